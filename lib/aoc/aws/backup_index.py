@@ -0,0 +1,306 @@
+"""AoC on AWS backup index module.
+
+This module maintains a locally cached index of the stack backups stored
+in an s3 bucket (one backup per top level prefix). The index is refreshed
+incrementally, only listing the objects of new or recently modified backups
+(starting after their last indexed key), so finding the latest backup does
+not require listing every object in the bucket. The index file is shared
+by the processes of a test session (e.g. the pytest-xdist workers), every
+update holds an exclusive file lock and merges with the persisted index.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import typing
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypedDict
+
+from lib.aoc.ops_container_cache import DEFAULT_CACHE_DIR
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_s3.type_defs import PaginatorConfigTypeDef
+
+__all__ = [
+    "AocAwsBackupIndex",
+    "AocAwsBackupIndexEntry",
+    "BACKUP_NAME_SEPARATOR",
+    "backup_name_has_prefix",
+]
+
+DEFAULT_INDEX_DIR: str = os.path.join(DEFAULT_CACHE_DIR, "s3-backup-index")
+DEFAULT_SETTLE_SECONDS: int = 3600
+# Separator between the backup prefix and the backup timestamp
+BACKUP_NAME_SEPARATOR: str = "-"
+
+
+def backup_name_has_prefix(name: str, prefix: str) -> bool:
+    """Checks whether the backup is named with the backup prefix.
+
+    Backups are named with the backup prefix and a single (timestamp)
+    component joined by the separator. The backups of a stack whose prefix
+    extends the prefix (e.g. "aoc-2-<timestamp>" for the prefix "aoc") do
+    not match.
+
+    :param name: the backup name
+    :param prefix: the backup prefix (an empty prefix matches every backup)
+    """
+    if not prefix:
+        return True
+    if not name.startswith(f"{prefix}{BACKUP_NAME_SEPARATOR}"):
+        return False
+    return BACKUP_NAME_SEPARATOR not in name[len(prefix) + 1 :]
+
+
+class AocAwsBackupIndexEntry(TypedDict):
+    """AoC stack backup index entry.
+
+    last_modified is the newest object last modified time (epoch seconds),
+    last_key is the last indexed object key (listing resumes after it).
+    """
+
+    name: str
+    object_count: int
+    total_size: int
+    last_modified: float
+    last_key: str
+
+
+class AocAwsBackupIndex:
+    """AocAwsBackupIndex class.
+
+    Perform the following to find the latest backup:
+        1. Call the `for_bucket` method returning the session wide index
+            > index = AocAwsBackupIndex.for_bucket(s3_client, bucket_name)
+        2. Call the `refresh` method to index new backup objects
+            > index.refresh()
+        3. Call the `latest` method to get the most recently modified backup
+            > index.latest(prefix="aoc-backup")
+
+    Backups last modified more than `settle_seconds` ago are considered
+    complete and their objects are not listed again, use `refresh(full=True)`
+    to rebuild the index from scratch.
+    """
+
+    _instances: Dict[str, "AocAwsBackupIndex"] = {}
+    _instances_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        cache_path: str = "",
+        settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+        page_size: int = 0,
+    ) -> None:
+        """Constructor.
+
+        :param s3_client: the s3 client used to list the bucket
+        :param bucket_name: the s3 bucket holding the backups
+        :param cache_path: the path to the json file caching the index
+            (defaults to a file per bucket in the aoc tests cache directory)
+        :param settle_seconds: seconds after which a backup is considered complete
+        :param page_size: the number of keys listed per request (0 for the
+            s3 default of 1000)
+        """
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.settle_seconds: int = settle_seconds
+        self.page_size: int = page_size
+        self.cache_path: str = cache_path or os.path.join(
+            DEFAULT_INDEX_DIR, f"{bucket_name}.json"
+        )
+        self._lock: threading.Lock = threading.Lock()
+        self._backups: Dict[str, AocAwsBackupIndexEntry] = {}
+        self._load()
+
+    @classmethod
+    def for_bucket(
+        cls, s3_client: "S3Client", bucket_name: str, cache_path: str = ""
+    ) -> "AocAwsBackupIndex":
+        """Returns the session wide index of the bucket.
+
+        The index lists the bucket with the latest s3 client given.
+
+        :param s3_client: the s3 client used to list the bucket
+        :param bucket_name: the s3 bucket holding the backups
+        :param cache_path: the path to the json file caching the index
+        """
+        key: str = cache_path or bucket_name
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(s3_client, bucket_name, cache_path)
+            index: "AocAwsBackupIndex" = cls._instances[key]
+            index.s3_client = s3_client
+            return index
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Holds an exclusive lock on the index file across processes."""
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with self._lock, open(f"{self.cache_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """Loads the cached index, ignoring missing/corrupt cache files.
+
+        The index kept in memory is replaced by the persisted one, updated
+        by another index instance/process.
+        """
+        try:
+            with open(self.cache_path) as f:
+                data: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("bucket") == self.bucket_name:
+            self._backups = dict(data.get("backups", {}))
+
+    def _save(self) -> None:
+        """Atomically writes the index to the cache file."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path) or ".")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"bucket": self.bucket_name, "backups": self._backups}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Unable to save s3 backup index {self.cache_path}: {e}")
+
+    def refresh(self, full: bool = False) -> int:
+        """Indexes the backups added/changed since the last refresh.
+
+        The backup prefixes are listed (paginated, one entry per backup) to
+        find new/removed backups. Only the objects of new backups, and the
+        objects added after the last indexed key of backups modified within
+        the settle window (which may still be in progress), are listed.
+
+        :param full: discard the index and list every backup object
+        :return: the number of objects listed
+        """
+        with self._file_lock():
+            self._load()
+            if full:
+                self._backups = {}
+
+            names: List[str] = []
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(
+                Bucket=self.bucket_name,
+                Delimiter="/",
+                PaginationConfig=self._pagination_config(),
+            ):
+                for common_prefix in page.get("CommonPrefixes", []):
+                    names.append(common_prefix["Prefix"].rstrip("/"))
+
+            for name in set(self._backups) - set(names):
+                del self._backups[name]
+
+            listed: int = 0
+            settled: float = time.time() - self.settle_seconds
+            for name in names:
+                entry = self._backups.get(name)
+                if entry is None:
+                    entry = self._backups[name] = AocAwsBackupIndexEntry(
+                        name=name,
+                        object_count=0,
+                        total_size=0,
+                        last_modified=0,
+                        last_key="",
+                    )
+                elif entry["last_modified"] < settled:
+                    continue
+                listed += self._list(entry)
+
+            self._save()
+            return listed
+
+    def _pagination_config(self) -> "PaginatorConfigTypeDef":
+        """Returns the listing pagination config."""
+        if self.page_size > 0:
+            return {"PageSize": self.page_size}
+        return {}
+
+    def _list(self, entry: AocAwsBackupIndexEntry) -> int:
+        """Lists (paginated) the backup objects after its last indexed key.
+
+        :param entry: the backup index entry to update
+        :return: the number of objects listed
+        """
+        listed: int = 0
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=f'{entry["name"]}/',
+            StartAfter=entry["last_key"],
+            PaginationConfig=self._pagination_config(),
+        ):
+            for item in page.get("Contents", []):
+                listed += 1
+                entry["object_count"] += 1
+                entry["total_size"] += item.get("Size", 0)
+                entry["last_modified"] = max(
+                    entry["last_modified"], item["LastModified"].timestamp()
+                )
+                entry["last_key"] = item["Key"]
+        return listed
+
+    def clear(self) -> None:
+        """Clears the index (e.g. when the bucket is created or deleted)."""
+        with self._file_lock():
+            self._backups = {}
+            self._save()
+
+    def remove(self, names: List[str]) -> None:
+        """Removes deleted backups from the index (without listing the bucket).
+
+        :param names: the backup names removed from the bucket
+        """
+        with self._file_lock():
+            self._load()
+            for name in names:
+                self._backups.pop(name.strip("/"), None)
+            self._save()
+
+    def backups(self, prefix: str = "") -> List[AocAwsBackupIndexEntry]:
+        """Returns the indexed backups ordered from oldest to newest.
+
+        :param prefix: only return backups named with the backup prefix
+            (see `backup_name_has_prefix`)
+        """
+        with self._lock:
+            entries = [
+                entry
+                for name, entry in self._backups.items()
+                if backup_name_has_prefix(name, prefix)
+            ]
+        return sorted(
+            entries, key=lambda entry: (entry["last_modified"], entry["name"])
+        )
+
+    def get(self, name: str) -> Optional[AocAwsBackupIndexEntry]:
+        """Returns the indexed backup by name.
+
+        :param name: the backup name
+        """
+        with self._lock:
+            return self._backups.get(name.strip("/"))
+
+    def latest(self, prefix: str = "") -> Optional[AocAwsBackupIndexEntry]:
+        """Returns the most recently modified backup.
+
+        :param prefix: only consider backups named with the backup prefix
+            (see `backup_name_has_prefix`)
+        """
+        backups = self.backups(prefix)
+        return backups[-1] if backups else None
@@ -0,0 +1,516 @@
+"""AoC on AWS backup inspector module.
+
+This module inspects the archives of a stack backup stored in an s3 bucket
+without downloading them. Uncompressed tar archives are walked header to
+header with ranged GET requests (member data is never fetched), compressed
+(gzip, bzip2, xz) tar archives are streamed through the decompressor member
+by member and plain gzip objects only have their header/trailer read. Memory
+stays constant whatever the size of the objects.
+
+The backup members, sizes and timestamps are reported along with the stored
+and uncompressed size of each backup component (e.g. database dumps, efs or
+configuration archives), sizes can be recorded per deployment to track the
+backup growth.
+"""
+import bz2
+import fnmatch
+import gzip
+import io
+import json
+import lzma
+import os
+import struct
+import tarfile
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TypedDict
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+__all__ = [
+    "AocAwsBackupArchive",
+    "AocAwsBackupArchiveMember",
+    "AocAwsBackupComponentSize",
+    "AocAwsBackupInspectResult",
+    "AocAwsBackupInspector",
+    "AocAwsBackupSizeRecord",
+    "DEFAULT_COMPONENTS",
+]
+
+DEFAULT_MAX_WORKERS: int = 8
+DEFAULT_BLOCK_SIZE: int = 64 * 1024
+STREAM_CHUNK_SIZE: int = 1024 * 1024
+
+# Components are matched in order against the object keys (relative to the
+# backup prefix), unmatched objects belong to the "other" component
+DEFAULT_COMPONENTS: Dict[str, List[str]] = {
+    "database": ["*.dump", "*.dump.*", "*.sql", "*.sql.*", "*pg_dump*"],
+    "efs": ["*efs*"],
+    "config": ["*config*", "*secret*", "*.yml", "*.yaml", "*.json"],
+}
+OTHER_COMPONENT: str = "other"
+
+COMPRESSED_MAGICS: Dict[str, bytes] = {
+    "gzip": b"\x1f\x8b",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+}
+# The decompressors validate the stream end (e.g. the gzip crc/length)
+DECOMPRESSORS: Dict[str, Callable[[Any], io.BufferedIOBase]] = {
+    "gzip": lambda stream: gzip.GzipFile(fileobj=stream, mode="rb"),
+    "bzip2": lambda stream: bz2.BZ2File(stream),
+    "xz": lambda stream: lzma.LZMAFile(stream),
+}
+TAR_MAGIC_OFFSET: int = 257
+
+
+class AocAwsBackupArchiveMember(TypedDict):
+    """AoC stack backup archive member (mtime is in epoch seconds)."""
+
+    name: str
+    size: int
+    mtime: float
+    type: str
+
+
+class AocAwsBackupArchive(TypedDict):
+    """AoC stack backup object/archive.
+
+    format is one of `tar`, `tar.<compression>`, `<compression>` or `raw`,
+    the uncompressed size of plain gzip objects comes from their trailer
+    (modulo 4 GiB), other plain compressed objects report their stored size.
+    """
+
+    key: str
+    component: str
+    format: str
+    size: int
+    uncompressed_size: int
+    members: List[AocAwsBackupArchiveMember]
+    bytes_read: int
+    error: str
+
+
+class AocAwsBackupComponentSize(TypedDict):
+    """AoC stack backup component size (bytes)."""
+
+    objects: int
+    size: int
+    uncompressed_size: int
+
+
+class AocAwsBackupInspectResult(TypedDict):
+    """AoC stack backup inspection results.
+
+    bytes_read is the number of bytes fetched from s3 to inspect the backup.
+    """
+
+    backup_name: str
+    archives: List[AocAwsBackupArchive]
+    components: Dict[str, AocAwsBackupComponentSize]
+    total_size: int
+    total_uncompressed_size: int
+    bytes_read: int
+    errors: List[str]
+    duration: float
+    result: bool
+
+
+class AocAwsBackupSizeRecord(TypedDict):
+    """AoC stack backup size record (one per inspected backup)."""
+
+    created: float
+    backup_name: str
+    total_size: int
+    total_uncompressed_size: int
+    components: Dict[str, AocAwsBackupComponentSize]
+
+
+class _S3RangeReader(io.RawIOBase):
+    """Seekable read only file over an s3 object, fetched with ranged GETs.
+
+    Only the last fetched block is kept in memory.
+    """
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        key: str,
+        size: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        super().__init__()
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.key: str = key
+        self.size: int = size
+        self.block_size: int = block_size
+        self.position: int = 0
+        self.bytes_read: int = 0
+        self._block_start: int = 0
+        self._block: bytes = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(0, offset)
+        return self.position
+
+    def _fetch(self, start: int) -> None:
+        end: int = min(start + self.block_size, self.size) - 1
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name, Key=self.key, Range=f"bytes={start}-{end}"
+        )
+        self._block = response["Body"].read()
+        self._block_start = start
+        self.bytes_read += len(self._block)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        chunks: List[bytes] = []
+        while size > 0:
+            offset: int = self.position - self._block_start
+            if not 0 <= offset < len(self._block):
+                self._fetch(self.position)
+                offset = 0
+            chunk: bytes = self._block[offset : offset + size]
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def readinto(self, buffer: Any) -> int:
+        data: bytes = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class _CountingReader(io.RawIOBase):
+    """Read only stream counting the bytes read from the wrapped stream."""
+
+    def __init__(self, stream: Any) -> None:
+        super().__init__()
+        self.stream: Any = stream
+        self.bytes_read: int = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        data: bytes = self.stream.read(None if size is None or size < 0 else size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        data: bytes = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class AocAwsBackupInspector:
+    """AocAwsBackupInspector class.
+
+    Perform the following to inspect a backup:
+        1. Instantiate the class constructing an object
+            > inspector = AocAwsBackupInspector(s3_client, bucket_name)
+        2. Call the `inspect` method with the backup name
+            > result = inspector.inspect("backup-1")
+        3. Call the `record_sizes` method to track the backup size growth
+            > inspector.record_sizes(result, "sizes/stack-1.jsonl")
+    """
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        components: Optional[Dict[str, List[str]]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        """Constructor.
+
+        :param s3_client: the s3 client (shared by every worker thread)
+        :param bucket_name: the s3 bucket holding the backups
+        :param components: the fnmatch patterns (relative to the backup
+            prefix) of each backup component, matched in order
+        :param max_workers: the maximum number of objects inspected at once
+        :param block_size: the ranged GET size used to read tar headers
+        """
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.components: Dict[str, List[str]] = (
+            DEFAULT_COMPONENTS if components is None else components
+        )
+        self.max_workers: int = max(1, max_workers)
+        self.block_size: int = max(tarfile.BLOCKSIZE, block_size)
+
+    def component(self, key: str) -> str:
+        """Returns the backup component of the object key."""
+        for component, patterns in self.components.items():
+            if any(fnmatch.fnmatch(key, pattern) for pattern in patterns):
+                return component
+        return OTHER_COMPONENT
+
+    @staticmethod
+    def _members(
+        archive: tarfile.TarFile, size: int = -1
+    ) -> List[AocAwsBackupArchiveMember]:
+        """Lists the archive members (only reading their headers).
+
+        :param archive: the tar archive
+        :param size: the size of the (uncompressed) archive, checking
+            its last member is not truncated
+        """
+        members: List[AocAwsBackupArchiveMember] = []
+        while True:
+            member: Optional[tarfile.TarInfo] = archive.next()
+            if member is None:
+                break
+            if 0 <= size < member.offset_data + member.size:
+                raise tarfile.ReadError(f"{member.name}: truncated member")
+            members.append(
+                AocAwsBackupArchiveMember(
+                    name=member.name,
+                    size=member.size,
+                    mtime=float(member.mtime),
+                    type=(
+                        "file"
+                        if member.isfile()
+                        else "directory"
+                        if member.isdir()
+                        else "symlink"
+                        if member.issym() or member.islnk()
+                        else "other"
+                    ),
+                )
+            )
+            # Forget the member, keeping memory constant for large archives
+            archive.members.clear()  # type: ignore[attr-defined]
+        return members
+
+    def _inspect_tar(self, key: str, size: int) -> AocAwsBackupArchive:
+        """Walks the uncompressed tar headers with ranged GET requests."""
+        reader = _S3RangeReader(
+            self.s3_client, self.bucket_name, key, size, self.block_size
+        )
+        with tarfile.open(fileobj=reader, mode="r:") as archive:
+            members = self._members(archive, size)
+        return AocAwsBackupArchive(
+            key=key,
+            component="",
+            format="tar",
+            size=size,
+            uncompressed_size=sum(member["size"] for member in members),
+            members=members,
+            bytes_read=reader.bytes_read,
+            error="",
+        )
+
+    def _inspect_compressed(
+        self, key: str, size: int, compression: str, reader: _S3RangeReader
+    ) -> AocAwsBackupArchive:
+        """Streams the compressed tar archive (falling back to plain gzip)."""
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        stream = _CountingReader(response["Body"])
+        try:
+            with DECOMPRESSORS[compression](stream) as decompressed:
+                with tarfile.open(fileobj=decompressed, mode="r|") as archive:
+                    members = self._members(archive)
+                # Read the end of the stream, detecting truncated archives
+                while decompressed.read(STREAM_CHUNK_SIZE):
+                    pass
+            archive_format: str = f"tar.{compression}"
+            uncompressed_size: int = sum(member["size"] for member in members)
+        except tarfile.ReadError:
+            members = []
+            archive_format = compression
+            uncompressed_size = size
+            if compression == "gzip":
+                # Not a tar archive, the gzip trailer holds the uncompressed size
+                reader.seek(size - 4)
+                (uncompressed_size,) = struct.unpack("<I", reader.read(4))
+        finally:
+            response["Body"].close()
+        return AocAwsBackupArchive(
+            key=key,
+            component="",
+            format=archive_format,
+            size=size,
+            uncompressed_size=uncompressed_size,
+            members=members,
+            bytes_read=stream.bytes_read + reader.bytes_read,
+            error="",
+        )
+
+    def inspect_object(self, key: str, size: int) -> AocAwsBackupArchive:
+        """Inspects the backup object, detecting its format from its header.
+
+        :param key: the object key
+        :param size: the object size
+        """
+        reader = _S3RangeReader(
+            self.s3_client, self.bucket_name, key, size, tarfile.BLOCKSIZE
+        )
+        try:
+            header: bytes = reader.read(tarfile.BLOCKSIZE) if size else b""
+            for compression, magic in COMPRESSED_MAGICS.items():
+                if header.startswith(magic):
+                    return self._inspect_compressed(key, size, compression, reader)
+            if header[TAR_MAGIC_OFFSET : TAR_MAGIC_OFFSET + 5] == b"ustar":
+                archive = self._inspect_tar(key, size)
+                archive["bytes_read"] += reader.bytes_read
+                return archive
+            error: str = ""
+        except (tarfile.TarError, EOFError, OSError, struct.error) as e:
+            error = f"{key}: {e}"
+        except self.s3_client.exceptions.ClientError as e:
+            error = f'{key}: {e.response["Error"].get("Message", "")}'
+        return AocAwsBackupArchive(
+            key=key,
+            component="",
+            format="raw",
+            size=size,
+            uncompressed_size=size,
+            members=[],
+            bytes_read=reader.bytes_read,
+            error=error,
+        )
+
+    def inspect(self, backup_name: str) -> AocAwsBackupInspectResult:
+        """Inspects every object of the backup.
+
+        :param backup_name: the backup name (the objects key prefix)
+        """
+        start: float = time.perf_counter()
+        prefix: str = f'{backup_name.strip("/")}/'
+        errors: List[str] = []
+        archives: List[AocAwsBackupArchive] = []
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="aoc-s3-inspect"
+        ) as executor:
+            futures = []
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            try:
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                    for item in page.get("Contents", []):
+                        futures.append(
+                            executor.submit(
+                                self.inspect_object, item["Key"], item.get("Size", 0)
+                            )
+                        )
+            except self.s3_client.exceptions.ClientError as e:
+                errors.append(f'{backup_name}: {e.response["Error"]["Message"]}')
+            for future in futures:
+                archive = future.result()
+                archive["key"] = archive["key"][len(prefix) :]
+                archive["component"] = self.component(archive["key"])
+                archives.append(archive)
+        archives.sort(key=lambda archive: archive["key"])
+
+        components: Dict[str, AocAwsBackupComponentSize] = {}
+        for archive in archives:
+            component = components.setdefault(
+                archive["component"],
+                AocAwsBackupComponentSize(objects=0, size=0, uncompressed_size=0),
+            )
+            component["objects"] += 1
+            component["size"] += archive["size"]
+            component["uncompressed_size"] += archive["uncompressed_size"]
+            if archive["error"]:
+                errors.append(archive["error"])
+        if not archives and not errors:
+            errors.append(f"{backup_name}: no backup objects found")
+
+        return AocAwsBackupInspectResult(
+            backup_name=backup_name,
+            archives=archives,
+            components=components,
+            total_size=sum(archive["size"] for archive in archives),
+            total_uncompressed_size=sum(
+                archive["uncompressed_size"] for archive in archives
+            ),
+            bytes_read=sum(archive["bytes_read"] for archive in archives),
+            errors=errors,
+            duration=time.perf_counter() - start,
+            result=not errors,
+        )
+
+    @staticmethod
+    def record_sizes(
+        result: AocAwsBackupInspectResult, path: str
+    ) -> AocAwsBackupSizeRecord:
+        """Appends the backup sizes to the json lines history file.
+
+        :param result: the backup inspection results
+        :param path: the json lines file path (e.g. one per deployment)
+        """
+        record = AocAwsBackupSizeRecord(
+            created=time.time(),
+            backup_name=result["backup_name"],
+            total_size=result["total_size"],
+            total_uncompressed_size=result["total_uncompressed_size"],
+            components=result["components"],
+        )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(f"{json.dumps(record, sort_keys=True)}\n")
+        return record
+
+    @staticmethod
+    def load_sizes(path: str) -> List[AocAwsBackupSizeRecord]:
+        """Reads the backup sizes history (oldest first).
+
+        :param path: the json lines file path
+        """
+        try:
+            with open(path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def growth(
+        previous: AocAwsBackupSizeRecord, current: AocAwsBackupSizeRecord
+    ) -> Dict[str, int]:
+        """Returns the stored size growth (bytes) of each component and total.
+
+        :param previous: the previously recorded backup sizes
+        :param current: the backup sizes to compare with it
+        """
+
+        def size(record: AocAwsBackupSizeRecord, name: str) -> int:
+            component = record["components"].get(name)
+            return component["size"] if component else 0
+
+        growth: Dict[str, int] = {
+            name: size(current, name) - size(previous, name)
+            for name in sorted(
+                previous["components"].keys() | current["components"].keys()
+            )
+        }
+        growth["total"] = current["total_size"] - previous["total_size"]
+        return growth
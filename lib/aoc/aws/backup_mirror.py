@@ -0,0 +1,708 @@
+"""AoC on AWS backup mirror module.
+
+This module mirrors a stack backup stored in an s3 bucket to a local
+directory and serves the mirror through a local (read only) s3 compatible
+endpoint, so repeated inspections/restore tests do not fetch the backup
+from the cloud again.
+
+Objects are downloaded with parallel ranged GET requests written into
+preallocated memory mapped files. Completed ranges are recorded next to the
+partial file so an interrupted download resumes where it stopped, sizes and
+ETags are verified once every range is downloaded.
+
+The mirror layout is `<local_dir>/<bucket>/<backup_name>/<key>`, each
+mirrored backup manifest (see `AocAwsBackupVerifier`) is kept in
+`<local_dir>/<bucket>/.aoc-mirror/<backup_name>.json`.
+
+Usage:
+    python -m lib.aoc.aws.backup_mirror download --bucket <bucket> \\
+        --backup-name <backup> --local-dir <dir>
+    python -m lib.aoc.aws.backup_mirror serve --local-dir <dir> --port 9000
+"""
+import argparse
+import collections
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import typing
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypedDict
+from xml.sax.saxutils import escape
+
+from lib.aoc.aws.backup_verifier import AocAwsBackupManifest
+from lib.aoc.aws.backup_verifier import AocAwsBackupManifestObject
+from lib.aoc.aws.backup_verifier import AocAwsBackupVerifier
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+__all__ = [
+    "AocAwsBackupMirror",
+    "AocAwsBackupMirrorResult",
+    "AocAwsBackupMirrorServer",
+]
+
+DEFAULT_MAX_WORKERS: int = 16
+DEFAULT_PART_SIZE: int = 8 * 1024 * 1024
+DEFAULT_MAX_OPEN_OBJECTS: int = 64
+MIRROR_DIR: str = ".aoc-mirror"
+PARTIAL_SUFFIX: str = ".aoc-part"
+S3_XMLNS: str = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class AocAwsBackupMirrorResult(TypedDict):
+    """AoC stack backup mirror results.
+
+    skipped objects were already mirrored, resumed objects continued a
+    partial download.
+    """
+
+    local_path: str
+    downloaded_objects: List[str]
+    skipped_objects: List[str]
+    resumed_objects: List[str]
+    downloaded_bytes: int
+    errors: List[str]
+    duration: float
+    bytes_per_second: float
+    result: bool
+
+
+class _MirrorObject:
+    """An object being downloaded into its preallocated memory mapped file."""
+
+    def __init__(
+        self,
+        manifest_object: AocAwsBackupManifestObject,
+        path: str,
+        ranges: List[Tuple[int, int]],
+    ) -> None:
+        self.manifest_object: AocAwsBackupManifestObject = manifest_object
+        self.path: str = path
+        self.ranges: List[Tuple[int, int]] = ranges
+        self.digests: Dict[str, str] = {}
+        self.errors: List[str] = []
+        self.pending: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        self.mmap: Optional[mmap.mmap] = None
+
+    @property
+    def partial_path(self) -> str:
+        """Returns the path of the partially downloaded file."""
+        return f"{self.path}{PARTIAL_SUFFIX}"
+
+    @property
+    def state_path(self) -> str:
+        """Returns the path recording the downloaded ranges."""
+        return f"{self.path}{PARTIAL_SUFFIX}.json"
+
+
+class AocAwsBackupMirror:
+    """AocAwsBackupMirror class.
+
+    Perform the following to mirror a backup:
+        1. Instantiate the class constructing an object
+            > mirror = AocAwsBackupMirror(s3_client, bucket_name, local_dir)
+        2. Call the `download` method with the backup name
+            > mirror.download("backup-1")
+        3. Serve the mirror (see `AocAwsBackupMirrorServer`)
+    """
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        local_dir: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_open_objects: int = DEFAULT_MAX_OPEN_OBJECTS,
+    ) -> None:
+        """Constructor.
+
+        :param s3_client: the s3 client (shared by every worker thread)
+        :param bucket_name: the s3 bucket holding the backups
+        :param local_dir: the local mirror directory
+        :param max_workers: the maximum number of concurrent ranged GET requests
+        :param part_size: the ranged GET size of objects not uploaded in parts
+            (multipart uploaded objects are fetched per uploaded part)
+        :param max_open_objects: the maximum number of objects being downloaded
+            (each holding a memory mapped file) at once
+        """
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.local_dir: str = local_dir
+        self.max_workers: int = max(1, max_workers)
+        self.part_size: int = max(1, part_size)
+        self.max_open_objects: int = max(1, max_open_objects)
+
+    def backup_path(self, backup_name: str) -> str:
+        """Returns the local directory mirroring the backup."""
+        return os.path.join(self.local_dir, self.bucket_name, backup_name.strip("/"))
+
+    def manifest_path(self, backup_name: str) -> str:
+        """Returns the path of the mirrored backup manifest."""
+        return os.path.join(
+            self.local_dir,
+            self.bucket_name,
+            MIRROR_DIR,
+            f'{backup_name.strip("/")}.json',
+        )
+
+    def _ranges(
+        self, backup_name: str, manifest_object: AocAwsBackupManifestObject
+    ) -> List[Tuple[int, int]]:
+        """Returns the (inclusive) byte ranges to download the object with.
+
+        Multipart uploaded objects (`<md5>-<parts>` ETag) are split along
+        their uploaded parts, so the ETag can be verified from the parts md5.
+        """
+        size: int = manifest_object["size"]
+        part_size: int = self.part_size
+        if "-" in manifest_object["etag"]:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=f'{backup_name.strip("/")}/{manifest_object["key"]}',
+                PartNumber=1,
+            )
+            part_size = max(1, response.get("ContentLength", size))
+        return [
+            (start, min(start + part_size, size) - 1)
+            for start in range(0, size, part_size)
+        ]
+
+    def _etag(self, mirror_object: _MirrorObject) -> str:
+        """Computes the ETag of the downloaded object."""
+        if "-" in mirror_object.manifest_object["etag"]:
+            parts = b"".join(
+                bytes.fromhex(mirror_object.digests[str(i)])
+                for i in range(len(mirror_object.ranges))
+            )
+            return f"{hashlib.md5(parts).hexdigest()}-{len(mirror_object.ranges)}"
+        if mirror_object.mmap is None:
+            return hashlib.md5(b"").hexdigest()
+        return hashlib.md5(mirror_object.mmap).hexdigest()
+
+    def _open(self, mirror_object: _MirrorObject) -> List[int]:
+        """Preallocates/maps the partial file, resuming its recorded ranges.
+
+        :return: the indexes of the ranges left to download
+        """
+        os.makedirs(os.path.dirname(mirror_object.path), exist_ok=True)
+        try:
+            with open(mirror_object.state_path) as f:
+                state: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("etag") == mirror_object.manifest_object[
+            "etag"
+        ] and os.path.exists(mirror_object.partial_path):
+            mirror_object.digests = dict(state.get("digests", {}))
+
+        size: int = mirror_object.manifest_object["size"]
+        fd: int = os.open(mirror_object.partial_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+                mirror_object.digests = {}
+            if size:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+                mirror_object.mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        return [
+            i
+            for i in range(len(mirror_object.ranges))
+            if str(i) not in mirror_object.digests
+        ]
+
+    def _save_state(self, mirror_object: _MirrorObject) -> None:
+        """Records the downloaded ranges (called holding the object lock)."""
+        with open(mirror_object.state_path, "w") as f:
+            json.dump(
+                {
+                    "etag": mirror_object.manifest_object["etag"],
+                    "digests": mirror_object.digests,
+                },
+                f,
+            )
+
+    def _download_range(
+        self, backup_name: str, mirror_object: _MirrorObject, index: int
+    ) -> int:
+        """Downloads the byte range into the memory mapped file.
+
+        :return: the number of downloaded bytes
+        """
+        start, end = mirror_object.ranges[index]
+        key: str = f'{backup_name.strip("/")}/{mirror_object.manifest_object["key"]}'
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Range=f"bytes={start}-{end}",
+                IfMatch=f'"{mirror_object.manifest_object["etag"]}"',
+            )
+            body: bytes = response["Body"].read()
+        except self.s3_client.exceptions.ClientError as e:
+            message: str = e.response["Error"].get("Message", "")
+            with mirror_object.lock:
+                mirror_object.errors.append(f"{key} bytes {start}-{end}: {message}")
+            return 0
+        if len(body) != end - start + 1:
+            with mirror_object.lock:
+                mirror_object.errors.append(
+                    f"{key} bytes {start}-{end}: received {len(body)} bytes"
+                )
+            return 0
+
+        assert mirror_object.mmap is not None
+        mirror_object.mmap[start : end + 1] = body
+        with mirror_object.lock:
+            mirror_object.digests[str(index)] = hashlib.md5(body).hexdigest()
+            self._save_state(mirror_object)
+        return len(body)
+
+    def _finalize(self, mirror_object: _MirrorObject) -> List[str]:
+        """Verifies the downloaded object, moving it into the mirror.
+
+        :return: the download/verification errors
+        """
+        key: str = mirror_object.manifest_object["key"]
+        expected_etag: str = mirror_object.manifest_object["etag"]
+        errors: List[str] = list(mirror_object.errors)
+        if not errors:
+            etag: str = self._etag(mirror_object)
+            if etag != expected_etag:
+                errors.append(f"{key}: ETag {etag} does not match {expected_etag}")
+                # The recorded ranges are not trustworthy, download them again
+                mirror_object.digests = {}
+                self._save_state(mirror_object)
+
+        if mirror_object.mmap is not None:
+            mirror_object.mmap.flush()
+            mirror_object.mmap.close()
+        if errors:
+            return errors
+
+        if os.path.getsize(mirror_object.partial_path) != (
+            mirror_object.manifest_object["size"]
+        ):
+            return [f"{key}: size does not match"]
+        os.replace(mirror_object.partial_path, mirror_object.path)
+        os.remove(mirror_object.state_path)
+        return []
+
+    def _mirrored(self, backup_name: str) -> Dict[str, AocAwsBackupManifestObject]:
+        """Returns the objects of the previously mirrored backup manifest."""
+        try:
+            manifest = AocAwsBackupVerifier.load_manifest(
+                self.manifest_path(backup_name)
+            )
+        except (OSError, ValueError):
+            return {}
+        return {o["key"]: o for o in manifest["objects"]}
+
+    def download(
+        self, backup_name: str, manifest: Optional[AocAwsBackupManifest] = None
+    ) -> AocAwsBackupMirrorResult:
+        """Downloads (or resumes downloading) the backup into the mirror.
+
+        Objects already mirrored with the same size/ETag are skipped. The
+        backup integrity errors (e.g. empty objects) are reported but do not
+        prevent mirroring the backup as is.
+
+        :param backup_name: the backup name (the objects key prefix)
+        :param manifest: the backup manifest (built when not provided, see
+            `AocAwsBackupVerifier`)
+        """
+        start: float = time.perf_counter()
+        backup_path: str = self.backup_path(backup_name)
+        errors: List[str] = []
+        verify_errors: List[str] = []
+        if manifest is None:
+            verify_result = AocAwsBackupVerifier(
+                self.s3_client, self.bucket_name, self.max_workers
+            ).verify(backup_name)
+            manifest = verify_result["manifest"]
+            verify_errors = verify_result["errors"]
+
+        mirrored = self._mirrored(backup_name)
+        skipped_objects: List[str] = []
+        resumed_objects: List[str] = []
+        downloaded_objects: List[str] = []
+        downloaded_bytes: int = 0
+
+        pending: Deque[AocAwsBackupManifestObject] = collections.deque()
+        for manifest_object in manifest["objects"]:
+            path = os.path.join(backup_path, manifest_object["key"])
+            previous = mirrored.get(manifest_object["key"])
+            if (
+                previous
+                and (previous["size"], previous["etag"])
+                == (manifest_object["size"], manifest_object["etag"])
+                and os.path.isfile(path)
+                and os.path.getsize(path) == manifest_object["size"]
+            ):
+                skipped_objects.append(manifest_object["key"])
+            else:
+                # A previously mirrored version must not be skipped once the
+                # new manifest is saved
+                if os.path.isfile(path):
+                    os.remove(path)
+                pending.append(manifest_object)
+
+        futures: Dict[Future[int], _MirrorObject] = {}
+        open_objects: Set[_MirrorObject] = set()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="aoc-s3-mirror"
+        ) as executor:
+            while pending or futures:
+                while pending and len(open_objects) < self.max_open_objects:
+                    manifest_object = pending.popleft()
+                    try:
+                        mirror_object = _MirrorObject(
+                            manifest_object,
+                            os.path.join(backup_path, manifest_object["key"]),
+                            self._ranges(backup_name, manifest_object),
+                        )
+                        indexes = self._open(mirror_object)
+                    except (OSError, self.s3_client.exceptions.ClientError) as e:
+                        errors.append(f'{manifest_object["key"]}: {e}')
+                        continue
+                    if mirror_object.digests:
+                        resumed_objects.append(manifest_object["key"])
+                    if not indexes:
+                        object_errors = self._finalize(mirror_object)
+                        errors.extend(object_errors)
+                        if not object_errors:
+                            downloaded_objects.append(manifest_object["key"])
+                        continue
+                    open_objects.add(mirror_object)
+                    mirror_object.pending = len(indexes)
+                    for index in indexes:
+                        futures[
+                            executor.submit(
+                                self._download_range, backup_name, mirror_object, index
+                            )
+                        ] = mirror_object
+
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    mirror_object = futures.pop(future)
+                    downloaded_bytes += future.result()
+                    mirror_object.pending -= 1
+                    if mirror_object.pending:
+                        continue
+                    open_objects.discard(mirror_object)
+                    object_errors = self._finalize(mirror_object)
+                    errors.extend(object_errors)
+                    if not object_errors:
+                        downloaded_objects.append(mirror_object.manifest_object["key"])
+
+        AocAwsBackupVerifier.save_manifest(manifest, self.manifest_path(backup_name))
+
+        duration: float = time.perf_counter() - start
+        return AocAwsBackupMirrorResult(
+            local_path=backup_path,
+            downloaded_objects=downloaded_objects,
+            skipped_objects=skipped_objects,
+            resumed_objects=resumed_objects,
+            downloaded_bytes=downloaded_bytes,
+            errors=verify_errors + errors,
+            duration=duration,
+            bytes_per_second=downloaded_bytes / duration if duration else 0.0,
+            result=not verify_errors and not errors,
+        )
+
+
+class _MirrorRequestHandler(BaseHTTPRequestHandler):
+    """Read only s3 api (HeadBucket, ListObjectsV2, HeadObject, GetObject)."""
+
+    server: "_MirrorHTTPServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silences the request logs."""
+
+    def _send_xml(self, status: int, body: str) -> None:
+        content: bytes = f'<?xml version="1.0" encoding="UTF-8"?>\n{body}'.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+    def _send_error(self, status: int, code: str, message: str) -> None:
+        self._send_xml(
+            status,
+            f"<Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>",
+        )
+
+    def _route(self) -> Tuple[str, str, Dict[str, List[str]]]:
+        """Returns the bucket, key and query of the (path style) request."""
+        url = urllib.parse.urlsplit(self.path)
+        bucket, _, key = urllib.parse.unquote(url.path).lstrip("/").partition("/")
+        return bucket, key, urllib.parse.parse_qs(url.query)
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        bucket, key, query = self._route()
+        bucket_path: str = os.path.join(self.server.local_dir, bucket)
+        if not bucket or not os.path.isdir(bucket_path) or bucket == MIRROR_DIR:
+            self._send_error(404, "NoSuchBucket", f"{bucket} does not exist")
+        elif not key and self.command == "HEAD":
+            self._send_xml(200, "")
+        elif not key:
+            self._list_objects(bucket, query)
+        else:
+            self._get_object(bucket, key)
+
+    def _list_objects(self, bucket: str, query: Dict[str, List[str]]) -> None:
+        prefix: str = query.get("prefix", [""])[0]
+        max_keys: int = int(query.get("max-keys", ["1000"])[0])
+        start_after: str = max(
+            query.get("start-after", [""])[0],
+            query.get("continuation-token", [""])[0],
+        )
+        keys: List[str] = [
+            key
+            for key in self.server.keys(bucket)
+            if key.startswith(prefix) and key > start_after
+        ]
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+        contents: str = "".join(
+            f"<Contents><Key>{escape(key)}</Key>"
+            f"<LastModified>{self.server.last_modified(bucket, key)}</LastModified>"
+            f"<ETag>&quot;{self.server.etag(bucket, key)}&quot;</ETag>"
+            f"<Size>{os.path.getsize(self.server.path(bucket, key))}</Size>"
+            "<StorageClass>STANDARD</StorageClass></Contents>"
+            for key in page
+        )
+        self._send_xml(
+            200,
+            f'<ListBucketResult xmlns="{S3_XMLNS}"><Name>{escape(bucket)}</Name>'
+            f"<Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<MaxKeys>{max_keys}</MaxKeys>"
+            f"<IsTruncated>{str(truncated).lower()}</IsTruncated>"
+            + (
+                f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>"
+                if truncated
+                else ""
+            )
+            + f"{contents}</ListBucketResult>",
+        )
+
+    def _get_object(self, bucket: str, key: str) -> None:
+        path: str = self.server.path(bucket, key)
+        if key not in self.server.keys(bucket):
+            self._send_error(404, "NoSuchKey", f"{key} does not exist")
+            return
+
+        size: int = os.path.getsize(path)
+        start, end = 0, size - 1
+        status: int = 200
+        byte_range: str = self.headers.get("Range", "")
+        if byte_range.startswith("bytes="):
+            first, _, last = byte_range[len("bytes=") :].partition("-")
+            if first:
+                start, end = int(first), min(int(last) if last else size - 1, size - 1)
+            else:
+                start = max(0, size - int(last))
+            if start > end:
+                self._send_error(416, "InvalidRange", byte_range)
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "binary/octet-stream")
+        self.send_header("Content-Length", str(max(0, end - start + 1)))
+        self.send_header("ETag", f'"{self.server.etag(bucket, key)}"')
+        self.send_header(
+            "Last-Modified", formatdate(os.path.getmtime(path), usegmt=True)
+        )
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD" or end < start:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining: int = end - start + 1
+            while remaining:
+                chunk = f.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+class _MirrorHTTPServer(ThreadingHTTPServer):
+    """Threaded http server holding the mirrored objects ETags."""
+
+    daemon_threads = True
+
+    def __init__(self, local_dir: str, address: Tuple[str, int]) -> None:
+        super().__init__(address, _MirrorRequestHandler)
+        self.local_dir: str = local_dir
+
+    def path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.local_dir, bucket, *key.split("/"))
+
+    def keys(self, bucket: str) -> List[str]:
+        """Returns the sorted keys of the mirrored bucket objects."""
+        keys: List[str] = []
+        bucket_path: str = os.path.join(self.local_dir, bucket)
+        for root, dirs, files in os.walk(bucket_path):
+            dirs[:] = [d for d in dirs if d != MIRROR_DIR]
+            relative: str = os.path.relpath(root, bucket_path)
+            keys.extend(
+                "/".join(filter(None, [relative.replace(os.sep, "/").strip("."), f]))
+                for f in files
+                if PARTIAL_SUFFIX not in f
+            )
+        return sorted(keys)
+
+    def etag(self, bucket: str, key: str) -> str:
+        """Returns the object ETag recorded in its backup manifest."""
+        backup_name, _, object_key = key.partition("/")
+        try:
+            manifest = AocAwsBackupVerifier.load_manifest(
+                os.path.join(self.local_dir, bucket, MIRROR_DIR, f"{backup_name}.json")
+            )
+        except (OSError, ValueError):
+            manifest = AocAwsBackupManifest(
+                bucket=bucket,
+                backup_name=backup_name,
+                created=0.0,
+                object_count=0,
+                total_size=0,
+                objects=[],
+            )
+        for manifest_object in manifest["objects"]:
+            if manifest_object["key"] == object_key:
+                return manifest_object["etag"]
+        with open(self.path(bucket, key), "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+
+    def last_modified(self, bucket: str, key: str) -> str:
+        return time.strftime(
+            "%Y-%m-%dT%H:%M:%S.000Z",
+            time.gmtime(os.path.getmtime(self.path(bucket, key))),
+        )
+
+
+class AocAwsBackupMirrorServer:
+    """AocAwsBackupMirrorServer class.
+
+    Serves the mirror directory as a read only s3 compatible endpoint
+    (path style requests, every top level directory is a bucket). Point the
+    s3 clients to it with their endpoint url (or `AWS_ENDPOINT_URL_S3`).
+
+    Perform the following to serve a mirror:
+        1. Instantiate the class constructing an object
+            > server = AocAwsBackupMirrorServer(local_dir)
+        2. Call the `start` method and use the endpoint url
+            > server.start()
+            > boto3.client("s3", endpoint_url=server.endpoint_url)
+        3. Call the `stop` method once done
+            > server.stop()
+    """
+
+    def __init__(self, local_dir: str, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Constructor.
+
+        :param local_dir: the local mirror directory
+        :param host: the address to listen on
+        :param port: the port to listen on (0 picks a free port)
+        """
+        self.local_dir: str = local_dir
+        self._server: _MirrorHTTPServer = _MirrorHTTPServer(local_dir, (host, port))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        """Returns the s3 endpoint url of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> None:
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="aoc-s3-mirror", daemon=True
+        )
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        """Serves in the current thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Downloads/serves backup mirrors from the command line."""
+    from lib.aoc.aws.clients import AWS_CLIENTS
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    download_parser = subparsers.add_parser("download", help="Mirror a backup")
+    download_parser.add_argument("--bucket", required=True)
+    download_parser.add_argument("--backup-name", required=True)
+    download_parser.add_argument("--local-dir", required=True)
+    download_parser.add_argument("--credentials-path", default="")
+    download_parser.add_argument("--region", default="")
+    download_parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    serve_parser = subparsers.add_parser("serve", help="Serve the mirrored backups")
+    serve_parser.add_argument("--local-dir", required=True)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = AocAwsBackupMirrorServer(args.local_dir, args.host, args.port)
+        print(f"Serving {args.local_dir} at {server.endpoint_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = AocAwsBackupMirror(
+        AWS_CLIENTS.s3(args.credentials_path, args.region),
+        args.bucket,
+        args.local_dir,
+        max_workers=args.max_workers,
+    ).download(args.backup_name)
+    print(json.dumps(result, indent=2))
+    return 0 if result["result"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+"""AoC aws backup retention module.
+
+This module applies a retention policy (keep the last N backups, the
+daily/weekly/monthly ones and a maximum age) to the stack backups of an s3
+bucket. The backups to prune are computed in a single pass over the backup
+index listing (see `AocAwsBackupIndex`), walked from newest to oldest and
+grouped by backup prefix (one group per deployment).
+"""
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import TypedDict
+
+from lib.aoc.aws.backup_index import AocAwsBackupIndexEntry
+from lib.aoc.aws.backup_index import backup_name_has_prefix
+
+__all__ = [
+    "AocAwsBackupRetention",
+    "AocAwsBackupRetentionDecision",
+    "AocAwsBackupRetentionPolicy",
+    "AocAwsBackupRetentionResult",
+    "RETENTION_PERIODS",
+]
+
+# Period formats (utc) of the keep_<period> rules
+RETENTION_PERIODS: Dict[str, str] = {
+    "daily": "%Y-%m-%d",
+    "weekly": "%G-W%V",
+    "monthly": "%Y-%m",
+}
+
+
+class AocAwsBackupRetentionPolicy(TypedDict, total=False):
+    """AoC backup retention policy.
+
+    A rule set to 0 (or missing) is disabled. keep_daily/weekly/monthly keep
+    the newest backup of each of the N most recent days/weeks/months holding
+    a backup. Backups older than max_age_days are pruned even when a keep
+    rule matches them, a policy without keep rules keeps every backup younger
+    than max_age_days.
+    """
+
+    keep_last: int
+    keep_daily: int
+    keep_weekly: int
+    keep_monthly: int
+    max_age_days: float
+
+
+class AocAwsBackupRetentionDecision(TypedDict):
+    """AoC backup retention decision.
+
+    reasons are the rules keeping the backup (or `expired` when pruned by the
+    maximum age).
+    """
+
+    name: str
+    prefix: str
+    last_modified: float
+    total_size: int
+    keep: bool
+    reasons: List[str]
+
+
+class AocAwsBackupRetentionResult(TypedDict):
+    """AoC backup retention results.
+
+    decisions are ordered from newest to oldest, kept/pruned hold the backup
+    names.
+    """
+
+    policy: AocAwsBackupRetentionPolicy
+    decisions: List[AocAwsBackupRetentionDecision]
+    kept: List[str]
+    pruned: List[str]
+    kept_size: int
+    pruned_size: int
+    duration: float
+
+
+class AocAwsBackupRetention:
+    """AocAwsBackupRetention class.
+
+    Perform the following to prune backups:
+        1. Instantiate the class constructing an object
+            > retention = AocAwsBackupRetention({"keep_last": 3, "keep_daily": 7})
+        2. Call the `plan` method with the indexed backups and backup prefixes
+            > plan = retention.plan(backup_index.backups(), ["aoc-backup"])
+        3. Print the `report` (dry run) or delete the `pruned` backups
+
+    The most recent backup of each prefix is never pruned, a restore always
+    has a backup to use.
+    """
+
+    def __init__(self, policy: AocAwsBackupRetentionPolicy) -> None:
+        """Constructor.
+
+        :param policy: the retention policy
+        :raises ValueError: when a policy rule is negative
+        """
+        for rule, value in policy.items():
+            if not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"Invalid backup retention {rule}: {value}")
+        self.policy: AocAwsBackupRetentionPolicy = policy
+
+    @staticmethod
+    def _group(name: str, prefixes: List[str]) -> Optional[str]:
+        """Returns the longest backup prefix of the backup name (if any)."""
+        matches = [
+            prefix for prefix in prefixes if backup_name_has_prefix(name, prefix)
+        ]
+        return max(matches, key=len) if matches else None
+
+    def plan(
+        self,
+        backups: List[AocAwsBackupIndexEntry],
+        prefixes: Optional[List[str]] = None,
+        now: Optional[float] = None,
+    ) -> AocAwsBackupRetentionResult:
+        """Computes the backups to keep/prune.
+
+        Backups not named with any of the prefixes (see
+        `backup_name_has_prefix`) are left out of the results (neither kept
+        nor pruned).
+
+        :param backups: the backups ordered from oldest to newest (see
+            `AocAwsBackupIndex.backups`)
+        :param prefixes: the backup prefixes the policy applies to separately
+            (defaults to every backup as a single group)
+        :param now: the time the backup ages are computed at (defaults to now)
+        """
+        start: float = time.perf_counter()
+        now = time.time() if now is None else now
+        prefixes = [""] if prefixes is None else prefixes
+
+        keep_last: int = self.policy.get("keep_last", 0)
+        keep_periods: Dict[str, int] = {
+            "daily": self.policy.get("keep_daily", 0),
+            "weekly": self.policy.get("keep_weekly", 0),
+            "monthly": self.policy.get("keep_monthly", 0),
+        }
+        max_age: float = self.policy.get("max_age_days", 0) * 24 * 3600
+        has_keep_rules: bool = bool(keep_last or any(keep_periods.values()))
+
+        counts: Dict[str, int] = {}
+        seen_periods: Dict[str, Dict[str, Set[str]]] = {}
+        decisions: List[AocAwsBackupRetentionDecision] = []
+        for backup in reversed(backups):
+            prefix = self._group(backup["name"], prefixes)
+            if prefix is None:
+                continue
+            count: int = counts.get(prefix, 0)
+            counts[prefix] = count + 1
+            periods = seen_periods.setdefault(
+                prefix, {period: set() for period in RETENTION_PERIODS}
+            )
+
+            reasons: List[str] = []
+            if count == 0:
+                reasons.append("latest")
+            if count < keep_last:
+                reasons.append("last")
+            modified = datetime.fromtimestamp(backup["last_modified"], timezone.utc)
+            for period, period_format in RETENTION_PERIODS.items():
+                key: str = modified.strftime(period_format)
+                if key not in periods[period] and (
+                    len(periods[period]) < keep_periods[period]
+                ):
+                    periods[period].add(key)
+                    reasons.append(period)
+
+            expired: bool = bool(max_age) and now - backup["last_modified"] > max_age
+            if count == 0:
+                keep = True
+            elif expired:
+                keep, reasons = False, ["expired"]
+            else:
+                keep = bool(reasons) or not has_keep_rules
+
+            decisions.append(
+                AocAwsBackupRetentionDecision(
+                    name=backup["name"],
+                    prefix=prefix,
+                    last_modified=backup["last_modified"],
+                    total_size=backup["total_size"],
+                    keep=keep,
+                    reasons=reasons,
+                )
+            )
+
+        return AocAwsBackupRetentionResult(
+            policy=self.policy,
+            decisions=decisions,
+            kept=[d["name"] for d in decisions if d["keep"]],
+            pruned=[d["name"] for d in decisions if not d["keep"]],
+            kept_size=sum(d["total_size"] for d in decisions if d["keep"]),
+            pruned_size=sum(d["total_size"] for d in decisions if not d["keep"]),
+            duration=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def report(result: AocAwsBackupRetentionResult) -> str:
+        """Returns the retention decisions as a human readable report.
+
+        :param result: the retention results
+        """
+        lines: List[str] = []
+        for decision in result["decisions"]:
+            modified = datetime.fromtimestamp(decision["last_modified"], timezone.utc)
+            lines.append(
+                f'{"keep " if decision["keep"] else "prune"} '
+                f'{modified.strftime("%Y-%m-%dT%H:%M:%SZ")} '
+                f'{decision["total_size"]:>14} {decision["name"]} '
+                f'({", ".join(decision["reasons"]) or "no rule matched"})'
+            )
+        lines.append(
+            f'Keeping {len(result["kept"])} backups ({result["kept_size"]} bytes), '
+            f'pruning {len(result["pruned"])} backups ({result["pruned_size"]} bytes)'
+        )
+        return "\n".join(lines)
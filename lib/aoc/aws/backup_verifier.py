@@ -0,0 +1,307 @@
+"""AoC on AWS backup verifier module.
+
+This module verifies the integrity of a stack backup stored in an s3
+bucket. Every object under the backup prefix is listed (paginated) and
+inspected with concurrent HEAD requests, building a manifest (size, ETag,
+metadata per object) checked for the expected backup components, zero byte
+objects and unfinished multipart uploads. Manifests can be saved and compared
+against later backups, or recorded to check the backup is still intact
+(e.g. no truncated objects) when verified again.
+"""
+import fnmatch
+import json
+import os
+import time
+import typing
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypedDict
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+__all__ = [
+    "AocAwsBackupManifest",
+    "AocAwsBackupManifestDiff",
+    "AocAwsBackupManifestObject",
+    "AocAwsBackupVerifier",
+    "AocAwsBackupVerifyResult",
+]
+
+DEFAULT_MAX_WORKERS: int = 32
+
+
+class AocAwsBackupManifestObject(TypedDict):
+    """AoC stack backup manifest object.
+
+    key is relative to the backup prefix, last_modified is in epoch seconds.
+    """
+
+    key: str
+    size: int
+    etag: str
+    last_modified: float
+    content_type: str
+    metadata: Dict[str, str]
+
+
+class AocAwsBackupManifest(TypedDict):
+    """AoC stack backup manifest (objects ordered by key)."""
+
+    bucket: str
+    backup_name: str
+    created: float
+    object_count: int
+    total_size: int
+    objects: List[AocAwsBackupManifestObject]
+
+
+class AocAwsBackupManifestDiff(TypedDict):
+    """AoC stack backup manifests differences (object keys)."""
+
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+
+
+class AocAwsBackupVerifyResult(TypedDict):
+    """AoC stack backup verification results.
+
+    truncated objects are the ones smaller than in the recorded manifest
+    (always empty when verified without one), pending uploads are the
+    unfinished multipart uploads under the backup prefix.
+    """
+
+    manifest: AocAwsBackupManifest
+    missing_components: List[str]
+    empty_objects: List[str]
+    truncated_objects: List[str]
+    pending_uploads: List[str]
+    errors: List[str]
+    duration: float
+    objects_per_second: float
+    result: bool
+
+
+class AocAwsBackupVerifier:
+    """AocAwsBackupVerifier class.
+
+    Perform the following to verify a backup:
+        1. Instantiate the class constructing an object
+            > verifier = AocAwsBackupVerifier(s3_client, bucket_name)
+        2. Call the `verify` method with the backup name/expected components
+            > result = verifier.verify("backup-1", ["*.tar.gz"])
+        3. Call the `save_manifest` method to keep the manifest for comparison
+            > verifier.save_manifest(result["manifest"], "backup-1.json")
+    """
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> None:
+        """Constructor.
+
+        :param s3_client: the s3 client (shared by every worker thread)
+        :param bucket_name: the s3 bucket holding the backups
+        :param max_workers: the maximum number of concurrent HEAD requests
+        """
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.max_workers: int = max(1, max_workers)
+
+    @staticmethod
+    def _prefix(name: str) -> str:
+        """Returns the s3 key prefix for the backup name."""
+        return f'{name.strip("/")}/'
+
+    def _head(
+        self, key: str, prefix: str
+    ) -> Tuple[Optional[AocAwsBackupManifestObject], str]:
+        """Gets the manifest object of the key with a HEAD request.
+
+        :return: the manifest object (none on failure) and the error
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except self.s3_client.exceptions.ClientError as e:
+            return None, f'{key}: {e.response["Error"].get("Message", "")}'
+        return (
+            AocAwsBackupManifestObject(
+                key=key[len(prefix) :],
+                size=response.get("ContentLength", 0),
+                etag=response.get("ETag", "").strip('"'),
+                last_modified=response["LastModified"].timestamp(),
+                content_type=response.get("ContentType", ""),
+                metadata=dict(response.get("Metadata", {})),
+            ),
+            "",
+        )
+
+    def _pending_uploads(self, prefix: str) -> List[str]:
+        """Lists (paginated) the unfinished multipart upload keys."""
+        keys: List[str] = []
+        paginator = self.s3_client.get_paginator("list_multipart_uploads")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            keys.extend(
+                upload["Key"][len(prefix) :] for upload in page.get("Uploads", [])
+            )
+        return keys
+
+    def verify(
+        self,
+        backup_name: str,
+        expected_components: Optional[List[str]] = None,
+        recorded_manifest: Optional[AocAwsBackupManifest] = None,
+    ) -> AocAwsBackupVerifyResult:
+        """Builds the backup manifest and checks its integrity.
+
+        Listing pages are submitted as HEAD requests while the listing
+        continues, so the inspection overlaps the listing. The listing and
+        HEAD sizes always match, truncated objects are detected against the
+        sizes in the recorded manifest (along with removed/changed objects).
+
+        :param backup_name: the backup name (the objects key prefix)
+        :param expected_components: the fnmatch patterns (relative to the
+            backup prefix) each matching at least one backup object
+        :param recorded_manifest: the manifest recorded by a previous
+            verification of the backup
+        """
+        start: float = time.perf_counter()
+        prefix: str = self._prefix(backup_name)
+        futures: List[Future[Tuple[Optional[AocAwsBackupManifestObject], str]]] = []
+        errors: List[str] = []
+        pending_uploads: List[str] = []
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="aoc-s3-verify"
+        ) as executor:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            try:
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                    for item in page.get("Contents", []):
+                        futures.append(executor.submit(self._head, item["Key"], prefix))
+                pending_uploads = self._pending_uploads(prefix)
+            except self.s3_client.exceptions.ClientError as e:
+                errors.append(f'{backup_name}: {e.response["Error"]["Message"]}')
+
+        objects: List[AocAwsBackupManifestObject] = []
+        for future in futures:
+            manifest_object, error = future.result()
+            if manifest_object is None:
+                errors.append(error)
+                continue
+            objects.append(manifest_object)
+        objects.sort(key=lambda manifest_object: manifest_object["key"])
+
+        duration: float = time.perf_counter() - start
+        keys: List[str] = [manifest_object["key"] for manifest_object in objects]
+        missing_components: List[str] = [
+            pattern
+            for pattern in expected_components or []
+            if not fnmatch.filter(keys, pattern)
+        ]
+        empty_objects: List[str] = [
+            manifest_object["key"]
+            for manifest_object in objects
+            if manifest_object["size"] == 0 and not manifest_object["key"].endswith("/")
+        ]
+
+        manifest = AocAwsBackupManifest(
+            bucket=self.bucket_name,
+            backup_name=backup_name,
+            created=time.time(),
+            object_count=len(objects),
+            total_size=sum(manifest_object["size"] for manifest_object in objects),
+            objects=objects,
+        )
+        truncated_objects: List[str] = []
+        recorded_errors: List[str] = []
+        if recorded_manifest is not None:
+            recorded_sizes: Dict[str, int] = {
+                o["key"]: o["size"] for o in recorded_manifest["objects"]
+            }
+            diff = self.compare(recorded_manifest, manifest)
+            sizes: Dict[str, int] = {o["key"]: o["size"] for o in objects}
+            truncated_objects = [
+                key for key in diff["changed"] if sizes[key] < recorded_sizes[key]
+            ]
+            recorded_errors = [
+                f"{key}: recorded object removed" for key in diff["removed"]
+            ]
+            recorded_errors.extend(
+                f"{key}: changed since recorded"
+                for key in diff["changed"]
+                if key not in truncated_objects
+            )
+
+        if not objects and not errors:
+            errors.append(f"{backup_name}: no backup objects found")
+        errors.extend(f"missing backup component {p}" for p in missing_components)
+        errors.extend(f"{key}: empty object" for key in empty_objects)
+        errors.extend(f"{key}: truncated object" for key in truncated_objects)
+        errors.extend(recorded_errors)
+        errors.extend(f"{key}: unfinished upload" for key in pending_uploads)
+
+        return AocAwsBackupVerifyResult(
+            manifest=manifest,
+            missing_components=missing_components,
+            empty_objects=empty_objects,
+            truncated_objects=truncated_objects,
+            pending_uploads=pending_uploads,
+            errors=errors,
+            duration=duration,
+            objects_per_second=len(objects) / duration if duration else 0.0,
+            result=not errors,
+        )
+
+    @staticmethod
+    def save_manifest(manifest: AocAwsBackupManifest, path: str) -> None:
+        """Writes the manifest to the json file.
+
+        :param manifest: the backup manifest
+        :param path: the json file path
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    @staticmethod
+    def load_manifest(path: str) -> AocAwsBackupManifest:
+        """Reads the manifest from the json file.
+
+        :param path: the json file path
+        """
+        with open(path) as f:
+            manifest: AocAwsBackupManifest = json.load(f)
+        return manifest
+
+    @staticmethod
+    def compare(
+        previous: AocAwsBackupManifest, current: AocAwsBackupManifest
+    ) -> AocAwsBackupManifestDiff:
+        """Compares the manifests objects (by key, size and ETag).
+
+        :param previous: the previously saved backup manifest
+        :param current: the backup manifest to compare with it
+        """
+        previous_objects: Dict[str, Tuple[int, str]] = {
+            o["key"]: (o["size"], o["etag"]) for o in previous["objects"]
+        }
+        current_objects: Dict[str, Tuple[int, str]] = {
+            o["key"]: (o["size"], o["etag"]) for o in current["objects"]
+        }
+        return AocAwsBackupManifestDiff(
+            added=sorted(current_objects.keys() - previous_objects.keys()),
+            removed=sorted(previous_objects.keys() - current_objects.keys()),
+            changed=sorted(
+                key
+                for key in current_objects.keys() & previous_objects.keys()
+                if current_objects[key] != previous_objects[key]
+            ),
+        )
@@ -0,0 +1,108 @@
+"""AoC aws clients module.
+
+This module contains a thread safe factory caching boto3 sessions and
+clients per (credentials file, region, service). Reusing clients avoids
+paying credential/endpoint resolution and new TLS connections on every
+call, and lets concurrent operations share a warm connection pool.
+
+boto3/botocore are only imported once the first session is created, as
+importing them costs more than the rest of the test collection.
+"""
+import os
+import threading
+import typing
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+if typing.TYPE_CHECKING:
+    from boto3.session import Session
+    from mypy_boto3_s3.client import S3Client
+
+__all__ = [
+    "AWS_CLIENTS",
+    "AwsClientFactory",
+]
+
+DEFAULT_MAX_POOL_CONNECTIONS: int = 50
+
+
+class AwsClientFactory:
+    """AwsClientFactory Class.
+
+    Sessions are cached per (credentials file, region) and clients per
+    (credentials file, region, service). An empty credentials file/region
+    falls back to the default boto3 credential chain/region resolution.
+
+    Only the clients (thread safe) are handed out, the boto3 sessions are
+    not thread safe and are only used under the factory lock.
+    """
+
+    def __init__(
+        self, max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS
+    ) -> None:
+        """Constructor.
+
+        :param max_pool_connections: the maximum connections kept in each
+            client connection pool
+        """
+        self.max_pool_connections: int = max_pool_connections
+        self._lock: threading.Lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str], Session] = {}
+        self._clients: Dict[Tuple[str, str, str], Any] = {}
+
+    def _session(self, credentials_path: str, region: str) -> "Session":
+        """Returns the cached session (callers must hold the lock)."""
+        key = (credentials_path, region)
+        if key not in self._sessions:
+            import botocore.session
+            from boto3.session import Session
+
+            botocore_session = botocore.session.Session()
+            if credentials_path:
+                botocore_session.set_config_variable(
+                    "credentials_file", os.path.expanduser(credentials_path)
+                )
+            self._sessions[key] = Session(
+                botocore_session=botocore_session, region_name=region or None
+            )
+        return self._sessions[key]
+
+    def client(self, service: str, credentials_path: str = "", region: str = "") -> Any:
+        """Returns the cached client for the service/credentials file/region.
+
+        :param service: the aws service name (e.g. s3)
+        :param credentials_path: the aws credentials file path
+        :param region: the aws region
+        """
+        key = (credentials_path, region, service)
+        with self._lock:
+            if key not in self._clients:
+                from botocore.config import Config
+
+                # boto3 sessions are not thread safe, clients are
+                self._clients[key] = self._session(credentials_path, region).client(
+                    service,  # type: ignore[call-overload]
+                    config=Config(max_pool_connections=self.max_pool_connections),
+                )
+            return self._clients[key]
+
+    def s3(self, credentials_path: str = "", region: str = "") -> "S3Client":
+        """Returns the cached s3 client for the credentials file/region.
+
+        :param credentials_path: the aws credentials file path
+        :param region: the aws region
+        """
+        return typing.cast("S3Client", self.client("s3", credentials_path, region))
+
+    def clear(self) -> None:
+        """Discards every cached session/client."""
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+
+
+# Shared by every aws operation in the session
+AWS_CLIENTS: AwsClientFactory = AwsClientFactory(
+    int(os.getenv("AOC_AWS_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS))
+)
@@ -3,18 +3,45 @@
 This module performs the standard operations for backing up an
 AoC deployment on AWS cloud.
 """
+import asyncio
 import json
-from random import randint
+import os
+import tempfile
+import time
+import typing
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import TypedDict
 
-import botocore.exceptions
-from boto3.session import Session
-from mypy_boto3_s3.client import S3Client
-from mypy_boto3_s3.type_defs import ListObjectsV2OutputTypeDef
-from pytest_ansible.host_manager import BaseHostManager
-
+from lib.aoc.aws.backup_index import AocAwsBackupIndex
+from lib.aoc.aws.backup_inspector import AocAwsBackupInspector
+from lib.aoc.aws.backup_inspector import AocAwsBackupInspectResult
+from lib.aoc.aws.backup_mirror import AocAwsBackupMirror
+from lib.aoc.aws.backup_mirror import AocAwsBackupMirrorResult
+from lib.aoc.aws.backup_retention import AocAwsBackupRetention
+from lib.aoc.aws.backup_retention import AocAwsBackupRetentionPolicy
+from lib.aoc.aws.backup_retention import AocAwsBackupRetentionResult
+from lib.aoc.aws.backup_verifier import AocAwsBackupManifest
+from lib.aoc.aws.backup_verifier import AocAwsBackupVerifier
+from lib.aoc.aws.backup_verifier import AocAwsBackupVerifyResult
+from lib.aoc.aws.clients import AWS_CLIENTS
+from lib.aoc.aws.s3_bulk_delete import AocAwsS3BulkDelete
+from lib.aoc.aws.s3_bulk_delete import AocAwsS3BulkDeleteResult
 from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_run import OpsContainerRun
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import traced
+from lib.aoc.tracing import TRACER
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from pytest_ansible.host_manager import BaseHostManager
 
 
 class AocAwsBackupDataExtraVars(TypedDict, total=False):
@@ -37,18 +64,108 @@ class AocAwsBackupDataVars(TypedDict, total=False):
 
 
 class AocAwsBackupStackResult(TypedDict):
-    """AoC stack backup results."""
+    """AoC stack backup results.
+
+    playbook_output is only the output tail when streaming, whether the
+    backup object name is in the whole output is reported separately.
+    """
 
     playbook_output: str
     playbook_result: bool
     backup_object_name: str
+    backup_object_name_in_output: bool
+
+
+class _BackupOutputSpool:
+    """Spools the streamed backup playbook output to a temporary file.
+
+    Streaming only keeps the output tail in memory (see
+    `OpsContainer.stream_container`) while the backup object name is known
+    once the playbook finishes, the spooled output is searched for it then.
+    The buffered output is searched as is.
+    """
+
+    def __init__(self, ops_container: OpsContainer) -> None:
+        """Constructor.
+
+        :param ops_container: the ops container whose output is spooled
+        """
+        self.ops_container: OpsContainer = ops_container
+        self.spool: Optional[typing.TextIO] = None
+        if ops_container.options.get("stream_output", False):
+            self.spool = tempfile.TemporaryFile("w+")
+            ops_container.output_callbacks.append(self)
+
+    def __enter__(self) -> "_BackupOutputSpool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.spool:
+            self.ops_container.output_callbacks.remove(self)
+            self.spool.close()
+
+    def __call__(self, line: str) -> None:
+        """Spools the streamed output line."""
+        if self.spool:
+            self.spool.write(f"{line}\n")
+
+    def contains(self, text: str, output: str) -> bool:
+        """Checks whether the text is in the playbook output.
+
+        :param text: the text to search
+        :param output: the playbook output (tail when streaming)
+        """
+        if not text:
+            return False
+        if not self.spool:
+            return text in output
+        self.spool.seek(0)
+        return any(text in line for line in self.spool)
+
+
+DEFAULT_DELETE_CHUNK_SIZE: int = 100
+DEFAULT_DELETE_MAX_WORKERS: int = 4
+DEFAULT_DELETE_RETRIES: int = 1
+
+
+class AocAwsBackupDeleteChunkResult(TypedDict):
+    """AoC stack delete backup chunk results (one per chunk).
+
+    attempts is the number of delete backups playbook runs for the chunk,
+    duration is the sum of their durations.
+    """
+
+    backup_names: List[str]
+    attempts: int
+    duration: float
+    playbook_output: str
+    playbook_result: bool
 
 
 class AocAwsBackupDeleteResult(TypedDict):
-    """AoC stack delete backup results."""
+    """AoC stack delete backup results.
+
+    playbook_output joins every chunk playbook output, chunk_results is
+    empty for bulk deletions. s3_objects_only is set for bulk deletions, only
+    the backup s3 objects are deleted: the backup recovery points (e.g. EFS
+    and RDS) are left in the backup vault.
+    """
 
     playbook_output: str
     playbook_result: bool
+    chunk_results: List[AocAwsBackupDeleteChunkResult]
+    s3_objects_only: bool
+
+
+class AocAwsBackupPruneResult(TypedDict):
+    """AoC stack backups pruning results.
+
+    delete_result is None for dry runs (or when nothing is pruned).
+    """
+
+    retention: AocAwsBackupRetentionResult
+    delete_result: Optional[AocAwsBackupDeleteResult]
+    result: bool
 
 
 class AocAwsBackup(OpsContainer):
@@ -62,6 +179,7 @@ class AocAwsBackup(OpsContainer):
             > aoc_aws_backup.setup()
         3. Call the `backup_stack` method to perform backup
             > aoc_aws_backup.backup_stack()
+            (or await `backup_stack_async` from an event loop)
     """
 
     def __init__(
@@ -71,8 +189,9 @@ class AocAwsBackup(OpsContainer):
         aoc_ops_image_tag: str,
         aoc_image_registry_username: str,
         aoc_image_registry_password: str,
-        ansible_module: BaseHostManager,
+        ansible_module: "BaseHostManager",
         command_generator_vars: AocAwsBackupDataVars,
+        options: Optional[OpsContainerOptions] = None,
     ) -> None:
         """Constructor.
 
@@ -85,6 +204,7 @@ class AocAwsBackup(OpsContainer):
             the image registry holding aoc operations image
         :param ansible_module: the pytest ansible module fixture
         :param command_generator_vars: the data to provide to aoc operations command generator playbooks
+        :param options: the ops container tunable options
         """
         super().__init__(
             "aws",
@@ -94,8 +214,9 @@ class AocAwsBackup(OpsContainer):
             aoc_image_registry_username,
             aoc_image_registry_password,
             ansible_module,
+            options,
         )
-        self.ansible_module: BaseHostManager = ansible_module
+        self.ansible_module: "BaseHostManager" = ansible_module
 
         self.command_generator_vars: AocAwsBackupDataVars = command_generator_vars
 
@@ -108,6 +229,7 @@ class AocAwsBackup(OpsContainer):
             f'aws_backup_iam_role_arn={self.command_generator_vars["extra_vars"]["aws_backup_iam_role_arn"]}',
             f'aws_s3_bucket={self.command_generator_vars["extra_vars"]["aws_s3_bucket"]}',
         ]
+        self.extra_vars = {}
 
         if self.aoc_version != "2.3":
             self.command_args.extend(
@@ -131,12 +253,19 @@ class AocAwsBackup(OpsContainer):
     def populate_delete_backup_command_generator_args(
         self, backup_names: List[str]
     ) -> None:
+        """Performs any setup required to run the backups delete playbook.
+
+        The backup names are passed in an extra vars file (see
+        `OpsContainer.command`), so any number of names is supported.
+
+        :param backup_names: the backup names to delete
+        """
         self.command_args: List[str] = [
             f'aws_region={self.command_generator_vars["extra_vars"]["aws_region"]}',
             f'aws_s3_bucket={self.command_generator_vars["extra_vars"]["aws_s3_bucket"]}',
-            f"aws_backup_names={json.dumps(backup_names)}",
             "delete=True",
         ]
+        self.extra_vars = {"aws_backup_names": backup_names}
 
         self.command = "redhat.ansible_on_clouds.aws_backups_delete"
         self.env_vars = {
@@ -147,76 +276,625 @@ class AocAwsBackup(OpsContainer):
             f'{self.command_generator_vars["cloud_credentials_path"]}:/home/runner/.aws/credentials:ro',
         ]
 
+    def trace_attributes(self) -> Dict[str, str]:
+        """Returns the attributes recorded on the operation tracing spans."""
+        # Unset while the ops container constructor performs the login/pull
+        command_generator_vars = getattr(
+            self, "command_generator_vars", AocAwsBackupDataVars()
+        )
+        return {
+            **super().trace_attributes(),
+            "aoc.deployment_name": command_generator_vars.get("deployment_name", ""),
+            "aws.s3_bucket": command_generator_vars.get("extra_vars", {}).get(
+                "aws_s3_bucket", ""
+            ),
+        }
+
+    @traced("aws_backup.create_s3_bucket")
     def create_s3_bucket(self) -> bool:
-        """Create s3 bucket to store backup files."""
-        result = self.ansible_module.s3_bucket(
-            name=self.command_generator_vars["extra_vars"]["aws_s3_bucket"],
+        """Create s3 bucket (in the stack region) to store backup files."""
+        extra_vars: AocAwsBackupDataExtraVars = self.command_generator_vars[
+            "extra_vars"
+        ]
+        region: Dict[str, str] = (
+            {"region": extra_vars["aws_region"]} if extra_vars.get("aws_region") else {}
+        )
+        result = self.run_module(
+            "s3_bucket",
+            name=extra_vars["aws_s3_bucket"],
             state="present",
+            **region,
         )
         if "failed" in result.contacted["localhost"]:
             print(result.contacted["localhost"]["msg"])
             return False
+        self.backup_index().clear()
         return True
 
-    def delete_s3_bucket(self) -> bool:
-        """Delete s3 bucket holding backup files."""
-        result = self.ansible_module.s3_bucket(
-            name=self.command_generator_vars["extra_vars"]["aws_s3_bucket"],
+    @traced("aws_backup.delete_s3_bucket", bulk="aoc.bulk")
+    def delete_s3_bucket(self, bulk: bool = False) -> bool:
+        """Delete s3 bucket holding backup files.
+
+        :param bulk: empty the bucket (every object version and delete marker)
+            with batched native s3 deletes instead of the ansible module
+            removing objects one by one
+        """
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+
+        if bulk:
+            if not self.__bulk_delete([], empty_bucket=True)["result"]:
+                return False
+            s3_client: "S3Client" = self.s3_client()
+            try:
+                s3_client.delete_bucket(Bucket=bucket_name)
+            except s3_client.exceptions.ClientError as e:
+                if e.response["Error"]["Code"] != "NoSuchBucket":
+                    print(
+                        f'Unable to delete bucket {bucket_name}, server message: {e.response["Error"]["Message"]}'
+                    )
+                    return False
+            self.backup_index().clear()
+            return True
+
+        result = self.run_module(
+            "s3_bucket",
+            name=bucket_name,
             state="absent",
             force=True,
         )
         if "failed" in result.contacted["localhost"]:
             print(result.contacted["localhost"]["msg"])
             return False
+        self.backup_index().clear()
         return True
 
+    def delete_s3_backups(self, backup_names: List[str]) -> AocAwsS3BulkDeleteResult:
+        """Deletes the backup objects from the s3 bucket with batched requests.
+
+        Only the s3 objects (every version of them) are deleted, unlike the
+        delete backups playbook which also handles the other backup resources.
+
+        :param backup_names: the backup names
+        :raises ValueError: when a backup name is blank (see `delete_s3_bucket`
+            to empty the bucket)
+        """
+        blank: List[str] = [name for name in backup_names if not name.strip("/")]
+        if blank:
+            raise ValueError(f"Blank backup names {blank} would delete every backup")
+        return self.__bulk_delete(backup_names)
+
+    def __bulk_delete(
+        self, backup_names: List[str], empty_bucket: bool = False
+    ) -> AocAwsS3BulkDeleteResult:
+        """Deletes the backup objects (or every object) with batched requests.
+
+        :param backup_names: the backup names
+        :param empty_bucket: delete every object in the bucket instead
+        """
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+        if empty_bucket:
+            backup_names = [""]
+
+        s3_client: "S3Client" = self.s3_client()
+        try:
+            s3_client.head_bucket(Bucket=bucket_name)
+        except s3_client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchBucket"):
+                raise
+            # Nothing left to delete
+            return AocAwsS3BulkDeleteResult(
+                deleted_counts={name: 0 for name in backup_names},
+                remaining_counts={name: 0 for name in backup_names},
+                errors=[],
+                duration=0.0,
+                objects_per_second=0.0,
+                result=True,
+            )
+
+        bulk_delete = AocAwsS3BulkDelete(s3_client, bucket_name)
+        result = (
+            bulk_delete.empty_bucket()
+            if empty_bucket
+            else bulk_delete.delete_prefixes(backup_names)
+        )
+        for name, count in result["deleted_counts"].items():
+            print(f"Deleted {count} objects from s3://{bucket_name}/{name}")
+        print(
+            f'Deleted {sum(result["deleted_counts"].values())} objects in '
+            f'{result["duration"]:.2f}s ({result["objects_per_second"]:.0f} objects/s)'
+        )
+        for error in result["errors"]:
+            print(error)
+
+        if not empty_bucket:
+            self.backup_index().remove(backup_names)
+        return result
+
+    @traced("aws_backup.verify_s3_backup", backup_name="aoc.backup_name")
+    def verify_s3_backup(
+        self,
+        backup_name: str,
+        expected_components: Optional[List[str]] = None,
+        manifest_dir: str = "",
+    ) -> AocAwsBackupVerifyResult:
+        """Verifies the integrity of the backup objects in the s3 bucket.
+
+        Every backup object is inspected (see `AocAwsBackupVerifier`), the
+        resulting manifest is written to `<manifest_dir>/<backup_name>.json`.
+        A manifest already recorded there (by a previous verification of the
+        backup) is checked against, e.g. for truncated objects.
+
+        :param backup_name: the backup name (the objects key prefix)
+        :param expected_components: the fnmatch patterns (relative to the
+            backup prefix) each matching at least one backup object
+        :param manifest_dir: directory to write the backup manifest to (when
+            verified successfully)
+        """
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+        manifest_path: str = os.path.join(
+            manifest_dir, f'{backup_name.strip("/")}.json'
+        )
+        recorded_manifest: Optional[AocAwsBackupManifest] = None
+        if manifest_dir and os.path.exists(manifest_path):
+            recorded_manifest = AocAwsBackupVerifier.load_manifest(manifest_path)
+
+        result = AocAwsBackupVerifier(self.s3_client(), bucket_name).verify(
+            backup_name, expected_components, recorded_manifest
+        )
+        print(
+            f'Verified {result["manifest"]["object_count"]} objects '
+            f'({result["manifest"]["total_size"]} bytes) of s3://{bucket_name}/'
+            f'{backup_name} in {result["duration"]:.2f}s '
+            f'({result["objects_per_second"]:.0f} objects/s)'
+        )
+        for error in result["errors"]:
+            print(error)
+
+        if manifest_dir and result["result"]:
+            AocAwsBackupVerifier.save_manifest(result["manifest"], manifest_path)
+        return result
+
+    @traced("aws_backup.inspect_s3_backup", backup_name="aoc.backup_name")
+    def inspect_s3_backup(
+        self, backup_name: str, size_history_dir: str = ""
+    ) -> AocAwsBackupInspectResult:
+        """Inspects the backup archives in the s3 bucket without downloading them.
+
+        The archives members and per component sizes are listed (see
+        `AocAwsBackupInspector`), the backup sizes are appended to
+        `<size_history_dir>/<deployment name>.jsonl` and compared with the
+        previously recorded ones.
+
+        :param backup_name: the backup name (the objects key prefix)
+        :param size_history_dir: directory holding the backup sizes history
+        """
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+
+        result = AocAwsBackupInspector(self.s3_client(), bucket_name).inspect(
+            backup_name
+        )
+        print(
+            f'Inspected {len(result["archives"])} objects '
+            f'({result["total_size"]} bytes, {result["total_uncompressed_size"]} '
+            f"bytes uncompressed) of s3://{bucket_name}/{backup_name} reading "
+            f'{result["bytes_read"]} bytes in {result["duration"]:.2f}s'
+        )
+        for name, component in sorted(result["components"].items()):
+            print(
+                f'  {name}: {component["objects"]} objects, {component["size"]} '
+                f'bytes ({component["uncompressed_size"]} bytes uncompressed)'
+            )
+        for error in result["errors"]:
+            print(error)
+
+        if size_history_dir:
+            path: str = os.path.join(
+                size_history_dir,
+                f'{self.command_generator_vars["deployment_name"]}.jsonl',
+            )
+            history = AocAwsBackupInspector.load_sizes(path)
+            record = AocAwsBackupInspector.record_sizes(result, path)
+            if history:
+                growth = AocAwsBackupInspector.growth(history[-1], record)
+                print(
+                    f'Backup size growth since {history[-1]["backup_name"]}: '
+                    + ", ".join(f"{name} {size:+d}" for name, size in growth.items())
+                )
+        return result
+
+    @traced("aws_backup.mirror_s3_backup", backup_name="aoc.backup_name")
+    def mirror_s3_backup(
+        self, backup_name: str, local_dir: str
+    ) -> AocAwsBackupMirrorResult:
+        """Mirrors the backup objects of the s3 bucket to a local directory.
+
+        The objects are downloaded with parallel ranged GET requests (see
+        `AocAwsBackupMirror`), an interrupted mirror resumes where it stopped
+        and already mirrored objects are skipped.
+
+        :param backup_name: the backup name (the objects key prefix)
+        :param local_dir: the local mirror directory
+        """
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+
+        result = AocAwsBackupMirror(self.s3_client(), bucket_name, local_dir).download(
+            backup_name
+        )
+        print(
+            f'Mirrored {len(result["downloaded_objects"])} objects '
+            f'({result["downloaded_bytes"]} bytes, '
+            f'{len(result["skipped_objects"])} already mirrored) of '
+            f's3://{bucket_name}/{backup_name} to {result["local_path"]} in '
+            f'{result["duration"]:.2f}s ({result["bytes_per_second"]:.0f} bytes/s)'
+        )
+        for error in result["errors"]:
+            print(error)
+        return result
+
+    def s3_client(self) -> "S3Client":
+        """Returns the shared s3 client for the backup credentials/region."""
+        return AWS_CLIENTS.s3(
+            self.command_generator_vars.get("cloud_credentials_path", ""),
+            self.command_generator_vars["extra_vars"].get("aws_region", ""),
+        )
+
+    def backup_index(self) -> AocAwsBackupIndex:
+        """Returns the backup index of the s3 bucket holding backup files."""
+        return AocAwsBackupIndex.for_bucket(
+            self.s3_client(),
+            self.command_generator_vars["extra_vars"]["aws_s3_bucket"],
+        )
+
+    def backup_prefix(self) -> str:
+        """Returns the prefix the backup names start with.
+
+        The backup prefix is not supported by aoc 2.3 (empty prefix).
+        """
+        if self.aoc_version == "2.3":
+            return ""
+        return self.command_generator_vars["extra_vars"].get("backup_prefix", "")
+
+    def s3_bucket_exists(self) -> bool:
+        """Checks whether the s3 bucket holding backup files exists."""
+        s3_client: "S3Client" = self.s3_client()
+        try:
+            s3_client.head_bucket(
+                Bucket=self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+            )
+        except s3_client.exceptions.ClientError:
+            return False
+        return True
+
+    def s3_backup_exists(self, backup_name: str) -> bool:
+        """Checks whether the backup objects exist in the s3 bucket.
+
+        :param backup_name: the backup name (the objects key prefix)
+        """
+        if not backup_name.strip("/"):
+            return False
+        s3_client: "S3Client" = self.s3_client()
+        try:
+            response = s3_client.list_objects_v2(
+                Bucket=self.command_generator_vars["extra_vars"]["aws_s3_bucket"],
+                Prefix=f'{backup_name.strip("/")}/',
+                MaxKeys=1,
+            )
+        except s3_client.exceptions.ClientError:
+            return False
+        return response.get("KeyCount", 0) > 0
+
+    def s3_bucket_exists_async(self) -> OpsContainerRun[bool]:
+        """Checks whether the s3 bucket exists from the running event loop.
+
+        :return: the run handle, awaiting it returns whether the bucket exists
+        """
+        return OpsContainerRun(
+            asyncio.to_thread(self.s3_bucket_exists),
+            self.command_generator_vars["extra_vars"]["aws_s3_bucket"],
+        )
+
+    def s3_backup_exists_async(self, backup_name: str) -> OpsContainerRun[bool]:
+        """Checks whether the backup objects exist from the running event loop.
+
+        :param backup_name: the backup name (the objects key prefix)
+        :return: the run handle, awaiting it returns whether the backup exists
+        """
+        return OpsContainerRun(
+            asyncio.to_thread(self.s3_backup_exists, backup_name), backup_name
+        )
+
+    @traced("aws_backup.get_s3_backup_object")
     def get_s3_backup_object(self) -> str:
-        """Gets the stack backup object stored in the s3 bucket."""
+        """Gets the latest stack backup object stored in the s3 bucket.
+
+        The bucket backups are looked up using the locally cached backup
+        index, which is refreshed incrementally, ordered by last modified time.
+        Only backups named with the backup prefix are considered, no backup
+        (an empty name) is returned when none matches.
+        """
         # TODO: Submit an RFE to playbook to have a final task to write
         #   the bucket name to an output file for consumption.
         #   Need to mount new volume into container to fetch file
         bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
 
-        s3_client: S3Client = Session().client("s3")
+        s3_client: "S3Client" = self.s3_client()
 
         try:
             s3_client.head_bucket(Bucket=bucket_name)
-        except botocore.exceptions.ClientError as e:
+        except s3_client.exceptions.ClientError as e:
             print(
                 f'Unable to locate bucket {bucket_name}, server message: {e.response["Error"]["Message"]}'
             )
             return ""
 
-        bucket_objects: ListObjectsV2OutputTypeDef = s3_client.list_objects_v2(
-            Bucket=bucket_name, Delimiter="/"
-        )
+        backup_index: AocAwsBackupIndex = self.backup_index()
+        backup_index.refresh()
 
-        return str(bucket_objects["CommonPrefixes"][-1]["Prefix"].strip("/"))
+        backup_prefix: str = self.backup_prefix()
+        latest_backup = backup_index.latest(prefix=backup_prefix)
+        if latest_backup is None:
+            print(
+                f"Unable to locate a backup prefixed {backup_prefix!r} in bucket "
+                f"{bucket_name}"
+            )
+            return ""
+        return latest_backup["name"]
 
+    @traced("aws_backup.backup_stack")
     def backup_stack(self) -> AocAwsBackupStackResult:
         """Performs stack backup."""
         backup_object_name: str = ""
 
         self.populate_backup_command_generator_args()
 
-        output, result = self.run_container(
-            name=f'{self.command_generator_vars["deployment_name"]}-backup-stack'
-        )
+        with _BackupOutputSpool(self) as output_spool:
+            output, result = self.run_container(
+                name=self.container_name(
+                    f'{self.command_generator_vars["deployment_name"]}-backup-stack'
+                )
+            )
+
+            if result:
+                backup_object_name = self.get_s3_backup_object()
+
+            return AocAwsBackupStackResult(
+                backup_object_name=backup_object_name,
+                backup_object_name_in_output=output_spool.contains(
+                    backup_object_name, output
+                ),
+                playbook_output=output,
+                playbook_result=result,
+            )
 
-        if result:
-            backup_object_name = self.get_s3_backup_object()
+    def backup_stack_async(self) -> OpsContainerRun[AocAwsBackupStackResult]:
+        """Performs stack backup from the running event loop.
 
-        return AocAwsBackupStackResult(
-            backup_object_name=backup_object_name,
-            playbook_output=output,
-            playbook_result=result,
+        The asyncio counterpart of `backup_stack` (see `run_container_async`),
+        the backup object is looked up in a worker thread.
+
+        :return: the run handle, awaiting it returns the stack backup results
+        """
+        return OpsContainerRun(
+            self._backup_stack_async(),
+            self.container_name(
+                f'{self.command_generator_vars["deployment_name"]}-backup-stack'
+            ),
         )
 
-    def delete_stack_backup(self, backup_names: List[str]) -> AocAwsBackupDeleteResult:
-        self.populate_delete_backup_command_generator_args(backup_names)
+    @traced("aws_backup.backup_stack")
+    async def _backup_stack_async(self) -> AocAwsBackupStackResult:
+        """Performs stack backup (see `backup_stack_async`)."""
+        backup_object_name: str = ""
+
+        self.populate_backup_command_generator_args()
+
+        with _BackupOutputSpool(self) as output_spool:
+            output, result = await self.run_container_async(
+                name=self.container_name(
+                    f'{self.command_generator_vars["deployment_name"]}-backup-stack'
+                )
+            )
+
+            if result:
+                backup_object_name = await asyncio.to_thread(self.get_s3_backup_object)
+
+            return AocAwsBackupStackResult(
+                backup_object_name=backup_object_name,
+                backup_object_name_in_output=await asyncio.to_thread(
+                    output_spool.contains, backup_object_name, output
+                ),
+                playbook_output=output,
+                playbook_result=result,
+            )
+
+    def __delete_backup_chunk(
+        self,
+        chunk_result: AocAwsBackupDeleteChunkResult,
+        label: str,
+        concurrent: bool,
+        parent_span: Optional[Span],
+    ) -> Tuple[str, bool]:
+        """Runs the delete backups playbook for the chunk of backup names.
+
+        Concurrent chunks are run by streaming clones of the operation (see
+        `streaming_clone`).
 
-        output, result = self.run_container(
-            name=f"aoc-delete-backup-{randint(0, 100000)}"
+        :return: the playbook output and whether the playbook succeeded
+        """
+        operation: AocAwsBackup = self.streaming_clone(label) if concurrent else self
+
+        start: float = time.perf_counter()
+        try:
+            with TRACER.use_span(parent_span):
+                operation.populate_delete_backup_command_generator_args(
+                    chunk_result["backup_names"]
+                )
+                return operation.run_container(
+                    name=self.container_name(
+                        f"aoc-delete-backup-{uuid.uuid4().hex[:12]}"
+                    )
+                )
+        except Exception as e:
+            print(f"Backups delete {label} raised an error: {e}")
+            return str(e), False
+        finally:
+            chunk_result["attempts"] += 1
+            chunk_result["duration"] += time.perf_counter() - start
+
+    @traced("aws_backup.delete_stack_backup", bulk="aoc.bulk")
+    def delete_stack_backup(
+        self,
+        backup_names: List[str],
+        bulk: bool = False,
+        chunk_size: int = DEFAULT_DELETE_CHUNK_SIZE,
+        max_workers: int = DEFAULT_DELETE_MAX_WORKERS,
+        retries: int = DEFAULT_DELETE_RETRIES,
+    ) -> AocAwsBackupDeleteResult:
+        """Performs stack backups deletion.
+
+        The backup names are split into chunks of `chunk_size` names, each
+        deleted by its own delete backups playbook run (up to `max_workers`
+        concurrently). The chunks that failed are retried (only them) up to
+        `retries` times, the results of every chunk are aggregated.
+
+        :param backup_names: the backup names to delete
+        :param bulk: delete the backup s3 objects natively with batched
+            requests (see `delete_s3_backups`) instead of running the delete
+            backups playbook, the backup recovery points are not deleted
+        :param chunk_size: the maximum number of backup names per playbook run
+        :param max_workers: the maximum number of playbooks run concurrently
+        :param retries: the number of times the failed chunks are retried
+        """
+        if bulk:
+            bulk_result = self.delete_s3_backups(backup_names)
+            return AocAwsBackupDeleteResult(
+                playbook_output=json.dumps(bulk_result, indent=2),
+                playbook_result=bulk_result["result"],
+                chunk_results=[],
+                s3_objects_only=True,
+            )
+
+        chunk_size = max(1, chunk_size)
+        chunk_results: List[AocAwsBackupDeleteChunkResult] = [
+            AocAwsBackupDeleteChunkResult(
+                backup_names=backup_names[i : i + chunk_size],
+                attempts=0,
+                duration=0.0,
+                playbook_output="",
+                playbook_result=False,
+            )
+            for i in range(0, max(1, len(backup_names)), chunk_size)
+        ]
+        outputs: List[str] = []
+
+        pending: List[int] = list(range(len(chunk_results)))
+        for attempt in range(max(0, retries) + 1):
+            if not pending:
+                break
+            if attempt:
+                print(f"Retrying {len(pending)} failed backups delete chunk(s)")
+            labels: Dict[int, str] = {
+                i: f"chunk {i + 1}/{len(chunk_results)} attempt {attempt + 1}"
+                for i in pending
+            }
+            concurrent: bool = len(pending) > 1 and max_workers > 1
+            results: Dict[int, Tuple[str, bool]] = {}
+            if not concurrent:
+                for i in pending:
+                    results[i] = self.__delete_backup_chunk(
+                        chunk_results[i], labels[i], False, TRACER.current_span()
+                    )
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=min(max_workers, len(pending)),
+                    thread_name_prefix="aoc-delete-backup",
+                ) as executor:
+                    futures = {
+                        i: executor.submit(
+                            self.__delete_backup_chunk,
+                            chunk_results[i],
+                            labels[i],
+                            True,
+                            TRACER.current_span(),
+                        )
+                        for i in pending
+                    }
+                results = {i: future.result() for i, future in futures.items()}
+
+            for i, (output, result) in results.items():
+                chunk_results[i]["playbook_output"] = output
+                chunk_results[i]["playbook_result"] = result
+                if len(chunk_results) > 1 or attempt:
+                    outputs.append(f"--- backups delete {labels[i]} ---")
+                outputs.append(output)
+            pending = [i for i in pending if not chunk_results[i]["playbook_result"]]
+
+        deleted: List[str] = [
+            backup_name
+            for chunk_result in chunk_results
+            if chunk_result["playbook_result"]
+            for backup_name in chunk_result["backup_names"]
+        ]
+        if deleted:
+            self.backup_index().remove(deleted)
+
+        return AocAwsBackupDeleteResult(
+            playbook_output="\n".join(outputs),
+            playbook_result=not pending,
+            chunk_results=chunk_results,
+            s3_objects_only=False,
+        )
+
+    @traced("aws_backup.prune_stack_backups", dry_run="aoc.dry_run")
+    def prune_stack_backups(
+        self,
+        policy: AocAwsBackupRetentionPolicy,
+        prefixes: Optional[List[str]] = None,
+        dry_run: bool = True,
+        bulk: bool = False,
+        chunk_size: int = DEFAULT_DELETE_CHUNK_SIZE,
+        max_workers: int = DEFAULT_DELETE_MAX_WORKERS,
+    ) -> AocAwsBackupPruneResult:
+        """Prunes the stack backups not retained by the retention policy.
+
+        The backups to prune are computed from the (incrementally refreshed)
+        backup index in a single pass (see `AocAwsBackupRetention`), then
+        deleted with `delete_stack_backup` unless running dry.
+
+        :param policy: the retention policy
+        :param prefixes: the backup prefixes the policy applies to separately
+            (defaults to the backup prefix of the stack)
+        :param dry_run: only report the backups to prune
+        :param bulk: delete the backup s3 objects natively with batched
+            requests instead of running the delete backups playbook
+        :param chunk_size: the maximum number of backup names per playbook run
+        :param max_workers: the maximum number of playbooks run concurrently
+        """
+        retention = AocAwsBackupRetention(policy)
+        backup_index = self.backup_index()
+        if self.s3_bucket_exists():
+            backup_index.refresh()
+        else:
+            backup_index.clear()
+        result = retention.plan(
+            backup_index.backups(),
+            [self.backup_prefix()] if prefixes is None else prefixes,
         )
+        print(AocAwsBackupRetention.report(result))
 
-        return AocAwsBackupDeleteResult(playbook_output=output, playbook_result=result)
+        if dry_run or not result["pruned"]:
+            return AocAwsBackupPruneResult(
+                retention=result, delete_result=None, result=True
+            )
+
+        delete_result = self.delete_stack_backup(
+            result["pruned"],
+            bulk=bulk,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+        )
+        return AocAwsBackupPruneResult(
+            retention=result,
+            delete_result=delete_result,
+            result=delete_result["playbook_result"],
+        )
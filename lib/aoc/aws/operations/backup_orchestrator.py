@@ -0,0 +1,331 @@
+"""AoC on AWS backup orchestrator module.
+
+This module performs stack backups for many AoC deployments on AWS
+cloud concurrently.
+"""
+import queue
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypedDict
+from typing import TypeVar
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.backup import AocAwsBackupStackResult
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import TRACER
+
+if typing.TYPE_CHECKING:
+    from pytest_ansible.host_manager import BaseHostManager
+
+__all__ = [
+    "AocAwsBackupOrchestrator",
+    "AocAwsBackupOrchestratorResult",
+]
+
+DEFAULT_MAX_WORKERS: int = 4
+
+ResultType = TypeVar("ResultType")
+
+
+class AocAwsBackupOrchestratorResult(TypedDict):
+    """AoC multi stack backup results.
+
+    stack_results/stack_durations are keyed by deployment name. The
+    sequential duration is the sum of every stack backup duration, compare it
+    with the total duration to see the time saved by running concurrently.
+    """
+
+    stack_results: Dict[str, AocAwsBackupStackResult]
+    stack_durations: Dict[str, float]
+    setup_duration: float
+    total_duration: float
+    sequential_duration: float
+    result: bool
+
+
+def deployment_name_key(stack: AocAwsBackupDataVars) -> str:
+    """Returns the stack key of the orchestrator results (its deployment name)."""
+    return stack["deployment_name"]
+
+
+class AocAwsBackupOrchestrator:
+    """AocAwsBackupOrchestrator class.
+
+    This class handles backing up many aoc on aws stacks concurrently.
+    The ops container image registry login/pull is performed once and
+    shared by every stack backup. Perform the following to initiate backups:
+        1. Call the `create` method constructing an object (or instantiate
+           the class with an already constructed backup operation)
+            > orchestrator = AocAwsBackupOrchestrator.create(..., stacks=[...])
+        2. Call the `backup_stacks` method to perform the backups
+            > orchestrator.backup_stacks()
+
+    Other operations are run for every stack concurrently with `run_stacks`.
+    """
+
+    def __init__(
+        self,
+        aoc_aws_backup: AocAwsBackup,
+        stacks: List[AocAwsBackupDataVars],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        stack_key: Callable[[AocAwsBackupDataVars], str] = deployment_name_key,
+        group_key: Optional[Callable[[AocAwsBackupDataVars], str]] = None,
+        group_max_workers: int = 0,
+    ) -> None:
+        """Constructor.
+
+        :param aoc_aws_backup: the base backup operation, every stack backup
+            is a clone of it sharing its authenticated/pulled image
+        :param stacks: the backup data vars for each stack to backup
+        :param max_workers: the maximum number of stack operations run
+            concurrently
+        :param stack_key: returns the key of the stack (in the results)
+        :param group_key: returns the group of the stack (e.g. its region),
+            operations run concurrently across groups
+        :param group_max_workers: the maximum number of stack operations run
+            concurrently in each group (0 for max workers)
+        :raises ValueError: when no stacks are given, or stacks share a
+            key or a backup location
+        """
+        if not stacks:
+            raise ValueError("At least one stack to backup is required")
+
+        self.aoc_aws_backup: AocAwsBackup = aoc_aws_backup
+        self.max_workers: int = max(1, max_workers)
+        self.group_key: Optional[Callable[[AocAwsBackupDataVars], str]] = group_key
+        self.group_max_workers: int = group_max_workers or self.max_workers
+        self.stacks: Dict[str, AocAwsBackupDataVars] = {}
+        for stack in stacks:
+            key: str = stack_key(stack)
+            if key in self.stacks:
+                raise ValueError(f"Duplicate stack {key}")
+            self.stacks[key] = stack
+        self.__check_backup_locations()
+        self.setup_duration: float = 0.0
+
+    @classmethod
+    def create(
+        cls,
+        aoc_version: str,
+        aoc_ops_image: str,
+        aoc_ops_image_tag: str,
+        aoc_image_registry_username: str,
+        aoc_image_registry_password: str,
+        ansible_module: "BaseHostManager",
+        stacks: List[AocAwsBackupDataVars],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        options: Optional[OpsContainerOptions] = None,
+    ) -> "AocAwsBackupOrchestrator":
+        """Returns the orchestrator of the stacks, logging in/pulling the ops image.
+
+        :param aoc_version: the aoc version deployed
+        :param aoc_ops_image: the aoc operations container image
+        :param aoc_ops_image_tag: the aoc operations container image tag
+        :param aoc_image_registry_username: the username to authenticate with
+            the image registry holding aoc operations image
+        :param aoc_image_registry_password: the password to authenticate with
+            the image registry holding aoc operations image
+        :param ansible_module: the pytest ansible module fixture
+        :param stacks: the backup data vars for each stack to backup
+        :param max_workers: the maximum number of stack backups run concurrently
+        :param options: the ops container tunable options
+        :raises ValueError: when no stacks are given, or stacks share a
+            deployment name or a backup location
+        """
+        if not stacks:
+            raise ValueError("At least one stack to backup is required")
+
+        # The stacks are checked before the ops image is authenticated/pulled
+        backup_options = OpsContainerOptions(**(options or OpsContainerOptions()))
+        backup_options["defer_image_pull"] = True
+        setup_start: float = time.perf_counter()
+        orchestrator = cls(
+            AocAwsBackup(
+                aoc_version=aoc_version,
+                aoc_ops_image=aoc_ops_image,
+                aoc_ops_image_tag=aoc_ops_image_tag,
+                aoc_image_registry_username=aoc_image_registry_username,
+                aoc_image_registry_password=aoc_image_registry_password,
+                ansible_module=ansible_module,
+                command_generator_vars=stacks[0],
+                options=backup_options,
+            ),
+            stacks,
+            max_workers=max_workers,
+        )
+        if not orchestrator.aoc_aws_backup.prepare_image():
+            raise SystemExit(1)
+        orchestrator.setup_duration = time.perf_counter() - setup_start
+        return orchestrator
+
+    def __check_backup_locations(self) -> None:
+        """Checks every stack has its own backup location.
+
+        The backup object is discovered by listing the s3 bucket, stacks
+        sharing a bucket/backup prefix would discover each other's backup.
+
+        :raises ValueError: when stacks share a backup location
+        """
+        locations: Dict[Tuple[str, str], str] = {}
+        for key, stack in self.stacks.items():
+            location = (
+                stack["extra_vars"]["aws_s3_bucket"],
+                stack["extra_vars"].get("backup_prefix", ""),
+            )
+            if location in locations:
+                raise ValueError(
+                    f"Stacks {locations[location]} and {key} share s3 "
+                    f"bucket/backup prefix {'/'.join(location)}, their backup "
+                    f"objects would be ambiguous"
+                )
+            locations[location] = key
+
+    def stack_backup(self, key: str) -> AocAwsBackup:
+        """Returns the backup operation for the stack.
+
+        The operation streams its output prefixed by the stack key (see
+        `OpsContainer.streaming_clone`).
+
+        :param key: the stack key
+        """
+        aoc_aws_backup = self.aoc_aws_backup.streaming_clone(key)
+        aoc_aws_backup.command_generator_vars = self.stacks[key]
+        return aoc_aws_backup
+
+    def create_s3_buckets(self) -> bool:
+        """Create every unique s3 bucket to store backup files."""
+        result: bool = True
+        buckets: Set[str] = set()
+        for key, stack in self.stacks.items():
+            if stack["extra_vars"]["aws_s3_bucket"] in buckets:
+                continue
+            buckets.add(stack["extra_vars"]["aws_s3_bucket"])
+            result = self.stack_backup(key).create_s3_bucket() and result
+        return result
+
+    def __run_stack(
+        self,
+        func: Callable[[AocAwsBackup, str], ResultType],
+        on_error: Callable[[str, Exception], ResultType],
+        key: str,
+        workers: threading.BoundedSemaphore,
+        parent_span: Optional[Span],
+    ) -> Tuple[ResultType, float]:
+        """Runs the operation for the stack, returning its result and duration."""
+        start: float = time.perf_counter()
+        with workers, TRACER.use_span(parent_span):
+            try:
+                result: ResultType = func(self.stack_backup(key), key)
+            except Exception as e:
+                result = on_error(key, e)
+        return result, time.perf_counter() - start
+
+    def __run_group(
+        self,
+        func: Callable[[AocAwsBackup, str], ResultType],
+        on_error: Callable[[str, Exception], ResultType],
+        keys: "queue.SimpleQueue[str]",
+        workers: threading.BoundedSemaphore,
+        parent_span: Optional[Span],
+        results: Dict[str, Tuple[ResultType, float]],
+    ) -> None:
+        """Runs the operation for the group stacks left in the queue."""
+        while True:
+            try:
+                key = keys.get_nowait()
+            except queue.Empty:
+                return
+            results[key] = self.__run_stack(func, on_error, key, workers, parent_span)
+
+    def run_stacks(
+        self,
+        func: Callable[[AocAwsBackup, str], ResultType],
+        on_error: Callable[[str, Exception], ResultType],
+        keys: Optional[List[str]] = None,
+    ) -> Dict[str, Tuple[ResultType, float]]:
+        """Runs the operation for every stack concurrently.
+
+        Each group runs up to `group_max_workers` lanes taking the group
+        stacks from a queue, every operation holds one of the `max_workers`
+        overall slots while running.
+
+        :param func: the operation, called with the stack backup operation
+            (see `stack_backup`) and key
+        :param on_error: returns the result of an operation raising an error,
+            called with the stack key and error
+        :param keys: the stack keys (defaults to every stack)
+        :return: the result and duration of each stack, in the stacks order
+        """
+        group_keys: Dict[str, "queue.SimpleQueue[str]"] = {}
+        for key in self.stacks if keys is None else keys:
+            group: str = self.group_key(self.stacks[key]) if self.group_key else ""
+            group_keys.setdefault(group, queue.SimpleQueue()).put(key)
+
+        workers = threading.BoundedSemaphore(self.max_workers)
+        lanes: List["queue.SimpleQueue[str]"] = [
+            group_queue
+            for group_queue in group_keys.values()
+            for _ in range(min(self.group_max_workers, group_queue.qsize()))
+        ]
+        results: Dict[str, Tuple[ResultType, float]] = {}
+        if lanes:
+            with ThreadPoolExecutor(
+                max_workers=len(lanes), thread_name_prefix="aoc-backup"
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        self.__run_group,
+                        func,
+                        on_error,
+                        group_queue,
+                        workers,
+                        TRACER.current_span(),
+                        results,
+                    )
+                    for group_queue in lanes
+                ]
+            for future in futures:
+                future.result()
+        return {key: results[key] for key in self.stacks if key in results}
+
+    def backup_stacks(self) -> AocAwsBackupOrchestratorResult:
+        """Performs every stack backup concurrently (up to max workers)."""
+        start: float = time.perf_counter()
+
+        def on_error(key: str, e: Exception) -> AocAwsBackupStackResult:
+            print(f"Stack {key} backup raised an error: {e}")
+            return AocAwsBackupStackResult(
+                backup_object_name="",
+                backup_object_name_in_output=False,
+                playbook_output=str(e),
+                playbook_result=False,
+            )
+
+        results = self.run_stacks(
+            lambda backup, key: backup.backup_stack(), on_error=on_error
+        )
+        stack_results: Dict[str, AocAwsBackupStackResult] = {
+            key: result for key, (result, _) in results.items()
+        }
+        stack_durations: Dict[str, float] = {
+            key: duration for key, (_, duration) in results.items()
+        }
+
+        return AocAwsBackupOrchestratorResult(
+            stack_results=stack_results,
+            stack_durations=stack_durations,
+            setup_duration=self.setup_duration,
+            total_duration=time.perf_counter() - start,
+            sequential_duration=sum(stack_durations.values()),
+            result=all(r["playbook_result"] for r in stack_results.values()),
+        )
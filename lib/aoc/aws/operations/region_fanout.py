@@ -0,0 +1,401 @@
+"""AoC on AWS region fan-out module.
+
+This module performs the stack backups, backup discovery and cleanup of AoC
+deployments spanning many AWS regions, in every region concurrently (up to
+a per region cap), and merges the per region results into one table.
+"""
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypedDict
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.backup_orchestrator import AocAwsBackupOrchestrator
+
+__all__ = [
+    "AocAwsRegion",
+    "AocAwsRegionFanout",
+    "AocAwsRegionFanoutResult",
+    "AocAwsRegionResult",
+    "DEFAULT_MAX_WORKERS",
+    "DEFAULT_REGION_MAX_WORKERS",
+    "parse_regions",
+]
+
+DEFAULT_MAX_WORKERS: int = 8
+DEFAULT_REGION_MAX_WORKERS: int = 2
+
+# The fan-out operations, in the order of the merged results table columns
+OPERATIONS: List[str] = ["create_bucket", "backup", "discover", "cleanup"]
+
+
+class AocAwsRegion(TypedDict, total=False):
+    """AoC region fan-out target (a deployment in a region).
+
+    A missing s3 bucket name defaults to the base stack one suffixed by the
+    region (s3 bucket names are global), a missing deployment name defaults
+    to the base stack one. The ssm bucket name is required when the base
+    stack has one.
+    """
+
+    aws_region: str
+    aws_s3_bucket: str
+    aws_ssm_bucket_name: str
+    deployment_name: str
+
+
+class AocAwsRegionResult(TypedDict):
+    """AoC region fan-out result of an operation for a target.
+
+    backup_name is the backup created/discovered/deleted, message describes
+    the failure (or the bucket for bucket operations).
+    """
+
+    region: str
+    deployment_name: str
+    operation: str
+    backup_name: str
+    duration: float
+    message: str
+    result: bool
+
+
+class AocAwsRegionFanoutResult(TypedDict):
+    """AoC region fan-out results of an operation.
+
+    region_results are keyed by `<region>/<deployment name>`. The sequential
+    duration is the sum of every target duration, compare it with the total
+    duration to see the time saved by running the regions concurrently.
+    """
+
+    operation: str
+    region_results: Dict[str, AocAwsRegionResult]
+    total_duration: float
+    sequential_duration: float
+    result: bool
+
+
+def parse_regions(specs: List[str]) -> List[AocAwsRegion]:
+    """Converts `region[=s3_bucket[,ssm_bucket_name]]` specs to fan-out targets.
+
+    :param specs: the region specs (e.g. `eu-west-1=aoc-backups-eu`)
+    """
+    regions: List[AocAwsRegion] = []
+    for spec in specs:
+        region, _, buckets = spec.partition("=")
+        s3_bucket, _, ssm_bucket_name = buckets.partition(",")
+        target = AocAwsRegion(aws_region=region.strip())
+        if s3_bucket.strip():
+            target["aws_s3_bucket"] = s3_bucket.strip()
+        if ssm_bucket_name.strip():
+            target["aws_ssm_bucket_name"] = ssm_bucket_name.strip()
+        regions.append(target)
+    return regions
+
+
+class AocAwsRegionFanout:
+    """AocAwsRegionFanout class.
+
+    This class handles the stack backups of deployments spanning many aws
+    regions, run by a backup orchestrator (see `AocAwsBackupOrchestrator`)
+    of the region targets. The ops container image login/pull of the base
+    operation is shared by every target (each runs a clone of it), the aws
+    clients are shared per region (see `AwsClientFactory`). Perform the following to
+    initiate backups in every region:
+        1. Instantiate the class constructing an object
+            > fanout = AocAwsRegionFanout(aoc_aws_backup, regions=[...])
+        2. Call the `create_s3_buckets`/`backup_stacks` methods
+            > fanout.backup_stacks()
+        3. Call the `cleanup` method to delete the backups (and buckets)
+            > fanout.cleanup()
+        4. Call the `results_table` method to print the merged results
+            > print(fanout.results_table())
+
+    Operations run concurrently across regions, up to `region_max_workers`
+    at a time in each region and `max_workers` overall.
+    """
+
+    def __init__(
+        self,
+        aoc_aws_backup: AocAwsBackup,
+        regions: List[AocAwsRegion],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        region_max_workers: int = DEFAULT_REGION_MAX_WORKERS,
+    ) -> None:
+        """Constructor.
+
+        :param aoc_aws_backup: the base backup operation (its stack data vars
+            are the defaults of every target)
+        :param regions: the fan-out targets
+        :param max_workers: the maximum number of operations run concurrently
+        :param region_max_workers: the maximum number of operations run
+            concurrently in each region
+        :raises ValueError: when no (or duplicate) targets are given, targets
+            share a backup location or lack their ssm bucket name
+        """
+        if not regions:
+            raise ValueError("At least one region to fan out to is required")
+
+        self.aoc_aws_backup: AocAwsBackup = aoc_aws_backup
+        self.orchestrator: AocAwsBackupOrchestrator = AocAwsBackupOrchestrator(
+            aoc_aws_backup,
+            [self.region_stack(region) for region in regions],
+            max_workers=max_workers,
+            stack_key=self.key,
+            group_key=lambda stack: stack["extra_vars"]["aws_region"],
+            group_max_workers=max(1, region_max_workers),
+        )
+        self.stacks: Dict[str, AocAwsBackupDataVars] = self.orchestrator.stacks
+
+        # Backups created/discovered per target, deleted by `cleanup`
+        self.backup_names: Dict[str, str] = {}
+        self.results: Dict[str, AocAwsRegionFanoutResult] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def key(stack: AocAwsBackupDataVars) -> str:
+        """Returns the results key (`<region>/<deployment name>`) of the stack."""
+        return f'{stack["extra_vars"]["aws_region"]}/{stack["deployment_name"]}'
+
+    def region_stack(self, region: AocAwsRegion) -> AocAwsBackupDataVars:
+        """Returns the backup data vars of the target.
+
+        :param region: the fan-out target
+        :raises ValueError: when the target lacks the ssm bucket name the base
+            stack has
+        """
+        base: AocAwsBackupDataVars = self.aoc_aws_backup.command_generator_vars
+        base_extra_vars: AocAwsBackupDataExtraVars = base["extra_vars"]
+        aws_region: str = region["aws_region"]
+
+        extra_vars = AocAwsBackupDataExtraVars(**base_extra_vars)
+        extra_vars["aws_region"] = aws_region
+        extra_vars["aws_s3_bucket"] = region.get(
+            "aws_s3_bucket", f'{base_extra_vars["aws_s3_bucket"]}-{aws_region}'
+        )
+        if "aws_ssm_bucket_name" in region:
+            extra_vars["aws_ssm_bucket_name"] = region["aws_ssm_bucket_name"]
+        elif extra_vars.get("aws_ssm_bucket_name"):
+            raise ValueError(
+                f"Region {aws_region} requires its ssm bucket name "
+                "(REGION=[S3_BUCKET],SSM_BUCKET_NAME)"
+            )
+        return AocAwsBackupDataVars(
+            cloud_credentials_path=base.get("cloud_credentials_path", ""),
+            deployment_name=region.get("deployment_name", base["deployment_name"]),
+            extra_vars=extra_vars,
+        )
+
+    def __bucket_keys(self) -> List[str]:
+        """Returns the key of the first target of every unique s3 bucket."""
+        keys: Dict[str, str] = {}
+        for key, stack in self.stacks.items():
+            keys.setdefault(stack["extra_vars"]["aws_s3_bucket"], key)
+        return list(keys.values())
+
+    def __fanout(
+        self,
+        operation: str,
+        func: Callable[[AocAwsBackup, str], Tuple[bool, str, str]],
+        keys: Optional[List[str]] = None,
+    ) -> AocAwsRegionFanoutResult:
+        """Runs the operation for every target, concurrently across regions.
+
+        Up to `region_max_workers` target operations run at once in each
+        region, and `max_workers` overall (see `AocAwsBackupOrchestrator`).
+
+        :param operation: the operation name
+        :param func: the operation, called with the target backup operation
+            and key, returning its result, backup name and message
+        :param keys: the target keys (defaults to every target)
+        """
+        start: float = time.perf_counter()
+
+        def on_error(key: str, e: Exception) -> Tuple[bool, str, str]:
+            print(f"Region {key} {operation} raised an error: {e}")
+            return False, "", str(e)
+
+        results: Dict[str, AocAwsRegionResult] = {}
+        for key, (
+            (result, backup_name, message),
+            duration,
+        ) in self.orchestrator.run_stacks(func, on_error, keys).items():
+            results[key] = AocAwsRegionResult(
+                region=self.stacks[key]["extra_vars"]["aws_region"],
+                deployment_name=self.stacks[key]["deployment_name"],
+                operation=operation,
+                backup_name=backup_name,
+                duration=duration,
+                message=message,
+                result=result,
+            )
+
+        fanout_result = AocAwsRegionFanoutResult(
+            operation=operation,
+            region_results=results,
+            total_duration=time.perf_counter() - start,
+            sequential_duration=sum(r["duration"] for r in results.values()),
+            result=all(r["result"] for r in results.values()),
+        )
+        self.results[operation] = fanout_result
+        return fanout_result
+
+    def create_s3_buckets(self) -> AocAwsRegionFanoutResult:
+        """Creates every unique s3 bucket (in its region) to store backup files."""
+
+        def create_s3_bucket(backup: AocAwsBackup, key: str) -> Tuple[bool, str, str]:
+            bucket_name: str = backup.command_generator_vars["extra_vars"][
+                "aws_s3_bucket"
+            ]
+            return backup.create_s3_bucket(), "", bucket_name
+
+        return self.__fanout("create_bucket", create_s3_bucket, self.__bucket_keys())
+
+    def backup_stacks(self) -> AocAwsRegionFanoutResult:
+        """Performs every target stack backup, concurrently across regions."""
+
+        def backup_stack(backup: AocAwsBackup, key: str) -> Tuple[bool, str, str]:
+            result = backup.backup_stack()
+            if result["backup_object_name"]:
+                with self._lock:
+                    self.backup_names[key] = result["backup_object_name"]
+            message: str = "" if result["playbook_result"] else "backup playbook failed"
+            return result["playbook_result"], result["backup_object_name"], message
+
+        return self.__fanout("backup", backup_stack)
+
+    def discover_backups(self) -> AocAwsRegionFanoutResult:
+        """Discovers the backup of every target in its region bucket.
+
+        The backup created by `backup_stacks` is looked up, otherwise the
+        latest backup named with the target backup prefix (each target has
+        its own bucket/backup prefix). Targets without either are not
+        discovered, the latest backup of the bucket may be another stack's.
+        """
+
+        def discover_backup(backup: AocAwsBackup, key: str) -> Tuple[bool, str, str]:
+            with self._lock:
+                backup_name: str = self.backup_names.get(key, "")
+            if backup_name:
+                if not backup.s3_backup_exists(backup_name):
+                    return False, backup_name, "backup not found"
+                return True, backup_name, ""
+            if not backup.backup_prefix():
+                return False, "", "no backup created or backup prefix to discover"
+            backup_name = backup.get_s3_backup_object()
+            if not backup_name:
+                return False, "", "no backup found"
+            with self._lock:
+                self.backup_names[key] = backup_name
+            return True, backup_name, ""
+
+        return self.__fanout("discover", discover_backup)
+
+    def cleanup(
+        self, delete_buckets: bool = True, bulk: bool = False
+    ) -> AocAwsRegionFanoutResult:
+        """Deletes the backups created/discovered (and the s3 buckets).
+
+        The backups are deleted first, then each unique bucket.
+
+        :param delete_buckets: delete the s3 buckets once their backups are
+        :param bulk: delete the s3 objects natively with batched requests
+            instead of running the delete backups playbook/ansible module
+        """
+
+        def delete_backup(backup: AocAwsBackup, key: str) -> Tuple[bool, str, str]:
+            with self._lock:
+                backup_name: str = self.backup_names.get(key, "")
+            if not backup_name:
+                return True, "", "no backup to delete"
+            delete_result = backup.delete_stack_backup([backup_name], bulk=bulk)
+            if not delete_result["playbook_result"]:
+                return False, backup_name, "delete backup playbook failed"
+            with self._lock:
+                self.backup_names.pop(key, None)
+            if delete_result["s3_objects_only"]:
+                return True, backup_name, "s3 objects only, recovery points remain"
+            return True, backup_name, ""
+
+        result = self.__fanout("cleanup", delete_backup)
+        if not delete_buckets:
+            return result
+
+        def delete_s3_bucket(backup: AocAwsBackup, key: str) -> Tuple[bool, str, str]:
+            bucket_name: str = backup.command_generator_vars["extra_vars"][
+                "aws_s3_bucket"
+            ]
+            if not backup.delete_s3_bucket(bulk=bulk):
+                return False, "", f"unable to delete bucket {bucket_name}"
+            return True, "", bucket_name
+
+        bucket_result = self.__fanout(
+            "delete_bucket", delete_s3_bucket, self.__bucket_keys()
+        )
+        # Merge the bucket deletions into the cleanup results
+        for key, bucket_key_result in bucket_result["region_results"].items():
+            key_result = result["region_results"].get(key)
+            if key_result is None:
+                result["region_results"][key] = bucket_key_result
+                continue
+            key_result["duration"] += bucket_key_result["duration"]
+            key_result["result"] = key_result["result"] and bucket_key_result["result"]
+            key_result["message"] = ", ".join(
+                m for m in (key_result["message"], bucket_key_result["message"]) if m
+            )
+            key_result["operation"] = "cleanup"
+        result["total_duration"] += bucket_result["total_duration"]
+        result["sequential_duration"] += bucket_result["sequential_duration"]
+        result["result"] = result["result"] and bucket_result["result"]
+        del self.results["delete_bucket"]
+        return result
+
+    def results_table(self) -> str:
+        """Returns the merged results of every operation run as a table.
+
+        One row per target, one column per operation (its result and
+        duration) and the backup name, followed by the total/sequential
+        duration of each operation.
+        """
+        operations: List[str] = [op for op in OPERATIONS if op in self.results]
+        header: List[str] = ["target", *operations, "backup"]
+        rows: List[List[str]] = []
+        for key in self.stacks:
+            row: List[str] = [key]
+            backup_name: str = ""
+            for operation in operations:
+                key_result = self.results[operation]["region_results"].get(key)
+                if key_result is None:
+                    row.append("-")
+                    continue
+                row.append(
+                    f'{"ok" if key_result["result"] else "FAILED"} '
+                    f'{key_result["duration"]:.1f}s'
+                )
+                backup_name = key_result["backup_name"] or backup_name
+            rows.append([*row, backup_name or "-"])
+        rows.append(
+            [
+                "total (sequential)",
+                *(
+                    f'{self.results[op]["total_duration"]:.1f}s '
+                    f'({self.results[op]["sequential_duration"]:.1f}s)'
+                    for op in operations
+                ),
+                "",
+            ]
+        )
+
+        widths: List[int] = [
+            max(len(row[i]) for row in [header, *rows]) for i in range(len(header))
+        ]
+        return "\n".join(
+            "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in [header, *rows]
+        )
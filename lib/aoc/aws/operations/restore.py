@@ -3,12 +3,19 @@
 This module performs the standard operations for restoring an
 AoC deployment on AWS cloud.
 """
+import typing
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import TypedDict
 
-from pytest_ansible.host_manager import BaseHostManager
-
 from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_run import OpsContainerRun
+from lib.aoc.tracing import traced
+
+if typing.TYPE_CHECKING:
+    from pytest_ansible.host_manager import BaseHostManager
 
 __all__ = [
     "AocAwsRestore",
@@ -56,8 +63,9 @@ class AocAwsRestore(OpsContainer):
         aoc_ops_image_tag: str,
         aoc_image_registry_username: str,
         aoc_image_registry_password: str,
-        ansible_module: BaseHostManager,
+        ansible_module: "BaseHostManager",
         command_generator_vars: AocAwsRestoreDataVars,
+        options: Optional[OpsContainerOptions] = None,
     ) -> None:
         """Constructor.
 
@@ -70,6 +78,7 @@ class AocAwsRestore(OpsContainer):
             the image registry holding aoc operations image
         :param ansible_module: the pytest ansible module fixture
         :param command_generator_vars: the data to provide to aoc operations command generator playbooks
+        :param options: the ops container tunable options
         """
         super().__init__(
             "aws",
@@ -79,10 +88,25 @@ class AocAwsRestore(OpsContainer):
             aoc_image_registry_username,
             aoc_image_registry_password,
             ansible_module,
+            options,
         )
 
         self.command_generator_vars: AocAwsRestoreDataVars = command_generator_vars
 
+    def trace_attributes(self) -> Dict[str, str]:
+        """Returns the attributes recorded on the operation tracing spans."""
+        # Unset while the ops container constructor performs the login/pull
+        command_generator_vars = getattr(
+            self, "command_generator_vars", AocAwsRestoreDataVars()
+        )
+        return {
+            **super().trace_attributes(),
+            "aoc.deployment_name": command_generator_vars.get("deployment_name", ""),
+            "aws.s3_bucket": command_generator_vars.get("extra_vars", {}).get(
+                "aws_s3_bucket", ""
+            ),
+        }
+
     def populate_command_generator_args(self) -> None:
         """Performs any setup required to run command generator playbooks."""
         self.command_args: List[str] = [
@@ -92,6 +116,7 @@ class AocAwsRestore(OpsContainer):
             f'aws_s3_bucket={self.command_generator_vars["extra_vars"]["aws_s3_bucket"]}',
             f'aws_ssm_bucket_name={self.command_generator_vars["extra_vars"]["aws_ssm_bucket_name"]}',
         ]
+        self.extra_vars = {}
         self.command = "redhat.ansible_on_clouds.aws_restore_stack"
         self.env_vars = {
             "ANSIBLE_CONFIG": "../aws-ansible.cfg",
@@ -104,12 +129,44 @@ class AocAwsRestore(OpsContainer):
             f'{self.command_generator_vars["cloud_credentials_path"]}:/home/runner/.aws/credentials:ro',
         ]
 
+    @traced("aws_restore.restore_stack")
     def restore_stack(self) -> AocAwsRestoreStackResult:
         """Performs stack restore."""
         self.populate_command_generator_args()
 
         output, result = self.run_container(
-            name=f'{self.command_generator_vars["deployment_name"]}-restore-stack'
+            name=self.container_name(
+                f'{self.command_generator_vars["deployment_name"]}-restore-stack'
+            )
+        )
+        return AocAwsRestoreStackResult(
+            playbook_output=output,
+            playbook_result=result,
+        )
+
+    def restore_stack_async(self) -> OpsContainerRun[AocAwsRestoreStackResult]:
+        """Performs stack restore from the running event loop.
+
+        The asyncio counterpart of `restore_stack` (see `run_container_async`).
+
+        :return: the run handle, awaiting it returns the stack restore results
+        """
+        return OpsContainerRun(
+            self._restore_stack_async(),
+            self.container_name(
+                f'{self.command_generator_vars["deployment_name"]}-restore-stack'
+            ),
+        )
+
+    @traced("aws_restore.restore_stack")
+    async def _restore_stack_async(self) -> AocAwsRestoreStackResult:
+        """Performs stack restore (see `restore_stack_async`)."""
+        self.populate_command_generator_args()
+
+        output, result = await self.run_container_async(
+            name=self.container_name(
+                f'{self.command_generator_vars["deployment_name"]}-restore-stack'
+            )
         )
         return AocAwsRestoreStackResult(
             playbook_output=output,
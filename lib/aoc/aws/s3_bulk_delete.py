@@ -0,0 +1,203 @@
+"""AoC aws s3 bulk delete module.
+
+This module deletes every object under s3 prefixes (e.g. stack backups),
+or in the whole bucket, using batched DeleteObjects requests (up to 1000 keys
+each) spread across a thread pool, then verifies nothing is left. Every
+object version and delete marker is deleted, so nothing is left behind in
+versioned buckets either.
+"""
+import time
+import typing
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from typing import TypedDict
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_s3.type_defs import ObjectIdentifierTypeDef
+
+__all__ = [
+    "AocAwsS3BulkDelete",
+    "AocAwsS3BulkDeleteResult",
+]
+
+DEFAULT_MAX_WORKERS: int = 8
+MAX_DELETE_BATCH_SIZE: int = 1000
+
+
+class AocAwsS3BulkDeleteResult(TypedDict):
+    """AoC s3 bulk delete results.
+
+    deleted_counts/remaining_counts are keyed by prefix (an empty prefix for
+    the whole bucket) and count object versions and delete markers, remaining
+    objects are the ones found when verifying after the deletion.
+    """
+
+    deleted_counts: Dict[str, int]
+    remaining_counts: Dict[str, int]
+    errors: List[str]
+    duration: float
+    objects_per_second: float
+    result: bool
+
+
+class AocAwsS3BulkDelete:
+    """AocAwsS3BulkDelete class.
+
+    Perform the following to delete backups:
+        1. Instantiate the class constructing an object
+            > bulk_delete = AocAwsS3BulkDelete(s3_client, bucket_name)
+        2. Call the `delete_prefixes` method with the backup names
+            > bulk_delete.delete_prefixes(["backup-1", "backup-2"])
+        3. Call the `empty_bucket` method to delete every object (e.g. before
+           deleting the bucket)
+            > bulk_delete.empty_bucket()
+    """
+
+    def __init__(
+        self,
+        s3_client: "S3Client",
+        bucket_name: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        batch_size: int = MAX_DELETE_BATCH_SIZE,
+    ) -> None:
+        """Constructor.
+
+        :param s3_client: the s3 client (shared by every worker thread)
+        :param bucket_name: the s3 bucket holding the objects
+        :param max_workers: the maximum number of concurrent delete requests
+        :param batch_size: the number of keys per delete request (max 1000)
+        """
+        self.s3_client: "S3Client" = s3_client
+        self.bucket_name: str = bucket_name
+        self.max_workers: int = max(1, max_workers)
+        self.batch_size: int = max(1, min(batch_size, MAX_DELETE_BATCH_SIZE))
+
+    @staticmethod
+    def _prefix(name: str) -> str:
+        """Returns the s3 key prefix for the backup name.
+
+        :raises ValueError: when the name is blank (which would match every
+            object in the bucket, see `empty_bucket`)
+        """
+        if not name.strip("/"):
+            raise ValueError(f"Blank s3 prefix {name!r}, use empty_bucket instead")
+        return f'{name.strip("/")}/'
+
+    def _delete_batch(
+        self, objects: List["ObjectIdentifierTypeDef"]
+    ) -> Tuple[int, List[str]]:
+        """Deletes the batch of object versions with a DeleteObjects request.
+
+        :return: the number of deleted object versions and the per key errors
+        """
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name, Delete={"Objects": objects, "Quiet": True}
+            )
+        except self.s3_client.exceptions.ClientError as e:
+            return 0, [f'{len(objects)} keys: {e.response["Error"]["Message"]}']
+        errors = [
+            f'{error.get("Key", "")}: {error.get("Message", "")}'
+            for error in response.get("Errors", [])
+        ]
+        return len(objects) - len(errors), errors
+
+    def _list_versions(self, prefix: str) -> Iterator[List["ObjectIdentifierTypeDef"]]:
+        """Lists (paginated) the object versions/delete markers under the prefix.
+
+        Unversioned buckets list a single (null) version per object.
+
+        :param prefix: the key prefix, empty for the whole bucket
+        :return: the object versions, up to a batch per listing page
+        """
+        paginator = self.s3_client.get_paginator("list_object_versions")
+        for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={"PageSize": self.batch_size},
+        ):
+            objects: List["ObjectIdentifierTypeDef"] = []
+            for version in page.get("Versions", []):
+                objects.append(
+                    {"Key": version["Key"], "VersionId": version["VersionId"]}
+                )
+            for marker in page.get("DeleteMarkers", []):
+                objects.append({"Key": marker["Key"], "VersionId": marker["VersionId"]})
+            for i in range(0, len(objects), self.batch_size):
+                yield objects[i : i + self.batch_size]
+
+    def count(self, name: str) -> int:
+        """Counts (paginated) the object versions under the prefix.
+
+        :param name: the prefix (backup name), empty for the whole bucket
+        """
+        prefix: str = self._prefix(name) if name else ""
+        return sum(len(objects) for objects in self._list_versions(prefix))
+
+    def delete_prefixes(self, names: List[str]) -> AocAwsS3BulkDeleteResult:
+        """Deletes every object under each prefix, verifying none are left.
+
+        :param names: the prefixes (backup names) to delete
+        :raises ValueError: when a name is blank
+        """
+        return self._delete({name: self._prefix(name) for name in names})
+
+    def empty_bucket(self) -> AocAwsS3BulkDeleteResult:
+        """Deletes every object in the bucket, verifying none are left."""
+        return self._delete({"": ""})
+
+    def _delete(self, prefixes: Dict[str, str]) -> AocAwsS3BulkDeleteResult:
+        """Deletes every object version under each prefix.
+
+        The listing pages of a prefix are submitted as delete batches once
+        the prefix is listed (deleting versions would invalidate the listing
+        version markers), so deletion overlaps the listing of the next ones.
+
+        :param prefixes: the key prefixes keyed by name
+        """
+        start: float = time.perf_counter()
+        names: List[str] = list(prefixes)
+        futures: List[Tuple[str, Future[Tuple[int, List[str]]]]] = []
+        errors: List[str] = []
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="aoc-s3-delete"
+        ) as executor:
+            for name, prefix in prefixes.items():
+                try:
+                    batches = list(self._list_versions(prefix))
+                except self.s3_client.exceptions.ClientError as e:
+                    errors.append(f'{name}: {e.response["Error"]["Message"]}')
+                    continue
+                for objects in batches:
+                    if objects:
+                        futures.append(
+                            (name, executor.submit(self._delete_batch, objects))
+                        )
+
+        deleted_counts: Dict[str, int] = {name: 0 for name in names}
+        for name, future in futures:
+            deleted, batch_errors = future.result()
+            deleted_counts[name] += deleted
+            errors.extend(batch_errors)
+
+        duration: float = time.perf_counter() - start
+        remaining_counts: Dict[str, int] = {name: self.count(name) for name in names}
+        for name, remaining in remaining_counts.items():
+            if remaining:
+                errors.append(f"{name}: {remaining} objects remain after deletion")
+
+        deleted_total: int = sum(deleted_counts.values())
+        return AocAwsS3BulkDeleteResult(
+            deleted_counts=deleted_counts,
+            remaining_counts=remaining_counts,
+            errors=errors,
+            duration=duration,
+            objects_per_second=deleted_total / duration if duration else 0.0,
+            result=not errors,
+        )
@@ -0,0 +1,93 @@
+"""Operation checkpoints module.
+
+This module records the completed phases of long running operations
+(e.g. s3 bucket created, ops image ready, stack backed up) to a durable
+local state file, so a failed run can be resumed by skipping the phases
+still completed in reality instead of starting over.
+"""
+import os
+import time
+from typing import Optional
+from typing import TypedDict
+
+from lib.aoc.ops_container_cache import DEFAULT_CACHE_DIR
+from lib.aoc.state_store import SharedStateStore
+
+__all__ = [
+    "BACKUP_COMPLETED",
+    "BUCKET_CREATED",
+    "Checkpoint",
+    "DEFAULT_CHECKPOINT_PATH",
+    "IMAGE_READY",
+    "OperationCheckpoints",
+    "RESTORE_COMPLETED",
+]
+
+DEFAULT_CHECKPOINT_PATH: str = os.path.join(DEFAULT_CACHE_DIR, "checkpoints.json")
+
+BUCKET_CREATED: str = "bucket_created"
+IMAGE_READY: str = "image_ready"
+BACKUP_COMPLETED: str = "backup_completed"
+RESTORE_COMPLETED: str = "restore_completed"
+
+
+class Checkpoint(TypedDict, total=False):
+    """Operation phase checkpoint.
+
+    Only the fields relevant to the phase are set, e.g. the bucket for
+    `bucket_created` or the backup object name for `backup_completed`.
+    """
+
+    created: float
+    bucket: str
+    image: str
+    digest: str
+    backup_object_name: str
+    backup_name: str
+
+
+class OperationCheckpoints:
+    """OperationCheckpoints Class.
+
+    Perform the following to checkpoint/resume an operation phase:
+        1. Instantiate the class with the scope of the operation
+            > checkpoints = OperationCheckpoints(store, "aws/stack-1")
+        2. Call the `get` method, verifying the checkpoint against reality
+            > checkpoint = checkpoints.get(BUCKET_CREATED)
+        3. Call the `record` method once the phase completes
+            > checkpoints.record(BUCKET_CREATED, Checkpoint(bucket="bucket-1"))
+    """
+
+    def __init__(self, store: SharedStateStore, scope: str) -> None:
+        """Constructor.
+
+        :param store: the durable store persisting the checkpoints
+        :param scope: the scope of the checkpoints (e.g. cloud/deployment name)
+        """
+        self.store: SharedStateStore = store
+        self.scope: str = scope
+
+    def get(self, phase: str) -> Optional[Checkpoint]:
+        """Gets the checkpoint recorded for the phase.
+
+        :param phase: the operation phase (e.g. `BACKUP_COMPLETED`)
+        """
+        checkpoint: Optional[Checkpoint] = self.store.get(f"{self.scope}/{phase}")
+        return checkpoint
+
+    def record(self, phase: str, checkpoint: Checkpoint) -> None:
+        """Records the phase as completed.
+
+        :param phase: the operation phase (e.g. `BACKUP_COMPLETED`)
+        :param checkpoint: the phase details verified when resuming
+        """
+        self.store.set(f"{self.scope}/{phase}", {**checkpoint, "created": time.time()})
+
+    def clear(self, *phases: str) -> None:
+        """Forgets the phases (e.g. once their resources are deleted).
+
+        :param phases: the operation phases
+        """
+        with self.store.update() as data:
+            for phase in phases:
+                data.pop(f"{self.scope}/{phase}", None)
@@ -0,0 +1,6 @@
+"""Executors package.
+
+This package contains modules with the backends used by the ops
+container to perform container runtime operations (registry login,
+image pull, container run/logs/removal).
+"""
@@ -0,0 +1,266 @@
+"""Ansible container executor module.
+
+This module performs container runtime operations using the
+community.docker ansible modules (through the pytest ansible fixture).
+"""
+import asyncio
+import subprocess
+import typing
+import uuid
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from lib.aoc.executors.base import ContainerExecutor
+from lib.aoc.executors.base import IDLE_CONTAINER_ENTRYPOINT
+
+__all__ = [
+    "AnsibleContainerExecutor",
+]
+
+
+class AnsibleContainerExecutor(ContainerExecutor):
+    """AnsibleContainerExecutor Class.
+
+    Container logs (and streamed execs) are followed/waited on with the
+    container runtime cli as the docker_container (docker_container_exec)
+    module can only return the output once it exits.
+
+    The asyncio runs (see `run_container_async`) start the container detached
+    and follow its logs with the cli, as the blocking docker_container module
+    run would hold the (serialized) module runs until the container exits.
+    """
+
+    def __init__(
+        self, run_module: Callable[..., Any], container_cli: str = "docker"
+    ) -> None:
+        """Constructor.
+
+        :param run_module: callable running an ansible module by name/arguments
+        :param container_cli: the container runtime cli used to follow logs
+        """
+        super().__init__()
+        self.run_module: Callable[..., Any] = run_module
+        self.container_cli: str = container_cli
+        self._execs: Dict[str, "subprocess.Popen[str]"] = {}
+
+    @staticmethod
+    def _failed(result: Any) -> bool:
+        """Checks the module results, printing the error message on failure."""
+        if "failed" in result.contacted["localhost"]:
+            print(result.contacted["localhost"]["msg"])
+            return True
+        return False
+
+    @staticmethod
+    def find_repo_digest(image: str, image_info: Dict[str, Any]) -> Optional[str]:
+        """Finds the digest for the image repository in the image inspect data.
+
+        :param image: the container image fqdn
+        :param image_info: the image inspect data
+        """
+        for repo_digest in image_info.get("RepoDigests") or []:
+            repository, _, digest = str(repo_digest).partition("@")
+            if repository == image:
+                return digest
+        return None
+
+    def registry_login(self, registry: str, username: str, password: str) -> bool:
+        result = self.run_module(
+            "docker_login",
+            registry_url=registry,
+            username=username,
+            password=password,
+        )
+        return not self._failed(result)
+
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        result = self.run_module("docker_image_info", name=f"{image}:{tag}")
+        if "failed" in result.contacted["localhost"]:
+            return None
+        for image_info in result.contacted["localhost"].get("images", []):
+            digest = self.find_repo_digest(image, image_info)
+            if digest:
+                return digest
+        return None
+
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        result = self.run_module("docker_image", name=image, tag=tag, source="pull")
+        if self._failed(result):
+            return False, None
+        return True, self.find_repo_digest(
+            image, result.contacted["localhost"].get("image") or {}
+        )
+
+    def run_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        result = self.run_module(
+            "docker_container",
+            name=name,
+            image=image,
+            command=command,
+            detach="false",
+            state="started",
+            volumes=volumes,
+            env=env,
+        )
+        if "container" not in result.contacted["localhost"]:
+            self._failed(result)
+            return result.contacted["localhost"].get("msg", ""), -1
+        return (
+            result.contacted["localhost"]["container"]["Output"],
+            typing.cast(int, result.contacted["localhost"]["status"]),
+        )
+
+    async def run_container_async(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        """Runs the container detached, buffering its followed logs (asyncio).
+
+        Only the container start is a module run, so concurrent runs overlap
+        and a cancelled run can remove its container while it runs.
+        """
+        if not await asyncio.to_thread(
+            self.start_container, name, image, command, volumes, env
+        ):
+            return f"Unable to start container {name}", -1
+        lines: List[str] = [line async for line in self.follow_logs_async(name)]
+        return "\n".join(lines), await self.wait_container_async(name)
+
+    def start_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> bool:
+        result = self.run_module(
+            "docker_container",
+            name=name,
+            image=image,
+            command=command,
+            detach="true",
+            state="started",
+            volumes=volumes,
+            env=env,
+        )
+        return not self._failed(result)
+
+    def get_image_entrypoint(self, image: str) -> Optional[List[str]]:
+        result = self.run_module("docker_image_info", name=image)
+        if self._failed(result):
+            return None
+        for image_info in result.contacted["localhost"].get("images", []):
+            return list((image_info.get("Config") or {}).get("Entrypoint") or [])
+        print(f"Unable to inspect image {image}: image not present")
+        return None
+
+    def start_idle_container(self, name: str, image: str, volumes: List[str]) -> bool:
+        result = self.run_module(
+            "docker_container",
+            name=name,
+            image=image,
+            entrypoint=IDLE_CONTAINER_ENTRYPOINT,
+            detach="true",
+            state="started",
+            volumes=volumes,
+        )
+        return not self._failed(result)
+
+    def run_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Tuple[str, int]:
+        result = self.run_module(
+            "docker_container_exec", container=name, argv=command, env=env
+        )
+        if "rc" not in result.contacted["localhost"]:
+            self._failed(result)
+            return result.contacted["localhost"].get("msg", ""), -1
+        output: str = "\n".join(
+            stream
+            for stream in (
+                result.contacted["localhost"].get("stdout", ""),
+                result.contacted["localhost"].get("stderr", ""),
+            )
+            if stream
+        )
+        return output, typing.cast(int, result.contacted["localhost"]["rc"])
+
+    def start_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Optional[str]:
+        env_args: List[str] = []
+        for key, value in env.items():
+            env_args.extend(["--env", f"{key}={value}"])
+        try:
+            process = subprocess.Popen(
+                [self.container_cli, "exec", *env_args, name, *command],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+            )
+        except OSError as e:
+            print(f"Unable to exec in container {name}: {e}")
+            return None
+        exec_id: str = uuid.uuid4().hex
+        self._execs[exec_id] = process
+        return exec_id
+
+    def follow_exec(self, exec_id: str) -> Iterator[str]:
+        process = self._execs[exec_id]
+        assert process.stdout is not None
+        for line in process.stdout:
+            yield line.rstrip("\n")
+
+    def wait_exec(self, exec_id: str) -> int:
+        process = self._execs.pop(exec_id, None)
+        if process is None:
+            print(f"Unable to get exit code for exec {exec_id}: unknown exec")
+            return -1
+        with process:
+            return process.wait()
+
+    def follow_logs(self, name: str) -> Iterator[str]:
+        with subprocess.Popen(
+            [self.container_cli, "logs", "--follow", name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        ) as process:
+            assert process.stdout is not None
+            for line in process.stdout:
+                yield line.rstrip("\n")
+
+    def wait_container(self, name: str) -> int:
+        process = subprocess.run(
+            [self.container_cli, "wait", name],
+            capture_output=True,
+            text=True,
+        )
+        try:
+            return int(process.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            print(f"Unable to get exit code for container {name}: {process.stderr}")
+            return -1
+
+    def remove_container(self, name: str) -> bool:
+        result = self.run_module("docker_container", name=name, state="absent")
+        return not self._failed(result)
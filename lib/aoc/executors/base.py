@@ -0,0 +1,252 @@
+"""Container executor base module.
+
+This module contains the interface every ops container executor backend
+implements.
+"""
+import abc
+import asyncio
+from typing import AsyncIterator
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypedDict
+
+__all__ = [
+    "ContainerExecutor",
+    "IDLE_CONTAINER_ENTRYPOINT",
+    "RegistryAuth",
+]
+
+# Keeps a pooled container running idle, playbooks are run in it with exec
+IDLE_CONTAINER_ENTRYPOINT: List[str] = ["sleep", "infinity"]
+
+
+class RegistryAuth(TypedDict):
+    """Container image registry credentials."""
+
+    username: str
+    password: str
+    serveraddress: str
+
+
+class ContainerExecutor(abc.ABC):
+    """ContainerExecutor Class.
+
+    Methods report failures by printing the error message and returning a
+    falsy value, matching how the ops container handles ansible module results.
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.registry_auth: Dict[str, RegistryAuth] = {}
+
+    def add_registry_auth(self, registry: str, username: str, password: str) -> None:
+        """Remembers the registry credentials for later image pulls.
+
+        :param registry: the registry hostname
+        :param username: the registry username to authenticate with
+        :param password: the registry password to authenticate with
+        """
+        self.registry_auth[registry] = RegistryAuth(
+            username=username, password=password, serveraddress=registry
+        )
+
+    @abc.abstractmethod
+    def registry_login(self, registry: str, username: str, password: str) -> bool:
+        """Logins to the registry provided using username/password.
+
+        :param registry: the registry hostname
+        :param username: the registry username to authenticate with
+        :param password: the registry password to authenticate with
+        """
+
+    @abc.abstractmethod
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        """Gets the manifest digest of the image/tag present on the host.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        :return: the image digest or none when the image is not present
+        """
+
+    @abc.abstractmethod
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        """Pull the image/tag provided.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        :return: whether the pull succeeded and the pulled image digest
+        """
+
+    @abc.abstractmethod
+    def run_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        """Runs the container until it exits, buffering its output.
+
+        :param name: the container name
+        :param image: the container image (including the tag)
+        :param command: the container command
+        :param volumes: the container volume mounts (src:dest[:mode])
+        :param env: the container environment variables
+        :return: the container output and exit code (-1 on failure to run)
+        """
+
+    @abc.abstractmethod
+    def start_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> bool:
+        """Starts the container detached.
+
+        :param name: the container name
+        :param image: the container image (including the tag)
+        :param command: the container command
+        :param volumes: the container volume mounts (src:dest[:mode])
+        :param env: the container environment variables
+        """
+
+    @abc.abstractmethod
+    def follow_logs(self, name: str) -> Iterator[str]:
+        """Follows the container logs, yielding each line until it exits.
+
+        :param name: the container name
+        """
+
+    @abc.abstractmethod
+    def wait_container(self, name: str) -> int:
+        """Waits for the container to exit.
+
+        :param name: the container name
+        :return: the container exit code (-1 when it could not be determined)
+        """
+
+    @abc.abstractmethod
+    def get_image_entrypoint(self, image: str) -> Optional[List[str]]:
+        """Gets the entrypoint of the image present on the host.
+
+        :param image: the container image (including the tag)
+        :return: the image entrypoint (empty when unset) or none on failure
+        """
+
+    @abc.abstractmethod
+    def start_idle_container(self, name: str, image: str, volumes: List[str]) -> bool:
+        """Starts the container detached, idling until removed.
+
+        The image entrypoint is replaced by `IDLE_CONTAINER_ENTRYPOINT`, the
+        commands are run in the container with exec.
+
+        :param name: the container name
+        :param image: the container image (including the tag)
+        :param volumes: the container volume mounts (src:dest[:mode])
+        """
+
+    @abc.abstractmethod
+    def run_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Tuple[str, int]:
+        """Runs the command in the running container, buffering its output.
+
+        :param name: the container name
+        :param command: the command arguments
+        :param env: the command environment variables
+        :return: the command output and exit code (-1 on failure to run)
+        """
+
+    @abc.abstractmethod
+    def start_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Optional[str]:
+        """Creates the command exec in the running container.
+
+        :param name: the container name
+        :param command: the command arguments
+        :param env: the command environment variables
+        :return: the exec id (none on failure), to follow and wait on
+        """
+
+    @abc.abstractmethod
+    def follow_exec(self, exec_id: str) -> Iterator[str]:
+        """Runs the command exec, yielding each output line until it exits.
+
+        :param exec_id: the exec id
+        """
+
+    @abc.abstractmethod
+    def wait_exec(self, exec_id: str) -> int:
+        """Waits for the command exec to exit.
+
+        :param exec_id: the exec id
+        :return: the command exit code (-1 when it could not be determined)
+        """
+
+    @abc.abstractmethod
+    def remove_container(self, name: str) -> bool:
+        """Removes the container (stopping it when running).
+
+        :param name: the container name
+        """
+
+    async def run_container_async(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        """Runs the container until it exits, buffering its output (asyncio).
+
+        The blocking `run_container` is run in a worker thread, backends able
+        to wait on the container natively override it.
+
+        :param name: the container name
+        :param image: the container image (including the tag)
+        :param command: the container command
+        :param volumes: the container volume mounts (src:dest[:mode])
+        :param env: the container environment variables
+        :return: the container output and exit code (-1 on failure to run)
+        """
+        return await asyncio.to_thread(
+            self.run_container, name, image, command, volumes, env
+        )
+
+    async def follow_logs_async(self, name: str) -> AsyncIterator[str]:
+        """Follows the container logs, yielding each line until it exits (asyncio).
+
+        Each line of the blocking `follow_logs` is read in a worker thread,
+        backends able to follow the logs natively override it.
+
+        :param name: the container name
+        """
+        lines: Iterator[str] = self.follow_logs(name)
+        while True:
+            line: Optional[str] = await asyncio.to_thread(next, lines, None)
+            if line is None:
+                return
+            yield line
+
+    async def wait_container_async(self, name: str) -> int:
+        """Waits for the container to exit (asyncio).
+
+        The blocking `wait_container` is run in a worker thread, backends able
+        to wait on the container natively override it.
+
+        :param name: the container name
+        :return: the container exit code (-1 when it could not be determined)
+        """
+        return await asyncio.to_thread(self.wait_container, name)
+
+    def close(self) -> None:
+        """Releases any resources (e.g. connections) held by the executor."""
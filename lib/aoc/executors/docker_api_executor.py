@@ -0,0 +1,706 @@
+"""Docker engine api container executor module.
+
+This module performs container runtime operations by talking directly to
+the Docker (or Podman docker compatible) engine api over its unix socket.
+Connections are kept alive and reused (one per thread), so each operation
+costs a single http round trip instead of an ansible module execution.
+
+Waiting on containers and following their logs is also available with
+asyncio (on a dedicated asyncio unix socket connection), so an event loop
+can wait on many long running containers without a thread for each.
+"""
+import asyncio
+import base64
+import contextlib
+import http.client
+import json
+import os
+import shlex
+import socket
+import struct
+import threading
+import time
+import typing
+import urllib.parse
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from lib.aoc.executors.base import ContainerExecutor
+from lib.aoc.executors.base import IDLE_CONTAINER_ENTRYPOINT
+from lib.aoc.registry import split_image_name
+
+__all__ = [
+    "DockerApiContainerExecutor",
+    "DockerApiError",
+    "default_container_socket",
+]
+
+
+def default_container_socket() -> str:
+    """Returns the default container engine socket path.
+
+    DOCKER_HOST (unix://) is honored, then the docker socket, then the
+    rootless podman socket.
+    """
+    docker_host: str = os.getenv("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://") :]
+    if os.path.exists("/var/run/docker.sock"):
+        return "/var/run/docker.sock"
+    runtime_dir: str = os.getenv("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    return os.path.join(runtime_dir, "podman", "podman.sock")
+
+
+class DockerApiError(Exception):
+    """Raised when the container engine api returns an error response."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Constructor.
+
+        :param status: the http response status
+        :param message: the error message returned by the engine
+        """
+        super().__init__(f"{status}: {message}")
+        self.status: int = status
+        self.message: str = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection Class connecting to a unix socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None) -> None:
+        """Constructor.
+
+        :param socket_path: the unix socket path
+        :param timeout: the socket timeout in seconds (none blocks forever)
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path: str = socket_path
+
+    def connect(self) -> None:
+        """Connects to the unix socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class AsyncUnixHTTPResponse:
+    """AsyncUnixHTTPResponse Class.
+
+    A minimal HTTP/1.1 response read from an asyncio unix socket stream,
+    supporting the content length, chunked and close delimited bodies the
+    engine api returns.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: Dict[str, str],
+    ) -> None:
+        """Constructor.
+
+        :param reader: the connection stream reader (positioned on the body)
+        :param writer: the connection stream writer (closed with the response)
+        :param status: the response status
+        :param headers: the response headers (lower cased names)
+        """
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.status: int = status
+        self.headers: Dict[str, str] = headers
+        self._chunked: bool = headers.get("transfer-encoding", "").lower() == "chunked"
+        self._remaining: Optional[int] = (
+            int(headers["content-length"]) if "content-length" in headers else None
+        )
+        self._buffer: bytearray = bytearray()
+        self._eof: bool = False
+
+    @classmethod
+    async def request(
+        cls,
+        socket_path: str,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+    ) -> "AsyncUnixHTTPResponse":
+        """Sends the request on a new connection, reading the response head.
+
+        :param socket_path: the unix socket path
+        :param method: the http method
+        :param url: the request url (path and query)
+        :param body: the json request body
+        """
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            head: str = f"{method} {url} HTTP/1.1\r\nHost: localhost\r\n"
+            if body is not None:
+                head += "Content-Type: application/json\r\n"
+            head += f"Content-Length: {len(body or b'')}\r\nConnection: close\r\n"
+            writer.write(f"{head}\r\n".encode() + (body or b""))
+            await writer.drain()
+
+            status_line: bytes = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("connection closed by the engine")
+            status: int = int(status_line.split()[1])
+            headers: Dict[str, str] = {}
+            while True:
+                line: bytes = await reader.readline()
+                if not line.strip():
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+        except BaseException:
+            writer.close()
+            raise
+        return cls(reader, writer, status, headers)
+
+    async def _read_chunk(self) -> bytes:
+        """Reads the next piece of the body (empty once fully read)."""
+        data: bytes = b""
+        if self._chunked:
+            size: int = int((await self.reader.readline()).split(b";")[0] or b"0", 16)
+            if size:
+                data = await self.reader.readexactly(size)
+                await self.reader.readline()
+            else:
+                # Skip the trailers up to the final empty line
+                while (await self.reader.readline()).strip():
+                    pass
+        elif self._remaining is None:
+            data = await self.reader.read(65536)
+        elif self._remaining:
+            data = await self.reader.read(min(self._remaining, 65536))
+            self._remaining -= len(data)
+        self._eof = not data
+        return data
+
+    async def read(self, size: int = -1) -> bytes:
+        """Reads size bytes of the body (fewer at its end), all when negative.
+
+        :param size: the number of bytes to read
+        """
+        while (size < 0 or len(self._buffer) < size) and not self._eof:
+            self._buffer += await self._read_chunk()
+        size = len(self._buffer) if size < 0 else size
+        data: bytes = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self.writer.close()
+
+
+class DockerApiContainerExecutor(ContainerExecutor):
+    """DockerApiContainerExecutor Class."""
+
+    def __init__(self, socket_path: str = "", timeout: float = 60.0) -> None:
+        """Constructor.
+
+        :param socket_path: the container engine unix socket path
+        :param timeout: the socket timeout in seconds for non streaming requests
+        """
+        super().__init__()
+        self.socket_path: str = socket_path or default_container_socket()
+        self.timeout: float = timeout
+        self._local: threading.local = threading.local()
+
+    def _connection(self) -> UnixHTTPConnection:
+        """Returns the kept alive connection for the calling thread."""
+        connection: Optional[UnixHTTPConnection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            connection = UnixHTTPConnection(self.socket_path, self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        """Performs the api request on the kept alive connection.
+
+        The request is retried once on a fresh connection when the kept alive
+        connection was closed by the engine.
+
+        :return: the response status and body
+        """
+        url: str = path
+        if params:
+            url += f"?{urllib.parse.urlencode(params)}"
+        payload: Optional[bytes] = (
+            json.dumps(body).encode() if body is not None else None
+        )
+        request_headers: Dict[str, str] = {"Content-Type": "application/json"}
+        request_headers.update(headers or {})
+
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, url, body=payload, headers=request_headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (
+                http.client.RemoteDisconnected,
+                BrokenPipeError,
+                ConnectionResetError,
+            ):
+                connection.close()
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    def _request_json(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        ok: Tuple[int, ...] = (200, 201, 204),
+    ) -> Any:
+        """Performs the api request, decoding the json response.
+
+        :raises DockerApiError: when the response status is not ok
+        """
+        status, data = self._request(method, path, params, body, headers)
+        if status not in ok:
+            try:
+                message = json.loads(data).get("message", "")
+            except ValueError:
+                message = data.decode(errors="replace")
+            raise DockerApiError(status, message)
+        return json.loads(data) if data.strip() else {}
+
+    def _stream(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, Any],
+        headers: Dict[str, str],
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[UnixHTTPConnection, http.client.HTTPResponse]:
+        """Opens a dedicated connection for a streamed response.
+
+        :raises DockerApiError: when the response status is not ok
+        """
+        connection = UnixHTTPConnection(self.socket_path)
+        url: str = path
+        if params:
+            url += f"?{urllib.parse.urlencode(params)}"
+        if body is not None:
+            connection.request(
+                method,
+                url,
+                body=json.dumps(body).encode(),
+                headers={"Content-Type": "application/json", **headers},
+            )
+        else:
+            connection.request(method, url, headers=headers)
+        response = connection.getresponse()
+        if response.status != 200:
+            data = response.read()
+            connection.close()
+            raise DockerApiError(response.status, data.decode(errors="replace"))
+        return connection, response
+
+    async def _stream_async(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, Any],
+        body: Optional[Dict[str, Any]] = None,
+    ) -> AsyncUnixHTTPResponse:
+        """Opens a dedicated asyncio connection for a streamed response.
+
+        :raises DockerApiError: when the response status is not ok
+        """
+        url: str = path
+        if params:
+            url += f"?{urllib.parse.urlencode(params)}"
+        response = await AsyncUnixHTTPResponse.request(
+            self.socket_path,
+            method,
+            url,
+            json.dumps(body).encode() if body is not None else None,
+        )
+        if response.status != 200:
+            try:
+                data = await response.read()
+            finally:
+                response.close()
+            raise DockerApiError(response.status, data.decode(errors="replace"))
+        return response
+
+    def _registry_auth_header(self, image: str) -> Dict[str, str]:
+        """Returns the X-Registry-Auth header for the image registry."""
+        registry, _ = split_image_name(image)
+        auth = self.registry_auth.get(registry) or self.registry_auth.get(
+            image.split("/")[0]
+        )
+        if not auth:
+            return {}
+        return {
+            "X-Registry-Auth": base64.urlsafe_b64encode(
+                json.dumps(auth).encode()
+            ).decode()
+        }
+
+    def registry_login(self, registry: str, username: str, password: str) -> bool:
+        self.add_registry_auth(registry, username, password)
+        try:
+            self._request_json(
+                "POST",
+                "/auth",
+                body={
+                    "username": username,
+                    "password": password,
+                    "serveraddress": registry,
+                },
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to login to registry {registry}: {e}")
+            return False
+        return True
+
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        try:
+            image_info = self._request_json("GET", f"/images/{image}:{tag}/json")
+        except (DockerApiError, OSError):
+            return None
+        for repo_digest in image_info.get("RepoDigests") or []:
+            repository, _, digest = str(repo_digest).partition("@")
+            if repository == image:
+                return digest
+        return None
+
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        try:
+            connection, response = self._stream(
+                "POST",
+                "/images/create",
+                {"fromImage": image, "tag": tag},
+                self._registry_auth_header(image),
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to pull image {image}:{tag}: {e}")
+            return False, None
+
+        # The pull progress is streamed as json lines until the pull completes
+        error: str = ""
+        with contextlib.closing(connection):
+            for line in response:
+                try:
+                    progress: Dict[str, Any] = json.loads(line)
+                except ValueError:
+                    continue
+                error = progress.get("error", error)
+        if error:
+            print(f"Unable to pull image {image}:{tag}: {error}")
+            return False, None
+        return True, self.get_image_digest(image, tag)
+
+    def _create_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+        entrypoint: Optional[List[str]] = None,
+    ) -> None:
+        """Creates the container, replacing an existing one with the same name."""
+        body: Dict[str, Any] = {
+            "Image": image,
+            "Cmd": shlex.split(command),
+            "Env": [f"{key}={value}" for key, value in env.items()],
+            "HostConfig": {"Binds": [os.path.expanduser(v) for v in volumes]},
+        }
+        if entrypoint is not None:
+            body["Entrypoint"] = entrypoint
+        try:
+            self._request_json("POST", "/containers/create", {"name": name}, body)
+        except DockerApiError as e:
+            if e.status != 409:
+                raise
+            self.remove_container(name)
+            self._request_json("POST", "/containers/create", {"name": name}, body)
+
+    def start_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> bool:
+        try:
+            self._create_container(name, image, command, volumes, env)
+            self._request_json("POST", f"/containers/{name}/start", ok=(200, 204, 304))
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to start container {name}: {e}")
+            return False
+        return True
+
+    def start_idle_container(self, name: str, image: str, volumes: List[str]) -> bool:
+        try:
+            self._create_container(
+                name, image, "", volumes, {}, entrypoint=IDLE_CONTAINER_ENTRYPOINT
+            )
+            self._request_json("POST", f"/containers/{name}/start", ok=(200, 204, 304))
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to start container {name}: {e}")
+            return False
+        return True
+
+    def get_image_entrypoint(self, image: str) -> Optional[List[str]]:
+        try:
+            image_info = self._request_json("GET", f"/images/{image}/json")
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to inspect image {image}: {e}")
+            return None
+        return list((image_info.get("Config") or {}).get("Entrypoint") or [])
+
+    def run_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        if not self.start_container(name, image, command, volumes, env):
+            return f"Unable to start container {name}", -1
+        status: int = self.wait_container(name)
+        output: str = "\n".join(self._logs(name, follow=False))
+        return output, status
+
+    @staticmethod
+    def _demultiplex(response: http.client.HTTPResponse) -> Iterator[bytes]:
+        """Yields the payloads of a multiplexed (stdout/stderr) log stream.
+
+        Each frame has an 8 byte header: stream type, 3 padding bytes and the
+        big endian payload size.
+        """
+        while True:
+            header = response.read(8)
+            if len(header) < 8:
+                return
+            _, size = struct.unpack(">BxxxL", header)
+            yield response.read(size)
+
+    def _logs(self, name: str, follow: bool) -> Iterator[str]:
+        """Yields the container log lines, following them when requested."""
+        try:
+            connection, response = self._stream(
+                "GET",
+                f"/containers/{name}/logs",
+                {"follow": int(follow), "stdout": 1, "stderr": 1},
+                {},
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to get logs for container {name}: {e}")
+            return
+
+        # Containers are created without a tty, so the logs are multiplexed
+        yield from self._lines(connection, response)
+
+    def _lines(
+        self, connection: UnixHTTPConnection, response: http.client.HTTPResponse
+    ) -> Iterator[str]:
+        """Yields the lines of a multiplexed stream, closing its connection."""
+        with contextlib.closing(connection):
+            pending: bytes = b""
+            for chunk in self._demultiplex(response):
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line.decode(errors="replace")
+            if pending:
+                yield pending.decode(errors="replace")
+
+    def follow_logs(self, name: str) -> Iterator[str]:
+        return self._logs(name, follow=True)
+
+    @staticmethod
+    async def _demultiplex_async(
+        response: AsyncUnixHTTPResponse,
+    ) -> AsyncIterator[bytes]:
+        """Yields the payloads of a multiplexed log stream (see `_demultiplex`)."""
+        while True:
+            header = await response.read(8)
+            if len(header) < 8:
+                return
+            _, size = struct.unpack(">BxxxL", header)
+            yield await response.read(size)
+
+    async def _logs_async(self, name: str, follow: bool) -> AsyncIterator[str]:
+        """Yields the container log lines (see `_logs`) with asyncio."""
+        try:
+            response = await self._stream_async(
+                "GET",
+                f"/containers/{name}/logs",
+                {"follow": int(follow), "stdout": 1, "stderr": 1},
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to get logs for container {name}: {e}")
+            return
+
+        try:
+            pending: bytes = b""
+            async for chunk in self._demultiplex_async(response):
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line.decode(errors="replace")
+            if pending:
+                yield pending.decode(errors="replace")
+        finally:
+            response.close()
+
+    async def follow_logs_async(self, name: str) -> AsyncIterator[str]:
+        async for line in self._logs_async(name, follow=True):
+            yield line
+
+    async def wait_container_async(self, name: str) -> int:
+        try:
+            response = await AsyncUnixHTTPResponse.request(
+                self.socket_path, "POST", f"/containers/{name}/wait"
+            )
+            try:
+                data = json.loads(await response.read() or b"{}")
+            finally:
+                response.close()
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            print(f"Unable to get exit code for container {name}: {e}")
+            return -1
+        if response.status != 200:
+            print(f"Unable to get exit code for container {name}: {data}")
+            return -1
+        return typing.cast(int, data.get("StatusCode", -1))
+
+    async def run_container_async(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        # Only the (short) create/start requests are run in a worker thread
+        if not await asyncio.to_thread(
+            self.start_container, name, image, command, volumes, env
+        ):
+            return f"Unable to start container {name}", -1
+        status: int = await self.wait_container_async(name)
+        output: str = "\n".join(
+            [line async for line in self._logs_async(name, follow=False)]
+        )
+        return output, status
+
+    def wait_container(self, name: str) -> int:
+        connection = UnixHTTPConnection(self.socket_path)
+        try:
+            with contextlib.closing(connection):
+                connection.request("POST", f"/containers/{name}/wait")
+                response = connection.getresponse()
+                data = json.loads(response.read() or b"{}")
+        except (OSError, ValueError) as e:
+            print(f"Unable to get exit code for container {name}: {e}")
+            return -1
+        if response.status != 200:
+            print(f"Unable to get exit code for container {name}: {data}")
+            return -1
+        return typing.cast(int, data.get("StatusCode", -1))
+
+    def start_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Optional[str]:
+        try:
+            exec_info = self._request_json(
+                "POST",
+                f"/containers/{name}/exec",
+                body={
+                    "Cmd": command,
+                    "Env": [f"{key}={value}" for key, value in env.items()],
+                    "AttachStdout": True,
+                    "AttachStderr": True,
+                },
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to exec in container {name}: {e}")
+            return None
+        return typing.cast(str, exec_info["Id"])
+
+    def follow_exec(self, exec_id: str) -> Iterator[str]:
+        try:
+            connection, response = self._stream(
+                "POST",
+                f"/exec/{exec_id}/start",
+                {},
+                {},
+                {"Detach": False, "Tty": False},
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to start exec {exec_id}: {e}")
+            return
+
+        # The exec is started without a tty, so its output is multiplexed
+        yield from self._lines(connection, response)
+
+    def wait_exec(self, exec_id: str) -> int:
+        # The output stream ends when the command exits, the engine may take
+        # a moment to record its exit code
+        for _ in range(50):
+            try:
+                exec_info = self._request_json("GET", f"/exec/{exec_id}/json")
+            except (DockerApiError, OSError) as e:
+                print(f"Unable to get exit code for exec {exec_id}: {e}")
+                return -1
+            if not exec_info.get("Running"):
+                exit_code = exec_info.get("ExitCode")
+                return -1 if exit_code is None else typing.cast(int, exit_code)
+            time.sleep(0.1)
+        print(f"Unable to get exit code for exec {exec_id}: still running")
+        return -1
+
+    def run_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Tuple[str, int]:
+        exec_id = self.start_exec(name, command, env)
+        if exec_id is None:
+            return f"Unable to exec in container {name}", -1
+        output: str = "\n".join(self.follow_exec(exec_id))
+        return output, self.wait_exec(exec_id)
+
+    def remove_container(self, name: str) -> bool:
+        try:
+            self._request_json(
+                "DELETE", f"/containers/{name}", {"force": 1}, ok=(200, 204, 404)
+            )
+        except (DockerApiError, OSError) as e:
+            print(f"Unable to remove container {name}: {e}")
+            return False
+        return True
+
+    def close(self) -> None:
+        connection: Optional[UnixHTTPConnection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,128 @@
+"""Ops playbook extra vars file module.
+
+This module writes the extra vars of an ops playbook to a json/yaml file,
+mounted read only into the ops container and passed as `-e @<file>`, so
+operations can be given arbitrarily large structured inputs (e.g. thousands
+of backup names) without quoting them into the container command or hitting
+command line length limits.
+
+Files are written to a host directory (a per process temporary directory
+removed at exit by default) mounted as a whole at `EXTRA_VARS_CONTAINER_DIR`,
+the volume mounts of an operation therefore do not change from one file to
+the next (e.g. pooled ops containers are reused).
+"""
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+__all__ = [
+    "EXTRA_VARS_CONTAINER_DIR",
+    "EXTRA_VARS_FORMATS",
+    "ExtraVarsFile",
+    "parse_command_args",
+]
+
+EXTRA_VARS_CONTAINER_DIR: str = "/home/runner/aoc-extra-vars"
+EXTRA_VARS_FORMATS: List[str] = ["json", "yaml"]
+
+_DEFAULT_DIR: Optional[str] = None
+_DEFAULT_DIR_LOCK: threading.Lock = threading.Lock()
+
+
+def _default_dir() -> str:
+    """Returns the per process extra vars directory (removed at exit)."""
+    global _DEFAULT_DIR
+    with _DEFAULT_DIR_LOCK:
+        if _DEFAULT_DIR is None:
+            _DEFAULT_DIR = tempfile.mkdtemp(prefix="aoc-extra-vars-")
+            atexit.register(shutil.rmtree, _DEFAULT_DIR, True)
+        return _DEFAULT_DIR
+
+
+def parse_command_args(command_args: List[str]) -> Dict[str, str]:
+    """Converts `key=value` command args to extra vars.
+
+    :param command_args: the `key=value` command args
+    """
+    extra_vars: Dict[str, str] = {}
+    for command_arg in command_args:
+        key, _, value = command_arg.partition("=")
+        extra_vars[key] = value
+    return extra_vars
+
+
+class ExtraVarsFile:
+    """ExtraVarsFile Class.
+
+    Perform the following to pass the extra vars as a file:
+        1. Instantiate the class constructing an object
+            > extra_vars_file = ExtraVarsFile()
+        2. Call the `write` method with the extra vars
+            > extra_vars_file.write({"aws_backup_names": [...]})
+        3. Mount the `volume_mount` and pass `-e @<container_path>`
+        4. Call the `remove` method once the playbook no longer needs it
+            > extra_vars_file.remove()
+    """
+
+    def __init__(self, directory: str = "", file_format: str = "json") -> None:
+        """Constructor.
+
+        :param directory: the host directory holding the file (a per process
+            temporary directory when empty)
+        :param file_format: the file format (`json` or `yaml`)
+        :raises ValueError: when the file format is unsupported
+        """
+        if file_format not in EXTRA_VARS_FORMATS:
+            raise ValueError(f"Unsupported extra vars file format: {file_format}")
+        self.directory: str = os.path.abspath(directory or _default_dir())
+        self.file_format: str = file_format
+        self.path: str = ""
+
+    @property
+    def container_path(self) -> str:
+        """Returns the file path within the ops container."""
+        return f"{EXTRA_VARS_CONTAINER_DIR}/{os.path.basename(self.path)}"
+
+    @property
+    def volume_mount(self) -> str:
+        """Returns the read only volume mount of the file directory."""
+        return f"{self.directory}:{EXTRA_VARS_CONTAINER_DIR}:ro"
+
+    def write(self, extra_vars: Dict[str, Any]) -> str:
+        """Writes the extra vars to a new file (replacing the previous one).
+
+        :param extra_vars: the extra vars
+        :return: the host file path
+        """
+        self.remove()
+        os.makedirs(self.directory, exist_ok=True)
+        # The container user may differ from the host one
+        os.chmod(self.directory, 0o755)
+        fd, self.path = tempfile.mkstemp(
+            prefix="extra-vars-", suffix=f".{self.file_format}", dir=self.directory
+        )
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            if self.file_format == "yaml":
+                import yaml
+
+                yaml.safe_dump(extra_vars, f, default_flow_style=False)
+            else:
+                json.dump(extra_vars, f)
+        return self.path
+
+    def remove(self) -> None:
+        """Removes the file (if written)."""
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = ""
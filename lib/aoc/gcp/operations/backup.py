@@ -5,11 +5,14 @@ AoC deployment on GCP cloud.
 """
 import typing
 from typing import Dict
+from typing import Optional
 from typing import TypedDict
 
-from pytest_ansible.host_manager import BaseHostManager
-
 from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+
+if typing.TYPE_CHECKING:
+    from pytest_ansible.host_manager import BaseHostManager
 
 __all__ = [
     "AocGcpBackup",
@@ -41,8 +44,9 @@ class AocGcpBackup(OpsContainer):
         aoc_ops_image_tag: str,
         aoc_image_registry_username: str,
         aoc_image_registry_password: str,
-        ansible_module: BaseHostManager,
+        ansible_module: "BaseHostManager",
         command_generator_vars: AocGcpBackupDataVars,
+        options: Optional[OpsContainerOptions] = None,
     ) -> None:
         """Constructor.
 
@@ -55,6 +59,7 @@ class AocGcpBackup(OpsContainer):
             the image registry holding aoc operations image
         :param ansible_module: the pytest ansible module fixture
         :param command_generator_vars: the data to provide to aoc operations command generator playbooks
+        :param options: the ops container tunable options
         """
         super().__init__(
             "gcp",
@@ -64,6 +69,7 @@ class AocGcpBackup(OpsContainer):
             aoc_image_registry_username,
             aoc_image_registry_password,
             ansible_module,
+            options,
         )
 
         self.command_generator_vars: AocGcpBackupDataVars = command_generator_vars
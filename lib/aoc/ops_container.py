@@ -3,12 +3,173 @@
 This package contains additional packages/modules "libraries" that
 handle Ansible On Clouds operations using the ops container image.
 """
+import asyncio
+import collections
+import copy
+import os
+import shlex
+import threading
 import typing
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
 from typing import Dict
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Tuple
+from typing import TypedDict
+from typing import TypeVar
+
+from lib.aoc.executors.ansible_executor import AnsibleContainerExecutor
+from lib.aoc.executors.base import ContainerExecutor
+from lib.aoc.executors.docker_api_executor import DockerApiContainerExecutor
+from lib.aoc.extra_vars import ExtraVarsFile
+from lib.aoc.extra_vars import parse_command_args
+from lib.aoc.ops_container_cache import OpsContainerCache
+from lib.aoc.ops_container_pool import DEFAULT_POOL_MAX_USES
+from lib.aoc.ops_container_pool import OPS_CONTAINER_POOL
+from lib.aoc.ops_container_run import OpsContainerRun
+from lib.aoc.playbook_output import DEFAULT_SLOWEST_TASKS
+from lib.aoc.playbook_output import format_slowest_tasks
+from lib.aoc.playbook_output import PlaybookOutputParser
+from lib.aoc.playbook_output import PlaybookReport
+from lib.aoc.registry import get_remote_manifest_digest
+from lib.aoc.tracing import traced
+
+if typing.TYPE_CHECKING:
+    from pytest_ansible.host_manager import BaseHostManager
+
+DEFAULT_REGISTRY_LOGIN_TTL: int = 43200
+DEFAULT_IMAGE_DIGEST_TTL: int = 3600
+DEFAULT_STREAM_OUTPUT_TAIL_LINES: int = 2000
+
+# The playbook task timings are taken from the profile_tasks callback output
+PROFILE_TASKS_CALLBACK: str = "profile_tasks"
+
+# Ansible module executions are not thread safe, serialize them per process
+ANSIBLE_MODULE_LOCK: threading.RLock = threading.RLock()
+
+# Docker api executors keep their connections alive, share them per socket
+_DOCKER_API_EXECUTORS: Dict[str, DockerApiContainerExecutor] = {}
+_DOCKER_API_EXECUTORS_LOCK: threading.Lock = threading.Lock()
+
+OpsContainerType = TypeVar("OpsContainerType", bound="OpsContainer")
+
+
+class OpsContainerOptions(TypedDict, total=False):
+    """Ops container tunable options.
+
+    cache_path: the host wide ops container cache file
+    registry_login_ttl: seconds a successful registry login is reused (0 disables)
+    image_digest_ttl: seconds a verified local image digest is reused (0 disables)
+    executor: the container executor backend, `ansible` (community.docker
+        modules) or `docker-api` (docker/podman engine api over its socket)
+    container_socket: the container engine socket used by the docker-api executor
+    container_cli: the container runtime cli used by the ansible executor
+        to follow container logs
+    stream_output: follow the container output line by line while it runs
+    stream_output_tail_lines: number of trailing output lines kept in memory
+        and returned as the playbook output when streaming
+    output_log_dir: directory to write each container output to `<name>.log`
+    playbook_report_dir: directory to write each container playbook task
+        timings to `<name>.tasks.json`, the slowest tasks are printed as well
+        (the profile_tasks callback is enabled in the container)
+    playbook_report_top: number of slowest playbook tasks printed
+    pool_containers: run the playbooks with exec in long lived ops containers
+        pooled per image/volume mounts instead of a container per playbook
+    pool_max_uses: number of playbooks run in a pooled container before it
+        is recycled (failed playbooks always recycle it)
+    container_name_suffix: suffix appended to the container names (e.g. the
+        pytest-xdist worker id) so concurrent sessions do not collide
+    verified_image_digest: the ops image digest verified by a previous run
+        (e.g. a resume checkpoint), the image pull is skipped while the local
+        image digest matches it
+    extra_vars_transport: how the command args are passed to the playbook,
+        `cli` (`-e 'key=value ...'`) or `file` (written to an extra vars file
+        mounted read only and passed as `-e @<file>`), the structured
+        `extra_vars` are always passed as a file
+    extra_vars_format: the extra vars file format, `json` or `yaml`
+    extra_vars_dir: the host directory holding the extra vars files (a per
+        process temporary directory by default)
+    defer_image_pull: skip the registry login/image pull when constructing
+        the operation, the image is prepared by `prepare_image` (e.g. as a
+        `SetupGraph` step running alongside the other setup steps) or before
+        the first container run
+    """
+
+    cache_path: str
+    registry_login_ttl: int
+    image_digest_ttl: int
+    executor: str
+    container_socket: str
+    container_cli: str
+    stream_output: bool
+    stream_output_tail_lines: int
+    output_log_dir: str
+    playbook_report_dir: str
+    playbook_report_top: int
+    pool_containers: bool
+    pool_max_uses: int
+    container_name_suffix: str
+    verified_image_digest: str
+    extra_vars_transport: str
+    extra_vars_format: str
+    extra_vars_dir: str
+    defer_image_pull: bool
+
+
+class _ImageState:
+    """Ops image state shared by an operation and its clones (see `clone`)."""
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.ready: threading.Event = threading.Event()
+        self.lock: threading.Lock = threading.Lock()
+        self.digest: Optional[str] = None
+
+
+class _OutputFollower:
+    """Hands each followed output line to the output callbacks (and log).
+
+    Shared by the blocking and asyncio output followers (see
+    `OpsContainer._follow_output`), keeping the trailing
+    `stream_output_tail_lines` lines as the playbook output.
+    """
+
+    def __init__(self, ops_container: "OpsContainer", name: str) -> None:
+        """Constructor.
+
+        :param ops_container: the ops container whose output is followed
+        :param name: the container name
+        """
+        self.ops_container: "OpsContainer" = ops_container
+        self.tail: Deque[str] = collections.deque(
+            maxlen=ops_container.options.get(
+                "stream_output_tail_lines", DEFAULT_STREAM_OUTPUT_TAIL_LINES
+            )
+        )
+        self.output_log: Optional[typing.TextIO] = ops_container._open_output_log(name)
+
+    def __enter__(self) -> "_OutputFollower":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.output_log:
+            self.output_log.close()
 
-from pytest_ansible.host_manager import BaseHostManager
+    def __call__(self, line: str) -> None:
+        """Handles the followed output line."""
+        self.tail.append(line)
+        self.ops_container._emit_output_line(line)
+        if self.output_log:
+            self.output_log.write(f"{line}\n")
+
+    def output(self) -> str:
+        """Returns the trailing output lines."""
+        return "\n".join(self.tail)
 
 
 class OpsContainerImageMixin:
@@ -49,7 +210,8 @@ class OpsContainer(OpsContainerImageMixin):
         aoc_ops_image_tag: str,
         aoc_image_registry_username: str,
         aoc_image_registry_password: str,
-        ansible_module: BaseHostManager,
+        ansible_module: "BaseHostManager",
+        options: Optional[OpsContainerOptions] = None,
     ) -> None:
         """Constructor.
 
@@ -62,6 +224,7 @@ class OpsContainer(OpsContainerImageMixin):
         :param aoc_image_registry_password: the password to authenticate with
             the image registry holding aoc operations image
         :param ansible_module: the pytest ansible module fixture
+        :param options: the ops container tunable options
         """
         self.cloud: str = cloud
         self.aoc_version: str = aoc_version
@@ -69,55 +232,239 @@ class OpsContainer(OpsContainerImageMixin):
         self.aoc_ops_image_tag: str = aoc_ops_image_tag
         self.aoc_image_registry_username: str = aoc_image_registry_username
         self.aoc_image_registry_password: str = aoc_image_registry_password
-        self.ansible_module: BaseHostManager = ansible_module
+        self.ansible_module: "BaseHostManager" = ansible_module
+        self.options: OpsContainerOptions = options or OpsContainerOptions()
+        self.cache: OpsContainerCache = OpsContainerCache.get(
+            self.options.get("cache_path", "")
+        )
+        self.executor: ContainerExecutor = self.create_executor()
 
         if not self.__validate():
             raise SystemExit(1)
 
         self._command: str = ""
         self.command_args: List[str] = []
+        self.extra_vars: Dict[str, Any] = {}
+        self.extra_vars_file: Optional[ExtraVarsFile] = None
         self.env_vars: Dict[str, str] = {}
         self.volume_mounts: List[str] = []
+        self.output_callbacks: List[Callable[[str], None]] = [self.print_output_line]
+        self.playbook_report: Optional[PlaybookReport] = None
+        # Shared with the operation clones (see `clone`)
+        self._image: _ImageState = _ImageState()
 
-        # Authenticate with ops container image registry
-        if not self.registry_login(
-            self.aoc_ops_image.split("/")[0],
-            self.aoc_image_registry_username,
-            self.aoc_image_registry_password,
+        if not self.options.get("defer_image_pull", False) and not (
+            self.prepare_image()
         ):
             raise SystemExit(1)
 
-        # Pull ops container image
-        if not self.pull_image(self.aoc_ops_image, self.aoc_ops_image_tag):
-            raise SystemExit(1)
+    def run_module(self, module: str, **kwargs: Any) -> Any:
+        """Runs the ansible module on the host pattern provided by the fixture.
+
+        Module runs are serialized across threads as ansible is not thread safe.
+
+        :param module: the ansible module name
+        :param kwargs: the ansible module arguments
+        :return: the ansible module results
+        """
+        with ANSIBLE_MODULE_LOCK:
+            return getattr(self.ansible_module, module)(**kwargs)
 
+    def create_executor(self) -> ContainerExecutor:
+        """Creates the container executor backend selected by the options.
+
+        :raises ValueError: when the executor option is unsupported
+        """
+        executor: str = self.options.get("executor", "ansible")
+        if executor == "ansible":
+            return AnsibleContainerExecutor(
+                self.run_module, self.options.get("container_cli", "docker")
+            )
+        if executor == "docker-api":
+            socket_path: str = self.options.get("container_socket", "")
+            with _DOCKER_API_EXECUTORS_LOCK:
+                if socket_path not in _DOCKER_API_EXECUTORS:
+                    _DOCKER_API_EXECUTORS[socket_path] = DockerApiContainerExecutor(
+                        socket_path
+                    )
+                return _DOCKER_API_EXECUTORS[socket_path]
+        raise ValueError(f"Unsupported ops container executor: {executor}")
+
+    def clone(
+        self: OpsContainerType, ansible_module: Optional["BaseHostManager"] = None
+    ) -> OpsContainerType:
+        """Returns a copy of the operation sharing its authenticated/pulled image.
+
+        The copy has its own command, command args, env vars, volume mounts,
+        output callbacks and options so it can be prepared/run independently
+        (e.g. concurrently) without constructing a new operation (which would
+        login/pull again).
+
+        :param ansible_module: the pytest ansible module fixture the copy runs
+            ansible modules with (e.g. the one of the current test), the
+            operation one is shared when none
+        """
+        clone = copy.copy(self)
+        if ansible_module is not None:
+            clone.ansible_module = ansible_module
+            clone.executor = clone.create_executor()
+            clone.executor.registry_auth.update(self.executor.registry_auth)
+        clone._command = ""
+        clone.command_args = []
+        clone.extra_vars = {}
+        clone.extra_vars_file = None
+        clone.env_vars = {}
+        clone.volume_mounts = []
+        clone.output_callbacks = [clone.print_output_line]
+        clone.playbook_report = None
+        clone.options = OpsContainerOptions(**self.options)
+        return clone
+
+    def streaming_clone(self: OpsContainerType, label: str) -> OpsContainerType:
+        """Returns a copy of the operation streaming its labelled output.
+
+        Operations run concurrently (e.g. one per stack) stream their output,
+        each line printed prefixed by `[<label>]`, so their ops container runs
+        are not serialized while waiting on the playbooks (see `clone`).
+
+        :param label: the label printed before each output line
+        """
+        clone = self.clone()
+        clone.options["stream_output"] = True
+        clone.output_callbacks = [lambda line: print(f"[{label}] {line}", flush=True)]
+        return clone
+
+    def trace_attributes(self) -> Dict[str, str]:
+        """Returns the attributes recorded on the operation tracing spans."""
+        return {
+            "aoc.cloud": self.cloud,
+            "aoc.version": self.aoc_version,
+            "aoc.ops_image_tag": self.aoc_ops_image_tag,
+        }
+
+    @traced("ops_container.registry_login", registry="aoc.registry")
     def registry_login(self, registry: str, username: str, password: str) -> bool:
         """Logins to the registry provided using username/password
 
+        Successful logins are cached (per registry/username) for the configured
+        registry login ttl, skipping the login when a cached one is found.
+
         :param registry: the registry hostname
         :param username: the registry username to authenticate with
         :param password: the registry password to authenticate with
         """
-        result = self.ansible_module.docker_login(
-            registry_url=registry,
-            username=username,
-            password=password,
-        )
-        if "failed" in result.contacted["localhost"]:
-            print(result.contacted["localhost"]["msg"])
+        ttl: int = self.options.get("registry_login_ttl", DEFAULT_REGISTRY_LOGIN_TTL)
+        self.executor.add_registry_auth(registry, username, password)
+        if self.cache.has_login(registry, username, ttl):
+            return True
+
+        if not self.executor.registry_login(registry, username, password):
+            self.cache.invalidate_login(registry, username)
             return False
+
+        if ttl > 0:
+            self.cache.record_login(registry, username)
         return True
 
+    @property
+    def image_digest(self) -> Optional[str]:
+        """The ops image digest (when known), shared with the clones."""
+        return self._image.digest
+
+    @image_digest.setter
+    def image_digest(self, digest: Optional[str]) -> None:
+        self._image.digest = digest
+
+    def prepare_image(self) -> bool:
+        """Authenticates with the ops image registry and pulls the ops image.
+
+        The image is prepared once for the operation and its clones, later
+        calls return right away.
+        """
+        with self._image.lock:
+            if self._image.ready.is_set():
+                return True
+
+            # Authenticate with ops container image registry
+            if not self.registry_login(
+                self.aoc_ops_image.split("/")[0],
+                self.aoc_image_registry_username,
+                self.aoc_image_registry_password,
+            ):
+                return False
+
+            # Pull ops container image
+            if not self.pull_image(self.aoc_ops_image, self.aoc_ops_image_tag):
+                return False
+
+            self._image.ready.set()
+            return True
+
+    def get_local_image_digest(self, image: str, tag: str) -> Optional[str]:
+        """Gets the manifest digest of the image/tag present on the host.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        :return: the image digest or none when the image is not present
+        """
+        return self.executor.get_image_digest(image, tag)
+
+    @traced("ops_container.pull_image", image="aoc.image", tag="aoc.image_tag")
     def pull_image(self, image: str, tag: str) -> bool:
         """Pull the image/tag provided.
 
+        The pull is skipped when the local image digest matches the
+        `verified_image_digest` option, when the image/tag was verified within
+        the configured image digest ttl (and the local image still has the
+        verified digest) or when the local image digest matches the remote
+        registry manifest digest. The image digest (when known) is kept as
+        `image_digest`.
+
         :param image: the container image fqdn
         :param tag: the container image tag
         """
-        result = self.ansible_module.docker_image(name=image, tag=tag, source="pull")
-        if "failed" in result.contacted["localhost"]:
-            print(result.contacted["localhost"]["msg"])
+        verified_digest: str = self.options.get("verified_image_digest", "")
+        if verified_digest and verified_digest == self.get_local_image_digest(
+            image, tag
+        ):
+            print(f"Image {image}:{tag} was verified ({verified_digest}).")
+            self.image_digest = verified_digest
+            return True
+
+        ttl: int = self.options.get("image_digest_ttl", DEFAULT_IMAGE_DIGEST_TTL)
+        if ttl > 0:
+            local_digest = self.get_local_image_digest(image, tag)
+            cached_digest = self.cache.get_image_digest(image, tag, ttl)
+            if cached_digest and cached_digest == local_digest:
+                self.image_digest = cached_digest
+                return True
+            if cached_digest:
+                # The image was removed/re-tagged since it was verified
+                print(
+                    f"Image {image}:{tag} local digest {local_digest} differs from "
+                    f"the verified one ({cached_digest})."
+                )
+                self.cache.invalidate_image(image, tag)
+
+            if local_digest and local_digest == get_remote_manifest_digest(
+                image,
+                tag,
+                self.aoc_image_registry_username,
+                self.aoc_image_registry_password,
+            ):
+                print(f"Image {image}:{tag} is up to date ({local_digest}).")
+                self.cache.record_image_digest(image, tag, local_digest)
+                self.image_digest = local_digest
+                return True
+
+        pulled, digest = self.executor.pull_image(image, tag)
+        if not pulled:
+            self.cache.invalidate_image(image, tag)
             return False
+
+        if ttl > 0 and digest:
+            self.cache.record_image_digest(image, tag, digest)
+        self.image_digest = digest
         return True
 
     @property
@@ -127,8 +474,56 @@ class OpsContainer(OpsContainerImageMixin):
 
     @command.setter
     def command(self, value: str) -> None:
-        """Sets the command string value for the command generator vars container."""
-        self._command = f"{value} -e '{' '.join(self.command_args)}'"
+        """Sets the command string value for the command generator vars container.
+
+        The structured `extra_vars` (and the command args with the `file`
+        extra vars transport) are written to an extra vars file passed as
+        `-e @<file>`, see `ExtraVarsFile`.
+        """
+        command_args: List[str] = self.command_args
+        file_vars: Dict[str, Any] = dict(self.extra_vars)
+        if self.options.get("extra_vars_transport", "cli") == "file":
+            file_vars = {**parse_command_args(command_args), **file_vars}
+            command_args = []
+
+        if self.extra_vars_file:
+            self.extra_vars_file.remove()
+        if not file_vars:
+            self.extra_vars_file = None
+            self._command = f"{value} -e '{' '.join(command_args)}'"
+            return
+
+        self.extra_vars_file = ExtraVarsFile(
+            self.options.get("extra_vars_dir", ""),
+            self.options.get("extra_vars_format", "json"),
+        )
+        self.extra_vars_file.write(file_vars)
+        self._command = (
+            f"{value} -e '{' '.join(command_args)}'" if command_args else value
+        ) + f" -e @{self.extra_vars_file.container_path}"
+
+    @property
+    def container_volume_mounts(self) -> List[str]:
+        """Returns the volume mounts, including the extra vars file one."""
+        if self.extra_vars_file:
+            return [*self.volume_mounts, self.extra_vars_file.volume_mount]
+        return self.volume_mounts
+
+    @property
+    def container_env_vars(self) -> Dict[str, str]:
+        """Returns the env vars, enabling profile_tasks for playbook reports."""
+        if not self.options.get("playbook_report_dir", ""):
+            return self.env_vars
+        callbacks: List[str] = [
+            callback
+            for callback in self.env_vars.get("ANSIBLE_CALLBACKS_ENABLED", "").split(
+                ","
+            )
+            if callback
+        ]
+        if PROFILE_TASKS_CALLBACK not in callbacks:
+            callbacks.append(PROFILE_TASKS_CALLBACK)
+        return {**self.env_vars, "ANSIBLE_CALLBACKS_ENABLED": ",".join(callbacks)}
 
     def __validate(self) -> bool:
         """Validates any necessary input prior to performing backups.
@@ -159,24 +554,324 @@ class OpsContainer(OpsContainerImageMixin):
         output, result = self.run_container("container")
         return result
 
+    @staticmethod
+    def print_output_line(line: str) -> None:
+        """Default output callback printing each container output line."""
+        print(line, flush=True)
+
+    def _emit_output_line(self, line: str) -> None:
+        """Hands a container output line to each output callback."""
+        for callback in self.output_callbacks:
+            callback(line)
+
+    def _open_output_log(self, name: str) -> Optional[typing.TextIO]:
+        """Opens the output log file for the container when configured."""
+        log_dir: str = self.options.get("output_log_dir", "")
+        if not log_dir:
+            return None
+        os.makedirs(log_dir, exist_ok=True)
+        return open(os.path.join(log_dir, f"{name}.log"), "w")
+
+    def container_name(self, name: str) -> str:
+        """Returns the container name suffixed with `container_name_suffix`.
+
+        :param name: the container base name
+        """
+        suffix: str = self.options.get("container_name_suffix", "")
+        return f"{name}-{suffix}" if suffix else name
+
+    @traced("ops_container.run_container", name="aoc.container_name")
     def run_container(self, name: str) -> Tuple[str, bool]:
-        """Runs the ops container with necessary input."""
-        result = self.ansible_module.docker_container(
+        """Runs the ops container with necessary input.
+
+        When the `stream_output` option is enabled, the container output is
+        followed line by line (see `stream_container`) instead of buffered
+        until the container exits (see `buffer_container`). When the
+        `pool_containers` option is enabled, the playbook is run with exec in
+        a pooled ops container instead (see `exec_pooled_container`).
+
+        When the `playbook_report_dir` option is set, the output is parsed
+        into playbook task records (kept as `playbook_report`) written to
+        `<playbook_report_dir>/<name>.tasks.json` and the slowest tasks are
+        printed.
+
+        :param name: the container name
+        :return: the playbook output and whether the playbook succeeded
+        """
+        if not self.prepare_image():
+            return f"Unable to prepare image for {name}", False
+
+        run: Callable[[str], Tuple[str, bool]] = self.buffer_container
+        if self.options.get("pool_containers", False):
+            run = self.exec_pooled_container
+        elif self.options.get("stream_output", False):
+            run = self.stream_container
+
+        report_dir: str = self.options.get("playbook_report_dir", "")
+        if not report_dir:
+            return run(name)
+
+        parser = PlaybookOutputParser()
+        self.output_callbacks.append(parser)
+        try:
+            output, result = run(name)
+        finally:
+            self.output_callbacks.remove(parser)
+
+        self._write_playbook_report(name, parser)
+        return output, result
+
+    def _write_playbook_report(self, name: str, parser: PlaybookOutputParser) -> None:
+        """Writes the parsed playbook report, printing the slowest tasks."""
+        self.playbook_report = parser.write_json(
+            os.path.join(
+                self.options.get("playbook_report_dir", ""), f"{name}.tasks.json"
+            )
+        )
+        print(
+            format_slowest_tasks(
+                self.playbook_report,
+                self.options.get("playbook_report_top", DEFAULT_SLOWEST_TASKS),
+            ),
+            flush=True,
+        )
+
+    def run_container_async(self, name: str) -> OpsContainerRun[Tuple[str, bool]]:
+        """Runs the ops container from the running event loop.
+
+        The asyncio counterpart of `run_container`: the container is waited
+        on (and its output followed) without holding a thread when the
+        executor supports it (see `ContainerExecutor.run_container_async`).
+        Pooled container execs are run in a worker thread.
+
+        :param name: the container name
+        :return: the run handle, awaiting it returns the playbook output and
+            whether the playbook succeeded
+        """
+        return OpsContainerRun(self._run_container_async(name), name)
+
+    @traced("ops_container.run_container", name="aoc.container_name")
+    async def _run_container_async(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops container (see `run_container_async`)."""
+        if not self._image.ready.is_set() and not (
+            await asyncio.to_thread(self.prepare_image)
+        ):
+            return f"Unable to prepare image for {name}", False
+
+        run: Callable[[str], Awaitable[Tuple[str, bool]]] = self.buffer_container_async
+        if self.options.get("pool_containers", False):
+            run = self._exec_pooled_container_async
+        elif self.options.get("stream_output", False):
+            run = self.stream_container_async
+
+        if not self.options.get("playbook_report_dir", ""):
+            return await run(name)
+
+        parser = PlaybookOutputParser()
+        self.output_callbacks.append(parser)
+        try:
+            output, result = await run(name)
+        finally:
+            self.output_callbacks.remove(parser)
+
+        self._write_playbook_report(name, parser)
+        return output, result
+
+    async def _remove_container_async(self, name: str) -> None:
+        """Removes the container, even when the run is being cancelled."""
+        await asyncio.shield(asyncio.to_thread(self.executor.remove_container, name))
+
+    async def buffer_container_async(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops container, buffering its output until it exits (asyncio).
+
+        :param name: the container name
+        :return: the playbook output and whether the playbook succeeded
+        """
+        try:
+            playbook_output, status = await self.executor.run_container_async(
+                name=name,
+                image=f"{self.aoc_ops_image}:{self.aoc_ops_image_tag}",
+                command=self.command,
+                volumes=self.container_volume_mounts,
+                env=self.container_env_vars,
+            )
+        finally:
+            await self._remove_container_async(name)
+        self._record_output(name, playbook_output)
+
+        return playbook_output, status == 0
+
+    async def _follow_output_async(self, name: str, lines: AsyncIterator[str]) -> str:
+        """Hands each followed output line to the output callbacks (asyncio).
+
+        :param name: the container name
+        :param lines: the followed output lines
+        :return: the trailing `stream_output_tail_lines` output lines
+        """
+        with _OutputFollower(self, name) as follower:
+            async for line in lines:
+                follower(line)
+        return follower.output()
+
+    async def stream_container_async(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops container detached, streaming its output (asyncio).
+
+        :param name: the container name
+        :return: the playbook output tail and whether the playbook succeeded
+        """
+        try:
+            if not await asyncio.to_thread(
+                self.executor.start_container,
+                name=name,
+                image=f"{self.aoc_ops_image}:{self.aoc_ops_image_tag}",
+                command=self.command,
+                volumes=self.container_volume_mounts,
+                env=self.container_env_vars,
+            ):
+                return f"Unable to start container {name}", False
+
+            output: str = await self._follow_output_async(
+                name, self.executor.follow_logs_async(name)
+            )
+
+            status: int = await self.executor.wait_container_async(name)
+        finally:
+            await self._remove_container_async(name)
+
+        return output, status == 0
+
+    async def _exec_pooled_container_async(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops playbook in a pooled ops container in a worker thread."""
+        return await asyncio.to_thread(self.exec_pooled_container, name)
+
+    def buffer_container(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops container, buffering its output until it exits.
+
+        :param name: the container name
+        :return: the playbook output and whether the playbook succeeded
+        """
+        playbook_output, status = self.executor.run_container(
             name=name,
             image=f"{self.aoc_ops_image}:{self.aoc_ops_image_tag}",
             command=self.command,
-            detach="false",
-            state="started",
-            volumes=self.volume_mounts,
-            env=self.env_vars,
+            volumes=self.container_volume_mounts,
+            env=self.container_env_vars,
         )
+        self._record_output(name, playbook_output)
+
+        self.executor.remove_container(name)
+
+        return playbook_output, status == 0
+
+    def _record_output(self, name: str, output: str) -> None:
+        """Hands the buffered output lines to the output callbacks (and log)."""
+        for line in output.splitlines():
+            self._emit_output_line(line)
+
+        output_log = self._open_output_log(name)
+        if output_log:
+            with output_log:
+                output_log.write(output)
 
-        playbook_output: str = result.contacted["localhost"]["container"]["Output"]
-        print(playbook_output)
+    def _follow_output(self, name: str, lines: Iterator[str]) -> str:
+        """Hands each followed output line to the output callbacks (and log).
 
-        self.ansible_module.docker_container(name=name, state="absent")
+        :param name: the container name
+        :param lines: the followed output lines
+        :return: the trailing `stream_output_tail_lines` output lines
+        """
+        with _OutputFollower(self, name) as follower:
+            for line in lines:
+                follower(line)
+        return follower.output()
+
+    def follow_container_logs(self, name: str) -> Iterator[str]:
+        """Follows the container logs, yielding each line until it exits.
+
+        :param name: the container name
+        """
+        return self.executor.follow_logs(name)
+
+    def wait_container(self, name: str) -> int:
+        """Waits for the container to exit.
 
-        return (
-            playbook_output,
-            typing.cast(int, result.contacted["localhost"]["status"]) == 0,
+        :param name: the container name
+        :return: the container exit code (-1 when it could not be determined)
+        """
+        return self.executor.wait_container(name)
+
+    def stream_container(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops container detached, streaming its output.
+
+        Each output line is handed to the output callbacks (and output log)
+        as soon as it is produced. Only the trailing `stream_output_tail_lines`
+        lines are kept in memory and returned as the playbook output. The
+        container is removed even when following it is interrupted.
+
+        :param name: the container name
+        :return: the playbook output tail and whether the playbook succeeded
+        """
+        try:
+            if not self.executor.start_container(
+                name=name,
+                image=f"{self.aoc_ops_image}:{self.aoc_ops_image_tag}",
+                command=self.command,
+                volumes=self.container_volume_mounts,
+                env=self.container_env_vars,
+            ):
+                return f"Unable to start container {name}", False
+
+            output: str = self._follow_output(name, self.follow_container_logs(name))
+
+            status: int = self.wait_container(name)
+        finally:
+            self.executor.remove_container(name)
+
+        return output, status == 0
+
+    def exec_pooled_container(self, name: str) -> Tuple[str, bool]:
+        """Runs the ops playbook with exec in a pooled ops container.
+
+        The pooled container (per image and volume mounts) is kept running
+        idle, the playbook command is exec'd prefixed by the image entrypoint.
+        The output is streamed or buffered as by `stream_container` or
+        `buffer_container`. The container is returned to the pool once done,
+        it is recycled after `pool_max_uses` playbooks or when one fails.
+
+        :param name: the container name (used for the output log/report)
+        :return: the playbook output and whether the playbook succeeded
+        """
+        container = OPS_CONTAINER_POOL.acquire(
+            self.executor,
+            f"{self.aoc_ops_image}:{self.aoc_ops_image_tag}",
+            self.container_volume_mounts,
         )
+        if container is None:
+            return f"Unable to start a pooled container for {name}", False
+
+        command: List[str] = container["entrypoint"] + shlex.split(self.command)
+        output: str = f'Unable to exec in container {container["name"]}'
+        status: int = -1
+        try:
+            if self.options.get("stream_output", False):
+                exec_id = self.executor.start_exec(
+                    container["name"], command, self.container_env_vars
+                )
+                if exec_id is not None:
+                    output = self._follow_output(
+                        name, self.executor.follow_exec(exec_id)
+                    )
+                    status = self.executor.wait_exec(exec_id)
+            else:
+                output, status = self.executor.run_exec(
+                    container["name"], command, self.container_env_vars
+                )
+                self._record_output(name, output)
+        finally:
+            OPS_CONTAINER_POOL.release(
+                container,
+                healthy=status == 0,
+                max_uses=self.options.get("pool_max_uses", DEFAULT_POOL_MAX_USES),
+            )
+
+        return output, status == 0
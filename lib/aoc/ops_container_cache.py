@@ -0,0 +1,218 @@
+"""Ops container cache module.
+
+This module contains a host wide cache remembering successful image
+registry logins and verified ops container image digests. It allows
+consecutive ops container constructions (within the same session or
+across sessions on the same host) to skip redundant logins/pulls.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import TypedDict
+
+__all__ = [
+    "DEFAULT_CACHE_DIR",
+    "DEFAULT_CACHE_PATH",
+    "OpsContainerCache",
+]
+
+DEFAULT_CACHE_DIR: str = os.path.join(
+    os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "aoc-tests"
+)
+DEFAULT_CACHE_PATH: str = os.path.join(DEFAULT_CACHE_DIR, "ops-container-cache.json")
+
+
+class OpsContainerCacheEntry(TypedDict, total=False):
+    """Ops container cache entry."""
+
+    created: float
+    digest: str
+
+
+class OpsContainerCache:
+    """OpsContainerCache Class.
+
+    Entries are kept in memory for the session and persisted to a json file
+    shared by all sessions on the host. Use `OpsContainerCache.get` to obtain
+    the shared instance for a cache file.
+    """
+
+    _instances: Dict[str, "OpsContainerCache"] = {}
+    _instances_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        """Constructor.
+
+        :param path: the path to the json file persisting the cache
+        """
+        self.path: str = path
+        self._lock: threading.Lock = threading.Lock()
+        self._data: Dict[str, Dict[str, OpsContainerCacheEntry]] = {
+            "logins": {},
+            "images": {},
+        }
+        self._loaded: bool = False
+
+    @classmethod
+    def get(cls, path: str = "") -> "OpsContainerCache":
+        """Returns the session wide cache instance for the cache file path.
+
+        :param path: the path to the json file persisting the cache
+        """
+        path = os.path.expanduser(path or DEFAULT_CACHE_PATH)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Holds an exclusive lock on the cache file across processes."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Dict[str, OpsContainerCacheEntry]]:
+        """Reads the persisted cache file, ignoring missing/corrupt files."""
+        try:
+            with open(self.path) as f:
+                data: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return {"logins": {}, "images": {}}
+        return {
+            "logins": dict(data.get("logins", {})),
+            "images": dict(data.get("images", {})),
+        }
+
+    def _write(self, data: Dict[str, Dict[str, OpsContainerCacheEntry]]) -> None:
+        """Atomically writes the cache file."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _lookup(
+        self, section: str, key: str, ttl: int
+    ) -> Optional[OpsContainerCacheEntry]:
+        """Returns the unexpired entry, reloading from disk on a memory miss."""
+        if ttl <= 0:
+            return None
+
+        with self._lock:
+            if not self._loaded:
+                self._data = self._read()
+                self._loaded = True
+            entry = self._data[section].get(key)
+            if not entry or time.time() - entry.get("created", 0) >= ttl:
+                # Another session on this host may have refreshed the entry
+                self._data = self._read()
+                entry = self._data[section].get(key)
+            if entry and time.time() - entry.get("created", 0) < ttl:
+                return entry
+        return None
+
+    def _store(self, section: str, key: str, entry: OpsContainerCacheEntry) -> None:
+        """Records the entry in memory and in the persisted cache file."""
+        with self._lock:
+            try:
+                with self._file_lock():
+                    self._data = self._read()
+                    self._data[section][key] = entry
+                    self._write(self._data)
+            except OSError as e:
+                print(f"Unable to persist ops container cache {self.path}: {e}")
+                self._data[section][key] = entry
+            self._loaded = True
+
+    def _discard(self, section: str, key: str) -> None:
+        """Removes the entry from memory and from the persisted cache file."""
+        with self._lock:
+            try:
+                with self._file_lock():
+                    self._data = self._read()
+                    self._data[section].pop(key, None)
+                    self._write(self._data)
+            except OSError:
+                self._data[section].pop(key, None)
+
+    @staticmethod
+    def _login_key(registry: str, username: str) -> str:
+        """Returns the cache key for a registry login."""
+        return f"{username}@{registry}"
+
+    def has_login(self, registry: str, username: str, ttl: int) -> bool:
+        """Checks whether a successful registry login is cached.
+
+        :param registry: the registry hostname
+        :param username: the registry username authenticated with
+        :param ttl: the maximum age in seconds for the login to be reused
+        """
+        return (
+            self._lookup("logins", self._login_key(registry, username), ttl) is not None
+        )
+
+    def record_login(self, registry: str, username: str) -> None:
+        """Records a successful registry login.
+
+        :param registry: the registry hostname
+        :param username: the registry username authenticated with
+        """
+        self._store(
+            "logins",
+            self._login_key(registry, username),
+            OpsContainerCacheEntry(created=time.time()),
+        )
+
+    def invalidate_login(self, registry: str, username: str) -> None:
+        """Forgets a cached registry login (e.g. once credentials are rejected).
+
+        :param registry: the registry hostname
+        :param username: the registry username authenticated with
+        """
+        self._discard("logins", self._login_key(registry, username))
+
+    def get_image_digest(self, image: str, tag: str, ttl: int) -> Optional[str]:
+        """Gets the digest recorded when the image/tag was last verified/pulled.
+
+        The image may have been removed or re-tagged on the host since, the
+        caller compares the digest with the local image digest.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        :param ttl: the maximum age in seconds for the verification to be reused
+        """
+        entry = self._lookup("images", f"{image}:{tag}", ttl)
+        return entry.get("digest") if entry else None
+
+    def record_image_digest(self, image: str, tag: str, digest: str) -> None:
+        """Records the digest of an image/tag verified to be present locally.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        :param digest: the image manifest digest
+        """
+        self._store(
+            "images",
+            f"{image}:{tag}",
+            OpsContainerCacheEntry(created=time.time(), digest=digest),
+        )
+
+    def invalidate_image(self, image: str, tag: str) -> None:
+        """Forgets a cached image/tag verification.
+
+        :param image: the container image fqdn
+        :param tag: the container image tag
+        """
+        self._discard("images", f"{image}:{tag}")
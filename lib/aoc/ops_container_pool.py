@@ -0,0 +1,143 @@
+"""Ops container pool module.
+
+This module keeps long lived (idle) ops containers per image and volume
+mounts (e.g. the cloud credentials mount). Playbooks are run in them with
+exec, so back to back operations skip the container create/start/removal.
+Containers are recycled (removed) after a number of uses or on failure.
+"""
+import threading
+import uuid
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypedDict
+
+from lib.aoc.executors.base import ContainerExecutor
+
+__all__ = [
+    "DEFAULT_POOL_MAX_USES",
+    "OPS_CONTAINER_POOL",
+    "OpsContainerPool",
+    "PooledContainer",
+]
+
+DEFAULT_POOL_MAX_USES: int = 10
+
+PoolKey = Tuple[str, Tuple[str, ...]]
+
+
+class PooledContainer(TypedDict):
+    """Pooled ops container.
+
+    entrypoint is the image entrypoint, prepended to the exec'd commands (the
+    container itself runs idle). executor is the executor that started it
+    (used to remove it).
+    """
+
+    name: str
+    image: str
+    volumes: List[str]
+    entrypoint: List[str]
+    uses: int
+    executor: ContainerExecutor
+
+
+class OpsContainerPool:
+    """OpsContainerPool Class.
+
+    Perform the following to run a playbook in a pooled container:
+        1. Acquire an idle container (started when none is idle)
+            > container = OPS_CONTAINER_POOL.acquire(executor, image, volumes)
+        2. Run the playbook with exec
+            > executor.run_exec(container["name"], command, env)
+        3. Release the container, it is recycled when unhealthy or used up
+            > OPS_CONTAINER_POOL.release(container, healthy=status == 0)
+    """
+
+    def __init__(self, name_prefix: str = "aoc-ops-pool") -> None:
+        """Constructor.
+
+        :param name_prefix: the pooled container names prefix
+        """
+        self.name_prefix: str = name_prefix
+        self._lock: threading.Lock = threading.Lock()
+        self._idle: Dict[PoolKey, List[PooledContainer]] = {}
+
+    @staticmethod
+    def _key(image: str, volumes: List[str]) -> PoolKey:
+        """Returns the pool key of the image/volume mounts."""
+        return image, tuple(sorted(volumes))
+
+    def __len__(self) -> int:
+        """Returns the number of idle containers."""
+        with self._lock:
+            return sum(len(containers) for containers in self._idle.values())
+
+    def acquire(
+        self, executor: ContainerExecutor, image: str, volumes: List[str]
+    ) -> Optional[PooledContainer]:
+        """Acquires an idle container, starting one when none is idle.
+
+        :param executor: the executor used to start a container
+        :param image: the container image (including the tag)
+        :param volumes: the container volume mounts (src:dest[:mode])
+        :return: the container (none when it could not be started)
+        """
+        with self._lock:
+            idle = self._idle.get(self._key(image, volumes))
+            if idle:
+                return idle.pop()
+
+        entrypoint = executor.get_image_entrypoint(image)
+        if entrypoint is None:
+            return None
+
+        name: str = f"{self.name_prefix}-{uuid.uuid4().hex[:12]}"
+        if not executor.start_idle_container(name, image, volumes):
+            executor.remove_container(name)
+            return None
+        return PooledContainer(
+            name=name,
+            image=image,
+            volumes=list(volumes),
+            entrypoint=entrypoint,
+            uses=0,
+            executor=executor,
+        )
+
+    def release(
+        self,
+        container: PooledContainer,
+        healthy: bool,
+        max_uses: int = DEFAULT_POOL_MAX_USES,
+    ) -> None:
+        """Returns the container to the pool, recycling it when needed.
+
+        :param container: the acquired container
+        :param healthy: whether its last use succeeded (failed containers
+            are removed as they may be left in an unknown state)
+        :param max_uses: the number of uses after which it is removed
+        """
+        container["uses"] += 1
+        if not healthy or container["uses"] >= max_uses:
+            container["executor"].remove_container(container["name"])
+            return
+        with self._lock:
+            self._idle.setdefault(
+                self._key(container["image"], container["volumes"]), []
+            ).append(container)
+
+    def close(self) -> None:
+        """Removes every idle container."""
+        with self._lock:
+            containers = [
+                container for idle in self._idle.values() for container in idle
+            ]
+            self._idle = {}
+        for container in containers:
+            container["executor"].remove_container(container["name"])
+
+
+# Shared by every ops container in the session
+OPS_CONTAINER_POOL: OpsContainerPool = OpsContainerPool()
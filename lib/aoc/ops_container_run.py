@@ -0,0 +1,95 @@
+"""Ops container run handle module.
+
+This module wraps the asyncio ops container operations (e.g.
+`run_container_async`, `backup_stack_async`) in a handle started as an
+asyncio task, so one event loop can overlap many long running operations:
+each handle can be awaited, polled, cancelled or gathered.
+"""
+import asyncio
+from typing import Any
+from typing import Coroutine
+from typing import Generator
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+__all__ = [
+    "OpsContainerRun",
+]
+
+ResultType = TypeVar("ResultType")
+
+
+class OpsContainerRun(Generic[ResultType]):
+    """OpsContainerRun Class.
+
+    Perform the following to overlap operations from an event loop:
+        1. Start the operations (within a coroutine), each returns a handle
+            > runs = [backup.backup_stack_async() for backup in backups]
+        2. Poll the handles while doing something else (optional)
+            > runs[0].done(), runs[0].poll()
+        3. Await (or gather) the handles for the operation results
+            > results = await asyncio.gather(*runs)
+
+    Cancelling a handle removes the ops container it runs. Operations
+    running at the same time must not share the operation object (use
+    `OpsContainer.clone`), the command and args are per operation object.
+    """
+
+    def __init__(
+        self, coroutine: Coroutine[Any, Any, ResultType], name: str = ""
+    ) -> None:
+        """Constructor.
+
+        :param coroutine: the operation coroutine, started as an asyncio task
+        :param name: the run name (e.g. the container name)
+        :raises RuntimeError: when there is no running event loop
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            coroutine.close()
+            raise
+        self.name: str = name
+        self.task: "asyncio.Task[ResultType]" = loop.create_task(
+            coroutine, name=name or None
+        )
+
+    def __await__(self) -> Generator[Any, None, ResultType]:
+        """Waits for the operation to finish, returning its result."""
+        return self.task.__await__()
+
+    def done(self) -> bool:
+        """Returns whether the operation finished (or was cancelled)."""
+        return self.task.done()
+
+    def poll(self) -> Optional[ResultType]:
+        """Returns the operation result, none while it is still running.
+
+        :raises asyncio.CancelledError: when the operation was cancelled
+        :raises Exception: the exception the operation raised
+        """
+        return self.task.result() if self.task.done() else None
+
+    def cancel(self) -> bool:
+        """Cancels the operation (removing its ops container).
+
+        :return: whether the operation was still running
+        """
+        return self.task.cancel()
+
+    def cancelled(self) -> bool:
+        """Returns whether the operation was cancelled."""
+        return self.task.cancelled()
+
+    async def wait(self, timeout: Optional[float] = None) -> Optional[ResultType]:
+        """Waits for the operation to finish, up to timeout seconds.
+
+        Unlike `asyncio.wait_for`, the operation is not cancelled on timeout.
+
+        :param timeout: the maximum number of seconds to wait (none waits
+            until finished)
+        :return: the operation result, none when still running
+        """
+        await asyncio.wait({self.task}, timeout=timeout)
+        return self.poll()
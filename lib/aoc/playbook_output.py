@@ -0,0 +1,310 @@
+"""Playbook output module.
+
+This module parses the ansible output of the ops container playbooks into
+structured task records (play, task, host, status and timing). It is fed
+one line at a time (e.g. as an ops container output callback) so even
+multi megabyte outputs are parsed in a single streaming pass.
+
+Task timings are taken from the profile_tasks callback timestamps printed
+after each task header, e.g.
+    Wednesday 05 July 2023  14:02:11 +0000 (0:00:01.834)       0:00:00.512 ****
+where the parenthesized duration is the one of the previous task.
+"""
+import datetime
+import json
+import os
+import re
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TypedDict
+
+__all__ = [
+    "DEFAULT_SLOWEST_TASKS",
+    "PlaybookOutputParser",
+    "PlaybookReport",
+    "PlaybookTaskRecord",
+    "format_slowest_tasks",
+]
+
+DEFAULT_SLOWEST_TASKS: int = 10
+
+HEADER_RE = re.compile(r"^(PLAY|TASK|RUNNING HANDLER) \[(.*)\] \*+$")
+TIMESTAMP_RE = re.compile(
+    r"^\w+ (?P<date>\d{1,2} \w+ \d{4}\s+\d{2}:\d{2}:\d{2}) (?P<tz>[+-]\d{4}) "
+    r"\((?P<elapsed>\d+:\d{2}:\d{2}(?:\.\d+)?)\)\s+"
+    r"(?P<total>\d+:\d{2}:\d{2}(?:\.\d+)?) \*+$"
+)
+HOST_RESULT_RE = re.compile(
+    r"^(?P<status>ok|changed|skipping|fatal|failed|unreachable|included|rescued)"
+    r": \[(?P<host>[^\]]+)\](?P<rest>.*)$"
+)
+RETRY_RE = re.compile(r"^FAILED - RETRYING: \[(?P<host>[^\]]+)\]")
+RECAP_RE = re.compile(r"^(?P<host>\S+)\s+:\s+(?P<stats>(?:\w+=\d+\s*)+)$")
+
+# Per host status precedence, a task looping over items keeps the worst one
+STATUS_PRECEDENCE: List[str] = [
+    "included",
+    "skipping",
+    "ok",
+    "changed",
+    "rescued",
+    "ignored",
+    "unreachable",
+    "failed",
+]
+
+
+class PlaybookTaskRecord(TypedDict):
+    """Playbook task result for a host.
+
+    start_time (epoch seconds) and duration (seconds) are none when the
+    output has no profile_tasks timestamps. The duration is the task
+    duration (shared by every host of the task).
+    """
+
+    play: str
+    role: str
+    task: str
+    host: str
+    status: str
+    retries: int
+    start_time: Optional[float]
+    duration: Optional[float]
+    line: int
+
+
+class PlaybookReport(TypedDict):
+    """Parsed playbook output.
+
+    recap is the play recap stats keyed by host, total_duration is the
+    playbook duration reported by the last profile_tasks timestamp.
+    """
+
+    tasks: List[PlaybookTaskRecord]
+    recap: Dict[str, Dict[str, int]]
+    total_duration: Optional[float]
+    lines: int
+
+
+def _seconds(value: str) -> float:
+    """Returns the seconds of a h:mm:ss.fff duration."""
+    hours, minutes, seconds = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class PlaybookOutputParser:
+    """PlaybookOutputParser Class.
+
+    Perform the following to parse playbook output:
+        1. Instantiate the class constructing an object
+            > parser = PlaybookOutputParser()
+        2. Feed each output line (the parser is an output callback)
+            > ops_container.output_callbacks.append(parser)
+        3. Call the `report` method once the playbook finished
+            > parser.report()
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.tasks: List[PlaybookTaskRecord] = []
+        self.recap: Dict[str, Dict[str, int]] = {}
+        self.total_duration: Optional[float] = None
+        self.lines: int = 0
+
+        self._play: str = ""
+        self._task: Optional[str] = None
+        self._task_line: int = 0
+        self._task_start: Optional[float] = None
+        self._statuses: Dict[str, str] = {}
+        self._retries: Dict[str, int] = {}
+        self._last_host: str = ""
+        # Records of the ended task, awaiting its duration (next timestamp)
+        self._pending: List[PlaybookTaskRecord] = []
+        self._in_recap: bool = False
+        self._in_summary: bool = False
+
+    def __call__(self, line: str) -> None:
+        """Feeds the output line (output callback signature)."""
+        self.feed(line)
+
+    def feed(self, line: str) -> None:
+        """Parses the next output line.
+
+        :param line: the output line (without the line ending)
+        """
+        self.lines += 1
+        line = line.rstrip()
+        if not line:
+            return
+
+        header = HEADER_RE.match(line)
+        if header:
+            self._in_recap = self._in_summary = False
+            kind, name = header.groups()
+            self._end_task()
+            if kind == "PLAY":
+                self._play = name
+            else:
+                self._task = name
+                self._task_line = self.lines
+            return
+
+        if line.startswith("PLAY RECAP "):
+            self._end_task()
+            self._in_recap = True
+            return
+
+        if line.endswith("*"):
+            timestamp = TIMESTAMP_RE.match(line)
+            if timestamp:
+                self._timestamp(timestamp)
+                return
+
+        if self._in_summary:
+            return
+        if self._in_recap:
+            if line.startswith("====="):
+                self._in_summary = True
+                return
+            recap = RECAP_RE.match(line)
+            if recap:
+                self.recap[recap.group("host")] = {
+                    key: int(value)
+                    for key, _, value in (
+                        stat.partition("=") for stat in recap.group("stats").split()
+                    )
+                }
+            return
+
+        if self._task is None:
+            return
+
+        result = HOST_RESULT_RE.match(line)
+        if result:
+            status = result.group("status")
+            if status == "fatal":
+                status = "unreachable" if "UNREACHABLE!" in line else "failed"
+            self._set_status(result.group("host"), status)
+            return
+
+        retry = RETRY_RE.match(line)
+        if retry:
+            host = retry.group("host")
+            self._retries[host] = self._retries.get(host, 0) + 1
+            return
+
+        if line == "...ignoring" and self._last_host:
+            self._statuses[self._last_host] = "ignored"
+
+    def _set_status(self, host: str, status: str) -> None:
+        """Records the host status, keeping the worst one of looped items."""
+        current = self._statuses.get(host)
+        if current is None or STATUS_PRECEDENCE.index(status) > STATUS_PRECEDENCE.index(
+            current
+        ):
+            self._statuses[host] = status
+        self._last_host = host
+
+    def _timestamp(self, timestamp: "re.Match[str]") -> None:
+        """Assigns the previous task duration and the current task start."""
+        self._flush(_seconds(timestamp.group("elapsed")))
+        self.total_duration = _seconds(timestamp.group("total"))
+        try:
+            self._task_start = datetime.datetime.strptime(
+                f'{" ".join(timestamp.group("date").split())} {timestamp.group("tz")}',
+                "%d %B %Y %H:%M:%S %z",
+            ).timestamp()
+        except ValueError:
+            self._task_start = None
+
+    def _end_task(self) -> None:
+        """Ends the current task, its records await their duration."""
+        if self._task is None:
+            return
+        role, _, task = self._task.rpartition(" : ")
+        self._flush(None)
+        self._pending = [
+            PlaybookTaskRecord(
+                play=self._play,
+                role=role,
+                task=task,
+                host=host,
+                status=status,
+                retries=self._retries.get(host, 0),
+                start_time=self._task_start,
+                duration=None,
+                line=self._task_line,
+            )
+            for host, status in (self._statuses or {"": ""}).items()
+        ]
+        self._task = None
+        self._task_start = None
+        self._statuses = {}
+        self._retries = {}
+        self._last_host = ""
+
+    def _flush(self, duration: Optional[float]) -> None:
+        """Records the ended task records with their duration."""
+        for record in self._pending:
+            record["duration"] = duration
+        self.tasks.extend(self._pending)
+        self._pending = []
+
+    def report(self) -> PlaybookReport:
+        """Returns the parsed playbook output (ending the current task)."""
+        self._end_task()
+        self._flush(None)
+        return PlaybookReport(
+            tasks=self.tasks,
+            recap=self.recap,
+            total_duration=self.total_duration,
+            lines=self.lines,
+        )
+
+    def write_json(self, path: str) -> PlaybookReport:
+        """Writes the parsed playbook output to the json file.
+
+        :param path: the json file path
+        :return: the parsed playbook output
+        """
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def format_slowest_tasks(
+    report: PlaybookReport, count: int = DEFAULT_SLOWEST_TASKS
+) -> str:
+    """Returns the ranked slowest tasks of the playbook report.
+
+    :param report: the parsed playbook output
+    :param count: the number of tasks to rank
+    """
+    tasks: Dict[int, PlaybookTaskRecord] = {}
+    for record in report["tasks"]:
+        if record["duration"] is not None:
+            tasks.setdefault(record["line"], record)
+    slowest = sorted(
+        tasks.values(), key=lambda record: record["duration"] or 0.0, reverse=True
+    )[:count]
+    if not slowest:
+        return "No task timings found (is the profile_tasks callback enabled?)"
+
+    total: float = report["total_duration"] or sum(
+        record["duration"] or 0.0 for record in tasks.values()
+    )
+    lines: List[str] = [f"Slowest {len(slowest)} tasks of {len(tasks)}:"]
+    for rank, record in enumerate(slowest, start=1):
+        duration: float = record["duration"] or 0.0
+        name: str = (
+            f'{record["role"]} : {record["task"]}' if record["role"] else record["task"]
+        )
+        lines.append(
+            f"{rank:>3}. {duration:>10.2f}s {duration / total if total else 0:>6.1%}  "
+            f'{name} [{record["status"] or "-"}]'
+            + (f' ({record["retries"]} retries)' if record["retries"] else "")
+        )
+    return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""Container registry module.
+
+This module contains helpers for querying container image registries
+directly using the registry v2 HTTP API (without pulling images).
+"""
+import base64
+import json
+import re
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+
+__all__ = [
+    "get_remote_manifest_digest",
+    "split_image_name",
+]
+
+MANIFEST_MEDIA_TYPES: Tuple[str, ...] = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+)
+
+# An auth-param (RFC 7235): a token or a quoted string (with escapes) value
+AUTH_PARAM_PATTERN: Pattern[str] = re.compile(
+    r'([^\s=,]+)\s*=\s*(?:"((?:[^"\\]|\\.)*)"|([^\s,]*))'
+)
+
+
+def split_image_name(image: str) -> Tuple[str, str]:
+    """Split a fully qualified image name into its registry and repository.
+
+    :param image: the container image fqdn (e.g. registry.redhat.io/org/image)
+    :return: the registry hostname and repository path
+    """
+    registry, _, repository = image.partition("/")
+    if registry == "docker.io":
+        registry = "registry-1.docker.io"
+    return registry, repository
+
+
+def _parse_auth_challenge(header: str) -> Tuple[str, Dict[str, str]]:
+    """Parse a WWW-Authenticate header into its scheme and parameters.
+
+    Quoted parameter values may hold commas and escaped characters, e.g.
+    `scope="repository:org/image:pull,push"`.
+    """
+    scheme, _, params = header.strip().partition(" ")
+    values: Dict[str, str] = {}
+    for match in AUTH_PARAM_PATTERN.finditer(params):
+        key, quoted, token = match.group(1, 2, 3)
+        values[key.lower()] = (
+            re.sub(r"\\(.)", r"\1", quoted) if quoted is not None else token
+        )
+    return scheme.lower(), values
+
+
+def _basic_auth(username: str, password: str) -> str:
+    """Returns the basic authorization header value for the credentials."""
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return f"Basic {token}"
+
+
+def _fetch_bearer_token(
+    challenge: Dict[str, str], username: str, password: str, timeout: float
+) -> str:
+    """Request a bearer token from the registry token service."""
+    query = urllib.parse.urlencode(
+        [(key, challenge[key]) for key in ("service", "scope") if key in challenge]
+    )
+    request = urllib.request.Request(f'{challenge["realm"]}?{query}')
+    if username:
+        request.add_header("Authorization", _basic_auth(username, password))
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body: Dict[str, str] = json.loads(response.read())
+    return body.get("token", body.get("access_token", ""))
+
+
+def _head_manifest(url: str, authorization: str, timeout: float) -> str:
+    """Issue a manifest HEAD request returning the content digest header."""
+    request = urllib.request.Request(url, method="HEAD")
+    request.add_header("Accept", ", ".join(MANIFEST_MEDIA_TYPES))
+    if authorization:
+        request.add_header("Authorization", authorization)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return typing.cast(str, response.headers.get("Docker-Content-Digest", ""))
+
+
+def get_remote_manifest_digest(
+    image: str,
+    tag: str,
+    username: str = "",
+    password: str = "",
+    timeout: float = 10.0,
+) -> Optional[str]:
+    """Gets the manifest digest for the image/tag from the remote registry.
+
+    Authentication challenges (basic or bearer token) are handled using the
+    credentials provided.
+
+    :param image: the container image fqdn
+    :param tag: the container image tag
+    :param username: the registry username to authenticate with
+    :param password: the registry password to authenticate with
+    :param timeout: the timeout in seconds for each http request
+    :return: the manifest digest or none when it could not be determined
+    """
+    registry, repository = split_image_name(image)
+    url = f"https://{registry}/v2/{repository}/manifests/{tag}"
+
+    try:
+        try:
+            digest = _head_manifest(url, "", timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 401:
+                raise
+            scheme, challenge = _parse_auth_challenge(
+                e.headers.get("WWW-Authenticate", "")
+            )
+            if scheme == "bearer":
+                token = _fetch_bearer_token(challenge, username, password, timeout)
+                authorization = f"Bearer {token}"
+            else:
+                authorization = _basic_auth(username, password)
+            digest = _head_manifest(url, authorization, timeout)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Unable to get manifest digest for {image}:{tag}, error: {e}")
+        return None
+
+    return digest or None
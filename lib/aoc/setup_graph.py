@@ -0,0 +1,167 @@
+"""Operation setup graph module.
+
+This module runs the preparation steps of an operation (e.g. ops image
+login/pull, data vars validation, s3 bucket creation) as a dependency graph:
+each step starts as soon as the steps it depends on completed, independent
+steps run concurrently and the first failing step stops the graph.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import TypedDict
+
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import TRACER
+
+__all__ = [
+    "DEFAULT_MAX_WORKERS",
+    "SetupGraph",
+    "SetupGraphResult",
+    "SetupStepResult",
+]
+
+DEFAULT_MAX_WORKERS: int = 4
+
+
+class SetupStepResult(TypedDict):
+    """Operation setup step result.
+
+    start is the number of seconds after the graph started the step did,
+    value is what the step returned.
+    """
+
+    name: str
+    depends_on: List[str]
+    start: float
+    duration: float
+    value: Any
+
+
+class SetupGraphResult(TypedDict):
+    """Operation setup graph results.
+
+    step_results are ordered by step completion. The sequential duration is
+    the sum of every step duration, compare it with the total duration to see
+    the time saved by running independent steps concurrently.
+    """
+
+    step_results: Dict[str, SetupStepResult]
+    total_duration: float
+    sequential_duration: float
+
+
+class SetupGraph:
+    """SetupGraph class.
+
+    Perform the following to prepare an operation:
+        1. Instantiate the class constructing an object
+            > graph = SetupGraph()
+        2. Call the `add` method for each step, after the steps it depends on
+            > graph.add("image", operation.prepare_image)
+            > graph.add("vars", validate_vars)
+            > graph.add("bucket", operation.create_s3_bucket, depends_on=["vars"])
+        3. Call the `run` method, raising the error of the first failed step
+            > graph.run()
+
+    A step fails by raising an exception. Steps must be added after their
+    dependencies, so the graph can not hold cycles.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Constructor.
+
+        :param max_workers: the maximum number of steps run concurrently
+        """
+        self.max_workers: int = max(1, max_workers)
+        self.steps: Dict[str, Callable[[], Any]] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+
+    def add(
+        self, name: str, func: Callable[[], Any], depends_on: Sequence[str] = ()
+    ) -> "SetupGraph":
+        """Adds a step to the graph.
+
+        :param name: the step name
+        :param func: the step, called without arguments
+        :param depends_on: the names of the steps to complete before this one
+        :raises ValueError: when the step name is taken or a dependency is
+            unknown
+        """
+        if name in self.steps:
+            raise ValueError(f"Duplicate setup step {name}")
+        unknown: List[str] = [step for step in depends_on if step not in self.steps]
+        if unknown:
+            raise ValueError(f"Setup step {name} depends on unknown steps {unknown}")
+        self.steps[name] = func
+        self.dependencies[name] = list(depends_on)
+        return self
+
+    def __run_step(
+        self, name: str, start: float, parent_span: Optional[Span]
+    ) -> SetupStepResult:
+        """Runs the step, returning its result."""
+        step_start: float = time.perf_counter()
+        with TRACER.use_span(parent_span), TRACER.span(
+            "setup_graph.step", **{"aoc.setup_step": name}
+        ):
+            value: Any = self.steps[name]()
+        return SetupStepResult(
+            name=name,
+            depends_on=self.dependencies[name],
+            start=step_start - start,
+            duration=time.perf_counter() - step_start,
+            value=value,
+        )
+
+    def run(self) -> SetupGraphResult:
+        """Runs every step, each once its dependencies completed.
+
+        On the first failed step no other step is started, the running ones
+        are waited for and the step error is raised.
+
+        :raises Exception: the error raised by the first failed step
+        """
+        start: float = time.perf_counter()
+        parent_span: Optional[Span] = TRACER.current_span()
+        step_results: Dict[str, SetupStepResult] = {}
+        pending: Dict[str, List[str]] = dict(self.dependencies)
+        running: Dict["Future[SetupStepResult]", str] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="aoc-setup"
+        ) as executor:
+            while pending or running:
+                for name, depends_on in list(pending.items()):
+                    if all(step in step_results for step in depends_on):
+                        del pending[name]
+                        future = executor.submit(
+                            self.__run_step, name, start, parent_span
+                        )
+                        running[future] = name
+
+                done: Set["Future[SetupStepResult]"] = wait(
+                    running, return_when=FIRST_COMPLETED
+                ).done
+                for future in done:
+                    name = running.pop(future)
+                    error: Optional[BaseException] = future.exception()
+                    if error is not None:
+                        print(f"Setup step {name} failed: {error!r}")
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        raise error
+                    step_results[name] = future.result()
+
+        return SetupGraphResult(
+            step_results=step_results,
+            total_duration=time.perf_counter() - start,
+            sequential_duration=sum(r["duration"] for r in step_results.values()),
+        )
@@ -0,0 +1,118 @@
+"""Shared state store module.
+
+This module contains a json file backed key/value store shared by the
+processes of a test session (e.g. the pytest-xdist workers). Every access
+holds an exclusive file lock, so state such as the backup object name
+created by one test can safely be read by a test running in another
+worker.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+
+__all__ = [
+    "SharedStateStore",
+]
+
+
+class SharedStateStore:
+    """SharedStateStore Class.
+
+    Perform the following to share state:
+        1. Instantiate the class with a path shared by the processes
+            > state = SharedStateStore("/tmp/session/aoc-state.json")
+        2. Call the `set`/`get` methods
+            > state.set("stack-1/backup_object_name", "backup-1")
+        3. Call the `update` method for read-modify-write operations
+            > with state.update() as data:
+            >     data["count"] = data.get("count", 0) + 1
+    """
+
+    def __init__(self, path: str, durable: bool = False) -> None:
+        """Constructor.
+
+        :param path: the path to the json file persisting the state
+        :param durable: write the state atomically and flush it to disk, so
+            it survives crashes (slower, for rarely written state)
+        """
+        self.path: str = path
+        self.durable: bool = durable
+        self._lock: threading.Lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Holds an exclusive lock on the state file across processes."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        """Reads the state file, ignoring missing/corrupt files."""
+        try:
+            with open(self.path) as f:
+                data: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        """Writes the state file.
+
+        Durable stores atomically replace the file with flushed content.
+        Otherwise the file is written in place as readers hold the file lock
+        as well, it is neither replaced nor truncated to empty first (both
+        flush it to disk on some file systems, e.g. ext4, slowing every write
+        down).
+        """
+        content: str = json.dumps(data, indent=2)
+        if self.durable:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".")
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            return
+
+        with open(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), "r+") as f:
+            f.write(content)
+            f.truncate()
+
+    @contextmanager
+    def update(self) -> Iterator[Dict[str, Any]]:
+        """Yields the state for modification, holding the lock until written.
+
+        The state is only written when the block does not raise.
+        """
+        with self._file_lock():
+            data = self._read()
+            yield data
+            self._write(data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gets the value stored for the key.
+
+        :param key: the state key
+        :param default: the value returned when the key is unset
+        """
+        with self._file_lock():
+            return self._read().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores the (json serializable) value for the key.
+
+        :param key: the state key
+        :param value: the state value
+        """
+        with self.update() as data:
+            data[key] = value
@@ -0,0 +1,329 @@
+"""Tracing module.
+
+This module records nested spans (name, duration and attributes such as
+the image tag, deployment name or bucket) around the ops container and
+operation phases. Finished spans are exported to a local json lines file,
+each line is an OTLP/JSON trace export request holding one span.
+
+Tracing is disabled by default, traced methods then only check a flag.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import typing
+from contextlib import contextmanager
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+from typing import TypeVar
+
+__all__ = [
+    "Span",
+    "TRACER",
+    "Tracer",
+    "traced",
+]
+
+FuncType = TypeVar("FuncType", bound=Callable[..., Any])
+
+SCOPE_NAME: str = "lib.aoc"
+
+
+class Span:
+    """Span Class.
+
+    A timed phase, its parent is the span that was current (on the same
+    thread or asyncio task) when it started.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Constructor.
+
+        :param name: the span name
+        :param parent: the parent span (none for a root span)
+        :param attributes: the span attributes
+        """
+        self.name: str = name
+        self.parent: Optional[Span] = parent
+        self.trace_id: str = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id: str = os.urandom(8).hex()
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: str = ""
+        self.start_time: int = time.time_ns()
+        self.end_time: int = 0
+        self._start: float = time.perf_counter()
+        self.duration: float = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Sets the span attribute.
+
+        :param key: the attribute key
+        :param value: the attribute value (str, bool, int or float)
+        """
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        """Marks the span as failed.
+
+        :param message: the error message
+        """
+        self.error = message
+
+    def end(self) -> None:
+        """Ends the span, recording its duration."""
+        self.duration = time.perf_counter() - self._start
+        self.end_time = self.start_time + int(self.duration * 1e9)
+
+    @staticmethod
+    def _otlp_value(value: Any) -> Dict[str, Any]:
+        """Returns the OTLP/JSON any value of the attribute value."""
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Returns the span in the OTLP/JSON format."""
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": self._otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+class Tracer:
+    """Tracer Class.
+
+    Use `configure` to enable tracing, spans are then recorded with the
+    `span` context manager (or the `traced` method decorator). Listeners are
+    called with every finished span (e.g. to summarize them).
+    """
+
+    def __init__(self, service_name: str = "aoc-tests") -> None:
+        """Constructor.
+
+        :param service_name: the service name of the exported spans resource
+        """
+        self.service_name: str = service_name
+        self.enabled: bool = False
+        self.export_path: str = ""
+        self._export_file: Optional[TextIO] = None
+        self._lock: threading.Lock = threading.Lock()
+        # Current spans (innermost last), asyncio tasks (and threads started
+        # with asyncio.to_thread) inherit the ones current when started
+        self._spans: contextvars.ContextVar[Tuple[Span, ...]] = contextvars.ContextVar(
+            f"aoc_spans_{id(self)}", default=()
+        )
+        self._listeners: List[Callable[[Span], None]] = []
+
+    def configure(self, export_path: str = "", enabled: bool = True) -> None:
+        """Enables/disables tracing.
+
+        :param export_path: the json lines file to export finished spans to
+            (spans are only handed to listeners when empty)
+        :param enabled: whether spans are recorded
+        """
+        self.close()
+        self.enabled = enabled
+        self.export_path = export_path
+        if enabled and export_path:
+            os.makedirs(os.path.dirname(os.path.abspath(export_path)), exist_ok=True)
+            self._export_file = open(export_path, "a")
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Calls the listener with every finished span.
+
+        :param listener: the callable receiving the finished span
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        """Stops calling the listener with finished spans.
+
+        :param listener: the callable previously added
+        """
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def current_span(self) -> Optional[Span]:
+        """Returns the calling thread (or asyncio task) innermost span."""
+        spans = self._spans.get()
+        return spans[-1] if spans else None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Records the span around the block (nothing when disabled).
+
+        An exception raised by the block marks the span as failed.
+
+        :param name: the span name
+        :param attributes: the span attributes
+        :return: the span (none when tracing is disabled)
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        span = Span(name, self.current_span(), attributes)
+        token = self._spans.set(self._spans.get() + (span,))
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end()
+            self._spans.reset(token)
+            self._export(span)
+
+    @contextmanager
+    def use_span(self, span: Optional[Span]) -> Iterator[None]:
+        """Makes the span current on the calling thread (e.g. a worker thread).
+
+        Spans started within the block are its children, the span itself is
+        neither ended nor exported.
+
+        :param span: the span to make current (nothing is done when none)
+        """
+        if span is None:
+            yield
+            return
+        token = self._spans.set(self._spans.get() + (span,))
+        try:
+            yield
+        finally:
+            self._spans.reset(token)
+
+    def _export(self, span: Span) -> None:
+        """Writes the finished span to the export file and hands it to listeners."""
+        with self._lock:
+            if self._export_file:
+                request = {
+                    "resourceSpans": [
+                        {
+                            "resource": {
+                                "attributes": [
+                                    {
+                                        "key": "service.name",
+                                        "value": {"stringValue": self.service_name},
+                                    }
+                                ]
+                            },
+                            "scopeSpans": [
+                                {
+                                    "scope": {"name": SCOPE_NAME},
+                                    "spans": [span.to_otlp()],
+                                }
+                            ],
+                        }
+                    ]
+                }
+                self._export_file.write(f"{json.dumps(request)}\n")
+                self._export_file.flush()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(span)
+
+    def close(self) -> None:
+        """Closes the export file."""
+        with self._lock:
+            if self._export_file:
+                self._export_file.close()
+                self._export_file = None
+
+
+# Shared by every traced operation in the session
+TRACER: Tracer = Tracer()
+
+
+def traced(span_name: str, **arg_attributes: str) -> Callable[[FuncType], FuncType]:
+    """Decorator recording the method calls as spans.
+
+    The instance `trace_attributes()` (when defined) are recorded as span
+    attributes. A method returning false (or a tuple ending with false, e.g.
+    the output and result of `run_container`) marks the span as failed.
+    Coroutine methods are supported, the span then covers the awaited call.
+
+    :param span_name: the span name
+    :param arg_attributes: the method arguments to record, mapped to the
+        span attribute key (e.g. tag="aoc.image_tag")
+    """
+
+    def decorator(func: FuncType) -> FuncType:
+        signature = inspect.signature(func)
+
+        def attributes(self: Any, args: Any, kwargs: Any) -> Dict[str, Any]:
+            span_attributes: Dict[str, Any] = {}
+            trace_attributes = getattr(self, "trace_attributes", None)
+            if trace_attributes:
+                span_attributes.update(trace_attributes())
+            if arg_attributes:
+                arguments = signature.bind(self, *args, **kwargs)
+                arguments.apply_defaults()
+                for arg, key in arg_attributes.items():
+                    span_attributes[key] = arguments.arguments[arg]
+            return span_attributes
+
+        def check_result(span: Optional[Span], result: Any) -> None:
+            if span and (
+                result is False
+                or (isinstance(result, tuple) and result and result[-1] is False)
+            ):
+                span.set_error(f"{func.__name__} failed")
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+                if not TRACER.enabled:
+                    return await func(self, *args, **kwargs)
+
+                with TRACER.span(span_name, **attributes(self, args, kwargs)) as span:
+                    result = await func(self, *args, **kwargs)
+                    check_result(span, result)
+                return result
+
+            return typing.cast(FuncType, async_wrapper)
+
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if not TRACER.enabled:
+                return func(self, *args, **kwargs)
+
+            with TRACER.span(span_name, **attributes(self, args, kwargs)) as span:
+                result = func(self, *args, **kwargs)
+                check_result(span, result)
+            return result
+
+        return typing.cast(FuncType, wrapper)
+
+    return decorator
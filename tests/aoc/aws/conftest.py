@@ -5,8 +5,11 @@ Majority of the functions here will be pytest fixtures.
 """
 import os
 
+import pytest
 from _pytest.config.argparsing import Parser
 
+from lib.aoc.aws.clients import AWS_CLIENTS
+
 
 def pytest_addoption(parser: Parser) -> None:
     """Handles setting up options that are applicable to aoc aws."""
@@ -23,3 +26,17 @@ def pytest_addoption(parser: Parser) -> None:
         default=os.getenv("AOC_AWS_REGION", ""),
         help="AWS region",
     )
+
+    parser.addoption(
+        "--aoc-aws-max-pool-connections",
+        action="store",
+        type=int,
+        default=AWS_CLIENTS.max_pool_connections,
+        help="Maximum connections kept in each shared aws client connection pool "
+        "(env: AOC_AWS_MAX_POOL_CONNECTIONS)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Configures the aws client factory shared by every aws operation."""
+    AWS_CLIENTS.max_pool_connections = config.getoption("aoc_aws_max_pool_connections")
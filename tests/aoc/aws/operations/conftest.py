@@ -5,9 +5,18 @@ Majority of the functions here will be pytest fixtures.
 """
 import argparse
 import os
+from typing import List
+from typing import Tuple
+from typing import Type
 
 from _pytest.config.argparsing import Parser
 
+from lib.aoc.aws.operations.backup import DEFAULT_DELETE_CHUNK_SIZE
+from lib.aoc.aws.operations.backup import DEFAULT_DELETE_MAX_WORKERS
+from lib.aoc.aws.operations.backup import DEFAULT_DELETE_RETRIES
+from lib.aoc.aws.operations.region_fanout import DEFAULT_MAX_WORKERS
+from lib.aoc.aws.operations.region_fanout import DEFAULT_REGION_MAX_WORKERS
+
 
 def pytest_addoption(parser: Parser) -> None:
     """Handles setting up options that are applicable to aoc aws."""
@@ -91,3 +100,151 @@ def pytest_addoption(parser: Parser) -> None:
         default=False,
         help="Enable to disable deleting stack backup",
     )
+
+    parser.addoption(
+        "--aoc-aws-verify-backup",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_AWS_VERIFY_BACKUP", "true").lower() == "true",
+        help="Enable to verify the integrity of the stack backup objects",
+    )
+
+    parser.addoption(
+        "--aoc-aws-backup-expected-component",
+        action="append",
+        default=[],
+        help="The fnmatch pattern (relative to the backup folder) of an object "
+        "expected in the stack backup",
+    )
+
+    parser.addoption(
+        "--aoc-aws-backup-manifest-dir",
+        action="store",
+        default=os.getenv("AOC_AWS_BACKUP_MANIFEST_DIR", ""),
+        help="Directory to write the verified stack backup manifests to",
+    )
+
+    parser.addoption(
+        "--aoc-aws-backup-mirror-dir",
+        action="store",
+        default=os.getenv("AOC_AWS_BACKUP_MIRROR_DIR", ""),
+        help="Directory to mirror the stack backup objects to (served locally "
+        "with `python -m lib.aoc.aws.backup_mirror serve`)",
+    )
+
+    parser.addoption(
+        "--aoc-aws-backup-size-history-dir",
+        action="store",
+        default=os.getenv("AOC_AWS_BACKUP_SIZE_HISTORY_DIR", ""),
+        help="Directory to record the stack backup component sizes to (one json "
+        "lines file per deployment), inspecting the backup archives",
+    )
+
+    parser.addoption(
+        "--aoc-aws-delete-backup-chunk-size",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_AWS_DELETE_BACKUP_CHUNK_SIZE", DEFAULT_DELETE_CHUNK_SIZE)
+        ),
+        help="Maximum number of backup names deleted per delete backups playbook run",
+    )
+
+    parser.addoption(
+        "--aoc-aws-delete-backup-max-workers",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_AWS_DELETE_BACKUP_MAX_WORKERS", DEFAULT_DELETE_MAX_WORKERS)
+        ),
+        help="Maximum number of delete backups playbooks run concurrently",
+    )
+
+    parser.addoption(
+        "--aoc-aws-delete-backup-retries",
+        action="store",
+        type=int,
+        default=int(os.getenv("AOC_AWS_DELETE_BACKUP_RETRIES", DEFAULT_DELETE_RETRIES)),
+        help="Number of times the failed backup name chunks are deleted again",
+    )
+
+    retention_options: List[Tuple[str, Type[float], str]] = [
+        (
+            "--aoc-aws-backup-retention-keep-last",
+            int,
+            "Number of most recent stack backups kept when pruning",
+        ),
+        (
+            "--aoc-aws-backup-retention-keep-daily",
+            int,
+            "Number of days whose newest stack backup is kept when pruning",
+        ),
+        (
+            "--aoc-aws-backup-retention-keep-weekly",
+            int,
+            "Number of weeks whose newest stack backup is kept when pruning",
+        ),
+        (
+            "--aoc-aws-backup-retention-keep-monthly",
+            int,
+            "Number of months whose newest stack backup is kept when pruning",
+        ),
+        (
+            "--aoc-aws-backup-retention-max-age-days",
+            float,
+            "Age (in days) after which stack backups are pruned",
+        ),
+    ]
+    for name, option_type, description in retention_options:
+        parser.addoption(
+            name,
+            action="store",
+            type=option_type,
+            default=option_type(
+                os.getenv(name.lstrip("-").upper().replace("-", "_"), 0)
+            ),
+            help=f"{description} (0 disables the rule)",
+        )
+
+    parser.addoption(
+        "--aoc-aws-prune-backups-dry-run",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_AWS_PRUNE_BACKUPS_DRY_RUN", "true").lower() == "true",
+        help="Enable to only report the stack backups the retention policy prunes",
+    )
+
+    parser.addoption(
+        "--aoc-aws-fanout-region",
+        action="append",
+        default=[],
+        help="Region (`REGION[=[S3_BUCKET],SSM_BUCKET_NAME]`) to back up the "
+        "stack in concurrently with the other fan-out regions, the ssm bucket "
+        "name is required when the stack has one (env: AOC_AWS_FANOUT_REGIONS, "
+        "space separated, only used when the option is not given)",
+    )
+
+    parser.addoption(
+        "--aoc-aws-fanout-max-workers",
+        action="store",
+        type=int,
+        default=int(os.getenv("AOC_AWS_FANOUT_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+        help="Maximum number of region fan-out operations run concurrently",
+    )
+
+    parser.addoption(
+        "--aoc-aws-region-max-workers",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_AWS_REGION_MAX_WORKERS", DEFAULT_REGION_MAX_WORKERS)
+        ),
+        help="Maximum number of region fan-out operations run concurrently in "
+        "each region",
+    )
+
+    parser.addoption(
+        "--aoc-aws-bulk-delete-backup",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_AWS_BULK_DELETE_BACKUP", "false").lower() == "true",
+        help="Enable to delete stack backups/s3 buckets with batched native s3 "
+        "deletes (only s3 objects are deleted) instead of ansible",
+    )
@@ -1,5 +1,7 @@
 """Tests validating AoC on AWS backup/restore."""
+import os
 import typing
+from typing import Callable
 from typing import Dict
 from typing import Iterator
 from typing import List
@@ -7,20 +9,139 @@ from typing import List
 import pytest
 from pytest_ansible.host_manager import BaseHostManager
 
+from lib.aoc.aws.backup_retention import AocAwsBackupRetentionPolicy
 from lib.aoc.aws.operations.backup import AocAwsBackup
 from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
 from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.region_fanout import AocAwsRegion
+from lib.aoc.aws.operations.region_fanout import AocAwsRegionFanout
+from lib.aoc.aws.operations.region_fanout import parse_regions
 from lib.aoc.aws.operations.restore import AocAwsRestore
 from lib.aoc.aws.operations.restore import AocAwsRestoreDataExtraVars
 from lib.aoc.aws.operations.restore import AocAwsRestoreDataVars
+from lib.aoc.checkpoints import BACKUP_COMPLETED
+from lib.aoc.checkpoints import BUCKET_CREATED
+from lib.aoc.checkpoints import Checkpoint
+from lib.aoc.checkpoints import IMAGE_READY
+from lib.aoc.checkpoints import OperationCheckpoints
+from lib.aoc.checkpoints import RESTORE_COMPLETED
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.setup_graph import SetupGraph
+from lib.aoc.state_store import SharedStateStore
+from tests.aoc.conftest import OpsContainerFactory
+
+
+def checkpointed_options(
+    pytestconfig: pytest.Config,
+    options: OpsContainerOptions,
+    checkpoints: OperationCheckpoints,
+) -> OpsContainerOptions:
+    """Returns the options verifying the ops image checkpoint when resuming."""
+    image: str = (
+        f'{pytestconfig.getoption("aoc_ops_container_image")}:'
+        f'{pytestconfig.getoption("aoc_ops_container_image_tag")}'
+    )
+    checkpoint = checkpoints.get(IMAGE_READY)
+    if not (
+        pytestconfig.getoption("aoc_resume")
+        and checkpoint
+        and checkpoint.get("image") == image
+        and checkpoint.get("digest")
+    ):
+        return options
+    return OpsContainerOptions(**options, verified_image_digest=checkpoint["digest"])
+
+
+def checkpoint_image(
+    operation: OpsContainer, checkpoints: OperationCheckpoints
+) -> None:
+    """Records the ops image of the operation as ready (when it changed)."""
+    image: str = f"{operation.aoc_ops_image}:{operation.aoc_ops_image_tag}"
+    checkpoint = checkpoints.get(IMAGE_READY) or Checkpoint()
+    if operation.image_digest and (
+        checkpoint.get("image"),
+        checkpoint.get("digest"),
+    ) != (image, operation.image_digest):
+        checkpoints.record(
+            IMAGE_READY, Checkpoint(image=image, digest=operation.image_digest)
+        )
+
+
+def verify_backup(
+    pytestconfig: pytest.Config, backup: AocAwsBackup, backup_name: str
+) -> None:
+    """Asserts the backup objects integrity (when enabled)."""
+    if not pytestconfig.getoption("aoc_aws_verify_backup"):
+        return
+    verify_result = backup.verify_s3_backup(
+        backup_name,
+        expected_components=pytestconfig.getoption("aoc_aws_backup_expected_component"),
+        manifest_dir=pytestconfig.getoption("aoc_aws_backup_manifest_dir"),
+    )
+    assert verify_result[
+        "result"
+    ], f'backup verification failed: {verify_result["errors"]}'
+
+
+def inspect_backup(
+    pytestconfig: pytest.Config, backup: AocAwsBackup, backup_name: str
+) -> None:
+    """Asserts the backup archives are readable, recording their sizes."""
+    size_history_dir: str = pytestconfig.getoption("aoc_aws_backup_size_history_dir")
+    if not size_history_dir:
+        return
+    inspect_result = backup.inspect_s3_backup(backup_name, size_history_dir)
+    assert inspect_result[
+        "result"
+    ], f'backup inspection failed: {inspect_result["errors"]}'
+
+
+def mirror_backup(
+    pytestconfig: pytest.Config, backup: AocAwsBackup, backup_name: str
+) -> None:
+    """Asserts the backup objects are mirrored locally (when enabled)."""
+    mirror_dir: str = pytestconfig.getoption("aoc_aws_backup_mirror_dir")
+    if not mirror_dir:
+        return
+    mirror_result = backup.mirror_s3_backup(backup_name, mirror_dir)
+    assert mirror_result["result"], f'backup mirror failed: {mirror_result["errors"]}'
+
+
+@pytest.fixture
+def aoc_aws_checkpoints(
+    pytestconfig: pytest.Config, aoc_checkpoint_store: SharedStateStore
+) -> OperationCheckpoints:
+    """Fixture returning the operation checkpoints of the stack."""
+    return OperationCheckpoints(
+        aoc_checkpoint_store,
+        f'aws/{pytestconfig.getoption("aoc_stack_deployment_name")}',
+    )
 
 
 @pytest.fixture  # type: ignore
 def aoc_aws_backup_stack(
+    request: pytest.FixtureRequest,
     ansible_module: BaseHostManager,
     pytestconfig: pytest.Config,
+    aoc_ops_container_options: OpsContainerOptions,
+    aoc_ops_container_factory: OpsContainerFactory,
+    aoc_shared_state: SharedStateStore,
+    aoc_worker_scoped_name: Callable[[str], str],
+    aoc_aws_checkpoints: OperationCheckpoints,
 ) -> Iterator[AocAwsBackup]:
-    """Fixture returning aoc aws backup operations."""
+    """Fixture returning aoc aws backup operations.
+
+    The stack backup test creates the s3 bucket, suffixed with the xdist worker
+    id, and deletes it along with the backup on teardown (unless skipped). The
+    other tests (e.g. deleting/pruning backups) use the existing bucket as is.
+    """
+    creates_s3_bucket: bool = (
+        request.node.get_closest_marker("aoc_aws_backup_stack") is not None
+    )
+    s3_bucket: str = pytestconfig.getoption("aoc_aws_backup_s3_bucket")
+    if creates_s3_bucket:
+        s3_bucket = aoc_worker_scoped_name(s3_bucket)
 
     command_generator_vars: AocAwsBackupDataVars = AocAwsBackupDataVars(
         cloud_credentials_path=pytestconfig.getoption("aoc_aws_credentials_path"),
@@ -31,7 +152,7 @@ def aoc_aws_backup_stack(
             ),
             aws_backup_vault_name=pytestconfig.getoption("aoc_aws_backup_vault_name"),
             aws_region=pytestconfig.getoption("aoc_aws_region"),
-            aws_s3_bucket=pytestconfig.getoption("aoc_aws_backup_s3_bucket"),
+            aws_s3_bucket=s3_bucket,
             aws_ssm_bucket_name=pytestconfig.getoption(
                 "aoc_aws_backup_ssm_bucket_name"
             ),
@@ -39,7 +160,9 @@ def aoc_aws_backup_stack(
         ),
     )
 
-    aoc_aws_backup = AocAwsBackup(
+    aoc_aws_backup = aoc_ops_container_factory.get(
+        AocAwsBackup,
+        ansible_module,
         aoc_version=pytestconfig.getoption("aoc_version"),
         aoc_ops_image=pytestconfig.getoption("aoc_ops_container_image"),
         aoc_ops_image_tag=pytestconfig.getoption("aoc_ops_container_image_tag"),
@@ -49,39 +172,75 @@ def aoc_aws_backup_stack(
         aoc_image_registry_password=pytestconfig.getoption(
             "aoc_ops_container_image_registry_password"
         ),
-        ansible_module=ansible_module,
         command_generator_vars=command_generator_vars,
+        options=checkpointed_options(
+            pytestconfig, aoc_ops_container_options, aoc_aws_checkpoints
+        ),
     )
+    checkpoint_image(aoc_aws_backup, aoc_aws_checkpoints)
     yield aoc_aws_backup
+    # The image pull may be deferred to the test (see `prepare_image`)
+    checkpoint_image(aoc_aws_backup, aoc_aws_checkpoints)
 
     # Delete backup and s3 bucket
-    if pytestconfig.cache.get("delete_stack_backup", True):
-        aoc_aws_backup.delete_stack_backup(
-            [pytestconfig.cache.get("stack_backup_object_name", "")]
+    deployment_name: str = command_generator_vars["deployment_name"]
+    if creates_s3_bucket and not pytestconfig.getoption("aoc_aws_skip_delete_backup"):
+        bulk: bool = pytestconfig.getoption("aoc_aws_bulk_delete_backup")
+        # No backup name is recorded when the backup test failed or did not run
+        backup_object_name: str = aoc_shared_state.get(
+            f"{deployment_name}/stack_backup_object_name", ""
         )
-        aoc_aws_backup.delete_s3_bucket()
+        if backup_object_name:
+            delete_result = aoc_aws_backup.delete_stack_backup(
+                [backup_object_name], bulk=bulk
+            )
+            # Bulk deletions leave the backup recovery points, keep the backup
+            # checkpoint recording them
+            if delete_result["playbook_result"] and delete_result["s3_objects_only"]:
+                print(
+                    f"Deleted the s3 objects of backup {backup_object_name} only, "
+                    "its recovery points remain in the backup vault"
+                )
+            elif delete_result["playbook_result"]:
+                aoc_aws_checkpoints.clear(BACKUP_COMPLETED, RESTORE_COMPLETED)
+        if aoc_aws_backup.delete_s3_bucket(bulk=bulk):
+            aoc_aws_checkpoints.clear(BUCKET_CREATED)
 
 
 @pytest.fixture  # type: ignore
 def aoc_aws_restore_stack(
     ansible_module: pytest.fixture,
     pytestconfig: pytest.Config,
+    aoc_ops_container_options: OpsContainerOptions,
+    aoc_ops_container_factory: OpsContainerFactory,
+    aoc_shared_state: SharedStateStore,
+    aoc_aws_checkpoints: OperationCheckpoints,
 ) -> AocAwsRestore:
-    """Fixture returning aoc aws restore operations."""
+    """Fixture returning aoc aws restore operations.
+
+    The stack is restored from the bucket created by the stack backup test,
+    when it ran in the session, otherwise from the existing bucket.
+    """
+    deployment_name: str = pytestconfig.getoption("aoc_stack_deployment_name")
     command_generator_vars: AocAwsRestoreDataVars = AocAwsRestoreDataVars(
         cloud_credentials_path=pytestconfig.getoption("aoc_aws_credentials_path"),
-        deployment_name=pytestconfig.getoption("aoc_stack_deployment_name"),
+        deployment_name=deployment_name,
         extra_vars=AocAwsRestoreDataExtraVars(
             aws_backup_name=pytestconfig.getoption("aoc_aws_backup_vault_name"),
             aws_region=pytestconfig.getoption("aoc_aws_region"),
-            aws_s3_bucket=pytestconfig.getoption("aoc_aws_backup_s3_bucket"),
+            aws_s3_bucket=aoc_shared_state.get(
+                f"{deployment_name}/s3_bucket",
+                pytestconfig.getoption("aoc_aws_backup_s3_bucket"),
+            ),
             aws_ssm_bucket_name=pytestconfig.getoption(
                 "aoc_aws_backup_ssm_bucket_name"
             ),
         ),
     )
 
-    return AocAwsRestore(
+    aoc_aws_restore = aoc_ops_container_factory.get(
+        AocAwsRestore,
+        ansible_module,
         aoc_version=pytestconfig.getoption("aoc_version"),
         aoc_ops_image=pytestconfig.getoption("aoc_ops_container_image"),
         aoc_ops_image_tag=pytestconfig.getoption("aoc_ops_container_image_tag"),
@@ -91,9 +250,13 @@ def aoc_aws_restore_stack(
         aoc_image_registry_password=pytestconfig.getoption(
             "aoc_ops_container_image_registry_password"
         ),
-        ansible_module=ansible_module,
         command_generator_vars=command_generator_vars,
+        options=checkpointed_options(
+            pytestconfig, aoc_ops_container_options, aoc_aws_checkpoints
+        ),
     )
+    checkpoint_image(aoc_aws_restore, aoc_aws_checkpoints)
+    return aoc_aws_restore
 
 
 @pytest.mark.aoc_aws_backup_restore_stack
@@ -102,55 +265,154 @@ class TestAoCAwsStackBackupRestore:
 
     @pytest.mark.aoc_aws_backup_stack  # type: ignore
     def test_backup_stack(
-        self, aoc_aws_backup_stack: AocAwsBackup, pytestconfig: pytest.Config
+        self,
+        aoc_aws_backup_stack: AocAwsBackup,
+        aoc_aws_checkpoints: OperationCheckpoints,
+        aoc_shared_state: SharedStateStore,
+        pytestconfig: pytest.Config,
     ) -> None:
         """Test verifies a stack can be backed up using the ops container image.
 
         Test procedure:
             1. Validate registry.redhat.io authentication/pull ops container image
-                (Handled when fixture constructs AocAwsBackup class)
+                (Handled when fixture constructs AocAwsBackup class, unless
+                deferred to run alongside steps 2-4)
             2. Validate required test data for backup playbook is defined
             3. Generate the ops backup playbook extra vars
             4. Create s3 bucket to store backup files
             5. Run ops container targeting backup playbook w/extra vars
             6. Get the stack backup name to be used for restoring the stack
+            7. Verify the backup objects integrity (HEAD every backup object)
+            (With --aoc-resume, steps 2-6 are skipped when their checkpoint is
+            still valid: bucket exists/backup objects exist in the bucket)
         Expected results:
             1. S3 bucket is created
             2. Ops container backup playbook finishes successfully
             3. Backup object exists in the s3 bucket
             4. Backup object name is in the playbook output
+            5. Backup objects are complete (expected components present, no
+                empty objects or unfinished uploads, none truncated since the
+                manifest recorded in the manifest dir)
         """
-        pytestconfig.cache.set(
-            "delete_stack_backup", pytestconfig.getoption("aoc_aws_skip_delete_backup")
-        )
+        deployment_name: str = aoc_aws_backup_stack.command_generator_vars[
+            "deployment_name"
+        ]
+        resume: bool = pytestconfig.getoption("aoc_resume")
+        bucket_name: str = aoc_aws_backup_stack.command_generator_vars["extra_vars"][
+            "aws_s3_bucket"
+        ]
+        aoc_shared_state.set(f"{deployment_name}/s3_bucket", bucket_name)
+        backup_checkpoint = aoc_aws_checkpoints.get(BACKUP_COMPLETED)
+        if (
+            resume
+            and backup_checkpoint
+            and backup_checkpoint.get("bucket") == bucket_name
+            and aoc_aws_backup_stack.s3_backup_exists(
+                backup_checkpoint.get("backup_object_name", "")
+            )
+        ):
+            print(f'Resuming from backup {backup_checkpoint["backup_object_name"]}')
+            aoc_shared_state.set(
+                f"{deployment_name}/stack_backup_object_name",
+                backup_checkpoint["backup_object_name"],
+            )
+            verify_backup(
+                pytestconfig,
+                aoc_aws_backup_stack,
+                backup_checkpoint["backup_object_name"],
+            )
+            mirror_backup(
+                pytestconfig,
+                aoc_aws_backup_stack,
+                backup_checkpoint["backup_object_name"],
+            )
+            return
+
+        def prepare_image() -> None:
+            assert aoc_aws_backup_stack.prepare_image(), "failed to pull ops image"
+            checkpoint_image(aoc_aws_backup_stack, aoc_aws_checkpoints)
+
+        def validate_vars() -> None:
+            assert aoc_aws_backup_stack.validate_command_generator_vars(
+                typing.cast(Dict[str, str], aoc_aws_backup_stack.command_generator_vars)
+            ), "one or more stack backup vars are undefined"
 
-        assert aoc_aws_backup_stack.validate_command_generator_vars(
-            typing.cast(Dict[str, str], aoc_aws_backup_stack.command_generator_vars)
-        ), "one or more stack backup vars are undefined"
-        assert aoc_aws_backup_stack.create_s3_bucket(), "failed to create S3 bucket"
+        def create_s3_bucket() -> None:
+            bucket_checkpoint = aoc_aws_checkpoints.get(BUCKET_CREATED)
+            if not (
+                resume
+                and bucket_checkpoint
+                and bucket_checkpoint.get("bucket") == bucket_name
+                and aoc_aws_backup_stack.s3_bucket_exists()
+            ):
+                assert (
+                    aoc_aws_backup_stack.create_s3_bucket()
+                ), "failed to create S3 bucket"
+                aoc_aws_checkpoints.record(
+                    BUCKET_CREATED, Checkpoint(bucket=bucket_name)
+                )
+
+        # The image pull does not depend on the vars/bucket, run them together
+        SetupGraph().add("image", prepare_image).add("vars", validate_vars).add(
+            "bucket", create_s3_bucket, depends_on=["vars"]
+        ).run()
 
         stack_backup_results = aoc_aws_backup_stack.backup_stack()
         assert stack_backup_results["playbook_result"], "backup stack playbook failed"
-        assert (
-            stack_backup_results["backup_object_name"]
-            in stack_backup_results["playbook_output"]
-        ), "stack backup name does not exist in playbook output"
+        assert stack_backup_results[
+            "backup_object_name_in_output"
+        ], "stack backup name does not exist in playbook output"
 
-        pytestconfig.cache.set(
-            "stack_backup_object_name", stack_backup_results["backup_object_name"]
+        # Record the backup before checking it, so it is deleted/resumed from
+        # even when a check below fails
+        aoc_shared_state.set(
+            f"{deployment_name}/stack_backup_object_name",
+            stack_backup_results["backup_object_name"],
+        )
+        aoc_aws_checkpoints.record(
+            BACKUP_COMPLETED,
+            Checkpoint(
+                bucket=bucket_name,
+                backup_object_name=stack_backup_results["backup_object_name"],
+            ),
+        )
+        aoc_aws_checkpoints.clear(RESTORE_COMPLETED)
+
+        verify_backup(
+            pytestconfig,
+            aoc_aws_backup_stack,
+            stack_backup_results["backup_object_name"],
+        )
+        inspect_backup(
+            pytestconfig,
+            aoc_aws_backup_stack,
+            stack_backup_results["backup_object_name"],
+        )
+        mirror_backup(
+            pytestconfig,
+            aoc_aws_backup_stack,
+            stack_backup_results["backup_object_name"],
         )
 
     @pytest.mark.aoc_aws_restore_stack  # type: ignore
-    def test_restore_stack(self, aoc_aws_restore_stack: AocAwsRestore) -> None:
+    def test_restore_stack(
+        self,
+        aoc_aws_restore_stack: AocAwsRestore,
+        aoc_aws_checkpoints: OperationCheckpoints,
+        pytestconfig: pytest.Config,
+    ) -> None:
         """Test verifies a stack can be restored from a provided backup file.
 
         Test procedure:
             1. Validate registry.redhat.io authentication/pull ops container image
-                (Handled when fixture constructs AocAwsRestore class)
+                (Handled when fixture constructs AocAwsRestore class, or by the
+                restore container run when deferred)
             2. Validate required test data for restore playbook is defined
             3. Generate the ops restore playbook extra vars
             4. Run ops container targeting restore playbook w/extra vars
             5. Verify stack is operational/accessible
+            (With --aoc-resume, steps 3-5 are skipped when the stack was
+            already restored from the same backup)
         Expected results:
             1. Ops container backup playbook finishes successfully
             2. Access to the AoC stack is working as prior to the restore
@@ -158,22 +420,41 @@ class TestAoCAwsStackBackupRestore:
         assert aoc_aws_restore_stack.validate_command_generator_vars(
             typing.cast(Dict[str, str], aoc_aws_restore_stack.command_generator_vars)
         ), "one or more stack restore vars are undefined"
+
+        backup_name: str = aoc_aws_restore_stack.command_generator_vars["extra_vars"][
+            "aws_backup_name"
+        ]
+        restore_checkpoint = aoc_aws_checkpoints.get(RESTORE_COMPLETED)
+        if (
+            pytestconfig.getoption("aoc_resume")
+            and restore_checkpoint
+            and restore_checkpoint.get("backup_name") == backup_name
+        ):
+            print(f"Resuming, stack already restored from backup {backup_name}")
+            return
+
         stack_restore_results = aoc_aws_restore_stack.restore_stack()
         assert stack_restore_results["playbook_result"], "restore stack playbook failed"
+        aoc_aws_checkpoints.record(
+            RESTORE_COMPLETED, Checkpoint(backup_name=backup_name)
+        )
 
         # TODO: Determine post checks to verify restore
 
 
 @pytest.mark.aoc_aws_delete_backups  # type: ignore
 def test_delete_backups(
-    aoc_aws_backup_stack: AocAwsBackup, pytestconfig: pytest.Config
+    aoc_aws_backup_stack: AocAwsBackup,
+    aoc_aws_checkpoints: OperationCheckpoints,
+    pytestconfig: pytest.Config,
 ) -> None:
     """Test verifies a stack backup can be deleted and removed within aws account.
 
     Test procedure:
         1. Validate registry.redhat.io authentication/pull ops container image
-            (Handled when fixture constructs AocAwsRestore class)
-        2. Validate required test data for restore playbook is defined
+            (Handled when fixture constructs AocAwsBackup class, or by the
+            first delete backup container run when deferred)
+        2. Validate required test data for delete backup playbook is defined
         3. Generate the ops delete backup playbook extra vars
         4. Run ops container targeting delete backup playbook w/extra vars
         5. Verify backups were deleted
@@ -181,10 +462,6 @@ def test_delete_backups(
         1. Ops container backup playbook finishes successfully
         2. Backup files no longer exist in S3 bucket
     """
-    # Skip having the fixture attempt to delete backups as this test is focused
-    # around deleting backups
-    pytestconfig.cache.set("delete_stack_backup", False)
-
     backup_names: List[str] = pytestconfig.getoption("aoc_aws_delete_backup_name")
     assert (
         len(backup_names) != 0
@@ -192,11 +469,145 @@ def test_delete_backups(
 
     # TODO: Validate input (e.g. aws region, etc)
 
-    stack_delete_backup_result = aoc_aws_backup_stack.delete_stack_backup(backup_names)
+    stack_delete_backup_result = aoc_aws_backup_stack.delete_stack_backup(
+        backup_names,
+        bulk=pytestconfig.getoption("aoc_aws_bulk_delete_backup"),
+        chunk_size=pytestconfig.getoption("aoc_aws_delete_backup_chunk_size"),
+        max_workers=pytestconfig.getoption("aoc_aws_delete_backup_max_workers"),
+        retries=pytestconfig.getoption("aoc_aws_delete_backup_retries"),
+    )
+    failed_backup_names: List[str] = [
+        backup_name
+        for chunk_result in stack_delete_backup_result["chunk_results"]
+        if not chunk_result["playbook_result"]
+        for backup_name in chunk_result["backup_names"]
+    ]
     assert stack_delete_backup_result[
         "playbook_result"
-    ], "delete stack backups playbook failed"
+    ], f"delete stack backups playbook failed for: {failed_backup_names}"
+
+    # Bulk deletions leave the backup recovery points, keep the backup checkpoint
+    backup_checkpoint = aoc_aws_checkpoints.get(BACKUP_COMPLETED)
+    if (
+        not stack_delete_backup_result["s3_objects_only"]
+        and backup_checkpoint
+        and backup_checkpoint.get("backup_object_name") in backup_names
+    ):
+        aoc_aws_checkpoints.clear(BACKUP_COMPLETED, RESTORE_COMPLETED)
 
     # TODO: Verify objects no longer exists in bucket
 
     # TODO: Delete the S3 bucket?
+
+
+@pytest.mark.aoc_aws_prune_backups  # type: ignore
+def test_prune_backups(
+    aoc_aws_backup_stack: AocAwsBackup,
+    aoc_aws_checkpoints: OperationCheckpoints,
+    pytestconfig: pytest.Config,
+) -> None:
+    """Test verifies stack backups are pruned according to the retention policy.
+
+    Test procedure:
+        1. Validate registry.redhat.io authentication/pull ops container image
+            (Handled when fixture constructs AocAwsBackup class, or by the
+            first delete backup container run when deferred)
+        2. List the stack backups of the s3 bucket (backup index)
+        3. Compute the backups the retention policy prunes (dry run report)
+        4. Run ops container targeting delete backup playbook w/the pruned
+            backups (unless dry run)
+    Expected results:
+        1. Retention report lists every stack backup with the backup prefix
+        2. Pruned backups are deleted (unless dry run)
+    """
+    prune_result = aoc_aws_backup_stack.prune_stack_backups(
+        AocAwsBackupRetentionPolicy(
+            keep_last=pytestconfig.getoption("aoc_aws_backup_retention_keep_last"),
+            keep_daily=pytestconfig.getoption("aoc_aws_backup_retention_keep_daily"),
+            keep_weekly=pytestconfig.getoption("aoc_aws_backup_retention_keep_weekly"),
+            keep_monthly=pytestconfig.getoption(
+                "aoc_aws_backup_retention_keep_monthly"
+            ),
+            max_age_days=pytestconfig.getoption(
+                "aoc_aws_backup_retention_max_age_days"
+            ),
+        ),
+        dry_run=pytestconfig.getoption("aoc_aws_prune_backups_dry_run"),
+        bulk=pytestconfig.getoption("aoc_aws_bulk_delete_backup"),
+        chunk_size=pytestconfig.getoption("aoc_aws_delete_backup_chunk_size"),
+        max_workers=pytestconfig.getoption("aoc_aws_delete_backup_max_workers"),
+    )
+    assert prune_result["result"], "delete stack backups playbook failed"
+
+    # Bulk deletions leave the backup recovery points, keep the backup checkpoint
+    backup_checkpoint = aoc_aws_checkpoints.get(BACKUP_COMPLETED)
+    if (
+        prune_result["delete_result"]
+        and not prune_result["delete_result"]["s3_objects_only"]
+        and backup_checkpoint
+        and (
+            backup_checkpoint.get("backup_object_name")
+            in prune_result["retention"]["pruned"]
+        )
+    ):
+        aoc_aws_checkpoints.clear(BACKUP_COMPLETED, RESTORE_COMPLETED)
+
+
+@pytest.mark.aoc_aws_backup_regions  # type: ignore
+def test_backup_regions(
+    aoc_aws_backup_stack: AocAwsBackup,
+    pytestconfig: pytest.Config,
+) -> None:
+    """Test verifies stack backups run concurrently in every fan-out region.
+
+    Test procedure:
+        1. Validate registry.redhat.io authentication/pull ops container image
+            (Handled when fixture constructs AocAwsBackup class, or by the
+            first region backup container run when deferred)
+        2. Create the s3 bucket of every region
+        3. Run ops container targeting backup playbook in every region
+        4. Discover the backup of every region in its bucket
+        5. Delete the region backups and s3 buckets
+    Expected results:
+        1. Ops container backup playbook finishes successfully in every region
+        2. Backup files are found in every region s3 bucket
+        3. Region backups and s3 buckets are deleted
+    """
+    # The regions given on the command line replace the environment ones
+    regions: List[AocAwsRegion] = parse_regions(
+        pytestconfig.getoption("aoc_aws_fanout_region")
+        or os.getenv("AOC_AWS_FANOUT_REGIONS", "").split()
+    )
+    assert len(regions) != 0, f"no fan-out regions provided, received: {regions}"
+
+    fanout = AocAwsRegionFanout(
+        aoc_aws_backup_stack,
+        regions,
+        max_workers=pytestconfig.getoption("aoc_aws_fanout_max_workers"),
+        region_max_workers=pytestconfig.getoption("aoc_aws_region_max_workers"),
+    )
+    try:
+        create_result = fanout.create_s3_buckets()
+        assert create_result["result"], "unable to create the region s3 buckets"
+
+        backup_result = fanout.backup_stacks()
+        failed_regions: List[str] = [
+            key
+            for key, region_result in backup_result["region_results"].items()
+            if not region_result["result"]
+        ]
+        assert backup_result["result"], f"backup playbook failed for: {failed_regions}"
+
+        discover_result = fanout.discover_backups()
+        failed_regions = [
+            key
+            for key, region_result in discover_result["region_results"].items()
+            if not region_result["result"]
+        ]
+        assert discover_result["result"], f"backups not found for: {failed_regions}"
+    finally:
+        cleanup_result = fanout.cleanup(
+            bulk=pytestconfig.getoption("aoc_aws_bulk_delete_backup")
+        )
+        print(fanout.results_table())
+    assert cleanup_result["result"], "unable to delete the region backups"
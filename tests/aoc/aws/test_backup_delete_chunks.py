@@ -0,0 +1,165 @@
+"""Tests validating the chunked aws stack backups deletion."""
+import threading
+import time
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.ops_container import OpsContainer
+from tests.aoc.conftest import fake_aws_backup
+
+
+class FakeBackupIndex:
+    """Fake backup index recording the removed backup names."""
+
+    def __init__(self) -> None:
+        self.removed: List[str] = []
+
+    def remove(self, backup_names: List[str]) -> None:
+        self.removed.extend(backup_names)
+
+
+class FakeDeletePlaybook:
+    """Fake delete backups playbook run, failing the chunks holding a name once."""
+
+    def __init__(self, failing_backup_name: str = "", always: bool = False) -> None:
+        self.failing_backup_name: str = failing_backup_name
+        self.always: bool = always
+        self.runs: List[List[str]] = []
+        self.running: int = 0
+        self.max_running: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    @property
+    def run_container(self) -> Callable[[OpsContainer, str], Tuple[str, bool]]:
+        """Returns the `OpsContainer.run_container` replacement (a function)."""
+        return lambda operation, name: self.run(operation, name)
+
+    def run(self, operation: OpsContainer, name: str) -> Tuple[str, bool]:
+        """Records the chunk run, failing it when holding the failing name."""
+        backup_names: List[str] = operation.extra_vars["aws_backup_names"]
+        with self.lock:
+            self.runs.append(backup_names)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            fail: bool = self.failing_backup_name in backup_names and (
+                self.always
+                or sum(self.failing_backup_name in run for run in self.runs) == 1
+            )
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return f"deleted {len(backup_names)} backups", not fail
+
+
+@pytest.fixture
+def aoc_aws_backup(
+    aoc_skip_login_pull: None, monkeypatch: pytest.MonkeyPatch
+) -> Tuple[AocAwsBackup, FakeBackupIndex]:
+    """Fixture returning an aws backup operation (without login/pull)."""
+    backup_index = FakeBackupIndex()
+    monkeypatch.setattr(AocAwsBackup, "backup_index", lambda self: backup_index)
+    return fake_aws_backup(), backup_index
+
+
+@pytest.mark.aoc_backup_delete_chunks
+class TestAocAwsBackupDeleteChunks:
+    """Test suite covering the chunked concurrent backups deletion."""
+
+    BACKUP_NAMES: List[str] = [f"backup-{i}" for i in range(10)]
+
+    def test_chunks(
+        self,
+        aoc_aws_backup: Tuple[AocAwsBackup, FakeBackupIndex],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test verifies the chunks are deleted concurrently (up to max workers)."""
+        operation, backup_index = aoc_aws_backup
+        playbook = FakeDeletePlaybook()
+        monkeypatch.setattr(OpsContainer, "run_container", playbook.run_container)
+
+        result = operation.delete_stack_backup(
+            self.BACKUP_NAMES, chunk_size=3, max_workers=2
+        )
+
+        assert result["playbook_result"]
+        assert [c["backup_names"] for c in result["chunk_results"]] == [
+            self.BACKUP_NAMES[0:3],
+            self.BACKUP_NAMES[3:6],
+            self.BACKUP_NAMES[6:9],
+            self.BACKUP_NAMES[9:],
+        ]
+        assert all(c["attempts"] == 1 for c in result["chunk_results"])
+        assert sorted(map(tuple, playbook.runs)) == sorted(
+            tuple(c["backup_names"]) for c in result["chunk_results"]
+        )
+        assert playbook.max_running == 2
+        assert sorted(backup_index.removed) == sorted(self.BACKUP_NAMES)
+        assert "--- backups delete chunk 4/4 attempt 1 ---" in result["playbook_output"]
+
+    def test_retry_failed_chunks(
+        self,
+        aoc_aws_backup: Tuple[AocAwsBackup, FakeBackupIndex],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test verifies only the failed chunks are retried."""
+        operation, backup_index = aoc_aws_backup
+        playbook = FakeDeletePlaybook("backup-4")
+        monkeypatch.setattr(OpsContainer, "run_container", playbook.run_container)
+
+        result = operation.delete_stack_backup(self.BACKUP_NAMES, chunk_size=3)
+
+        assert result["playbook_result"]
+        assert [c["attempts"] for c in result["chunk_results"]] == [1, 2, 1, 1]
+        assert playbook.runs.count(self.BACKUP_NAMES[3:6]) == 2
+        assert len(playbook.runs) == 5
+        assert sorted(backup_index.removed) == sorted(self.BACKUP_NAMES)
+
+    def test_failed_chunks(
+        self,
+        aoc_aws_backup: Tuple[AocAwsBackup, FakeBackupIndex],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test verifies chunks failing every retry fail the deletion."""
+        operation, backup_index = aoc_aws_backup
+        playbook = FakeDeletePlaybook("backup-4", always=True)
+        monkeypatch.setattr(OpsContainer, "run_container", playbook.run_container)
+
+        result = operation.delete_stack_backup(
+            self.BACKUP_NAMES, chunk_size=3, retries=2
+        )
+
+        assert not result["playbook_result"]
+        assert [c["playbook_result"] for c in result["chunk_results"]] == [
+            True,
+            False,
+            True,
+            True,
+        ]
+        assert result["chunk_results"][1]["attempts"] == 3
+        assert "backup-4" not in backup_index.removed
+        assert len(backup_index.removed) == 7
+
+    def test_single_chunk(
+        self,
+        aoc_aws_backup: Tuple[AocAwsBackup, FakeBackupIndex],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test verifies small name lists run a single playbook on the operation."""
+        operation, _ = aoc_aws_backup
+        operations: List[OpsContainer] = []
+
+        def run_container(self: OpsContainer, name: str) -> Tuple[str, bool]:
+            operations.append(self)
+            return "deleted", True
+
+        monkeypatch.setattr(OpsContainer, "run_container", run_container)
+
+        result = operation.delete_stack_backup(self.BACKUP_NAMES)
+
+        assert result["playbook_result"]
+        assert result["playbook_output"] == "deleted"
+        assert operations == [operation]
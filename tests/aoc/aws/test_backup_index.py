@@ -0,0 +1,177 @@
+"""Tests validating the aws stack backup index."""
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from lib.aoc.aws.backup_index import AocAwsBackupIndex
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from tests.aoc.conftest import AOC_S3_BUCKET
+from tests.aoc.conftest import fake_aws_backup
+
+S3_BUCKET: str = AOC_S3_BUCKET
+BACKUP_KEYS: List[str] = ["awx.sql.gz", "efs.tar", "secrets.tar"]
+
+
+@pytest.fixture
+def aoc_s3_client(aoc_s3_client: Any) -> Any:
+    """Fixture returning a mocked s3 client holding three backups."""
+    for name in ["aoc-1", "aoc-2", "other-1"]:
+        for key in BACKUP_KEYS:
+            aoc_s3_client.put_object(Bucket=S3_BUCKET, Key=f"{name}/{key}", Body=b"x")
+    return aoc_s3_client
+
+
+@pytest.fixture
+def list_requests(aoc_s3_client: Any) -> List[Dict[str, Any]]:
+    """Fixture returning the parameters of every ListObjectsV2 request sent."""
+    requests: List[Dict[str, Any]] = []
+
+    def record(params: Dict[str, Any], **kwargs: Any) -> None:
+        requests.append(dict(params))
+
+    aoc_s3_client.meta.events.register(
+        "before-parameter-build.s3.ListObjectsV2", record
+    )
+    return requests
+
+
+@pytest.mark.aoc_backup_index
+class TestAocAwsBackupIndex:
+    """Test suite covering the backup index refresh and sharing."""
+
+    def test_pagination(
+        self, aoc_s3_client: Any, list_requests: List[Dict[str, Any]], tmp_path: Path
+    ) -> None:
+        """Test verifies every listing page is indexed."""
+        index = AocAwsBackupIndex(
+            aoc_s3_client,
+            S3_BUCKET,
+            cache_path=str(tmp_path / "index.json"),
+            page_size=2,
+        )
+        assert index.refresh() == 9
+
+        # 2 prefix pages, then 2 object pages per backup
+        assert len(list_requests) == 2 + 3 * 2
+        assert [b["name"] for b in index.backups()] == ["aoc-1", "aoc-2", "other-1"]
+        entry = index.get("aoc-2")
+        assert entry is not None
+        assert (entry["object_count"], entry["last_key"]) == (3, "aoc-2/secrets.tar")
+
+    def test_resume_after_last_key(
+        self, aoc_s3_client: Any, list_requests: List[Dict[str, Any]], tmp_path: Path
+    ) -> None:
+        """Test verifies unsettled backups are listed after their last key."""
+        index = AocAwsBackupIndex(
+            aoc_s3_client, S3_BUCKET, cache_path=str(tmp_path / "index.json")
+        )
+        index.refresh()
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key="aoc-2/z.tar", Body=b"xy")
+        list_requests.clear()
+
+        assert index.refresh() == 1
+        start_after = {
+            r["Prefix"]: r["StartAfter"] for r in list_requests if "Prefix" in r
+        }
+        assert start_after["aoc-2/"] == "aoc-2/secrets.tar"
+        entry = index.get("aoc-2")
+        assert entry is not None
+        assert (entry["object_count"], entry["total_size"]) == (4, 5)
+        assert index.latest(prefix="aoc") == entry
+
+    def test_settle_window(
+        self, aoc_s3_client: Any, list_requests: List[Dict[str, Any]], tmp_path: Path
+    ) -> None:
+        """Test verifies settled backups objects are not listed again."""
+        cache_path = str(tmp_path / "index.json")
+        AocAwsBackupIndex(aoc_s3_client, S3_BUCKET, cache_path=cache_path).refresh()
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key="aoc-3/efs.tar", Body=b"x")
+        list_requests.clear()
+        time.sleep(1)
+
+        index = AocAwsBackupIndex(
+            aoc_s3_client, S3_BUCKET, cache_path=cache_path, settle_seconds=0
+        )
+        assert index.refresh() == 1
+        assert [r.get("Prefix") for r in list_requests] == [None, "aoc-3/"]
+
+        # A full refresh lists every backup object again
+        assert index.refresh(full=True) == 10
+
+    def test_shared_updates(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies indexes sharing the cache file do not lose updates."""
+        cache_path = str(tmp_path / "index.json")
+        first = AocAwsBackupIndex(aoc_s3_client, S3_BUCKET, cache_path=cache_path)
+        first.refresh()
+        # e.g. an index of another pytest-xdist worker
+        second = AocAwsBackupIndex(aoc_s3_client, S3_BUCKET, cache_path=cache_path)
+
+        second.remove(["aoc-1"])
+        first.remove(["other-1"])
+        assert [b["name"] for b in first.backups()] == ["aoc-2"]
+        assert [
+            b["name"]
+            for b in AocAwsBackupIndex(
+                aoc_s3_client, S3_BUCKET, cache_path=cache_path
+            ).backups()
+        ] == ["aoc-2"]
+
+    def test_for_bucket(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies one index is shared per bucket."""
+        cache_path = str(tmp_path / "index.json")
+        index = AocAwsBackupIndex.for_bucket(aoc_s3_client, S3_BUCKET, cache_path)
+        other_client: Any = object()
+        assert AocAwsBackupIndex.for_bucket(other_client, S3_BUCKET, cache_path) is (
+            index
+        )
+        # The index lists the bucket with the latest client
+        assert index.s3_client is other_client
+
+
+@pytest.mark.aoc_backup_index
+class TestGetS3BackupObject:
+    """Test suite covering the latest stack backup lookup."""
+
+    @pytest.fixture
+    def aoc_aws_backup(
+        self,
+        aoc_skip_login_pull: None,
+        aoc_s3_client: Any,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> AocAwsBackup:
+        """Fixture returning an aws backup operation using a mocked s3 bucket."""
+        index = AocAwsBackupIndex(
+            aoc_s3_client, S3_BUCKET, cache_path=str(tmp_path / "index.json")
+        )
+        monkeypatch.setattr(AocAwsBackup, "s3_client", lambda self: aoc_s3_client)
+        monkeypatch.setattr(AocAwsBackup, "backup_index", lambda self: index)
+        return fake_aws_backup()
+
+    def test_latest(self, aoc_aws_backup: AocAwsBackup) -> None:
+        """Test verifies the latest backup named with the prefix is returned."""
+        assert aoc_aws_backup.get_s3_backup_object() == "aoc-2"
+
+    def test_no_prefix_match(self, aoc_aws_backup: AocAwsBackup) -> None:
+        """Test verifies backups named with another prefix are not returned."""
+        aoc_aws_backup.command_generator_vars["extra_vars"]["backup_prefix"] = "x"
+        assert aoc_aws_backup.get_s3_backup_object() == ""
+
+    def test_extended_prefix(
+        self, aoc_aws_backup: AocAwsBackup, aoc_s3_client: Any
+    ) -> None:
+        """Test verifies the backups of a stack extending the prefix are ignored."""
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key="aoc-2-1/efs.tar", Body=b"x")
+
+        assert aoc_aws_backup.get_s3_backup_object() == "aoc-2"
+        assert [b["name"] for b in aoc_aws_backup.backup_index().backups("aoc")] == [
+            "aoc-1",
+            "aoc-2",
+        ]
+        assert [b["name"] for b in aoc_aws_backup.backup_index().backups("aoc-2")] == [
+            "aoc-2-1"
+        ]
@@ -0,0 +1,135 @@
+"""Tests validating the aws stack backup archive inspection."""
+import gzip
+import io
+import os
+import tarfile
+from pathlib import Path
+from typing import Any
+from typing import Dict
+
+import pytest
+
+from lib.aoc.aws.backup_inspector import AocAwsBackupInspector
+from tests.aoc.conftest import AOC_S3_BUCKET
+
+S3_BUCKET: str = AOC_S3_BUCKET
+LARGE_MEMBER_SIZE: int = 4 * 1024 * 1024
+
+
+def tar_archive(members: Dict[str, bytes], compress: bool = False) -> bytes:
+    """Returns the (gzip compressed) tar archive of the members."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz" if compress else "w") as archive:
+        for name, data in members.items():
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mtime = 1_700_000_000
+            archive.addfile(member, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def aoc_s3_client(aoc_s3_client: Any) -> Any:
+    """Fixture returning a mocked s3 client holding a backup with archives."""
+    objects: Dict[str, bytes] = {
+        "efs.tar": tar_archive(
+            {
+                "efs/projects/large.bin": os.urandom(LARGE_MEMBER_SIZE),
+                "efs/projects/small.txt": b"small",
+            }
+        ),
+        "config.tar.gz": tar_archive(
+            {"config/settings.yml": b"a: 1\n", "config/secret.key": b"key"},
+            compress=True,
+        ),
+        "awx.sql.gz": gzip.compress(b"x" * 100_000),
+        "notes.txt": b"notes",
+    }
+    for key, body in objects.items():
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key=f"backup-1/{key}", Body=body)
+    return aoc_s3_client
+
+
+@pytest.mark.aoc_backup_inspector
+class TestAocAwsBackupInspector:
+    """Test suite covering the backup archives inspection and size history."""
+
+    def test_inspect(self, aoc_s3_client: Any) -> None:
+        """Test verifies members and component sizes are reported."""
+        result = AocAwsBackupInspector(aoc_s3_client, S3_BUCKET).inspect("backup-1")
+
+        assert result["result"], result["errors"]
+        archives = {archive["key"]: archive for archive in result["archives"]}
+        assert {key: archive["format"] for key, archive in archives.items()} == {
+            "awx.sql.gz": "gzip",
+            "config.tar.gz": "tar.gzip",
+            "efs.tar": "tar",
+            "notes.txt": "raw",
+        }
+        assert archives["efs.tar"]["members"] == [
+            {
+                "name": "efs/projects/large.bin",
+                "size": LARGE_MEMBER_SIZE,
+                "mtime": 1_700_000_000.0,
+                "type": "file",
+            },
+            {
+                "name": "efs/projects/small.txt",
+                "size": 5,
+                "mtime": 1_700_000_000.0,
+                "type": "file",
+            },
+        ]
+        assert [m["name"] for m in archives["config.tar.gz"]["members"]] == [
+            "config/settings.yml",
+            "config/secret.key",
+        ]
+        assert archives["awx.sql.gz"]["uncompressed_size"] == 100_000
+        assert {
+            name: component["uncompressed_size"]
+            for name, component in result["components"].items()
+        } == {
+            "database": 100_000,
+            "config": 8,
+            "efs": LARGE_MEMBER_SIZE + 5,
+            "other": 5,
+        }
+        # The large tar member data is skipped with ranged reads
+        assert archives["efs.tar"]["bytes_read"] < 256 * 1024
+        assert result["bytes_read"] < result["total_size"] / 4
+
+    def test_corrupted(self, aoc_s3_client: Any) -> None:
+        """Test verifies corrupted archives are reported."""
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET,
+            Key="backup-1/hub.tar.gz",
+            Body=tar_archive({"hub/data": os.urandom(10_000)}, compress=True)[:-2000],
+        )
+
+        result = AocAwsBackupInspector(aoc_s3_client, S3_BUCKET).inspect("backup-1")
+
+        assert not result["result"]
+        assert len(result["errors"]) == 1
+        assert result["errors"][0].startswith("backup-1/hub.tar.gz: ")
+
+    def test_size_history(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies the backup size growth is tracked."""
+        inspector = AocAwsBackupInspector(aoc_s3_client, S3_BUCKET)
+        history = str(tmp_path / "sizes" / "stack-1.jsonl")
+        previous = inspector.record_sizes(inspector.inspect("backup-1"), history)
+        aoc_s3_client.copy_object(
+            Bucket=S3_BUCKET,
+            Key="backup-2/awx.sql.gz",
+            CopySource={"Bucket": S3_BUCKET, "Key": "backup-1/awx.sql.gz"},
+        )
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET, Key="backup-2/notes.txt", Body=b"more notes"
+        )
+        current = inspector.record_sizes(inspector.inspect("backup-2"), history)
+
+        assert inspector.load_sizes(history) == [previous, current]
+        growth = inspector.growth(previous, current)
+        assert growth["other"] == 5
+        assert growth["efs"] == -previous["components"]["efs"]["size"]
+        assert growth["database"] == 0
+        assert growth["total"] == current["total_size"] - previous["total_size"]
@@ -0,0 +1,192 @@
+"""Tests validating the aws stack backup local mirror."""
+import io
+import os
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.aws.backup_mirror import AocAwsBackupMirror
+from lib.aoc.aws.backup_mirror import AocAwsBackupMirrorServer
+from tests.aoc.conftest import AOC_S3_BUCKET
+
+S3_BUCKET: str = AOC_S3_BUCKET
+PART_SIZE: int = 1024
+MULTIPART_SIZE: int = 5 * 1024 * 1024
+BACKUP_OBJECTS: Dict[str, bytes] = {
+    "awx/awx.dump": os.urandom(10_000),
+    "hub/content.tar": b"a" * MULTIPART_SIZE + b"b" * 1_000,
+    "hub/hub.dump": b"hub",
+    "secrets.tar.gz": os.urandom(3_000),
+}
+
+
+@pytest.fixture
+def aoc_s3_client(aoc_s3_client: Any) -> Any:
+    """Fixture returning a mocked s3 client holding a backup.
+
+    `hub/content.tar` is uploaded in two parts (multipart ETag).
+    """
+    for key, body in BACKUP_OBJECTS.items():
+        if key == "hub/content.tar":
+            continue
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key=f"backup-1/{key}", Body=body)
+
+    key = "backup-1/hub/content.tar"
+    upload_id = aoc_s3_client.create_multipart_upload(Bucket=S3_BUCKET, Key=key)[
+        "UploadId"
+    ]
+    parts: List[Any] = []
+    for number, body in enumerate([b"a" * MULTIPART_SIZE, b"b" * 1_000], 1):
+        response = aoc_s3_client.upload_part(
+            Bucket=S3_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        parts.append({"ETag": response["ETag"], "PartNumber": number})
+    aoc_s3_client.complete_multipart_upload(
+        Bucket=S3_BUCKET,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+    return aoc_s3_client
+
+
+@pytest.mark.aoc_backup_mirror
+class TestAocAwsBackupMirror:
+    """Test suite covering the backup mirror downloads and local endpoint."""
+
+    def test_download(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies the backup is mirrored, then skipped once mirrored."""
+        mirror = AocAwsBackupMirror(
+            aoc_s3_client, S3_BUCKET, str(tmp_path), part_size=PART_SIZE
+        )
+        result = mirror.download("backup-1")
+
+        assert result["result"], result["errors"]
+        assert sorted(result["downloaded_objects"]) == sorted(BACKUP_OBJECTS)
+        assert result["downloaded_bytes"] == sum(map(len, BACKUP_OBJECTS.values()))
+        for key, body in BACKUP_OBJECTS.items():
+            assert (tmp_path / S3_BUCKET / "backup-1" / key).read_bytes() == body
+        assert not list(tmp_path.rglob("*.aoc-part*"))
+
+        result = mirror.download("backup-1")
+
+        assert result["result"], result["errors"]
+        assert result["downloaded_objects"] == []
+        assert sorted(result["skipped_objects"]) == sorted(BACKUP_OBJECTS)
+
+    def test_resume(
+        self, aoc_s3_client: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test verifies an interrupted download only fetches the missing ranges."""
+        get_object = aoc_s3_client.get_object
+        interrupted: List[bool] = [True]
+        ranges: List[Tuple[str, str]] = []
+
+        def interrupted_get_object(**kwargs: Any) -> Any:
+            if interrupted[0] and kwargs["Range"] == "bytes=5120-6143":
+                raise aoc_s3_client.exceptions.ClientError(
+                    {"Error": {"Code": "InternalError", "Message": "interrupted"}},
+                    "GetObject",
+                )
+            ranges.append((kwargs["Key"], kwargs["Range"]))
+            return get_object(**kwargs)
+
+        monkeypatch.setattr(aoc_s3_client, "get_object", interrupted_get_object)
+        mirror = AocAwsBackupMirror(
+            aoc_s3_client, S3_BUCKET, str(tmp_path), part_size=PART_SIZE
+        )
+        result = mirror.download("backup-1")
+
+        assert not result["result"]
+        assert result["errors"] == [
+            "backup-1/awx/awx.dump bytes 5120-6143: interrupted"
+        ]
+        assert "awx/awx.dump" not in result["downloaded_objects"]
+        awx_dump = tmp_path / S3_BUCKET / "backup-1" / "awx" / "awx.dump"
+        assert not awx_dump.exists()
+        assert awx_dump.with_name("awx.dump.aoc-part").exists()
+
+        interrupted[0] = False
+        ranges.clear()
+        result = mirror.download("backup-1")
+
+        assert result["result"], result["errors"]
+        assert result["resumed_objects"] == ["awx/awx.dump"]
+        assert result["downloaded_objects"] == ["awx/awx.dump"]
+        assert ranges == [("backup-1/awx/awx.dump", "bytes=5120-6143")]
+        assert awx_dump.read_bytes() == BACKUP_OBJECTS["awx/awx.dump"]
+
+    def test_etag_mismatch(
+        self, aoc_s3_client: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test verifies corrupted downloads are not mirrored."""
+        get_object = aoc_s3_client.get_object
+
+        def corrupted_get_object(**kwargs: Any) -> Any:
+            response = get_object(**kwargs)
+            if kwargs["Key"] == "backup-1/secrets.tar.gz":
+                body = bytearray(response["Body"].read())
+                body[0] ^= 0xFF
+                response["Body"] = io.BytesIO(bytes(body))
+            return response
+
+        monkeypatch.setattr(aoc_s3_client, "get_object", corrupted_get_object)
+        result = AocAwsBackupMirror(aoc_s3_client, S3_BUCKET, str(tmp_path)).download(
+            "backup-1"
+        )
+
+        assert not result["result"]
+        assert len(result["errors"]) == 1
+        assert result["errors"][0].startswith("secrets.tar.gz: ETag")
+        assert not (tmp_path / S3_BUCKET / "backup-1" / "secrets.tar.gz").exists()
+
+    def test_serve(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies the mirror is served as an s3 compatible endpoint."""
+        mirror = AocAwsBackupMirror(aoc_s3_client, S3_BUCKET, str(tmp_path))
+        assert mirror.download("backup-1")["result"]
+        etags = {
+            item["Key"]: item["ETag"]
+            for item in aoc_s3_client.list_objects_v2(Bucket=S3_BUCKET)["Contents"]
+        }
+
+        import boto3
+
+        server = AocAwsBackupMirrorServer(str(tmp_path))
+        server.start()
+        try:
+            s3_client = boto3.client(
+                "s3",
+                endpoint_url=server.endpoint_url,
+                region_name="us-east-1",
+                aws_access_key_id="mirror",
+                aws_secret_access_key="mirror",
+            )
+            s3_client.head_bucket(Bucket=S3_BUCKET)
+            pages = s3_client.get_paginator("list_objects_v2").paginate(
+                Bucket=S3_BUCKET, Prefix="backup-1/", PaginationConfig={"PageSize": 3}
+            )
+            listed = {
+                item["Key"]: item["ETag"]
+                for page in pages
+                for item in page.get("Contents", [])
+            }
+            response = s3_client.get_object(
+                Bucket=S3_BUCKET, Key="backup-1/awx/awx.dump", Range="bytes=10-19"
+            )
+
+            assert listed == etags
+            assert response["ContentRange"] == "bytes 10-19/10000"
+            assert response["Body"].read() == BACKUP_OBJECTS["awx/awx.dump"][10:20]
+            assert response["ETag"] == etags["backup-1/awx/awx.dump"]
+            with pytest.raises(s3_client.exceptions.ClientError):
+                s3_client.head_object(Bucket=S3_BUCKET, Key="backup-1/eda.dump")
+        finally:
+            server.stop()
@@ -0,0 +1,94 @@
+"""Tests validating the aws multi stack backup orchestrator."""
+import time
+from typing import List
+from typing import Optional
+
+import pytest
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.backup import AocAwsBackupStackResult
+from lib.aoc.aws.operations.backup_orchestrator import AocAwsBackupOrchestrator
+from tests.aoc.conftest import fake_aws_backup
+from tests.aoc.conftest import FakeHostManager
+
+DELAY: float = 0.2
+
+
+def stack(
+    deployment_name: str, aws_s3_bucket: str, backup_prefix: Optional[str] = None
+) -> AocAwsBackupDataVars:
+    """Returns the backup data vars of the stack."""
+    base: AocAwsBackupDataVars = fake_aws_backup().command_generator_vars
+    extra_vars = AocAwsBackupDataExtraVars(**base["extra_vars"])
+    extra_vars["aws_s3_bucket"] = aws_s3_bucket
+    if backup_prefix is not None:
+        extra_vars["backup_prefix"] = backup_prefix
+    return AocAwsBackupDataVars(
+        cloud_credentials_path=base["cloud_credentials_path"],
+        deployment_name=deployment_name,
+        extra_vars=extra_vars,
+    )
+
+
+def orchestrator(stacks: List[AocAwsBackupDataVars]) -> AocAwsBackupOrchestrator:
+    """Returns the backup orchestrator of the stacks (run by a fake module)."""
+    return AocAwsBackupOrchestrator.create(
+        aoc_version="2.4",
+        aoc_ops_image="registry.example.com/aoc/ops",
+        aoc_ops_image_tag="1.0",
+        aoc_image_registry_username="user",
+        aoc_image_registry_password="secret",
+        ansible_module=FakeHostManager(),
+        stacks=stacks,
+        max_workers=4,
+    )
+
+
+@pytest.mark.aoc_backup_orchestrator
+@pytest.mark.usefixtures("aoc_skip_login_pull")
+class TestAocAwsBackupOrchestrator:
+    """Test suite covering the concurrent stack backups."""
+
+    def test_duplicate_deployment_name(self) -> None:
+        """Test verifies stacks sharing a deployment name are rejected."""
+        with pytest.raises(ValueError, match="Duplicate stack s-1"):
+            orchestrator([stack("s-1", "bucket-1"), stack("s-1", "bucket-2")])
+
+    def test_shared_backup_location(self) -> None:
+        """Test verifies stacks sharing a bucket/backup prefix are rejected."""
+        with pytest.raises(ValueError, match="s-1 and s-2 share s3 bucket"):
+            orchestrator([stack("s-1", "bucket"), stack("s-2", "bucket")])
+        # The backup prefix tells the backups of a shared bucket apart
+        assert orchestrator(
+            [stack("s-1", "bucket"), stack("s-2", "bucket", backup_prefix="s-2")]
+        )
+
+    def test_backup_stacks(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies the stacks are backed up concurrently."""
+
+        def backup_stack(self: AocAwsBackup) -> AocAwsBackupStackResult:
+            time.sleep(DELAY)
+            deployment_name: str = self.command_generator_vars["deployment_name"]
+            if deployment_name == "s-3":
+                raise RuntimeError("unreachable")
+            return AocAwsBackupStackResult(
+                backup_object_name=f"{deployment_name}-backup",
+                backup_object_name_in_output=True,
+                playbook_output="",
+                playbook_result=True,
+            )
+
+        monkeypatch.setattr(AocAwsBackup, "backup_stack", backup_stack)
+        result = orchestrator(
+            [stack(f"s-{i}", f"bucket-{i}") for i in range(1, 5)]
+        ).backup_stacks()
+
+        assert not result["result"]
+        assert result["total_duration"] < 2 * DELAY
+        assert result["sequential_duration"] >= 3 * DELAY
+        assert {
+            name: r["backup_object_name"] for name, r in result["stack_results"].items()
+        } == {"s-1": "s-1-backup", "s-2": "s-2-backup", "s-3": "", "s-4": "s-4-backup"}
+        assert result["stack_results"]["s-3"]["playbook_output"] == "unreachable"
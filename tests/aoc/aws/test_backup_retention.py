@@ -0,0 +1,216 @@
+"""Tests validating the aws stack backups retention policies."""
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.aws.backup_index import AocAwsBackupIndex
+from lib.aoc.aws.backup_index import AocAwsBackupIndexEntry
+from lib.aoc.aws.backup_retention import AocAwsBackupRetention
+from lib.aoc.aws.backup_retention import AocAwsBackupRetentionPolicy
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from tests.aoc.conftest import AOC_S3_BUCKET
+from tests.aoc.conftest import fake_aws_backup
+
+S3_BUCKET: str = AOC_S3_BUCKET
+NOW: float = datetime(2026, 3, 31, 12, tzinfo=timezone.utc).timestamp()
+
+
+def backup(name: str, month: int, day: int, hour: int = 0) -> AocAwsBackupIndexEntry:
+    """Returns the index entry of a backup last modified at the 2026 (utc) date."""
+    return AocAwsBackupIndexEntry(
+        name=name,
+        object_count=1,
+        total_size=100,
+        last_modified=datetime(2026, month, day, hour, tzinfo=timezone.utc).timestamp(),
+        last_key=f"{name}/awx.sql.gz",
+    )
+
+
+def decisions(
+    retention: AocAwsBackupRetention, backups: List[AocAwsBackupIndexEntry]
+) -> List[Tuple[str, bool, List[str]]]:
+    """Returns the (name, keep, reasons) retention decisions of the backups."""
+    return [
+        (decision["name"], decision["keep"], decision["reasons"])
+        for decision in retention.plan(backups, now=NOW)["decisions"]
+    ]
+
+
+BACKUPS: List[AocAwsBackupIndexEntry] = [
+    backup("aoc-backup-0115", 1, 15),
+    backup("aoc-backup-0210", 2, 10),
+    backup("aoc-backup-0225", 2, 25),
+    backup("aoc-backup-0320", 3, 20),
+    backup("aoc-backup-0328", 3, 28),
+    backup("aoc-backup-0329", 3, 29),
+    backup("aoc-backup-0330a", 3, 30),
+    backup("aoc-backup-0330b", 3, 30, 12),
+    backup("aoc-backup-0331", 3, 31),
+]
+
+
+@pytest.mark.aoc_backup_retention
+class TestAocAwsBackupRetention:
+    """Test suite covering the backup retention policies."""
+
+    def test_keep_rules(self) -> None:
+        """Test verifies the last/daily/weekly/monthly backups are kept."""
+        retention = AocAwsBackupRetention(
+            AocAwsBackupRetentionPolicy(
+                keep_last=2, keep_daily=3, keep_weekly=2, keep_monthly=2
+            )
+        )
+
+        assert decisions(retention, BACKUPS) == [
+            (
+                "aoc-backup-0331",
+                True,
+                ["latest", "last", "daily", "weekly", "monthly"],
+            ),
+            ("aoc-backup-0330b", True, ["last", "daily"]),
+            ("aoc-backup-0330a", False, []),
+            ("aoc-backup-0329", True, ["daily", "weekly"]),
+            ("aoc-backup-0328", False, []),
+            ("aoc-backup-0320", False, []),
+            ("aoc-backup-0225", True, ["monthly"]),
+            ("aoc-backup-0210", False, []),
+            ("aoc-backup-0115", False, []),
+        ]
+
+        result = retention.plan(BACKUPS, now=NOW)
+        assert result["pruned_size"] == 500
+        report = AocAwsBackupRetention.report(result)
+        assert "prune 2026-03-30T00:00:00Z" in report
+        assert report.endswith(
+            "Keeping 4 backups (400 bytes), pruning 5 backups (500 bytes)"
+        )
+
+    def test_max_age(self) -> None:
+        """Test verifies expired backups are pruned, except the latest."""
+        retention = AocAwsBackupRetention(
+            AocAwsBackupRetentionPolicy(keep_last=5, max_age_days=2)
+        )
+        assert [
+            (name, keep) for name, keep, _ in decisions(retention, BACKUPS[:6])
+        ] == [
+            ("aoc-backup-0329", True),
+            ("aoc-backup-0328", False),
+            ("aoc-backup-0320", False),
+            ("aoc-backup-0225", False),
+            ("aoc-backup-0210", False),
+            ("aoc-backup-0115", False),
+        ]
+        assert decisions(retention, BACKUPS[:2])[0] == (
+            "aoc-backup-0210",
+            True,
+            ["latest", "last"],
+        )
+
+        # Without keep rules, every backup younger than the max age is kept
+        retention = AocAwsBackupRetention(AocAwsBackupRetentionPolicy(max_age_days=2))
+        assert retention.plan(BACKUPS, now=NOW)["kept"] == [
+            "aoc-backup-0331",
+            "aoc-backup-0330b",
+            "aoc-backup-0330a",
+        ]
+        # Without any rule, every backup is kept
+        result = AocAwsBackupRetention({}).plan(BACKUPS, now=NOW)
+        assert len(result["kept"]) == len(BACKUPS)
+        assert not result["pruned"]
+
+    def test_prefixes(self) -> None:
+        """Test verifies the policy applies to every backup prefix separately."""
+        backups = [
+            backup("stack-1-0301", 3, 1),
+            backup("stack-2-0302", 3, 2),
+            backup("stack-1-0303", 3, 3),
+            backup("stack-1-0304", 3, 4),
+            backup("other-0305", 3, 5),
+            backup("stack-1-0306", 3, 6),
+        ]
+        # The "stack" prefix does not match the backups of the extending prefixes
+        result = AocAwsBackupRetention(AocAwsBackupRetentionPolicy(keep_last=2)).plan(
+            backups, ["stack-1", "stack-2", "stack"], now=NOW
+        )
+
+        assert result["kept"] == [
+            "stack-1-0306",
+            "stack-1-0304",
+            "stack-2-0302",
+        ]
+        assert result["pruned"] == ["stack-1-0303", "stack-1-0301"]
+        assert {d["name"]: d["prefix"] for d in result["decisions"]}[
+            "stack-2-0302"
+        ] == "stack-2"
+
+    def test_invalid_policy(self) -> None:
+        """Test verifies negative rules are rejected."""
+        with pytest.raises(ValueError, match="keep_daily"):
+            AocAwsBackupRetention(AocAwsBackupRetentionPolicy(keep_daily=-1))
+
+
+@pytest.fixture
+def aoc_aws_backup(
+    aoc_skip_login_pull: None,
+    aoc_s3_client: Any,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> Tuple[AocAwsBackup, Any]:
+    """Fixture returning an aws backup operation using a mocked s3 bucket."""
+    for name in ["aoc-1", "aoc-2", "aoc-3", "aoc-4", "other-1"]:
+        for key in ["awx.sql.gz", "efs.tar"]:
+            aoc_s3_client.put_object(Bucket=S3_BUCKET, Key=f"{name}/{key}", Body=b"x")
+    monkeypatch.setattr(AocAwsBackup, "s3_client", lambda self: aoc_s3_client)
+    monkeypatch.setattr(
+        AocAwsBackup,
+        "backup_index",
+        lambda self: AocAwsBackupIndex(
+            aoc_s3_client, S3_BUCKET, cache_path=str(tmp_path / "index.json")
+        ),
+    )
+    return fake_aws_backup(), aoc_s3_client
+
+
+@pytest.mark.aoc_backup_retention
+class TestAocAwsBackupPrune:
+    """Test suite covering the stack backups pruning."""
+
+    @staticmethod
+    def backup_names(s3_client: Any) -> List[str]:
+        """Returns the backup names left in the bucket."""
+        response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Delimiter="/")
+        return [p["Prefix"].rstrip("/") for p in response.get("CommonPrefixes", [])]
+
+    def test_dry_run(self, aoc_aws_backup: Tuple[AocAwsBackup, Any]) -> None:
+        """Test verifies dry runs only report the backups to prune."""
+        operation, s3_client = aoc_aws_backup
+
+        result = operation.prune_stack_backups(AocAwsBackupRetentionPolicy(keep_last=2))
+
+        assert result["result"]
+        assert result["delete_result"] is None
+        assert result["retention"]["kept"] == ["aoc-4", "aoc-3"]
+        assert result["retention"]["pruned"] == ["aoc-2", "aoc-1"]
+        assert len(self.backup_names(s3_client)) == 5
+
+    def test_prune(self, aoc_aws_backup: Tuple[AocAwsBackup, Any]) -> None:
+        """Test verifies the pruned backups are deleted (only for the prefix)."""
+        operation, s3_client = aoc_aws_backup
+
+        result = operation.prune_stack_backups(
+            AocAwsBackupRetentionPolicy(keep_last=2), dry_run=False, bulk=True
+        )
+
+        assert result["result"]
+        assert result["delete_result"] is not None
+        assert self.backup_names(s3_client) == ["aoc-3", "aoc-4", "other-1"]
+        assert [b["name"] for b in operation.backup_index().backups()] == [
+            "aoc-3",
+            "aoc-4",
+            "other-1",
+        ]
@@ -0,0 +1,116 @@
+"""Tests validating the aws stack backup integrity verification."""
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from lib.aoc.aws.backup_verifier import AocAwsBackupVerifier
+from tests.aoc.conftest import AOC_S3_BUCKET
+
+S3_BUCKET: str = AOC_S3_BUCKET
+
+
+@pytest.fixture
+def aoc_s3_client(aoc_s3_client: Any) -> Any:
+    """Fixture returning a mocked s3 client holding a complete backup."""
+    for key in ("awx/awx.dump", "hub/hub.dump", "secrets.tar.gz"):
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET,
+            Key=f"backup-1/{key}",
+            Body=b"backup",
+            Metadata={"component": key.split("/")[0]},
+        )
+    return aoc_s3_client
+
+
+@pytest.mark.aoc_backup_verifier
+class TestAocAwsBackupVerifier:
+    """Test suite covering the backup manifest and integrity checks."""
+
+    def test_verify(self, aoc_s3_client: Any) -> None:
+        """Test verifies a complete backup manifest is built."""
+        result = AocAwsBackupVerifier(aoc_s3_client, S3_BUCKET).verify(
+            "backup-1", ["awx/*.dump", "hub/*.dump", "secrets.tar.gz"]
+        )
+
+        assert result["result"], result["errors"]
+        assert result["manifest"]["object_count"] == 3
+        assert result["manifest"]["total_size"] == 18
+        assert [o["key"] for o in result["manifest"]["objects"]] == [
+            "awx/awx.dump",
+            "hub/hub.dump",
+            "secrets.tar.gz",
+        ]
+        assert result["manifest"]["objects"][0]["metadata"] == {"component": "awx"}
+        assert result["manifest"]["objects"][0]["etag"]
+
+    def test_incomplete(self, aoc_s3_client: Any) -> None:
+        """Test verifies missing, empty and unfinished objects fail."""
+        aoc_s3_client.put_object(Bucket=S3_BUCKET, Key="backup-1/eda.dump", Body=b"")
+        aoc_s3_client.create_multipart_upload(
+            Bucket=S3_BUCKET, Key="backup-1/hub/content.tar"
+        )
+
+        result = AocAwsBackupVerifier(aoc_s3_client, S3_BUCKET).verify(
+            "backup-1", ["awx/*.dump", "controller/*.dump"]
+        )
+
+        assert not result["result"]
+        assert result["missing_components"] == ["controller/*.dump"]
+        assert result["empty_objects"] == ["eda.dump"]
+        assert result["truncated_objects"] == []
+        assert result["pending_uploads"] == ["hub/content.tar"]
+        assert len(result["errors"]) == 3
+
+        assert not AocAwsBackupVerifier(aoc_s3_client, S3_BUCKET).verify("backup-2")[
+            "result"
+        ]
+
+    def test_recorded_manifest(self, aoc_s3_client: Any) -> None:
+        """Test verifies a backup is checked against its recorded manifest."""
+        verifier = AocAwsBackupVerifier(aoc_s3_client, S3_BUCKET)
+        recorded_manifest = verifier.verify("backup-1")["manifest"]
+        assert verifier.verify("backup-1", recorded_manifest=recorded_manifest)[
+            "result"
+        ]
+
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET, Key="backup-1/hub/hub.dump", Body=b"back"
+        )
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET, Key="backup-1/awx/awx.dump", Body=b"BACKUP"
+        )
+        aoc_s3_client.delete_object(Bucket=S3_BUCKET, Key="backup-1/secrets.tar.gz")
+        result = verifier.verify("backup-1", recorded_manifest=recorded_manifest)
+
+        assert not result["result"]
+        assert result["truncated_objects"] == ["hub/hub.dump"]
+        assert result["errors"] == [
+            "hub/hub.dump: truncated object",
+            "secrets.tar.gz: recorded object removed",
+            "awx/awx.dump: changed since recorded",
+        ]
+
+    def test_compare(self, aoc_s3_client: Any, tmp_path: Path) -> None:
+        """Test verifies saved manifests are compared with later backups."""
+        verifier = AocAwsBackupVerifier(aoc_s3_client, S3_BUCKET)
+        path = str(tmp_path / "manifests" / "backup-1.json")
+        verifier.save_manifest(verifier.verify("backup-1")["manifest"], path)
+
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET, Key="backup-1/awx/awx.dump", Body=b"backup-2"
+        )
+        aoc_s3_client.put_object(
+            Bucket=S3_BUCKET, Key="backup-1/eda/eda.dump", Body=b"backup"
+        )
+        aoc_s3_client.delete_object(Bucket=S3_BUCKET, Key="backup-1/secrets.tar.gz")
+
+        diff = AocAwsBackupVerifier.compare(
+            AocAwsBackupVerifier.load_manifest(path),
+            verifier.verify("backup-1")["manifest"],
+        )
+        assert diff == {
+            "added": ["eda/eda.dump"],
+            "removed": ["secrets.tar.gz"],
+            "changed": ["awx/awx.dump"],
+        }
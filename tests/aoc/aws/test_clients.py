@@ -0,0 +1,80 @@
+"""Tests validating the aws client factory."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from typing import List
+
+import pytest
+
+from lib.aoc.aws.clients import AwsClientFactory
+
+CREDENTIALS: str = """[default]
+aws_access_key_id = AKIAAOCTESTS
+aws_secret_access_key = secret
+"""
+
+
+@pytest.fixture
+def credentials_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Fixture returning an aws credentials file, ignoring the environment."""
+    for name in [
+        "AWS_ACCESS_KEY_ID",
+        "AWS_SECRET_ACCESS_KEY",
+        "AWS_SESSION_TOKEN",
+        "AWS_PROFILE",
+        "AWS_DEFAULT_REGION",
+    ]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(tmp_path / "config"))
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(tmp_path / "missing"))
+    path = tmp_path / "credentials"
+    path.write_text(CREDENTIALS)
+    return str(path)
+
+
+@pytest.mark.aoc_aws_clients
+class TestAwsClientFactory:
+    """Test suite covering the aws clients caching and configuration."""
+
+    def test_cache(self, credentials_path: str, tmp_path: Path) -> None:
+        """Test verifies clients are cached per credentials file/region/service."""
+        factory = AwsClientFactory()
+        other_path = tmp_path / "other-credentials"
+        other_path.write_text(CREDENTIALS)
+
+        client = factory.s3(credentials_path, "us-east-1")
+
+        assert factory.client("s3", credentials_path, "us-east-1") is client
+        assert factory.s3(str(other_path), "us-east-1") is not client
+        assert factory.s3(credentials_path, "eu-west-1") is not client
+        assert factory.client("sts", credentials_path, "us-east-1") is not client
+
+        factory.clear()
+        assert factory.s3(credentials_path, "us-east-1") is not client
+
+    def test_configuration(self, credentials_path: str) -> None:
+        """Test verifies the credentials file, region and pool size are used."""
+        factory = AwsClientFactory(max_pool_connections=7)
+
+        client: Any = factory.client("s3", credentials_path, "eu-west-1")
+
+        assert client.meta.region_name == "eu-west-1"
+        assert client.meta.config.max_pool_connections == 7
+        credentials = client._request_signer._credentials
+        assert credentials.access_key == "AKIAAOCTESTS"
+
+    def test_concurrent_clients(self, credentials_path: str) -> None:
+        """Test verifies concurrent calls share a single cached client."""
+        factory = AwsClientFactory()
+        workers: int = 8
+        barrier = threading.Barrier(workers)
+
+        def client(_: int) -> Any:
+            barrier.wait()
+            return factory.s3(credentials_path, "us-east-1")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            clients: List[Any] = list(executor.map(client, range(workers)))
+
+        assert all(c is clients[0] for c in clients)
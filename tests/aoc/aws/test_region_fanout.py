@@ -0,0 +1,312 @@
+"""Tests validating the aws region fan-out operations."""
+import threading
+import time
+from typing import Dict
+from typing import List
+
+import pytest
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDeleteResult
+from lib.aoc.aws.operations.backup import AocAwsBackupStackResult
+from lib.aoc.aws.operations.region_fanout import AocAwsRegion
+from lib.aoc.aws.operations.region_fanout import AocAwsRegionFanout
+from lib.aoc.aws.operations.region_fanout import parse_regions
+from tests.aoc.conftest import fake_aws_backup
+
+DELAY: float = 0.2
+
+
+class FakeAws:
+    """Fake aws account recording the concurrent operations per region."""
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.lock: threading.Lock = threading.Lock()
+        self.running: Dict[str, int] = {}
+        self.max_running: Dict[str, int] = {}
+        self.max_total: int = 0
+        self.buckets: List[str] = []
+        self.backups: Dict[str, str] = {}
+        self.failed_regions: List[str] = []
+
+    def run(self, backup: AocAwsBackup) -> bool:
+        """Simulates an operation of the backup stack region."""
+        region: str = backup.command_generator_vars["extra_vars"]["aws_region"]
+        with self.lock:
+            self.running[region] = self.running.get(region, 0) + 1
+            self.max_running[region] = max(
+                self.max_running.get(region, 0), self.running[region]
+            )
+            self.max_total = max(self.max_total, sum(self.running.values()))
+        time.sleep(DELAY)
+        with self.lock:
+            self.running[region] -= 1
+        return region not in self.failed_regions
+
+
+@pytest.fixture
+def fake_aws(aoc_skip_login_pull: None, monkeypatch: pytest.MonkeyPatch) -> FakeAws:
+    """Fixture patching the aws backup operations to use a fake aws account."""
+    fake_aws = FakeAws()
+
+    def create_s3_bucket(self: AocAwsBackup) -> bool:
+        fake_aws.buckets.append(
+            self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+        )
+        return fake_aws.run(self)
+
+    def backup_stack(self: AocAwsBackup) -> AocAwsBackupStackResult:
+        result: bool = fake_aws.run(self)
+        backup_name: str = f'{self.command_generator_vars["deployment_name"]}-backup'
+        if result:
+            with fake_aws.lock:
+                fake_aws.backups[
+                    self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+                ] = backup_name
+        return AocAwsBackupStackResult(
+            playbook_output="",
+            playbook_result=result,
+            backup_object_name=backup_name if result else "",
+            backup_object_name_in_output=False,
+        )
+
+    def get_s3_backup_object(self: AocAwsBackup) -> str:
+        fake_aws.run(self)
+        return fake_aws.backups.get(
+            self.command_generator_vars["extra_vars"]["aws_s3_bucket"], ""
+        )
+
+    def s3_backup_exists(self: AocAwsBackup, backup_name: str) -> bool:
+        fake_aws.run(self)
+        return (
+            fake_aws.backups.get(
+                self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+            )
+            == backup_name
+        )
+
+    def delete_stack_backup(
+        self: AocAwsBackup, backup_names: List[str], bulk: bool = False
+    ) -> AocAwsBackupDeleteResult:
+        fake_aws.backups.pop(
+            self.command_generator_vars["extra_vars"]["aws_s3_bucket"], None
+        )
+        return AocAwsBackupDeleteResult(
+            playbook_output="",
+            playbook_result=fake_aws.run(self),
+            chunk_results=[],
+            s3_objects_only=bulk,
+        )
+
+    def delete_s3_bucket(self: AocAwsBackup, bulk: bool = False) -> bool:
+        bucket_name: str = self.command_generator_vars["extra_vars"]["aws_s3_bucket"]
+        if bucket_name in fake_aws.buckets:
+            fake_aws.buckets.remove(bucket_name)
+        return fake_aws.run(self)
+
+    monkeypatch.setattr(AocAwsBackup, "create_s3_bucket", create_s3_bucket)
+    monkeypatch.setattr(AocAwsBackup, "backup_stack", backup_stack)
+    monkeypatch.setattr(AocAwsBackup, "get_s3_backup_object", get_s3_backup_object)
+    monkeypatch.setattr(AocAwsBackup, "s3_backup_exists", s3_backup_exists)
+    monkeypatch.setattr(AocAwsBackup, "delete_stack_backup", delete_stack_backup)
+    monkeypatch.setattr(AocAwsBackup, "delete_s3_bucket", delete_s3_bucket)
+    return fake_aws
+
+
+@pytest.fixture
+def aoc_aws_backup(fake_aws: FakeAws) -> AocAwsBackup:
+    """Fixture returning the base aws backup operation of the fan-out."""
+    return fake_aws_backup(deployment_name="stack")
+
+
+REGIONS: List[AocAwsRegion] = [
+    AocAwsRegion(aws_region="us-east-1", aws_ssm_bucket_name="aoc-ssm-us"),
+    AocAwsRegion(
+        aws_region="us-east-1",
+        aws_s3_bucket="aoc-backups-us-2",
+        aws_ssm_bucket_name="aoc-ssm-us-2",
+        deployment_name="stack-2",
+    ),
+    AocAwsRegion(
+        aws_region="us-east-1",
+        aws_s3_bucket="aoc-backups-us-3",
+        aws_ssm_bucket_name="aoc-ssm-us-3",
+        deployment_name="stack-3",
+    ),
+    AocAwsRegion(
+        aws_region="eu-west-1",
+        aws_s3_bucket="aoc-backups-eu",
+        aws_ssm_bucket_name="aoc-ssm-eu",
+    ),
+    AocAwsRegion(
+        aws_region="ap-south-1",
+        aws_ssm_bucket_name="aoc-ssm-ap",
+        deployment_name="stack-ap",
+    ),
+]
+
+
+@pytest.mark.aoc_region_fanout
+class TestAocAwsRegionFanout:
+    """Test suite covering the aws region fan-out operations."""
+
+    def test_region_stacks(self, aoc_aws_backup: AocAwsBackup) -> None:
+        """Test verifies the region data vars default to the base stack ones."""
+        fanout = AocAwsRegionFanout(aoc_aws_backup, REGIONS)
+
+        assert list(fanout.stacks) == [
+            "us-east-1/stack",
+            "us-east-1/stack-2",
+            "us-east-1/stack-3",
+            "eu-west-1/stack",
+            "ap-south-1/stack-ap",
+        ]
+        eu_extra_vars = fanout.stacks["eu-west-1/stack"]["extra_vars"]
+        assert eu_extra_vars["aws_s3_bucket"] == "aoc-backups-eu"
+        assert eu_extra_vars["aws_ssm_bucket_name"] == "aoc-ssm-eu"
+        assert eu_extra_vars["backup_prefix"] == "aoc"
+        assert (
+            fanout.stacks["ap-south-1/stack-ap"]["extra_vars"]["aws_s3_bucket"]
+            == "aoc-backups-ap-south-1"
+        )
+        # The base operation is left untouched
+        assert aoc_aws_backup.command_generator_vars["extra_vars"]["aws_s3_bucket"] == (
+            "aoc-backups"
+        )
+
+        with pytest.raises(ValueError, match="Duplicate stack us-east-1/stack"):
+            AocAwsRegionFanout(aoc_aws_backup, REGIONS[:1] * 2)
+        with pytest.raises(ValueError):
+            AocAwsRegionFanout(aoc_aws_backup, [])
+        # Region targets sharing a bucket would discover each other's backup
+        with pytest.raises(ValueError, match="share s3 bucket"):
+            AocAwsRegionFanout(
+                aoc_aws_backup,
+                [REGIONS[0], AocAwsRegion(**REGIONS[0], deployment_name="stack-2")],
+            )
+        # The region ssm bucket name is not made up from the base stack one
+        with pytest.raises(ValueError, match="eu-west-1 requires its ssm bucket"):
+            AocAwsRegionFanout(aoc_aws_backup, [AocAwsRegion(aws_region="eu-west-1")])
+
+    def test_backup_stacks(
+        self, aoc_aws_backup: AocAwsBackup, fake_aws: FakeAws
+    ) -> None:
+        """Test verifies regions overlap, up to the per region/overall caps."""
+        fanout = AocAwsRegionFanout(
+            aoc_aws_backup, REGIONS, max_workers=3, region_max_workers=2
+        )
+
+        create_result = fanout.create_s3_buckets()
+        assert create_result["result"]
+        assert sorted(fake_aws.buckets) == [
+            "aoc-backups-ap-south-1",
+            "aoc-backups-eu",
+            "aoc-backups-us-2",
+            "aoc-backups-us-3",
+            "aoc-backups-us-east-1",
+        ]
+
+        result = fanout.backup_stacks()
+        assert result["result"]
+        # 5 backups of 0.2s: 2 lanes in us-east-1 (3 backups) plus eu/ap
+        assert result["total_duration"] < 2.5 * DELAY
+        assert result["sequential_duration"] >= 5 * DELAY
+        assert fake_aws.max_running["us-east-1"] == 2
+        assert fake_aws.max_total == 3
+        assert fanout.backup_names["ap-south-1/stack-ap"] == "stack-ap-backup"
+
+        discover_result = fanout.discover_backups()
+        assert discover_result["result"]
+        assert {
+            key: r["backup_name"]
+            for key, r in discover_result["region_results"].items()
+        } == {
+            "us-east-1/stack": "stack-backup",
+            "us-east-1/stack-2": "stack-2-backup",
+            "us-east-1/stack-3": "stack-3-backup",
+            "eu-west-1/stack": "stack-backup",
+            "ap-south-1/stack-ap": "stack-ap-backup",
+        }
+
+        cleanup_result = fanout.cleanup()
+        assert cleanup_result["result"]
+        assert not fake_aws.buckets
+        assert not fanout.backup_names
+        assert list(fanout.results) == [
+            "create_bucket",
+            "backup",
+            "discover",
+            "cleanup",
+        ]
+
+    def test_failed_region(
+        self, aoc_aws_backup: AocAwsBackup, fake_aws: FakeAws
+    ) -> None:
+        """Test verifies a failed region does not stop the other regions."""
+        fake_aws.failed_regions.append("eu-west-1")
+        fanout = AocAwsRegionFanout(aoc_aws_backup, REGIONS)
+
+        result = fanout.backup_stacks()
+
+        assert not result["result"]
+        assert [
+            key for key, r in result["region_results"].items() if not r["result"]
+        ] == ["eu-west-1/stack"]
+        assert "eu-west-1/stack" not in fanout.backup_names
+
+        # Nothing to delete for the failed region, its bucket delete fails
+        cleanup_result = fanout.cleanup()
+        assert not cleanup_result["result"]
+        eu_result = cleanup_result["region_results"]["eu-west-1/stack"]
+        assert eu_result["message"] == (
+            "no backup to delete, unable to delete bucket aoc-backups-eu"
+        )
+
+        table = fanout.results_table().splitlines()
+        assert table[0].split() == ["target", "backup", "cleanup", "backup"]
+        assert table[4].split()[:4] == [
+            "eu-west-1/stack",
+            "FAILED",
+            f"{DELAY:.1f}s",
+            "FAILED",
+        ]
+        assert table[-1].startswith("total (sequential)")
+
+    def test_discover_backups(
+        self, aoc_aws_backup: AocAwsBackup, fake_aws: FakeAws
+    ) -> None:
+        """Test verifies backups not created by the fan-out are found by prefix."""
+        fake_aws.backups["aoc-backups-eu"] = "aoc-1"
+        fanout = AocAwsRegionFanout(aoc_aws_backup, REGIONS[3:4])
+        result = fanout.discover_backups()
+        assert result["region_results"]["eu-west-1/stack"]["backup_name"] == "aoc-1"
+
+        # Without a backup prefix, the latest backup may be another stack's
+        aoc_aws_backup.command_generator_vars["extra_vars"]["backup_prefix"] = ""
+        fanout = AocAwsRegionFanout(aoc_aws_backup, REGIONS[3:4])
+        result = fanout.discover_backups()
+        assert not result["result"]
+        assert result["region_results"]["eu-west-1/stack"]["message"] == (
+            "no backup created or backup prefix to discover"
+        )
+
+    def test_parse_regions(self) -> None:
+        """Test verifies the region specs are parsed to fan-out targets."""
+        assert parse_regions(
+            [
+                "us-east-1",
+                "eu-west-1=aoc-eu",
+                "ap-south-1=aoc-ap,aoc-ssm-ap",
+                "sa-east-1=,ssm",
+            ]
+        ) == [
+            AocAwsRegion(aws_region="us-east-1"),
+            AocAwsRegion(aws_region="eu-west-1", aws_s3_bucket="aoc-eu"),
+            AocAwsRegion(
+                aws_region="ap-south-1",
+                aws_s3_bucket="aoc-ap",
+                aws_ssm_bucket_name="aoc-ssm-ap",
+            ),
+            AocAwsRegion(aws_region="sa-east-1", aws_ssm_bucket_name="ssm"),
+        ]
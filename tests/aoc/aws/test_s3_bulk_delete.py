@@ -0,0 +1,113 @@
+"""Tests validating the aws s3 bulk deletes."""
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from lib.aoc.aws.backup_index import AocAwsBackupIndex
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.s3_bulk_delete import AocAwsS3BulkDelete
+from tests.aoc.conftest import AOC_S3_BUCKET
+from tests.aoc.conftest import fake_aws_backup
+
+S3_BUCKET: str = AOC_S3_BUCKET
+
+
+@pytest.fixture
+def aoc_s3_client(aoc_s3_client: Any) -> Any:
+    """Fixture returning a mocked versioned s3 bucket holding two backups.
+
+    Every backup object has two versions, an object of each backup was
+    deleted (leaving a delete marker).
+    """
+    aoc_s3_client.put_bucket_versioning(
+        Bucket=S3_BUCKET, VersioningConfiguration={"Status": "Enabled"}
+    )
+    for name in ["backup-1", "backup-2"]:
+        for key in ["awx.sql.gz", "efs.tar", "secrets.tar"]:
+            for body in [b"x", b"y"]:
+                aoc_s3_client.put_object(
+                    Bucket=S3_BUCKET, Key=f"{name}/{key}", Body=body
+                )
+        aoc_s3_client.delete_object(Bucket=S3_BUCKET, Key=f"{name}/secrets.tar")
+    return aoc_s3_client
+
+
+@pytest.mark.aoc_s3_bulk_delete
+class TestAocAwsS3BulkDelete:
+    """Test suite covering the batched s3 object deletion."""
+
+    def test_delete_prefixes(self, aoc_s3_client: Any) -> None:
+        """Test verifies every object version/delete marker of a prefix is deleted."""
+        bulk_delete = AocAwsS3BulkDelete(aoc_s3_client, S3_BUCKET, batch_size=2)
+        assert bulk_delete.count("backup-1") == 7
+
+        result = bulk_delete.delete_prefixes(["backup-1"])
+        assert result["result"], result["errors"]
+        assert result["deleted_counts"] == {"backup-1": 7}
+        assert result["remaining_counts"] == {"backup-1": 0}
+        assert bulk_delete.count("backup-2") == 7
+
+    def test_blank_prefix(self, aoc_s3_client: Any) -> None:
+        """Test verifies blank prefixes are rejected, nothing is deleted."""
+        bulk_delete = AocAwsS3BulkDelete(aoc_s3_client, S3_BUCKET)
+        for names in [[""], ["backup-1", "/"]]:
+            with pytest.raises(ValueError, match="Blank s3 prefix"):
+                bulk_delete.delete_prefixes(names)
+        assert bulk_delete.count("") == 14
+
+    def test_empty_bucket(self, aoc_s3_client: Any) -> None:
+        """Test verifies the versioned bucket is emptied, so it can be deleted."""
+        result = AocAwsS3BulkDelete(aoc_s3_client, S3_BUCKET).empty_bucket()
+        assert result["result"], result["errors"]
+        assert result["deleted_counts"] == {"": 14}
+        aoc_s3_client.delete_bucket(Bucket=S3_BUCKET)
+
+
+@pytest.mark.aoc_s3_bulk_delete
+class TestDeleteS3Backups:
+    """Test suite covering the backup operation bulk deletes."""
+
+    @pytest.fixture
+    def aoc_aws_backup(
+        self,
+        aoc_skip_login_pull: None,
+        aoc_s3_client: Any,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> AocAwsBackup:
+        """Fixture returning an aws backup operation using a mocked s3 bucket."""
+        index = AocAwsBackupIndex(
+            aoc_s3_client, S3_BUCKET, cache_path=str(tmp_path / "index.json")
+        )
+        monkeypatch.setattr(AocAwsBackup, "s3_client", lambda self: aoc_s3_client)
+        monkeypatch.setattr(AocAwsBackup, "backup_index", lambda self: index)
+        return fake_aws_backup()
+
+    def test_blank_backup_name(
+        self, aoc_aws_backup: AocAwsBackup, aoc_s3_client: Any
+    ) -> None:
+        """Test verifies blank backup names do not delete the whole bucket."""
+        for backup_names in [[""], ["backup-1", "/"]]:
+            with pytest.raises(ValueError, match="Blank backup names"):
+                aoc_aws_backup.delete_s3_backups(backup_names)
+            with pytest.raises(ValueError, match="Blank backup names"):
+                aoc_aws_backup.delete_stack_backup(backup_names, bulk=True)
+        assert AocAwsS3BulkDelete(aoc_s3_client, S3_BUCKET).count("") == 14
+
+    def test_delete_s3_bucket(
+        self, aoc_aws_backup: AocAwsBackup, aoc_s3_client: Any
+    ) -> None:
+        """Test verifies the versioned bucket is emptied before being deleted."""
+        assert aoc_aws_backup.delete_s3_bucket(bulk=True)
+        assert not aoc_aws_backup.s3_bucket_exists()
+
+    def test_delete_stack_backup(
+        self, aoc_aws_backup: AocAwsBackup, aoc_s3_client: Any
+    ) -> None:
+        """Test verifies bulk deletions report only the s3 objects deleted."""
+        result = aoc_aws_backup.delete_stack_backup(["backup-1"], bulk=True)
+
+        assert result["playbook_result"]
+        assert result["s3_objects_only"]
+        assert AocAwsS3BulkDelete(aoc_s3_client, S3_BUCKET).count("backup-1") == 0
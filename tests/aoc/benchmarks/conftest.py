@@ -0,0 +1,644 @@
+"""AoC benchmarks conftest module.
+
+This module contains the offline stand-ins (a container executor replaying
+recorded playbook output and a moto backed s3), the phase timer and the
+baseline comparison used by the benchmark test modules.
+
+The benchmarks are opt-in, they are deselected unless selected with
+`-m aoc_benchmark` (see `make benchmark`).
+"""
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import pathlib
+import platform
+import shlex
+import statistics
+import tempfile
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+from _pytest.config.argparsing import Parser
+
+import lib.aoc.aws.backup_index
+from lib.aoc.aws.clients import AWS_CLIENTS
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.restore import AocAwsRestore
+from lib.aoc.executors.base import ContainerExecutor
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_pool import OPS_CONTAINER_POOL
+
+RECORDINGS_DIR: str = os.path.join(os.path.dirname(__file__), "recordings")
+DEFAULT_BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Phase median increases below this many seconds are considered noise
+MIN_SLOWDOWN_SECONDS: float = 0.005
+
+# The counts recorded (medians), unlike durations they are not subject to
+# noise: aws api requests and container executor calls (recorded for every
+# phase), and the modules imported (recorded by the import benchmark)
+COUNTERS: List[str] = ["aws_requests", "executor_calls", "imported_modules"]
+PHASE_COUNTERS: List[str] = ["aws_requests", "executor_calls"]
+
+# The container executor methods counted as executor calls
+EXECUTOR_CALLS: List[str] = [
+    "registry_login",
+    "get_image_digest",
+    "pull_image",
+    "run_container",
+    "start_container",
+    "start_idle_container",
+    "get_image_entrypoint",
+    "follow_logs",
+    "wait_container",
+    "remove_container",
+    "run_exec",
+    "start_exec",
+    "follow_exec",
+    "wait_exec",
+]
+
+# Phases timing the stand-ins rather than the harness, never compared
+UNCOMPARED_PHASES: List[str] = ["replay"]
+
+AWS_REGION: str = "us-east-1"
+
+
+def pytest_addoption(parser: Parser) -> None:
+    """Handles setting up options that are applicable to benchmark tests."""
+    parser.addoption(
+        "--aoc-benchmark-iterations",
+        action="store",
+        type=int,
+        default=int(os.getenv("AOC_BENCHMARK_ITERATIONS", "20")),
+        help="Number of iterations each benchmarked operation is run",
+    )
+
+    parser.addoption(
+        "--aoc-benchmark-output",
+        action="store",
+        default=os.getenv("AOC_BENCHMARK_OUTPUT", ""),
+        help="Path to write the benchmark results json to",
+    )
+
+    parser.addoption(
+        "--aoc-benchmark-baseline",
+        action="store",
+        default=os.getenv("AOC_BENCHMARK_BASELINE", DEFAULT_BASELINE_PATH),
+        help="Path to the benchmark baseline results json",
+    )
+
+    parser.addoption(
+        "--aoc-benchmark-tolerance",
+        action="store",
+        type=float,
+        default=float(os.getenv("AOC_BENCHMARK_TOLERANCE", "1.0")),
+        help="Phase median increase over the baseline failing the benchmark "
+        "(1.0 = 100%%), increases below 5ms are ignored",
+    )
+
+    parser.addoption(
+        "--aoc-benchmark-update-baseline",
+        action="store_true",
+        default=False,
+        help="Write the benchmark results to the baseline instead of comparing",
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: List[pytest.Item]
+) -> None:
+    """Deselects the benchmarks unless selected with `-m aoc_benchmark`."""
+    if "aoc_benchmark" in config.getoption("markexpr", ""):
+        return
+    deselected: List[pytest.Item] = [
+        item for item in items if item.get_closest_marker("aoc_benchmark")
+    ]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item not in deselected]
+
+
+class ReplayContainerExecutor(ContainerExecutor):
+    """Container executor replaying recorded playbook output.
+
+    The playbook is the first word of the container (or exec) command, its
+    output is replayed from `recordings/<playbook short name>.log`. Hooks registered
+    per playbook run once the output is replayed to simulate the playbook
+    side effects (e.g. backup objects written to s3).
+    """
+
+    def __init__(self, exit_code: int = 0) -> None:
+        """Constructor.
+
+        :param exit_code: the exit code of every container
+        """
+        super().__init__()
+        self.exit_code: int = exit_code
+        self.hooks: Dict[str, Callable[[], None]] = {}
+        self.images: Dict[str, str] = {}
+        self.containers: Dict[str, str] = {}
+        self.execs: Dict[str, str] = {}
+        self._recordings: Dict[str, List[str]] = {}
+
+    def recording(self, playbook: str) -> List[str]:
+        """Returns the recorded output lines of the playbook."""
+        if playbook not in self._recordings:
+            path = os.path.join(RECORDINGS_DIR, f'{playbook.split(".")[-1]}.log')
+            with open(path) as f:
+                self._recordings[playbook] = f.read().splitlines()
+        return self._recordings[playbook]
+
+    def registry_login(self, registry: str, username: str, password: str) -> bool:
+        self.add_registry_auth(registry, username, password)
+        return True
+
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        return self.images.get(f"{image}:{tag}")
+
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        digest = f'sha256:{hashlib.sha256(f"{image}:{tag}".encode()).hexdigest()}'
+        self.images[f"{image}:{tag}"] = digest
+        return True, digest
+
+    def run_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> Tuple[str, int]:
+        if not self.start_container(name, image, command, volumes, env):
+            return f"Unable to start container {name}", -1
+        output: str = "\n".join(self.follow_logs(name))
+        return output, self.wait_container(name)
+
+    def start_container(
+        self,
+        name: str,
+        image: str,
+        command: str,
+        volumes: List[str],
+        env: Dict[str, str],
+    ) -> bool:
+        if image not in self.images:
+            print(f"Unable to start container {name}: image {image} not present")
+            return False
+        self.containers[name] = shlex.split(command)[0]
+        return True
+
+    def start_idle_container(self, name: str, image: str, volumes: List[str]) -> bool:
+        if image not in self.images:
+            print(f"Unable to start container {name}: image {image} not present")
+            return False
+        self.containers[name] = ""
+        return True
+
+    def get_image_entrypoint(self, image: str) -> Optional[List[str]]:
+        return [] if image in self.images else None
+
+    def follow_logs(self, name: str) -> Iterator[str]:
+        playbook: str = self.containers[name]
+        yield from self.recording(playbook)
+        self.run_hook(playbook)
+
+    def run_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Tuple[str, int]:
+        exec_id = self.start_exec(name, command, env)
+        if exec_id is None:
+            return f"Unable to exec in container {name}", -1
+        output: str = "\n".join(self.follow_exec(exec_id))
+        return output, self.wait_exec(exec_id)
+
+    def start_exec(
+        self, name: str, command: List[str], env: Dict[str, str]
+    ) -> Optional[str]:
+        if name not in self.containers:
+            print(f"Unable to exec in container {name}: container not running")
+            return None
+        exec_id: str = f"{name}-{len(self.execs)}"
+        self.execs[exec_id] = command[0]
+        return exec_id
+
+    def follow_exec(self, exec_id: str) -> Iterator[str]:
+        playbook: str = self.execs[exec_id]
+        yield from self.recording(playbook)
+        self.run_hook(playbook)
+
+    def wait_exec(self, exec_id: str) -> int:
+        return self.exit_code if exec_id in self.execs else -1
+
+    def run_hook(self, playbook: str) -> None:
+        """Runs the hook simulating the playbook side effects."""
+        hook = self.hooks.get(playbook)
+        if hook:
+            hook()
+
+    def wait_container(self, name: str) -> int:
+        return self.exit_code if name in self.containers else -1
+
+    def remove_container(self, name: str) -> bool:
+        self.containers.pop(name, None)
+        return True
+
+
+class FakeAnsibleResult:
+    """Fake pytest ansible module result for the localhost host pattern."""
+
+    def __init__(self, result: Dict[str, Any]) -> None:
+        """Constructor.
+
+        :param result: the module result
+        """
+        self.contacted: Dict[str, Dict[str, Any]] = {"localhost": result}
+
+
+class FakeAnsibleModule:
+    """Fake pytest ansible module fixture running the used modules natively."""
+
+    def s3_bucket(
+        self, name: str, state: str, force: bool = False, region: str = AWS_REGION
+    ) -> FakeAnsibleResult:
+        """Creates/deletes (emptying it when forced) the s3 bucket."""
+        s3_client = AWS_CLIENTS.s3(region=region)
+        if state == "present":
+            s3_client.create_bucket(Bucket=name)
+        else:
+            paginator = s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=name):
+                for item in page.get("Contents", []):
+                    s3_client.delete_object(Bucket=name, Key=item["Key"])
+            s3_client.delete_bucket(Bucket=name)
+        return FakeAnsibleResult({"changed": True})
+
+
+class BenchmarkTimer:
+    """Times the benchmark phases of each iteration.
+
+    Phases may be nested, each phase is only attributed its own time (the
+    time spent in nested phases is attributed to them). The `COUNTERS` (e.g.
+    aws api requests) are counted per phase, unlike durations the counts are
+    not subject to noise.
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.samples: Dict[str, List[float]] = {}
+        self.count_samples: Dict[str, Dict[str, List[int]]] = {}
+        self._durations: Dict[str, float] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._phases: List[str] = []
+        self._nested: List[float] = []
+
+    @contextlib.contextmanager
+    def iteration(self) -> Iterator[None]:
+        """Records the time spent/counts in each phase."""
+        self._durations = {}
+        self._counts = {}
+        yield
+        for phase, duration in self._durations.items():
+            self.samples.setdefault(phase, []).append(duration)
+            counts: Dict[str, int] = self._counts.get(phase, {})
+            for counter in COUNTERS:
+                if counter not in PHASE_COUNTERS and counter not in counts:
+                    continue
+                self.count_samples.setdefault(phase, {}).setdefault(counter, []).append(
+                    counts.get(counter, 0)
+                )
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the phase, excluding the time spent in nested phases."""
+        start: float = time.perf_counter()
+        self._phases.append(name)
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed: float = time.perf_counter() - start
+            nested: float = self._nested.pop()
+            self._phases.pop()
+            self._durations[name] = self._durations.get(name, 0.0) + elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def record(
+        self, name: str, duration: float, counts: Optional[Dict[str, int]] = None
+    ) -> None:
+        """Attributes the duration/counts measured elsewhere (e.g. a subprocess).
+
+        :param name: the phase name
+        :param duration: the phase duration (seconds)
+        :param counts: the phase counts keyed by counter (see `COUNTERS`)
+        """
+        self._durations[name] = self._durations.get(name, 0.0) + duration
+        phase_counts = self._counts.setdefault(name, {})
+        for counter, count in (counts or {}).items():
+            phase_counts[counter] = phase_counts.get(counter, 0) + count
+
+    def count(self, counter: str) -> None:
+        """Counts (e.g. an aws api request) in the current phase.
+
+        :param counter: the counter name (see `COUNTERS`)
+        """
+        if self._phases:
+            counts = self._counts.setdefault(self._phases[-1], {})
+            counts[counter] = counts.get(counter, 0) + 1
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Returns the function timed as the phase."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the per phase duration (seconds) and count statistics."""
+        stats: Dict[str, Dict[str, float]] = {}
+        for phase, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            stats[phase] = {
+                "iterations": len(ordered),
+                "min": ordered[0],
+                "median": statistics.median(ordered),
+                "mean": statistics.fmean(ordered),
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+            }
+            for counter, counts in self.count_samples[phase].items():
+                stats[phase][counter] = statistics.median(counts)
+        return stats
+
+
+# The phases timed by the benchmarks and the methods attributed to them
+BENCHMARK_PHASES: List[Tuple[Any, str, str]] = [
+    (OpsContainer, "registry_login", "login"),
+    (OpsContainer, "pull_image", "pull"),
+    (ReplayContainerExecutor, "start_container", "container_create"),
+    (ReplayContainerExecutor, "start_idle_container", "container_create"),
+    (ReplayContainerExecutor, "run_hook", "replay"),
+    (OpsContainer, "run_container", "playbook"),
+    (AocAwsBackup, "get_s3_backup_object", "s3_discovery"),
+    (AocAwsBackup, "verify_s3_backup", "s3_verify"),
+    (ReplayContainerExecutor, "remove_container", "teardown"),
+    (AocAwsBackup, "delete_s3_bucket", "teardown"),
+    (AocAwsBackup, "backup_stack", "operation"),
+    (AocAwsBackup, "delete_stack_backup", "operation"),
+    (AocAwsRestore, "restore_stack", "operation"),
+]
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+) -> List[str]:
+    """Compares the phase counts (see `COUNTERS`) against the baseline ones.
+
+    A phase regresses when it performs more aws api requests/container
+    executor calls or imports more modules. Counts do not depend on the machine/load, unlike
+    durations (see `compare_durations`), so any increase is a regression.
+    Counters missing from the baseline are not compared.
+
+    :param results: the benchmark phase statistics
+    :param baseline: the baseline phase statistics
+    :return: the regressions found
+    """
+    regressions: List[str] = []
+    for phase, stats in results.items():
+        if phase not in baseline or phase in UNCOMPARED_PHASES:
+            continue
+        for counter in COUNTERS:
+            if counter not in stats or counter not in baseline[phase]:
+                continue
+            if stats[counter] > baseline[phase][counter]:
+                name: str = counter.replace("_", " ")
+                regressions.append(
+                    f"{phase}: {stats[counter]:g} {name} exceed baseline "
+                    f"{baseline[phase][counter]:g} {name}"
+                )
+    return regressions
+
+
+def compare_durations(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """Compares the phase median durations against the baseline ones.
+
+    Durations depend on the machine and its load, a phase only regresses
+    when its median exceeds the baseline by more than the tolerance and by
+    more than `MIN_SLOWDOWN_SECONDS`.
+
+    :param results: the benchmark phase statistics
+    :param baseline: the baseline phase statistics
+    :param tolerance: the median increase ratio failing the benchmark
+    :return: the slowdowns found
+    """
+    slowdowns: List[str] = []
+    for phase, stats in results.items():
+        if phase not in baseline or phase in UNCOMPARED_PHASES:
+            continue
+        expected: float = baseline[phase]["median"]
+        if (
+            stats["median"] > expected * (1 + tolerance)
+            and stats["median"] - expected > MIN_SLOWDOWN_SECONDS
+        ):
+            slowdowns.append(
+                f'{phase}: median {stats["median"] * 1000:.3f}ms exceeds baseline '
+                f"{expected * 1000:.3f}ms by more than {tolerance:.0%}"
+            )
+    return slowdowns
+
+
+class BenchmarkResults:
+    """Benchmark results collected across the benchmark session."""
+
+    def __init__(self, config: pytest.Config) -> None:
+        """Constructor.
+
+        :param config: the pytest config
+        """
+        self.config: pytest.Config = config
+        self.iterations: int = max(1, config.getoption("aoc_benchmark_iterations"))
+        self.operations: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.baseline: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+        baseline_path: str = config.getoption("aoc_benchmark_baseline")
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                self.baseline = json.load(f).get("operations", {})
+
+    def record(self, operation: str, timer: BenchmarkTimer) -> List[str]:
+        """Records the operation phase statistics.
+
+        :param operation: the benchmarked operation name
+        :param timer: the timer holding the operation phase samples
+        :return: the count and duration regressions found against the baseline
+        """
+        self.operations[operation] = timer.stats()
+        if self.config.getoption("aoc_benchmark_update_baseline"):
+            return []
+        baseline: Dict[str, Dict[str, float]] = self.baseline.get(operation, {})
+        return compare_to_baseline(
+            self.operations[operation], baseline
+        ) + compare_durations(
+            self.operations[operation],
+            baseline,
+            self.config.getoption("aoc_benchmark_tolerance"),
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        """Returns the json serializable benchmark results."""
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": self.iterations,
+            "operations": self.operations,
+        }
+
+    def write(self) -> None:
+        """Writes the results to the output and/or baseline files."""
+        paths: List[str] = []
+        if self.config.getoption("aoc_benchmark_output"):
+            paths.append(self.config.getoption("aoc_benchmark_output"))
+        if self.config.getoption("aoc_benchmark_update_baseline"):
+            paths.append(self.config.getoption("aoc_benchmark_baseline"))
+        for path in paths:
+            with open(path, "w") as f:
+                json.dump(self.to_json(), f, indent=2, sort_keys=True)
+                f.write("\n")
+
+
+@pytest.fixture(scope="session")
+def aoc_benchmark_results(pytestconfig: pytest.Config) -> Iterator[BenchmarkResults]:
+    """Fixture collecting the benchmark results, written at session end."""
+    results = BenchmarkResults(pytestconfig)
+    yield results
+    if results.operations:
+        results.write()
+
+
+@pytest.fixture
+def aoc_benchmark_tmp_path() -> Iterator[pathlib.Path]:
+    """Fixture returning a temporary directory for the benchmark state files.
+
+    The directory is created on a memory filesystem when available, replacing
+    files (e.g. the ops container cache/backup index) on a disk filesystem
+    may flush to disk, adding tens of milliseconds of noise to the phases.
+    """
+    memory_dir: Optional[str] = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+    with tempfile.TemporaryDirectory(prefix="aoc-benchmark-", dir=memory_dir) as path:
+        yield pathlib.Path(path)
+
+
+@pytest.fixture
+def aoc_benchmark_s3(
+    aoc_benchmark_tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Dict[str, str]]:
+    """Fixture running the benchmark against a moto backed in memory s3.
+
+    :return: the credentials file path and region to provide to operations
+    """
+    credentials_path = aoc_benchmark_tmp_path / "credentials"
+    credentials_path.write_text(
+        "[default]\naws_access_key_id = testing\naws_secret_access_key = testing\n"
+    )
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_PROFILE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(credentials_path))
+    monkeypatch.setenv("AWS_DEFAULT_REGION", AWS_REGION)
+    monkeypatch.setattr(
+        lib.aoc.aws.backup_index,
+        "DEFAULT_INDEX_DIR",
+        str(aoc_benchmark_tmp_path / "index"),
+    )
+
+    # moto (and boto3) are imported on use, keeping the test collection fast
+    from moto import mock_aws
+
+    # Cached clients created outside the mock would reach the real s3
+    AWS_CLIENTS.clear()
+    with mock_aws():
+        yield {
+            "cloud_credentials_path": str(credentials_path),
+            "aws_region": AWS_REGION,
+        }
+    AWS_CLIENTS.clear()
+
+
+@pytest.fixture
+def aoc_benchmark_executor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[ReplayContainerExecutor]:
+    """Fixture making every ops container use the replaying executor."""
+    executor = ReplayContainerExecutor()
+    monkeypatch.setattr(OpsContainer, "create_executor", lambda self: executor)
+    yield executor
+    OPS_CONTAINER_POOL.close()
+
+
+@pytest.fixture
+def aoc_benchmark_timer(monkeypatch: pytest.MonkeyPatch) -> BenchmarkTimer:
+    """Fixture timing the benchmark phases of the instrumented methods."""
+    from botocore.client import BaseClient
+
+    timer = BenchmarkTimer()
+
+    # Only the harness calls are counted, not the replaying executor own ones,
+    # within the phases (wrapping the counted methods)
+    executor_depth: List[int] = [0]
+
+    def count_executor_call(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not executor_depth[0]:
+                timer.count("executor_calls")
+            executor_depth[0] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                executor_depth[0] -= 1
+
+        return wrapper
+
+    for method in EXECUTOR_CALLS:
+        monkeypatch.setattr(
+            ReplayContainerExecutor,
+            method,
+            count_executor_call(getattr(ReplayContainerExecutor, method)),
+        )
+    for cls, method, phase in BENCHMARK_PHASES:
+        monkeypatch.setattr(cls, method, timer.wrap(phase, getattr(cls, method)))
+
+    make_api_call = BaseClient._make_api_call  # type: ignore[attr-defined]
+
+    def count_api_call(client: BaseClient, *args: Any, **kwargs: Any) -> Any:
+        timer.count("aws_requests")
+        return make_api_call(client, *args, **kwargs)
+
+    monkeypatch.setattr(BaseClient, "_make_api_call", count_api_call)
+    return timer
+
+
+@pytest.fixture
+def aoc_benchmark_options(aoc_benchmark_tmp_path: pathlib.Path) -> OpsContainerOptions:
+    """Fixture returning the ops container options used by the benchmarks."""
+    return OpsContainerOptions(
+        cache_path=str(aoc_benchmark_tmp_path / "ops-container-cache.json")
+    )
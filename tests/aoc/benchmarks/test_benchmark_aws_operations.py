@@ -0,0 +1,233 @@
+"""Benchmarks measuring the AoC on AWS backup/restore harness overhead.
+
+The operations run end to end offline, the ops container playbooks are
+replayed from recorded output and the s3 bucket is moto backed, so the
+measured phases only account for the harness itself.
+"""
+import itertools
+from typing import Dict
+from typing import List
+
+import pytest
+
+from lib.aoc.aws.clients import AWS_CLIENTS
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.restore import AocAwsRestore
+from lib.aoc.aws.operations.restore import AocAwsRestoreDataExtraVars
+from lib.aoc.aws.operations.restore import AocAwsRestoreDataVars
+from lib.aoc.ops_container import OpsContainerOptions
+from tests.aoc.benchmarks.conftest import BenchmarkResults
+from tests.aoc.benchmarks.conftest import BenchmarkTimer
+from tests.aoc.benchmarks.conftest import FakeAnsibleModule
+from tests.aoc.benchmarks.conftest import ReplayContainerExecutor
+
+OPS_IMAGE: str = "registry.example.com/ansible-on-clouds/ansible-on-clouds-ops"
+OPS_IMAGE_TAG: str = "2.4.20230630"
+S3_BUCKET: str = "aoc-benchmark-backups"
+BACKUP_PREFIX: str = "aoc-backup"
+BACKUP_OBJECTS: int = 25
+VERIFY_BACKUP_OBJECTS: int = 250
+
+# Ops container run modes, each run mode operation is benchmarked separately
+RUN_MODES: Dict[str, OpsContainerOptions] = {
+    "buffered": OpsContainerOptions(),
+    "streamed": OpsContainerOptions(stream_output=True),
+    "pooled": OpsContainerOptions(pool_containers=True),
+}
+
+
+def put_backup(name: str, objects: int = BACKUP_OBJECTS) -> None:
+    """Writes the backup objects (as the backup playbook would) to s3."""
+    s3_client = AWS_CLIENTS.s3()
+    for i in range(objects):
+        s3_client.put_object(Bucket=S3_BUCKET, Key=f"{name}/object-{i}", Body=b"x")
+
+
+def delete_backup(name: str) -> None:
+    """Deletes the backup objects (as the delete backups playbook would)."""
+    s3_client = AWS_CLIENTS.s3()
+    response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=f"{name}/")
+    for item in response.get("Contents", []):
+        s3_client.delete_object(Bucket=S3_BUCKET, Key=item["Key"])
+
+
+def operation_name(operation: str, options: OpsContainerOptions) -> str:
+    """Returns the benchmarked operation name including its run mode."""
+    if options.get("pool_containers", False):
+        return f"{operation}[pooled]"
+    if options.get("stream_output", False):
+        return f"{operation}[streamed]"
+    return f"{operation}[buffered]"
+
+
+@pytest.fixture(params=list(RUN_MODES))
+def aoc_benchmark_output_options(
+    request: pytest.FixtureRequest, aoc_benchmark_options: OpsContainerOptions
+) -> OpsContainerOptions:
+    """Fixture returning the options for each ops container run mode."""
+    aoc_benchmark_options.update(RUN_MODES[request.param])
+    return aoc_benchmark_options
+
+
+def aws_backup(
+    options: OpsContainerOptions, aoc_benchmark_s3: Dict[str, str]
+) -> AocAwsBackup:
+    """Constructs the aws backup operation (login/pull)."""
+    return AocAwsBackup(
+        aoc_version="2.4",
+        aoc_ops_image=OPS_IMAGE,
+        aoc_ops_image_tag=OPS_IMAGE_TAG,
+        aoc_image_registry_username="benchmark",
+        aoc_image_registry_password="benchmark",
+        ansible_module=FakeAnsibleModule(),
+        command_generator_vars=AocAwsBackupDataVars(
+            cloud_credentials_path=aoc_benchmark_s3["cloud_credentials_path"],
+            deployment_name="aoc-benchmark",
+            extra_vars=AocAwsBackupDataExtraVars(
+                aws_backup_iam_role_arn="arn:aws:iam::123456789012:role/backup",
+                aws_backup_vault_name="Default",
+                aws_region=aoc_benchmark_s3["aws_region"],
+                aws_s3_bucket=S3_BUCKET,
+                aws_ssm_bucket_name="aoc-benchmark-ssm",
+                backup_prefix=BACKUP_PREFIX,
+            ),
+        ),
+        options=options,
+    )
+
+
+@pytest.mark.aoc_benchmark
+class TestBenchmarkAwsOperations:
+    """Benchmark suite timing the aws backup/restore/delete operation phases."""
+
+    def test_backup_stack(
+        self,
+        aoc_benchmark_s3: Dict[str, str],
+        aoc_benchmark_executor: ReplayContainerExecutor,
+        aoc_benchmark_timer: BenchmarkTimer,
+        aoc_benchmark_output_options: OpsContainerOptions,
+        aoc_benchmark_results: BenchmarkResults,
+    ) -> None:
+        """Benchmark a stack backup, from login to the s3 bucket teardown."""
+        counter = itertools.count()
+        aoc_benchmark_executor.hooks[
+            "redhat.ansible_on_clouds.aws_backup_stack"
+        ] = lambda: put_backup(f"{BACKUP_PREFIX}-{next(counter)}")
+
+        for _ in range(aoc_benchmark_results.iterations):
+            with aoc_benchmark_timer.iteration():
+                aoc_aws_backup = aws_backup(
+                    aoc_benchmark_output_options, aoc_benchmark_s3
+                )
+                assert aoc_aws_backup.create_s3_bucket()
+                result = aoc_aws_backup.backup_stack()
+                assert result["playbook_result"]
+                assert result["backup_object_name"].startswith(BACKUP_PREFIX)
+                assert aoc_aws_backup.delete_s3_bucket(bulk=True)
+
+        regressions = aoc_benchmark_results.record(
+            operation_name("backup_stack", aoc_benchmark_output_options),
+            aoc_benchmark_timer,
+        )
+        assert not regressions, "\n".join(regressions)
+
+    def test_restore_stack(
+        self,
+        aoc_benchmark_s3: Dict[str, str],
+        aoc_benchmark_executor: ReplayContainerExecutor,
+        aoc_benchmark_timer: BenchmarkTimer,
+        aoc_benchmark_output_options: OpsContainerOptions,
+        aoc_benchmark_results: BenchmarkResults,
+    ) -> None:
+        """Benchmark a stack restore, from login to the container teardown."""
+        AWS_CLIENTS.s3().create_bucket(Bucket=S3_BUCKET)
+        put_backup(f"{BACKUP_PREFIX}-0")
+
+        for _ in range(aoc_benchmark_results.iterations):
+            with aoc_benchmark_timer.iteration():
+                aoc_aws_restore = AocAwsRestore(
+                    aoc_version="2.4",
+                    aoc_ops_image=OPS_IMAGE,
+                    aoc_ops_image_tag=OPS_IMAGE_TAG,
+                    aoc_image_registry_username="benchmark",
+                    aoc_image_registry_password="benchmark",
+                    ansible_module=FakeAnsibleModule(),
+                    command_generator_vars=AocAwsRestoreDataVars(
+                        cloud_credentials_path=aoc_benchmark_s3[
+                            "cloud_credentials_path"
+                        ],
+                        deployment_name="aoc-benchmark",
+                        extra_vars=AocAwsRestoreDataExtraVars(
+                            aws_backup_name=f"{BACKUP_PREFIX}-0",
+                            aws_region=aoc_benchmark_s3["aws_region"],
+                            aws_s3_bucket=S3_BUCKET,
+                            aws_ssm_bucket_name="aoc-benchmark-ssm",
+                        ),
+                    ),
+                    options=aoc_benchmark_output_options,
+                )
+                result = aoc_aws_restore.restore_stack()
+                assert result["playbook_result"]
+
+        regressions = aoc_benchmark_results.record(
+            operation_name("restore_stack", aoc_benchmark_output_options),
+            aoc_benchmark_timer,
+        )
+        assert not regressions, "\n".join(regressions)
+
+    def test_delete_stack_backup(
+        self,
+        aoc_benchmark_s3: Dict[str, str],
+        aoc_benchmark_executor: ReplayContainerExecutor,
+        aoc_benchmark_timer: BenchmarkTimer,
+        aoc_benchmark_output_options: OpsContainerOptions,
+        aoc_benchmark_results: BenchmarkResults,
+    ) -> None:
+        """Benchmark a stack backup deletion, from login to the container teardown."""
+        AWS_CLIENTS.s3().create_bucket(Bucket=S3_BUCKET)
+        backup_names: List[str] = []
+        aoc_benchmark_executor.hooks[
+            "redhat.ansible_on_clouds.aws_backups_delete"
+        ] = lambda: delete_backup(backup_names[-1])
+
+        for i in range(aoc_benchmark_results.iterations):
+            backup_names.append(f"{BACKUP_PREFIX}-{i}")
+            put_backup(backup_names[-1])
+            with aoc_benchmark_timer.iteration():
+                aoc_aws_backup = aws_backup(
+                    aoc_benchmark_output_options, aoc_benchmark_s3
+                )
+                result = aoc_aws_backup.delete_stack_backup([backup_names[-1]])
+                assert result["playbook_result"]
+
+        regressions = aoc_benchmark_results.record(
+            operation_name("delete_stack_backup", aoc_benchmark_output_options),
+            aoc_benchmark_timer,
+        )
+        assert not regressions, "\n".join(regressions)
+
+    def test_verify_s3_backup(
+        self,
+        aoc_benchmark_s3: Dict[str, str],
+        aoc_benchmark_executor: ReplayContainerExecutor,
+        aoc_benchmark_timer: BenchmarkTimer,
+        aoc_benchmark_options: OpsContainerOptions,
+        aoc_benchmark_results: BenchmarkResults,
+    ) -> None:
+        """Benchmark a stack backup integrity verification (HEAD per object)."""
+        AWS_CLIENTS.s3().create_bucket(Bucket=S3_BUCKET)
+        put_backup(f"{BACKUP_PREFIX}-0", VERIFY_BACKUP_OBJECTS)
+        aoc_aws_backup = aws_backup(aoc_benchmark_options, aoc_benchmark_s3)
+
+        for _ in range(aoc_benchmark_results.iterations):
+            with aoc_benchmark_timer.iteration():
+                result = aoc_aws_backup.verify_s3_backup(f"{BACKUP_PREFIX}-0")
+                assert result["result"], result["errors"]
+                assert result["manifest"]["object_count"] == VERIFY_BACKUP_OBJECTS
+
+        regressions = aoc_benchmark_results.record(
+            "verify_s3_backup", aoc_benchmark_timer
+        )
+        assert not regressions, "\n".join(regressions)
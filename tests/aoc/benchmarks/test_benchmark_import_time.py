@@ -0,0 +1,135 @@
+"""Benchmarks measuring the cold import time of the lib.aoc packages.
+
+Test modules/conftests import the operation modules at collection, so their
+import time is paid by every pytest run (even `--help`/`--collect-only` and
+runs selecting a single cloud). Cloud sdks must only be imported on use,
+which is checked by every test run. The import time benchmark is opt-in,
+it fails when the import time or the number of modules imported exceeds the
+baseline (see `BenchmarkResults.record`).
+"""
+import os
+import subprocess
+import sys
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from tests.aoc.benchmarks.conftest import BenchmarkResults
+from tests.aoc.benchmarks.conftest import BenchmarkTimer
+
+REPO_DIR: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+# The modules imported by the test modules/conftests at collection
+COLLECTED_MODULES: List[str] = [
+    "lib.aoc.aws.clients",
+    "lib.aoc.aws.operations.backup",
+    "lib.aoc.aws.operations.backup_orchestrator",
+    "lib.aoc.aws.operations.region_fanout",
+    "lib.aoc.aws.operations.restore",
+    "lib.aoc.gcp.operations.backup",
+    "lib.aoc.gcp.operations.restore",
+    "lib.aoc.ops_container",
+    "lib.aoc.setup_graph",
+]
+
+# Heavy modules that must only be imported once an operation needs them
+DEFERRED_MODULES: List[str] = ["boto3", "botocore", "moto", "mypy_boto3_s3"]
+
+
+def import_times(modules: List[str]) -> List[Tuple[int, str, float]]:
+    """Imports the modules in a fresh interpreter (python -X importtime).
+
+    :return: the nesting depth, name and cumulative import time (seconds,
+        nested imports included) of every imported module
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f'import {", ".join(modules)}'],
+        capture_output=True,
+        text=True,
+        cwd=REPO_DIR,
+        check=True,
+    )
+    times: List[Tuple[int, str, float]] = []
+    # import time: self [us] | cumulative | imported package (indented per depth)
+    for line in process.stderr.splitlines():
+        fields = line.split("|")
+        if not line.startswith("import time:") or not fields[1].strip().isdigit():
+            continue
+        name: str = fields[2].rstrip()
+        depth: int = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((depth, name.strip(), int(fields[1]) / 1e6))
+    return times
+
+
+@pytest.mark.aoc_benchmark
+class TestBenchmarkImportTime:
+    """Benchmark suite timing the lib.aoc cold import."""
+
+    def test_import_lib_aoc(self, aoc_benchmark_results: BenchmarkResults) -> None:
+        """Benchmark importing the operation modules in a fresh interpreter.
+
+        The number of modules imported does not depend on the machine/load,
+        it catches new imports slowing the startup down by less than the
+        duration tolerance.
+        """
+        timer = BenchmarkTimer()
+        for _ in range(aoc_benchmark_results.iterations):
+            with timer.iteration():
+                times = import_times(COLLECTED_MODULES)
+                # Top level imports hold the time of everything they import
+                timer.record(
+                    "import",
+                    sum(
+                        duration
+                        for depth, name, duration in times
+                        if depth == 0 and name.split(".")[0] == "lib"
+                    ),
+                    counts={"imported_modules": len(times)},
+                )
+
+        regressions = aoc_benchmark_results.record("import_lib_aoc", timer)
+        assert not regressions, "\n".join(regressions)
+
+
+@pytest.mark.aoc_deferred_imports
+class TestDeferredImports:
+    """Test suite covering the cloud sdks import deferral."""
+
+    def test_import_lib_aoc(self) -> None:
+        """Test verifies importing the operation modules does not import the sdks."""
+        imported = [name for _, name, _ in import_times(COLLECTED_MODULES)]
+        deferred = [name for name in DEFERRED_MODULES if name in imported]
+        assert not deferred, f"imported at collection: {deferred}"
+
+    def test_collect_tests(self) -> None:
+        """Test verifies collecting the tests does not import the cloud sdks."""
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-m",
+                "pytest",
+                "--collect-only",
+                "-q",
+                "-p",
+                "no:cacheprovider",
+                "--ansible-host-pattern=localhost",
+                "tests/aoc/aws",
+                "tests/aoc/gcp",
+            ],
+            capture_output=True,
+            text=True,
+            cwd=REPO_DIR,
+        )
+        assert process.returncode == 0, process.stdout
+        imported: List[str] = [
+            line.split("|")[-1].strip()
+            for line in process.stderr.splitlines()
+            if line.startswith("import time:")
+        ]
+        deferred = [name for name in DEFERRED_MODULES if name in imported]
+        assert not deferred, f"imported at collection: {deferred}"
@@ -3,9 +3,58 @@
 This module contains commonly used code across all test modules.
 Majority of the functions here will be pytest fixtures.
 """
+import argparse
+import json
 import os
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Type
+from typing import TypeVar
 
+import pytest
 from _pytest.config.argparsing import Parser
+from _pytest.terminal import TerminalReporter
+from pytest_ansible.host_manager import BaseHostManager
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.checkpoints import DEFAULT_CHECKPOINT_PATH
+from lib.aoc.extra_vars import EXTRA_VARS_FORMATS
+from lib.aoc.ops_container import DEFAULT_IMAGE_DIGEST_TTL
+from lib.aoc.ops_container import DEFAULT_REGISTRY_LOGIN_TTL
+from lib.aoc.ops_container import DEFAULT_STREAM_OUTPUT_TAIL_LINES
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_pool import DEFAULT_POOL_MAX_USES
+from lib.aoc.ops_container_pool import OPS_CONTAINER_POOL
+from lib.aoc.playbook_output import DEFAULT_SLOWEST_TASKS
+from lib.aoc.state_store import SharedStateStore
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import TRACER
+
+OperationType = TypeVar("OperationType", bound=OpsContainer)
+
+# The s3 bucket of the mocked s3 client (see `aoc_s3_client`)
+AOC_S3_BUCKET: str = "aoc-backups"
+
+# Tests which must run in order on the same xdist worker, keyed by marker:
+# backup then restore of a stack (from the bucket the backup creates), backup
+# deletion and pruning (both delete from the existing bucket). The other tests
+# are not grouped, they run on any worker.
+AOC_XDIST_GROUP_MARKERS: Dict[str, str] = {
+    "aoc_aws_backup_restore_stack": "aws-{deployment_name}",
+    "aoc_aws_delete_backups": "aws-{deployment_name}-delete",
+    "aoc_aws_prune_backups": "aws-{deployment_name}-delete",
+    "aoc_gcp_backup_restore": "gcp-{deployment_name}",
+}
+
+# Per test span summaries: span name -> [count, total duration, failures]
+AOC_TRACE_SUMMARIES = pytest.StashKey[Dict[str, Dict[str, List[float]]]]()
 
 
 def pytest_addoption(parser: Parser) -> None:
@@ -63,3 +112,492 @@ def pytest_addoption(parser: Parser) -> None:
         default=os.getenv("AOC_STACK_DEPLOYMENT_NAME", ""),
         help="AoC stack deployment name",
     )
+
+    parser.addoption(
+        "--aoc-ops-container-cache-path",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_CACHE_PATH", ""),
+        help="Path to the host wide ops container login/image cache file",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-registry-login-ttl",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv(
+                "AOC_OPS_CONTAINER_REGISTRY_LOGIN_TTL", DEFAULT_REGISTRY_LOGIN_TTL
+            )
+        ),
+        help="Seconds a successful ops image registry login is reused (0 disables)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-image-digest-ttl",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_OPS_CONTAINER_IMAGE_DIGEST_TTL", DEFAULT_IMAGE_DIGEST_TTL)
+        ),
+        help="Seconds a verified ops image digest is reused (0 disables)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-executor",
+        action="store",
+        choices=["ansible", "docker-api"],
+        default=os.getenv("AOC_OPS_CONTAINER_EXECUTOR", "ansible"),
+        help="Backend performing ops container operations (ansible modules or "
+        "the docker/podman engine api)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-socket",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_SOCKET", ""),
+        help="Container engine socket used by the docker-api executor",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-cli",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_CLI", "docker"),
+        help="Container runtime cli used to follow ops container output",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-stream-output",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_OPS_CONTAINER_STREAM_OUTPUT", "false").lower() == "true",
+        help="Enable to stream ops container output line by line while it runs",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-stream-output-tail-lines",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv(
+                "AOC_OPS_CONTAINER_STREAM_OUTPUT_TAIL_LINES",
+                DEFAULT_STREAM_OUTPUT_TAIL_LINES,
+            )
+        ),
+        help="Number of trailing ops container output lines kept when streaming",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-output-log-dir",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_OUTPUT_LOG_DIR", ""),
+        help="Directory to write each ops container output log to",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-playbook-report-dir",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_PLAYBOOK_REPORT_DIR", ""),
+        help="Directory to write each ops container playbook task timings to "
+        "(the slowest tasks are printed as well)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-playbook-report-top",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_OPS_CONTAINER_PLAYBOOK_REPORT_TOP", DEFAULT_SLOWEST_TASKS)
+        ),
+        help="Number of slowest ops container playbook tasks printed",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-pool",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_OPS_CONTAINER_POOL", "false").lower() == "true",
+        help="Enable to run the ops playbooks with exec in long lived pooled "
+        "ops containers (removed at the end of the session)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-pool-max-uses",
+        action="store",
+        type=int,
+        default=int(
+            os.getenv("AOC_OPS_CONTAINER_POOL_MAX_USES", DEFAULT_POOL_MAX_USES)
+        ),
+        help="Number of playbooks run in a pooled ops container before it is "
+        "recycled",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-extra-vars-transport",
+        action="store",
+        choices=["cli", "file"],
+        default=os.getenv("AOC_OPS_CONTAINER_EXTRA_VARS_TRANSPORT", "cli"),
+        help="How the ops playbook extra vars are passed, on the command line "
+        "or in a file mounted read only (structured extra vars always use a file)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-extra-vars-format",
+        action="store",
+        choices=EXTRA_VARS_FORMATS,
+        default=os.getenv("AOC_OPS_CONTAINER_EXTRA_VARS_FORMAT", "json"),
+        help="Format of the ops playbook extra vars files",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-extra-vars-dir",
+        action="store",
+        default=os.getenv("AOC_OPS_CONTAINER_EXTRA_VARS_DIR", ""),
+        help="Host directory holding the ops playbook extra vars files "
+        "(a temporary directory by default)",
+    )
+
+    parser.addoption(
+        "--aoc-ops-container-defer-image-pull",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_OPS_CONTAINER_DEFER_IMAGE_PULL", "false").lower()
+        == "true",
+        help="Enable to pull the ops container image alongside the other "
+        "operation setup steps instead of when constructing the operation",
+    )
+
+    parser.addoption(
+        "--aoc-xdist-worker-suffix",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_XDIST_WORKER_SUFFIX", "true").lower() == "true",
+        help="Enable to suffix the ops container names, and the s3 bucket the "
+        "stack backup test creates, with the pytest-xdist worker id when running "
+        "in parallel",
+    )
+
+    parser.addoption(
+        "--aoc-checkpoint-path",
+        action="store",
+        default=os.getenv("AOC_CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH),
+        help="Path to the file recording the completed operation phases",
+    )
+
+    parser.addoption(
+        "--aoc-resume",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("AOC_RESUME", "false").lower() == "true",
+        help="Enable to skip the operation phases completed by a previous run "
+        "(once verified to still be completed)",
+    )
+
+    parser.addoption(
+        "--aoc-trace-file",
+        action="store",
+        default=os.getenv("AOC_TRACE_FILE", ""),
+        help="Enable tracing, exporting the ops container/operation phase spans "
+        "to the OTLP json lines file",
+    )
+
+
+def enable_xdist_loadgroup(config: pytest.Config) -> None:
+    """Switches the default xdist `--dist load` to `--dist loadgroup`.
+
+    `-n <workers>` distributes with `--dist load` by default, which would not
+    keep the grouped stack tests on one worker (see `AOC_XDIST_GROUP_MARKERS`).
+    The workers parse the command line again, they are told to group their
+    tests in `pytest_configure_node`.
+
+    :raises pytest.UsageError: when the tests are distributed by another
+        xdist mode (e.g. `--dist each`)
+    """
+    if getattr(config, "workerinput", {}).get("aoc_xdist_loadgroup"):
+        config.option.loadgroup = True
+        return
+
+    dist: str = config.getoption("dist", "no")
+    if dist == "load":
+        config.option.dist = "loadgroup"
+    elif dist not in ["no", "loadgroup"]:
+        raise pytest.UsageError(
+            f"--dist {dist} does not keep the grouped stack tests on one worker, "
+            "run in parallel with `-n <workers>` (`--dist loadgroup`)"
+        )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    """Enables tracing when a trace file is provided.
+
+    The tests distributed by pytest-xdist are grouped (see
+    `enable_xdist_loadgroup`).
+    """
+    enable_xdist_loadgroup(config)
+    config.stash[AOC_TRACE_SUMMARIES] = {}
+    if config.getoption("aoc_trace_file"):
+        TRACER.configure(config.getoption("aoc_trace_file"))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node: Any) -> None:
+    """Tells the xdist worker to group its tests (see `enable_xdist_loadgroup`)."""
+    if node.config.getoption("dist", "no") == "loadgroup":
+        node.workerinput["aoc_xdist_loadgroup"] = True
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: List[pytest.Item]
+) -> None:
+    """Groups the dependent tests of each stack to run in order on one worker.
+
+    Tests with a marker of `AOC_XDIST_GROUP_MARKERS` are marked with its per
+    stack `xdist_group` (see `enable_xdist_loadgroup`), so independent tests
+    and stacks run on separate workers. The marks are added before the xdist
+    worker suffixes the test ids with their group.
+    """
+    deployment_name: str = config.getoption("aoc_stack_deployment_name")
+    for item in items:
+        if item.get_closest_marker("xdist_group"):
+            continue
+        for marker, group in AOC_XDIST_GROUP_MARKERS.items():
+            if item.get_closest_marker(marker):
+                item.add_marker(
+                    pytest.mark.xdist_group(
+                        group.format(deployment_name=deployment_name)
+                    )
+                )
+                break
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    """Closes the trace file and removes the pooled ops containers."""
+    TRACER.close()
+    OPS_CONTAINER_POOL.close()
+
+
+def pytest_terminal_summary(
+    terminalreporter: TerminalReporter, config: pytest.Config
+) -> None:
+    """Reports the time spent in each traced phase per test."""
+    summaries = config.stash.get(AOC_TRACE_SUMMARIES, {})
+    if not summaries:
+        return
+    terminalreporter.write_sep("=", "aoc trace summary")
+    for nodeid, summary in summaries.items():
+        terminalreporter.write_line(nodeid)
+        for name, (count, duration, failures) in summary.items():
+            terminalreporter.write_line(
+                f"    {name:<40} {count:>4.0f}x {duration:>10.3f}s"
+                + (f"  ({failures:.0f} failed)" if failures else "")
+            )
+    terminalreporter.write_line(f"Spans exported to {TRACER.export_path}")
+
+
+class OpsContainerFactory:
+    """OpsContainerFactory Class.
+
+    Constructs each operation (registry login, image pull and validation)
+    once per unique configuration for the whole session. Every request gets
+    a view of it (see `OpsContainer.clone`) with its own command, command
+    args, env vars, volume mounts and options, so per test state can not
+    leak across tests.
+    """
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.operations: Dict[str, OpsContainer] = {}
+
+    def get(
+        self,
+        operation_class: Type[OperationType],
+        ansible_module: BaseHostManager,
+        **kwargs: Any,
+    ) -> OperationType:
+        """Returns a view of the operation constructed with the arguments.
+
+        :param operation_class: the operation class (e.g. AocAwsBackup)
+        :param ansible_module: the pytest ansible module fixture of the test
+        :param kwargs: the operation constructor arguments (json serializable)
+        """
+        key: str = json.dumps(
+            [operation_class.__module__, operation_class.__qualname__, kwargs],
+            sort_keys=True,
+        )
+        operation = self.operations.get(key)
+        if operation is None:
+            operation = operation_class(ansible_module=ansible_module, **kwargs)
+            self.operations[key] = operation
+        assert isinstance(operation, operation_class)
+        return operation.clone(ansible_module)
+
+
+@pytest.fixture(scope="session")
+def aoc_ops_container_factory() -> OpsContainerFactory:
+    """Fixture returning the session wide operation factory."""
+    return OpsContainerFactory()
+
+
+@pytest.fixture(scope="session")
+def aoc_worker_suffix(pytestconfig: pytest.Config) -> str:
+    """Fixture returning the xdist worker id names are suffixed with.
+
+    Empty when not running in parallel or when disabled.
+    """
+    if not pytestconfig.getoption("aoc_xdist_worker_suffix"):
+        return ""
+    return os.getenv("PYTEST_XDIST_WORKER", "")
+
+
+@pytest.fixture(scope="session")
+def aoc_worker_scoped_name(aoc_worker_suffix: str) -> Callable[[str], str]:
+    """Fixture returning a function suffixing names with the xdist worker id."""
+
+    def worker_scoped_name(name: str) -> str:
+        return f"{name}-{aoc_worker_suffix}" if name and aoc_worker_suffix else name
+
+    return worker_scoped_name
+
+
+@pytest.fixture(scope="session")
+def aoc_shared_state(tmp_path_factory: pytest.TempPathFactory) -> SharedStateStore:
+    """Fixture returning the state store shared by the xdist workers.
+
+    The store lives in the session base temp directory, which is shared by
+    the workers of a parallel session (and unique per session).
+    """
+    base_temp = tmp_path_factory.getbasetemp()
+    if os.getenv("PYTEST_XDIST_WORKER"):
+        base_temp = base_temp.parent
+    return SharedStateStore(str(base_temp / "aoc-shared-state.json"))
+
+
+@pytest.fixture(scope="session")
+def aoc_checkpoint_store(pytestconfig: pytest.Config) -> SharedStateStore:
+    """Fixture returning the durable store of the operation checkpoints."""
+    return SharedStateStore(
+        os.path.expanduser(pytestconfig.getoption("aoc_checkpoint_path")),
+        durable=True,
+    )
+
+
+@pytest.fixture
+def aoc_ops_container_options(
+    pytestconfig: pytest.Config, aoc_worker_suffix: str
+) -> OpsContainerOptions:
+    """Fixture returning the ops container tunable options."""
+    return OpsContainerOptions(
+        cache_path=pytestconfig.getoption("aoc_ops_container_cache_path"),
+        registry_login_ttl=pytestconfig.getoption(
+            "aoc_ops_container_registry_login_ttl"
+        ),
+        image_digest_ttl=pytestconfig.getoption("aoc_ops_container_image_digest_ttl"),
+        executor=pytestconfig.getoption("aoc_ops_container_executor"),
+        container_socket=pytestconfig.getoption("aoc_ops_container_socket"),
+        container_cli=pytestconfig.getoption("aoc_ops_container_cli"),
+        stream_output=pytestconfig.getoption("aoc_ops_container_stream_output"),
+        stream_output_tail_lines=pytestconfig.getoption(
+            "aoc_ops_container_stream_output_tail_lines"
+        ),
+        output_log_dir=pytestconfig.getoption("aoc_ops_container_output_log_dir"),
+        playbook_report_dir=pytestconfig.getoption(
+            "aoc_ops_container_playbook_report_dir"
+        ),
+        playbook_report_top=pytestconfig.getoption(
+            "aoc_ops_container_playbook_report_top"
+        ),
+        pool_containers=pytestconfig.getoption("aoc_ops_container_pool"),
+        pool_max_uses=pytestconfig.getoption("aoc_ops_container_pool_max_uses"),
+        container_name_suffix=aoc_worker_suffix,
+        extra_vars_transport=pytestconfig.getoption(
+            "aoc_ops_container_extra_vars_transport"
+        ),
+        extra_vars_format=pytestconfig.getoption("aoc_ops_container_extra_vars_format"),
+        extra_vars_dir=pytestconfig.getoption("aoc_ops_container_extra_vars_dir"),
+        defer_image_pull=pytestconfig.getoption("aoc_ops_container_defer_image_pull"),
+    )
+
+
+@pytest.fixture(autouse=True)
+def aoc_trace_test(request: pytest.FixtureRequest) -> Iterator[None]:
+    """Fixture recording each test as the root span of its traced phases."""
+    if not TRACER.enabled:
+        yield
+        return
+
+    summary: Dict[str, List[float]] = {}
+
+    def summarize(span: Span) -> None:
+        entry = summary.setdefault(span.name, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += span.duration
+        entry[2] += bool(span.error)
+
+    TRACER.add_listener(summarize)
+    try:
+        with TRACER.span("test", **{"test.nodeid": request.node.nodeid}):
+            yield
+    finally:
+        TRACER.remove_listener(summarize)
+        request.config.stash[AOC_TRACE_SUMMARIES][request.node.nodeid] = summary
+
+
+class FakeHostManager:
+    """Fake pytest ansible module fixture (for operations not running modules)."""
+
+
+def fake_aws_backup(
+    options: Optional[OpsContainerOptions] = None,
+    deployment_name: str = "stack-1",
+    aws_s3_bucket: str = AOC_S3_BUCKET,
+) -> AocAwsBackup:
+    """Returns an aws backup operation run with a fake ansible module.
+
+    Use with the `aoc_skip_login_pull` fixture, the operation constructor
+    would login/pull otherwise.
+
+    :param options: the ops container options
+    :param deployment_name: the stack deployment name
+    :param aws_s3_bucket: the s3 bucket holding the stack backups
+    """
+    return AocAwsBackup(
+        aoc_version="2.4",
+        aoc_ops_image="registry.example.com/aoc/ops",
+        aoc_ops_image_tag="1.0",
+        aoc_image_registry_username="user",
+        aoc_image_registry_password="secret",
+        ansible_module=FakeHostManager(),
+        command_generator_vars=AocAwsBackupDataVars(
+            cloud_credentials_path="/tmp/credentials",
+            deployment_name=deployment_name,
+            extra_vars=AocAwsBackupDataExtraVars(
+                aws_backup_iam_role_arn="arn:aws:iam::123456789012:role/backup",
+                aws_backup_vault_name="vault",
+                aws_region="us-east-1",
+                aws_s3_bucket=aws_s3_bucket,
+                aws_ssm_bucket_name="aoc-ssm",
+                backup_prefix="aoc",
+            ),
+        ),
+        options=options or OpsContainerOptions(),
+    )
+
+
+@pytest.fixture
+def aoc_skip_login_pull(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fixture skipping the ops container registry login/image pull."""
+    monkeypatch.setattr(
+        OpsContainer, "registry_login", lambda self, registry, user, password: True
+    )
+    monkeypatch.setattr(OpsContainer, "pull_image", lambda self, image, tag: True)
+
+
+@pytest.fixture
+def aoc_s3_client() -> Iterator[Any]:
+    """Fixture returning a mocked s3 client holding an empty backups bucket.
+
+    Test modules override it (requesting it) to upload their backups.
+    """
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=AOC_S3_BUCKET)
+        yield s3_client
@@ -0,0 +1,172 @@
+"""AoC executors conftest module.
+
+This module contains commonly used code across all test modules.
+Majority of the functions here will be pytest fixtures.
+"""
+import json
+import os
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+
+import pytest
+
+
+class FakeDockerApiState:
+    """Fake container engine state shared by the fake engine request handlers."""
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.connections: int = 0
+        self.requests: List[str] = []
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.images: Dict[str, str] = {}
+        self.entrypoint: List[str] = ["/usr/bin/entrypoint"]
+        self.execs: Dict[str, Dict[str, Any]] = {}
+        self.logs: List[str] = ["PLAY [localhost]", "TASK [backup]", "ok: [localhost]"]
+        self.exit_code: int = 0
+        # Seconds container waits block for (the container run duration)
+        self.wait_delay: float = 0.0
+        # Whether response bodies are sent with chunked transfer encoding
+        self.chunked: bool = False
+
+
+class FakeDockerApiHandler(BaseHTTPRequestHandler):
+    """Fake docker engine api request handler (a minimal subset of the api)."""
+
+    protocol_version = "HTTP/1.1"
+    server: "FakeDockerApiServer"
+
+    def setup(self) -> None:
+        """Counts each accepted connection."""
+        super().setup()
+        self.server.state.connections += 1
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silences the request logging."""
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type or "application/json")
+        if self.server.state.chunked and body:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # Odd sized chunks, so frames/lines span chunk boundaries
+            for i in range(0, len(body), 7):
+                chunk = body[i : i + 7]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, body: Any) -> None:
+        self._send(status, json.dumps(body).encode())
+
+    def _handle(self) -> None:
+        state = self.server.state
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        path, _, query = self.path.partition("?")
+        state.requests.append(f"{self.command} {path}")
+        parts = path.strip("/").split("/")
+
+        if path == "/auth":
+            if body.get("password") == "secret":
+                self._send_json(200, {"Status": "Login Succeeded"})
+            else:
+                self._send_json(401, {"message": "unauthorized"})
+        elif path == "/images/create":
+            params = dict(item.split("=", 1) for item in query.split("&"))
+            name = f'{params["fromImage"].replace("%2F", "/")}:{params["tag"]}'
+            state.images[name] = "sha256:abc"
+            self._send(200, b'{"status": "Pulling"}\n{"status": "Done"}\n')
+        elif parts[0] == "images" and parts[-1] == "json":
+            name = "/".join(parts[1:-1])
+            if name not in state.images:
+                self._send_json(404, {"message": "no such image"})
+            else:
+                repository = name.rsplit(":", 1)[0]
+                self._send_json(
+                    200,
+                    {
+                        "RepoDigests": [f"{repository}@{state.images[name]}"],
+                        "Config": {"Entrypoint": state.entrypoint},
+                    },
+                )
+        elif path == "/containers/create":
+            name = query.split("name=", 1)[1]
+            if name in state.containers:
+                self._send_json(409, {"message": "conflict"})
+            else:
+                state.containers[name] = body
+                self._send_json(201, {"Id": name})
+        elif parts[0] == "containers" and parts[-1] == "start":
+            self._send(204)
+        elif parts[0] == "containers" and parts[-1] == "wait":
+            time.sleep(state.wait_delay)
+            self._send_json(200, {"StatusCode": state.exit_code})
+        elif parts[0] == "containers" and parts[-1] == "logs":
+            self._send_logs()
+        elif parts[0] == "containers" and parts[-1] == "exec":
+            if parts[1] not in state.containers:
+                self._send_json(404, {"message": "no such container"})
+            else:
+                exec_id = f"exec-{len(state.execs)}"
+                state.execs[exec_id] = {"Container": parts[1], **body}
+                self._send_json(201, {"Id": exec_id})
+        elif parts[0] == "exec" and parts[-1] == "start":
+            self._send_logs()
+        elif parts[0] == "exec" and parts[-1] == "json":
+            self._send_json(200, {"Running": False, "ExitCode": state.exit_code})
+        elif self.command == "DELETE" and parts[0] == "containers":
+            state.containers.pop(parts[1], None)
+            self._send(204)
+        else:
+            self._send_json(404, {"message": f"unsupported {path}"})
+
+    def _send_logs(self) -> None:
+        frames = b""
+        for line in self.server.state.logs:
+            payload = f"{line}\n".encode()
+            frames += struct.pack(">BxxxL", 1, len(payload)) + payload
+        self._send(200, frames, "application/vnd.docker.multiplexed-stream")
+
+    do_GET = do_POST = do_DELETE = _handle
+
+
+class FakeDockerApiServer(socketserver.ThreadingUnixStreamServer):
+    """Fake docker engine api served over a unix socket."""
+
+    daemon_threads = True
+    # Accept many concurrent (e.g. asyncio) connections, like the engine does
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str) -> None:
+        """Constructor.
+
+        :param socket_path: the unix socket path to serve on
+        """
+        super().__init__(socket_path, FakeDockerApiHandler)
+        self.state: FakeDockerApiState = FakeDockerApiState()
+
+
+@pytest.fixture
+def fake_docker_api() -> Iterator[FakeDockerApiServer]:
+    """Fixture returning a running fake docker engine api server."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = FakeDockerApiServer(os.path.join(tmp_dir, "docker.sock"))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
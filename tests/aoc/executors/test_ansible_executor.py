@@ -0,0 +1,68 @@
+"""Tests validating the ansible container executor."""
+import asyncio
+import stat
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.executors.ansible_executor import AnsibleContainerExecutor
+from lib.aoc.ops_container import ANSIBLE_MODULE_LOCK
+
+# Fake container cli, container logs take half a second to be followed
+FAKE_CONTAINER_CLI: str = """#!/bin/sh
+case "$1" in
+    logs) sleep 0.5; echo "PLAY [localhost]"; echo "ok: [localhost]" ;;
+    wait) echo 0 ;;
+esac
+"""
+
+
+@pytest.fixture
+def container_cli(tmp_path: Path) -> str:
+    """Fixture returning the path to the fake container cli."""
+    path = tmp_path / "docker"
+    path.write_text(FAKE_CONTAINER_CLI)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.mark.aoc_executors
+class TestAnsibleContainerExecutor:
+    """Test suite covering the ansible executor backend."""
+
+    def test_run_container_async(self, container_cli: str) -> None:
+        """Test verifies asyncio runs overlap, only starting the container."""
+        module_runs: List[Tuple[str, Dict[str, Any]]] = []
+
+        def run_module(module: str, **kwargs: Any) -> Any:
+            with ANSIBLE_MODULE_LOCK:
+                module_runs.append((module, kwargs))
+                return SimpleNamespace(contacted={"localhost": {}})
+
+        executor = AnsibleContainerExecutor(run_module, container_cli)
+
+        async def run_containers() -> List[Tuple[str, int]]:
+            return await asyncio.gather(
+                *(
+                    executor.run_container_async(
+                        f"backup-{i}", "ops:1.0", "backup", [], {}
+                    )
+                    for i in range(3)
+                )
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(run_containers())
+
+        assert time.perf_counter() - start < 1.2
+        assert results == [("PLAY [localhost]\nok: [localhost]", 0)] * 3
+        assert sorted(kwargs["name"] for _, kwargs in module_runs) == [
+            f"backup-{i}" for i in range(3)
+        ]
+        assert all(kwargs["detach"] == "true" for _, kwargs in module_runs)
@@ -0,0 +1,130 @@
+"""Tests validating the docker engine api container executor."""
+import asyncio
+import time
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.executors.docker_api_executor import DockerApiContainerExecutor
+from tests.aoc.executors.conftest import FakeDockerApiServer
+
+IMAGE: str = "registry.example.com/aoc/ops"
+
+
+@pytest.mark.aoc_executors
+class TestDockerApiContainerExecutor:
+    """Test suite covering the docker engine api executor backend."""
+
+    def test_login_pull_digest(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies registry login, image pull and image digest lookup."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+
+        assert not executor.registry_login("registry.example.com", "user", "wrong")
+        assert executor.registry_login("registry.example.com", "user", "secret")
+        assert executor.get_image_digest(IMAGE, "1.0") is None
+        assert executor.pull_image(IMAGE, "1.0") == (True, "sha256:abc")
+        assert executor.get_image_digest(IMAGE, "1.0") == "sha256:abc"
+
+    def test_run_container(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies a container runs, returning its output and exit code."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+        fake_docker_api.state.exit_code = 2
+
+        output, status = executor.run_container(
+            "backup",
+            f"{IMAGE}:1.0",
+            "playbook -e 'a=b c=d'",
+            ["/tmp/credentials:/home/runner/.aws/credentials:ro"],
+            {"PLATFORM": "AWS"},
+        )
+        assert status == 2
+        assert output == "\n".join(fake_docker_api.state.logs)
+        container = fake_docker_api.state.containers["backup"]
+        assert container["Cmd"] == ["playbook", "-e", "a=b c=d"]
+        assert container["Env"] == ["PLATFORM=AWS"]
+
+        assert executor.remove_container("backup")
+        assert "backup" not in fake_docker_api.state.containers
+
+    def test_stream_container(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies a detached container output is followed line by line."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+
+        assert executor.start_container("backup", f"{IMAGE}:1.0", "playbook", [], {})
+        # An existing container with the same name is replaced
+        assert executor.start_container("backup", f"{IMAGE}:1.0", "playbook", [], {})
+        assert list(executor.follow_logs("backup")) == fake_docker_api.state.logs
+        assert executor.wait_container("backup") == 0
+
+    def test_connection_reuse(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies non streaming requests reuse one kept alive connection."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+
+        for _ in range(10):
+            executor.get_image_digest(IMAGE, "1.0")
+            executor.remove_container("backup")
+
+        assert len(fake_docker_api.state.requests) == 20
+        assert fake_docker_api.state.connections == 1
+        executor.close()
+
+    def test_exec_container(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies commands are exec'd in an idle container."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+        executor.pull_image(IMAGE, "1.0")
+
+        assert executor.get_image_entrypoint(f"{IMAGE}:1.0") == ["/usr/bin/entrypoint"]
+        assert executor.get_image_entrypoint(f"{IMAGE}:2.0") is None
+        assert executor.start_idle_container("pool", f"{IMAGE}:1.0", [])
+        assert fake_docker_api.state.containers["pool"]["Entrypoint"] == [
+            "sleep",
+            "infinity",
+        ]
+
+        fake_docker_api.state.exit_code = 2
+        output, status = executor.run_exec("pool", ["playbook"], {"PLATFORM": "AWS"})
+        assert (output, status) == ("\n".join(fake_docker_api.state.logs), 2)
+        assert fake_docker_api.state.execs["exec-0"]["Cmd"] == ["playbook"]
+        assert fake_docker_api.state.execs["exec-0"]["Env"] == ["PLATFORM=AWS"]
+
+        exec_id = executor.start_exec("pool", ["playbook"], {})
+        assert exec_id is not None
+        assert list(executor.follow_exec(exec_id)) == fake_docker_api.state.logs
+        assert executor.wait_exec(exec_id) == 2
+        assert executor.start_exec("missing", ["playbook"], {}) is None
+
+    def test_run_container_async(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies containers are run/waited on/followed with asyncio."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+        fake_docker_api.state.exit_code = 2
+        fake_docker_api.state.chunked = True
+        fake_docker_api.state.logs.append("x" * 100)
+
+        async def run() -> Tuple[Tuple[str, int], List[str], int]:
+            result = await executor.run_container_async(
+                "backup", f"{IMAGE}:1.0", "playbook", [], {}
+            )
+            lines = [line async for line in executor.follow_logs_async("backup")]
+            return result, lines, await executor.wait_container_async("missing")
+
+        result, lines, missing_status = asyncio.run(run())
+        assert result == ("\n".join(fake_docker_api.state.logs), 2)
+        assert lines == fake_docker_api.state.logs
+        # The fake engine waits on any container name
+        assert missing_status == 2
+        assert executor.remove_container("backup")
+
+    def test_wait_container_async(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies many containers are waited on from one event loop."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+        fake_docker_api.state.wait_delay = 0.5
+
+        async def wait() -> List[int]:
+            return await asyncio.gather(
+                *(executor.wait_container_async(f"backup-{i}") for i in range(10))
+            )
+
+        start = time.perf_counter()
+        assert asyncio.run(wait()) == [0] * 10
+        assert time.perf_counter() - start < 2.5
@@ -0,0 +1,192 @@
+"""Tests validating the asyncio ops container operations."""
+import asyncio
+import time
+from typing import List
+from typing import Tuple
+
+import pytest
+
+import lib.aoc.tracing
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.aws.operations.backup import AocAwsBackupStackResult
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import Tracer
+from tests.aoc.conftest import fake_aws_backup
+from tests.aoc.executors.conftest import FakeDockerApiServer
+
+
+@pytest.fixture
+def aoc_aws_backup(
+    aoc_skip_login_pull: None,
+    fake_docker_api: FakeDockerApiServer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> AocAwsBackup:
+    """Fixture returning an aws backup operation run by the fake engine."""
+    monkeypatch.setattr(AocAwsBackup, "get_s3_backup_object", lambda self: "backup-1")
+    return fake_aws_backup(
+        OpsContainerOptions(
+            executor="docker-api",
+            container_socket=str(fake_docker_api.server_address),
+        ),
+        deployment_name="stack",
+    )
+
+
+def stack_backup(aoc_aws_backup: AocAwsBackup, deployment_name: str) -> AocAwsBackup:
+    """Returns a copy of the backup operation for the deployment."""
+    backup = aoc_aws_backup.clone()
+    backup.command_generator_vars = AocAwsBackupDataVars(
+        **{**aoc_aws_backup.command_generator_vars, "deployment_name": deployment_name}
+    )
+    return backup
+
+
+@pytest.mark.aoc_executors
+class TestOpsContainerAsync:
+    """Test suite covering the asyncio ops container operations."""
+
+    def test_gather_backups(
+        self, aoc_aws_backup: AocAwsBackup, fake_docker_api: FakeDockerApiServer
+    ) -> None:
+        """Test verifies stack backups overlap when run from one event loop."""
+        fake_docker_api.state.wait_delay = 0.5
+
+        async def backup_stacks() -> Tuple[bool, List[AocAwsBackupStackResult]]:
+            runs = [
+                stack_backup(aoc_aws_backup, f"stack-{i}").backup_stack_async()
+                for i in range(5)
+            ]
+            await asyncio.sleep(0.1)
+            polled: bool = any(run.done() or run.poll() for run in runs)
+            return polled, await asyncio.gather(*runs)
+
+        start = time.perf_counter()
+        polled, results = asyncio.run(backup_stacks())
+
+        assert time.perf_counter() - start < 2.0
+        assert not polled
+        assert [result["backup_object_name"] for result in results] == ["backup-1"] * 5
+        assert all(result["playbook_result"] for result in results)
+        assert results[0]["playbook_output"] == "\n".join(fake_docker_api.state.logs)
+        assert sorted(
+            request.split("/")[2]
+            for request in fake_docker_api.state.requests
+            if request.endswith("/wait")
+        ) == [f"stack-{i}-backup-stack" for i in range(5)]
+        assert not fake_docker_api.state.containers
+
+    def test_cancel(
+        self, aoc_aws_backup: AocAwsBackup, fake_docker_api: FakeDockerApiServer
+    ) -> None:
+        """Test verifies cancelled runs remove their ops container."""
+        fake_docker_api.state.wait_delay = 2.0
+
+        async def cancel() -> bool:
+            run = aoc_aws_backup.run_container_async("backup")
+            while "backup" not in fake_docker_api.state.containers:
+                await asyncio.sleep(0.01)
+            assert run.poll() is None
+            assert await run.wait(timeout=0.1) is None
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+            return run.cancelled()
+
+        assert asyncio.run(cancel())
+        assert not fake_docker_api.state.containers
+        assert fake_docker_api.state.requests[-1] == "DELETE /containers/backup"
+
+    def test_stream_output_spans(
+        self,
+        aoc_aws_backup: AocAwsBackup,
+        fake_docker_api: FakeDockerApiServer,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test verifies streamed output and spans of overlapping runs."""
+        fake_docker_api.state.chunked = True
+        tracer = Tracer()
+        monkeypatch.setattr(lib.aoc.tracing, "TRACER", tracer)
+        spans: List[Span] = []
+        tracer.add_listener(spans.append)
+        tracer.configure()
+        aoc_aws_backup.options["stream_output"] = True
+
+        lines: List[str] = []
+        backups = [stack_backup(aoc_aws_backup, f"stack-{i}") for i in range(3)]
+        for backup in backups:
+            backup.output_callbacks = [lines.append]
+
+        async def backup_stacks() -> List[AocAwsBackupStackResult]:
+            with tracer.span("test"):
+                return await asyncio.gather(
+                    *(backup.backup_stack_async() for backup in backups)
+                )
+
+        results = asyncio.run(backup_stacks())
+
+        assert all(result["playbook_result"] for result in results)
+        assert sorted(lines) == sorted(fake_docker_api.state.logs * 3)
+        test_span = spans[-1]
+        backup_spans = [s for s in spans if s.name == "aws_backup.backup_stack"]
+        run_spans = [s for s in spans if s.name == "ops_container.run_container"]
+        assert len(backup_spans) == len(run_spans) == 3
+        assert all(s.parent is test_span for s in backup_spans)
+        assert sorted(
+            (
+                s.parent.attributes["aoc.deployment_name"],
+                s.attributes["aoc.container_name"],
+            )
+            for s in run_spans
+            if s.parent
+        ) == [(f"stack-{i}", f"stack-{i}-backup-stack") for i in range(3)]
+
+    @pytest.mark.parametrize("run", ["sync", "async"])
+    def test_stream_output_backup_name(
+        self,
+        aoc_aws_backup: AocAwsBackup,
+        fake_docker_api: FakeDockerApiServer,
+        run: str,
+    ) -> None:
+        """Test verifies the backup name is found beyond the streamed output tail."""
+        fake_docker_api.state.logs = [
+            "TASK [Backup the stack]",
+            'ok: [localhost] => {"backup_name": "backup-1"}',
+            *(f"TASK [Cleanup {i}]" for i in range(5)),
+        ]
+        aoc_aws_backup.options["stream_output"] = True
+        aoc_aws_backup.options["stream_output_tail_lines"] = 2
+
+        async def backup_stack() -> AocAwsBackupStackResult:
+            return await aoc_aws_backup.backup_stack_async()
+
+        if run == "sync":
+            result = aoc_aws_backup.backup_stack()
+        else:
+            result = asyncio.run(backup_stack())
+
+        assert result["playbook_output"] == "TASK [Cleanup 3]\nTASK [Cleanup 4]"
+        assert result["backup_object_name"] == "backup-1"
+        assert result["backup_object_name_in_output"]
+        assert aoc_aws_backup.output_callbacks == [aoc_aws_backup.print_output_line]
+
+        fake_docker_api.state.logs = fake_docker_api.state.logs[2:]
+        assert not aoc_aws_backup.backup_stack()["backup_object_name_in_output"]
+
+    def test_stream_output_interrupted(
+        self, aoc_aws_backup: AocAwsBackup, fake_docker_api: FakeDockerApiServer
+    ) -> None:
+        """Test verifies an interrupted streamed run removes its ops container."""
+        aoc_aws_backup.options["stream_output"] = True
+
+        def interrupt(line: str) -> None:
+            raise KeyboardInterrupt
+
+        aoc_aws_backup.output_callbacks = [interrupt]
+        aoc_aws_backup.populate_backup_command_generator_args()
+        with pytest.raises(KeyboardInterrupt):
+            aoc_aws_backup.stream_container("backup")
+
+        assert "backup" not in fake_docker_api.state.containers
+        assert fake_docker_api.state.requests[-1] == "DELETE /containers/backup"
@@ -0,0 +1,50 @@
+"""Tests validating the ops container pool."""
+from typing import List
+
+import pytest
+
+from lib.aoc.executors.docker_api_executor import DockerApiContainerExecutor
+from lib.aoc.ops_container_pool import OpsContainerPool
+from tests.aoc.executors.conftest import FakeDockerApiServer
+
+IMAGE: str = "registry.example.com/aoc/ops:1.0"
+VOLUMES: List[str] = ["/tmp/credentials:/home/runner/.aws/credentials:ro"]
+
+
+@pytest.mark.aoc_executors
+class TestOpsContainerPool:
+    """Test suite covering the pooled ops containers reuse/recycling."""
+
+    def test_reuse_and_recycle(self, fake_docker_api: FakeDockerApiServer) -> None:
+        """Test verifies idle containers are reused until used up or failed."""
+        executor = DockerApiContainerExecutor(str(fake_docker_api.server_address))
+        executor.pull_image("registry.example.com/aoc/ops", "1.0")
+        pool = OpsContainerPool()
+
+        container = pool.acquire(executor, IMAGE, VOLUMES)
+        assert container is not None
+        assert container["entrypoint"] == ["/usr/bin/entrypoint"]
+        assert container["name"] in fake_docker_api.state.containers
+
+        # Released containers are reused for the same image/volume mounts only
+        pool.release(container, healthy=True, max_uses=2)
+        assert len(pool) == 1
+        other = pool.acquire(executor, IMAGE, [])
+        assert other is not None and other["name"] != container["name"]
+        assert pool.acquire(executor, IMAGE, VOLUMES) is container
+
+        # Used up and failed containers are removed
+        pool.release(container, healthy=True, max_uses=2)
+        assert container["name"] not in fake_docker_api.state.containers
+        pool.release(other, healthy=False)
+        assert other["name"] not in fake_docker_api.state.containers
+        assert len(pool) == 0
+
+        container = pool.acquire(executor, IMAGE, VOLUMES)
+        assert container is not None
+        pool.release(container, healthy=True)
+        pool.close()
+        assert len(pool) == 0
+        assert not fake_docker_api.state.containers
+
+        assert pool.acquire(executor, "registry.example.com/aoc/ops:2.0", []) is None
@@ -6,16 +6,23 @@ from lib.aoc.gcp.operations.backup import AocGcpBackup
 from lib.aoc.gcp.operations.backup import AocGcpBackupDataVars
 from lib.aoc.gcp.operations.restore import AocGcpRestore
 from lib.aoc.gcp.operations.restore import AocGcpRestoreDataVars
+from lib.aoc.ops_container import OpsContainerOptions
+from tests.aoc.conftest import OpsContainerFactory
 
 
 @pytest.fixture  # type: ignore
 def aoc_gcp_backup(
-    ansible_module: BaseHostManager, pytestconfig: pytest.Config
+    ansible_module: BaseHostManager,
+    pytestconfig: pytest.Config,
+    aoc_ops_container_options: OpsContainerOptions,
+    aoc_ops_container_factory: OpsContainerFactory,
 ) -> AocGcpBackup:
     """Fixture returning aoc gcp backup operations."""
     command_generator_vars: AocGcpBackupDataVars = AocGcpBackupDataVars(todo="todo")
 
-    return AocGcpBackup(
+    aoc_gcp_backup = aoc_ops_container_factory.get(
+        AocGcpBackup,
+        ansible_module,
         aoc_version=pytestconfig.getoption("aoc_version"),
         aoc_ops_image=pytestconfig.getoption("aoc_ops_container_image"),
         aoc_ops_image_tag=pytestconfig.getoption("aoc_ops_container_image_tag"),
@@ -25,19 +32,28 @@ def aoc_gcp_backup(
         aoc_image_registry_password=pytestconfig.getoption(
             "aoc_ops_container_image_registry_password"
         ),
-        ansible_module=ansible_module,
         command_generator_vars=command_generator_vars,
+        options=aoc_ops_container_options,
     )
 
+    # Views do not inherit the command, generate it for this view
+    aoc_gcp_backup.command_generator_setup()
+    return aoc_gcp_backup
+
 
 @pytest.fixture  # type: ignore
 def aoc_gcp_restore(
-    ansible_module: pytest.fixture, pytestconfig: pytest.Config
+    ansible_module: pytest.fixture,
+    pytestconfig: pytest.Config,
+    aoc_ops_container_options: OpsContainerOptions,
+    aoc_ops_container_factory: OpsContainerFactory,
 ) -> AocGcpRestore:
     """Fixture returning aoc gcp restore operations."""
     command_generator_vars: AocGcpRestoreDataVars = AocGcpRestoreDataVars(todo="todo")
 
-    return AocGcpRestore(
+    aoc_gcp_restore = aoc_ops_container_factory.get(
+        AocGcpRestore,
+        ansible_module,
         aoc_version=pytestconfig.getoption("aoc_version"),
         aoc_ops_image=pytestconfig.getoption("aoc_ops_container_image"),
         aoc_ops_image_tag=pytestconfig.getoption("aoc_ops_container_image_tag"),
@@ -47,10 +63,14 @@ def aoc_gcp_restore(
         aoc_image_registry_password=pytestconfig.getoption(
             "aoc_ops_container_image_registry_password"
         ),
-        ansible_module=ansible_module,
         command_generator_vars=command_generator_vars,
+        options=aoc_ops_container_options,
     )
 
+    # Views do not inherit the command, generate it for this view
+    aoc_gcp_restore.command_generator_setup()
+    return aoc_gcp_restore
+
 
 @pytest.mark.gcp
 @pytest.mark.operations
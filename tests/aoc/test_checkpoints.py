@@ -0,0 +1,114 @@
+"""Tests validating the operation checkpoints used to resume runs."""
+from pathlib import Path
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+
+from lib.aoc.aws.operations.backup import AocAwsBackup
+from lib.aoc.aws.operations.backup import AocAwsBackupDataExtraVars
+from lib.aoc.aws.operations.backup import AocAwsBackupDataVars
+from lib.aoc.checkpoints import BACKUP_COMPLETED
+from lib.aoc.checkpoints import BUCKET_CREATED
+from lib.aoc.checkpoints import Checkpoint
+from lib.aoc.checkpoints import OperationCheckpoints
+from lib.aoc.ops_container import _ImageState
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_cache import OpsContainerCache
+from lib.aoc.state_store import SharedStateStore
+from tests.aoc.conftest import AOC_S3_BUCKET
+
+
+class FakeImageExecutor:
+    """Fake container executor recording the image pulls."""
+
+    def __init__(self, digest: str) -> None:
+        self.digest: str = digest
+        self.pulls: List[str] = []
+
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        return self.digest
+
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        self.pulls.append(f"{image}:{tag}")
+        return True, self.digest
+
+
+@pytest.fixture
+def aoc_backup(aoc_s3_client: Any) -> AocAwsBackup:
+    """Fixture returning an aws backup operation backed by a mocked s3."""
+    aoc_s3_client.put_object(
+        Bucket=AOC_S3_BUCKET, Key="backup-1/stack.tar.gz", Body=b"backup"
+    )
+    backup = AocAwsBackup.__new__(AocAwsBackup)
+    backup.command_generator_vars = AocAwsBackupDataVars(
+        extra_vars=AocAwsBackupDataExtraVars(aws_s3_bucket=AOC_S3_BUCKET)
+    )
+    backup.s3_client = lambda: aoc_s3_client  # type: ignore
+    return backup
+
+
+@pytest.mark.aoc_checkpoints
+class TestOperationCheckpoints:
+    """Test suite covering the checkpoints recording and verification."""
+
+    def test_record_clear(self, tmp_path: Path) -> None:
+        """Test verifies checkpoints persist per scope until cleared."""
+        path = str(tmp_path / "checkpoints.json")
+        checkpoints = OperationCheckpoints(
+            SharedStateStore(path, durable=True), "aws/stack-1"
+        )
+        checkpoints.record(BUCKET_CREATED, Checkpoint(bucket="aoc-backups"))
+        checkpoints.record(
+            BACKUP_COMPLETED,
+            Checkpoint(bucket="aoc-backups", backup_object_name="backup-1"),
+        )
+
+        resumed = OperationCheckpoints(SharedStateStore(path), "aws/stack-1")
+        assert (resumed.get(BUCKET_CREATED) or {}).get("bucket") == "aoc-backups"
+        assert (resumed.get(BACKUP_COMPLETED) or {}).get(
+            "backup_object_name"
+        ) == "backup-1"
+        assert (
+            OperationCheckpoints(SharedStateStore(path), "aws/stack-2").get(
+                BUCKET_CREATED
+            )
+            is None
+        )
+
+        resumed.clear(BACKUP_COMPLETED)
+        assert checkpoints.get(BACKUP_COMPLETED) is None
+        assert checkpoints.get(BUCKET_CREATED) is not None
+
+    def test_verify_s3(self, aoc_backup: AocAwsBackup) -> None:
+        """Test verifies bucket/backup checkpoints are checked against s3."""
+        assert aoc_backup.s3_bucket_exists()
+        assert aoc_backup.s3_backup_exists("backup-1")
+        assert not aoc_backup.s3_backup_exists("backup-2")
+        assert not aoc_backup.s3_backup_exists("")
+
+        aoc_backup.command_generator_vars["extra_vars"]["aws_s3_bucket"] = "missing"
+        assert not aoc_backup.s3_bucket_exists()
+        assert not aoc_backup.s3_backup_exists("backup-1")
+
+    def test_verified_image(self, tmp_path: Path) -> None:
+        """Test verifies the pull is skipped while the image digest matches."""
+        ops_container = OpsContainer.__new__(OpsContainer)
+        ops_container._image = _ImageState()
+        executor = FakeImageExecutor("sha256:1")
+        ops_container.executor = executor  # type: ignore
+        ops_container.cache = OpsContainerCache(str(tmp_path / "cache.json"))
+
+        ops_container.options = OpsContainerOptions(
+            image_digest_ttl=0, verified_image_digest="sha256:1"
+        )
+        assert ops_container.pull_image("registry.example.com/ops", "1.0")
+        assert executor.pulls == []
+        assert ops_container.image_digest == "sha256:1"
+
+        ops_container.options["verified_image_digest"] = "sha256:0"
+        assert ops_container.pull_image("registry.example.com/ops", "1.0")
+        assert executor.pulls == ["registry.example.com/ops:1.0"]
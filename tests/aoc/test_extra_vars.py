@@ -0,0 +1,87 @@
+"""Tests validating the ops playbook extra vars files."""
+import json
+import os
+import shlex
+from pathlib import Path
+
+import pytest
+import yaml
+
+from lib.aoc.extra_vars import EXTRA_VARS_CONTAINER_DIR
+from lib.aoc.ops_container import OpsContainerOptions
+from tests.aoc.conftest import fake_aws_backup
+
+
+def extra_vars_file(command: str, directory: Path) -> Path:
+    """Returns the host path of the `-e @<file>` extra vars file."""
+    argument = shlex.split(command)[-1]
+    assert argument.startswith(f"@{EXTRA_VARS_CONTAINER_DIR}/")
+    return directory / os.path.basename(argument)
+
+
+@pytest.mark.aoc_extra_vars
+@pytest.mark.usefixtures("aoc_skip_login_pull")
+class TestExtraVarsFile:
+    """Test suite covering the extra vars transports."""
+
+    def test_delete_backups(self, tmp_path: Path) -> None:
+        """Test verifies many/unusual backup names are passed in a file."""
+        backup = fake_aws_backup(OpsContainerOptions(extra_vars_dir=str(tmp_path)))
+        backup_names = [f"backup {i} 'quoted\"" for i in range(10_000)]
+        backup.populate_delete_backup_command_generator_args(backup_names)
+
+        assert backup.command.startswith(
+            "redhat.ansible_on_clouds.aws_backups_delete "
+            "-e 'aws_region=us-east-1 aws_s3_bucket=aoc-backups delete=True' -e @"
+        )
+        assert len(backup.command) < 200
+        path = extra_vars_file(backup.command, tmp_path)
+        assert json.loads(path.read_text()) == {"aws_backup_names": backup_names}
+        assert oct(path.stat().st_mode & 0o777) == oct(0o644)
+        assert backup.container_volume_mounts == [
+            "/tmp/credentials:/home/runner/.aws/credentials:ro",
+            f"{tmp_path}:{EXTRA_VARS_CONTAINER_DIR}:ro",
+        ]
+
+        # Command args only operations no longer pass (or keep) the file
+        backup.populate_backup_command_generator_args()
+        assert not path.exists()
+        assert "-e @" not in backup.command
+        assert backup.container_volume_mounts == backup.volume_mounts
+
+    def test_file_transport(self, tmp_path: Path) -> None:
+        """Test verifies every extra var is passed in a yaml file."""
+        backup = fake_aws_backup(
+            OpsContainerOptions(
+                extra_vars_transport="file",
+                extra_vars_format="yaml",
+                extra_vars_dir=str(tmp_path),
+            )
+        )
+        backup.populate_delete_backup_command_generator_args(["backup-1"])
+
+        assert shlex.split(backup.command)[:2] == [
+            "redhat.ansible_on_clouds.aws_backups_delete",
+            "-e",
+        ]
+        path = extra_vars_file(backup.command, tmp_path)
+        assert path.suffix == ".yaml"
+        assert yaml.safe_load(path.read_text()) == {
+            "aws_region": "us-east-1",
+            "aws_s3_bucket": "aoc-backups",
+            "delete": "True",
+            "aws_backup_names": ["backup-1"],
+        }
+
+    def test_clone(self, tmp_path: Path) -> None:
+        """Test verifies clones do not share the extra vars file."""
+        backup = fake_aws_backup(OpsContainerOptions(extra_vars_dir=str(tmp_path)))
+        backup.populate_delete_backup_command_generator_args(["backup-1"])
+        clone = backup.clone()
+
+        assert clone.extra_vars == {}
+        assert clone.extra_vars_file is None
+        assert clone.container_volume_mounts == []
+
+        clone.populate_delete_backup_command_generator_args(["backup-2"])
+        assert len(list(tmp_path.iterdir())) == 2
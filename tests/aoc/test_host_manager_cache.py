@@ -0,0 +1,27 @@
+"""Tests validating the cached ansible host managers."""
+from typing import Any
+from typing import Callable
+
+import pytest
+
+from tests.conftest import clear_host_manager_cache  # type: ignore
+
+
+@pytest.mark.aoc_host_manager_cache
+class TestHostManagerCache:
+    """Test suite covering the host manager reuse and invalidation."""
+
+    def test_cached(self, ansible_adhoc: Callable[..., Any]) -> None:
+        """Test verifies host managers are reused per configuration."""
+        host_manager = ansible_adhoc()
+
+        assert ansible_adhoc() is host_manager
+        assert ansible_adhoc(become=True) is not host_manager
+        assert ansible_adhoc(become=True) is ansible_adhoc(become=True)
+
+    def test_clear(self, ansible_adhoc: Callable[..., Any]) -> None:
+        """Test verifies host managers are rebuilt once invalidated."""
+        host_manager = ansible_adhoc()
+        clear_host_manager_cache()
+
+        assert ansible_adhoc() is not host_manager
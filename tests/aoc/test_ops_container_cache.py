@@ -0,0 +1,116 @@
+"""Tests validating the ops container login/image cache."""
+import time
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+
+import lib.aoc.ops_container
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.ops_container_cache import OpsContainerCache
+
+IMAGE: str = "registry.example.com/aoc/ops"
+
+
+class FakeImageExecutor:
+    """Fake container executor holding a local image, recording the pulls."""
+
+    def __init__(self, digest: Optional[str]) -> None:
+        self.digest: Optional[str] = digest
+        self.pulls: List[str] = []
+
+    def get_image_digest(self, image: str, tag: str) -> Optional[str]:
+        return self.digest
+
+    def pull_image(self, image: str, tag: str) -> Tuple[bool, Optional[str]]:
+        self.pulls.append(f"{image}:{tag}")
+        self.digest = "sha256:pulled"
+        return True, self.digest
+
+
+@pytest.fixture
+def ops_container(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> OpsContainer:
+    """Fixture returning an ops container pulling with a fake executor."""
+    monkeypatch.setattr(
+        lib.aoc.ops_container, "get_remote_manifest_digest", lambda *args: None
+    )
+    ops_container = OpsContainer.__new__(OpsContainer)
+    ops_container._image = lib.aoc.ops_container._ImageState()
+    ops_container.executor = FakeImageExecutor("sha256:1")  # type: ignore
+    ops_container.cache = OpsContainerCache(str(tmp_path / "cache.json"))
+    ops_container.options = OpsContainerOptions(image_digest_ttl=3600)
+    ops_container.aoc_image_registry_username = "user"
+    ops_container.aoc_image_registry_password = "secret"
+    return ops_container
+
+
+@pytest.mark.aoc_ops_container_cache
+class TestOpsContainerCache:
+    """Test suite covering the login/image cache entries."""
+
+    def test_entries(self, tmp_path: Path) -> None:
+        """Test verifies entries are shared through the cache file until expired."""
+        path = str(tmp_path / "cache.json")
+        cache = OpsContainerCache(path)
+        cache.record_login("registry.example.com", "user")
+        cache.record_image_digest(IMAGE, "1.0", "sha256:1")
+
+        other = OpsContainerCache(path)
+        assert other.has_login("registry.example.com", "user", ttl=60)
+        assert not other.has_login("registry.example.com", "other", ttl=60)
+        assert other.get_image_digest(IMAGE, "1.0", ttl=60) == "sha256:1"
+        assert other.get_image_digest(IMAGE, "1.0", ttl=0) is None
+
+        other.invalidate_image(IMAGE, "1.0")
+        assert other.get_image_digest(IMAGE, "1.0", ttl=60) is None
+        assert OpsContainerCache(path).get_image_digest(IMAGE, "1.0", ttl=60) is None
+
+    def test_expired(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies entries older than the ttl are not reused."""
+        cache = OpsContainerCache(str(tmp_path / "cache.json"))
+        cache.record_login("registry.example.com", "user")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 120)
+        assert not cache.has_login("registry.example.com", "user", ttl=60)
+        assert cache.has_login("registry.example.com", "user", ttl=600)
+
+    def test_shared_instances(self, tmp_path: Path) -> None:
+        """Test verifies one instance is shared per cache file."""
+        path = str(tmp_path / "cache.json")
+        assert OpsContainerCache.get(path) is OpsContainerCache.get(path)
+        assert OpsContainerCache.get(path) is not OpsContainerCache.get(
+            str(tmp_path / "other.json")
+        )
+
+
+@pytest.mark.aoc_ops_container_cache
+class TestPullImage:
+    """Test suite covering the image pulls skipped using the cache."""
+
+    def test_cached_digest(self, ops_container: OpsContainer) -> None:
+        """Test verifies the pull is skipped while the local image is unchanged."""
+        executor: FakeImageExecutor = ops_container.executor  # type: ignore
+        ops_container.cache.record_image_digest(IMAGE, "1.0", "sha256:1")
+
+        assert ops_container.pull_image(IMAGE, "1.0")
+        assert executor.pulls == []
+        assert ops_container.image_digest == "sha256:1"
+
+    @pytest.mark.parametrize("local_digest", ["sha256:2", None])
+    def test_local_image_changed(
+        self, ops_container: OpsContainer, local_digest: Optional[str]
+    ) -> None:
+        """Test verifies a removed/re-tagged local image is pulled again."""
+        executor: FakeImageExecutor = ops_container.executor  # type: ignore
+        executor.digest = local_digest
+        ops_container.cache.record_image_digest(IMAGE, "1.0", "sha256:1")
+
+        assert ops_container.pull_image(IMAGE, "1.0")
+        assert executor.pulls == [f"{IMAGE}:1.0"]
+        assert ops_container.image_digest == "sha256:pulled"
+        assert ops_container.cache.get_image_digest(IMAGE, "1.0", 60) == (
+            "sha256:pulled"
+        )
@@ -0,0 +1,92 @@
+"""Tests validating the session wide operation factory."""
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from lib.aoc.executors.ansible_executor import AnsibleContainerExecutor
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from tests.aoc.conftest import fake_aws_backup
+from tests.aoc.conftest import FakeHostManager
+from tests.aoc.conftest import OpsContainerFactory
+
+
+def ops_container_kwargs(options: OpsContainerOptions) -> Dict[str, Any]:
+    """Returns the ops container constructor arguments."""
+    return dict(
+        cloud="aws",
+        aoc_version="2.4",
+        aoc_ops_image="registry.example.com/aoc/ops",
+        aoc_ops_image_tag="1.0",
+        aoc_image_registry_username="user",
+        aoc_image_registry_password="secret",
+        options=options,
+    )
+
+
+@pytest.mark.aoc_factory
+class TestOpsContainerFactory:
+    """Test suite covering the operation construction reuse and views."""
+
+    def test_views(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies operations are built once per configuration."""
+        logins: List[str] = []
+
+        def registry_login(
+            self: OpsContainer, registry: str, username: str, password: str
+        ) -> bool:
+            logins.append(registry)
+            return True
+
+        monkeypatch.setattr(OpsContainer, "registry_login", registry_login)
+        monkeypatch.setattr(OpsContainer, "pull_image", lambda self, image, tag: True)
+        factory = OpsContainerFactory()
+
+        first_module, second_module = FakeHostManager(), FakeHostManager()
+        first = factory.get(
+            OpsContainer, first_module, **ops_container_kwargs(OpsContainerOptions())
+        )
+        first.command_args = ["a=b"]
+        first.env_vars["PLATFORM"] = "AWS"
+        first.volume_mounts.append("/tmp/credentials:/home/runner/.aws/credentials")
+        second = factory.get(
+            OpsContainer, second_module, **ops_container_kwargs(OpsContainerOptions())
+        )
+        assert logins == ["registry.example.com"]
+
+        # Each view has its own state and runs modules with its own fixture
+        assert second is not first
+        assert (second.command_args, second.env_vars, second.volume_mounts) == (
+            [],
+            {},
+            [],
+        )
+        assert second.ansible_module is second_module
+        assert isinstance(second.executor, AnsibleContainerExecutor)
+        assert second.executor.run_module == second.run_module
+
+        factory.get(
+            OpsContainer,
+            first_module,
+            **ops_container_kwargs(OpsContainerOptions(executor="ansible"))
+        )
+        assert len(logins) == 2
+        assert len(factory.operations) == 2
+
+    @pytest.mark.usefixtures("aoc_skip_login_pull")
+    def test_clones_share_image(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies a deferred image prepared by a clone is shared."""
+
+        def pull_image(self: OpsContainer, image: str, tag: str) -> bool:
+            self.image_digest = "sha256:1"
+            return True
+
+        monkeypatch.setattr(OpsContainer, "pull_image", pull_image)
+        backup = fake_aws_backup(OpsContainerOptions(defer_image_pull=True))
+        first, second = backup.clone(), backup.clone()
+        assert backup.image_digest is None
+
+        assert first.prepare_image()
+        assert backup.image_digest == second.image_digest == "sha256:1"
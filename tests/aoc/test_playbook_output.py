@@ -0,0 +1,124 @@
+"""Tests validating the ops container playbook output parsing."""
+import os
+from typing import List
+
+import pytest
+
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.playbook_output import format_slowest_tasks
+from lib.aoc.playbook_output import PlaybookOutputParser
+from tests.aoc.conftest import fake_aws_backup
+
+RECORDINGS_DIR: str = os.path.join(
+    os.path.dirname(__file__), "benchmarks", "recordings"
+)
+
+FAILED_OUTPUT: List[str] = [
+    "PLAY [Backup AoC on AWS] *******************************************************",
+    "",
+    "TASK [Copy backup objects] *****************************************************",
+    "changed: [localhost] => (item=secrets)",
+    'failed: [localhost] (item=database) => {"changed": false}',
+    "ok: [localhost] => (item=config)",
+    "",
+    "TASK [Check the ssm parameters] ************************************************",
+    'fatal: [localhost]: FAILED! => {"changed": false, "msg": "not found"}',
+    "...ignoring",
+    "",
+    "TASK [Connect to the bastion] **************************************************",
+    'fatal: [bastion]: UNREACHABLE! => {"changed": false, "unreachable": true}',
+    "",
+    "PLAY RECAP *********************************************************************",
+    "bastion                    : ok=0    changed=0    unreachable=1    failed=0    "
+    "skipped=0    rescued=0    ignored=0",
+    "localhost                  : ok=2    changed=1    unreachable=0    failed=1    "
+    "skipped=0    rescued=0    ignored=1",
+]
+
+
+@pytest.mark.aoc_playbook_output
+class TestPlaybookOutput:
+    """Test suite covering the playbook output task records/report."""
+
+    def test_recorded_output(self) -> None:
+        """Test verifies the recorded backup playbook task timings."""
+        parser = PlaybookOutputParser()
+        with open(os.path.join(RECORDINGS_DIR, "aws_backup_stack.log")) as f:
+            for line in f:
+                parser(line.rstrip("\n"))
+        report = parser.report()
+
+        assert len(report["tasks"]) == 15
+        assert report["total_duration"] == pytest.approx(120.162)
+        assert report["recap"]["localhost"]["ok"] == 15
+        assert report["recap"]["localhost"]["skipped"] == 2
+
+        slowest = max(report["tasks"], key=lambda record: record["duration"] or 0.0)
+        assert slowest["task"] == "Wait for rds backup job to complete"
+        assert slowest["role"] == "redhat.ansible_on_clouds.aws_backup"
+        assert slowest["duration"] == pytest.approx(48.341)
+        assert slowest["retries"] == 6
+        assert slowest["start_time"] is not None
+
+        summary = format_slowest_tasks(report, count=2).splitlines()
+        assert summary[0] == "Slowest 2 tasks of 15:"
+        assert "Wait for rds backup job to complete [ok] (6 retries)" in summary[1]
+        assert "Wait for efs backup job to complete" in summary[2]
+
+    def test_task_statuses(self) -> None:
+        """Test verifies looped, ignored and unreachable task statuses."""
+        parser = PlaybookOutputParser()
+        for line in FAILED_OUTPUT:
+            parser(line)
+        report = parser.report()
+
+        assert [
+            (record["task"], record["host"], record["status"])
+            for record in report["tasks"]
+        ] == [
+            ("Copy backup objects", "localhost", "failed"),
+            ("Check the ssm parameters", "localhost", "ignored"),
+            ("Connect to the bastion", "bastion", "unreachable"),
+        ]
+        assert all(record["duration"] is None for record in report["tasks"])
+        assert report["recap"]["localhost"]["ignored"] == 1
+        assert format_slowest_tasks(report).startswith("No task timings found")
+
+    def test_large_output(self) -> None:
+        """Test verifies a multi megabyte output is parsed in a single pass."""
+        parser = PlaybookOutputParser()
+        for i in range(2000):
+            parser(f"TASK [Wait for object {i}] {'*' * 60}")
+            parser(
+                "Wednesday 05 July 2023  14:02:11 +0000 (0:00:01.500)       "
+                f"0:{i // 60:02d}:{i % 60:02d}.000 {'*' * 20}"
+            )
+            for _ in range(25):
+                parser(f"ok: [localhost] => {{\"msg\": \"{'x' * 80}\"}}")
+        report = parser.report()
+
+        assert report["lines"] == 2000 * 27
+        assert len(report["tasks"]) == 2000
+        assert report["tasks"][-1]["task"] == "Wait for object 1999"
+        assert report["tasks"][0]["duration"] == pytest.approx(1.5)
+        assert report["tasks"][-1]["duration"] is None
+
+    @pytest.mark.usefixtures("aoc_skip_login_pull")
+    def test_profile_tasks_enabled(self) -> None:
+        """Test verifies the profile_tasks callback is enabled for reports."""
+        backup = fake_aws_backup()
+        backup.populate_backup_command_generator_args()
+        assert "ANSIBLE_CALLBACKS_ENABLED" not in backup.container_env_vars
+
+        backup.options["playbook_report_dir"] = "playbook-reports"
+        assert backup.container_env_vars == {
+            **backup.env_vars,
+            "ANSIBLE_CALLBACKS_ENABLED": "profile_tasks",
+        }
+
+        backup.env_vars["ANSIBLE_CALLBACKS_ENABLED"] = "timer,profile_tasks"
+        env_vars = backup.container_env_vars
+        assert env_vars["ANSIBLE_CALLBACKS_ENABLED"] == "timer,profile_tasks"
+        backup.env_vars["ANSIBLE_CALLBACKS_ENABLED"] = "timer"
+        env_vars = backup.container_env_vars
+        assert env_vars["ANSIBLE_CALLBACKS_ENABLED"] == "timer,profile_tasks"
@@ -0,0 +1,104 @@
+"""Tests validating the container registry v2 api helpers."""
+import io
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from email.message import Message
+from typing import Any
+from typing import List
+
+import pytest
+
+from lib.aoc import registry
+from lib.aoc.registry import get_remote_manifest_digest
+from lib.aoc.registry import split_image_name
+
+CHALLENGE: str = (
+    'Bearer realm="https://auth.example.com/token",'
+    'service="registry.example.com",'
+    'scope="repository:aoc/ops:pull,push"'
+)
+
+
+class FakeResponse(io.BytesIO):
+    """Fake urlopen response."""
+
+    def __init__(self, body: bytes = b"", digest: str = "") -> None:
+        super().__init__(body)
+        self.headers: Message = Message()
+        if digest:
+            self.headers["Docker-Content-Digest"] = digest
+
+
+@pytest.mark.aoc_registry
+class TestRegistry:
+    """Test suite covering the registry manifest digest lookups."""
+
+    def test_split_image_name(self) -> None:
+        """Test verifies image names are split into registry and repository."""
+        assert split_image_name("registry.example.com/aoc/ops") == (
+            "registry.example.com",
+            "aoc/ops",
+        )
+        assert split_image_name("docker.io/library/python") == (
+            "registry-1.docker.io",
+            "library/python",
+        )
+
+    def test_parse_auth_challenge(self) -> None:
+        """Test verifies quoted parameters may hold commas and escapes."""
+        assert registry._parse_auth_challenge(CHALLENGE) == (
+            "bearer",
+            {
+                "realm": "https://auth.example.com/token",
+                "service": "registry.example.com",
+                "scope": "repository:aoc/ops:pull,push",
+            },
+        )
+        assert registry._parse_auth_challenge(
+            'Basic realm="a \\"quoted\\" realm", charset=UTF-8'
+        ) == ("basic", {"realm": 'a "quoted" realm', "charset": "UTF-8"})
+
+    def test_bearer_token(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies the bearer token is requested with the full scope."""
+        requests: List[urllib.request.Request] = []
+
+        def urlopen(request: urllib.request.Request, timeout: float) -> Any:
+            requests.append(request)
+            if request.full_url.startswith("https://auth.example.com/"):
+                return FakeResponse(json.dumps({"token": "abc"}).encode())
+            if not request.has_header("Authorization"):
+                headers = Message()
+                headers["WWW-Authenticate"] = CHALLENGE
+                raise urllib.error.HTTPError(
+                    request.full_url, 401, "Unauthorized", headers, None
+                )
+            return FakeResponse(digest="sha256:1")
+
+        monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+        assert (
+            get_remote_manifest_digest(
+                "registry.example.com/aoc/ops", "1.0", "user", "secret"
+            )
+            == "sha256:1"
+        )
+
+        token_query = urllib.parse.parse_qs(
+            urllib.parse.urlparse(requests[1].full_url).query
+        )
+        assert token_query == {
+            "service": ["registry.example.com"],
+            "scope": ["repository:aoc/ops:pull,push"],
+        }
+        assert requests[1].get_header("Authorization", "").startswith("Basic ")
+        assert requests[2].get_header("Authorization") == "Bearer abc"
+
+    def test_unreachable(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies no digest is returned when the registry is unreachable."""
+
+        def urlopen(request: urllib.request.Request, timeout: float) -> Any:
+            raise urllib.error.URLError("unreachable")
+
+        monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+        assert get_remote_manifest_digest("registry.example.com/aoc/ops", "1.0") is None
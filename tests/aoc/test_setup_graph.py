@@ -0,0 +1,133 @@
+"""Tests validating the operation setup graph."""
+import threading
+import time
+from typing import List
+
+import pytest
+
+import lib.aoc.setup_graph
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.setup_graph import SetupGraph
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import Tracer
+from tests.aoc.conftest import fake_aws_backup
+
+DELAY: float = 0.2
+
+
+@pytest.mark.aoc_setup_graph
+class TestSetupGraph:
+    """Test suite covering the operation setup graph."""
+
+    def test_run(self) -> None:
+        """Test verifies independent steps overlap, others wait on dependencies."""
+        events: List[str] = []
+        lock = threading.Lock()
+
+        def step(name: str) -> str:
+            with lock:
+                events.append(f"{name}:start")
+            time.sleep(DELAY)
+            with lock:
+                events.append(f"{name}:end")
+            return name
+
+        graph = (
+            SetupGraph()
+            .add("image", lambda: step("image"))
+            .add("vars", lambda: step("vars"))
+            .add("bucket", lambda: step("bucket"), depends_on=["vars"])
+        )
+        result = graph.run()
+
+        assert result["total_duration"] < 2.5 * DELAY
+        assert result["sequential_duration"] >= 3 * DELAY
+        assert set(events[:2]) == {"image:start", "vars:start"}
+        assert events.index("bucket:start") > events.index("vars:end")
+        assert result["step_results"]["bucket"]["value"] == "bucket"
+        assert result["step_results"]["bucket"]["depends_on"] == ["vars"]
+        assert result["step_results"]["bucket"]["start"] >= DELAY
+
+    def test_fail_fast(self) -> None:
+        """Test verifies no step starts after the first failed one."""
+        started: List[str] = []
+
+        def fail() -> None:
+            started.append("vars")
+            raise AssertionError("one or more stack backup vars are undefined")
+
+        def pull() -> None:
+            started.append("image")
+            time.sleep(DELAY)
+
+        graph = (
+            SetupGraph()
+            .add("image", pull)
+            .add("vars", fail)
+            .add("bucket", lambda: started.append("bucket"), depends_on=["vars"])
+            .add("backup", lambda: started.append("backup"), depends_on=["image"])
+        )
+        start = time.perf_counter()
+        with pytest.raises(AssertionError, match="vars are undefined"):
+            graph.run()
+
+        # The running pull is waited for, its dependent step is not started
+        assert time.perf_counter() - start >= DELAY
+        assert sorted(started) == ["image", "vars"]
+
+    def test_invalid_steps(self) -> None:
+        """Test verifies duplicate steps and unknown dependencies are rejected."""
+        graph = SetupGraph().add("image", lambda: None)
+        with pytest.raises(ValueError, match="Duplicate"):
+            graph.add("image", lambda: None)
+        with pytest.raises(ValueError, match="unknown steps"):
+            graph.add("bucket", lambda: None, depends_on=["vars"])
+
+    def test_spans(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies steps are traced as children of the current span."""
+        tracer = Tracer()
+        monkeypatch.setattr(lib.aoc.setup_graph, "TRACER", tracer)
+        spans: List[Span] = []
+        tracer.add_listener(spans.append)
+        tracer.configure()
+
+        with tracer.span("test"):
+            SetupGraph().add("image", lambda: None).add(
+                "bucket", lambda: None, depends_on=["image"]
+            ).run()
+
+        test_span = spans[-1]
+        assert [
+            (s.attributes["aoc.setup_step"], s.parent is test_span)
+            for s in spans
+            if s.name == "setup_graph.step"
+        ] == [("image", True), ("bucket", True)]
+
+
+@pytest.mark.aoc_setup_graph
+def test_defer_image_pull(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test verifies deferred image pulls run once, at the latest before a run."""
+    pulls: List[str] = []
+    monkeypatch.setattr(
+        OpsContainer, "registry_login", lambda self, registry, user, password: True
+    )
+
+    def pull_image(self: OpsContainer, image: str, tag: str) -> bool:
+        pulls.append(tag)
+        return True
+
+    monkeypatch.setattr(OpsContainer, "pull_image", pull_image)
+    monkeypatch.setattr(OpsContainer, "buffer_container", lambda self, name: ("", True))
+
+    aoc_aws_backup = fake_aws_backup(OpsContainerOptions(defer_image_pull=True))
+    assert not pulls
+
+    clone = aoc_aws_backup.clone()
+    assert clone.run_container("backup") == ("", True)
+    assert pulls == ["1.0"]
+
+    # The image is shared by the operation and its clones
+    assert aoc_aws_backup.prepare_image()
+    assert aoc_aws_backup.clone().run_container("backup") == ("", True)
+    assert pulls == ["1.0"]
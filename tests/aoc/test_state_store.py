@@ -0,0 +1,57 @@
+"""Tests validating the state store shared by the xdist workers."""
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from lib.aoc.ops_container import OpsContainer
+from lib.aoc.ops_container import OpsContainerOptions
+from lib.aoc.state_store import SharedStateStore
+
+
+def increment(path: str, times: int) -> None:
+    """Increments the shared counter (run in a separate process)."""
+    state = SharedStateStore(path)
+    for _ in range(times):
+        with state.update() as data:
+            data["count"] = data.get("count", 0) + 1
+
+
+@pytest.mark.aoc_xdist
+class TestSharedStateStore:
+    """Test suite covering the shared state and worker scoped names."""
+
+    def test_get_set(self, tmp_path: Path) -> None:
+        """Test verifies values are shared by store instances."""
+        path = str(tmp_path / "state.json")
+        SharedStateStore(path).set("stack-1/stack_backup_object_name", "backup-1")
+
+        state = SharedStateStore(path)
+        assert state.get("stack-1/stack_backup_object_name") == "backup-1"
+        assert state.get("stack-2/stack_backup_object_name", "") == ""
+
+    def test_concurrent_updates(self, tmp_path: Path) -> None:
+        """Test verifies updates from concurrent processes are not lost."""
+        path = str(tmp_path / "state.json")
+        processes = [
+            multiprocessing.Process(target=increment, args=(path, 50)) for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert SharedStateStore(path).get("count") == 200
+
+    def test_container_name(self) -> None:
+        """Test verifies container names are suffixed with the worker id."""
+        ops_container = OpsContainer.__new__(OpsContainer)
+        ops_container.options = OpsContainerOptions()
+        assert ops_container.container_name("stack-backup-stack") == (
+            "stack-backup-stack"
+        )
+
+        ops_container.options = OpsContainerOptions(container_name_suffix="gw1")
+        assert ops_container.container_name("stack-backup-stack") == (
+            "stack-backup-stack-gw1"
+        )
@@ -0,0 +1,83 @@
+"""Tests validating the ops container/operation phase tracing."""
+import json
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+import lib.aoc.tracing
+from lib.aoc.tracing import Span
+from lib.aoc.tracing import traced
+from lib.aoc.tracing import Tracer
+
+
+class TracedOperation:
+    """Operation with traced methods."""
+
+    def trace_attributes(self) -> Dict[str, str]:
+        return {"aoc.deployment_name": "stack"}
+
+    @traced("operation.pull_image", tag="aoc.image_tag")
+    def pull_image(self, image: str, tag: str = "latest") -> bool:
+        return self.login()
+
+    @traced("operation.login")
+    def login(self) -> bool:
+        return False
+
+
+@pytest.mark.aoc_tracing
+class TestTracing:
+    """Test suite covering the tracing spans recording/export."""
+
+    def test_nested_spans_export(self, tmp_path: Any) -> None:
+        """Test verifies nested spans are exported as OTLP json lines."""
+        tracer = Tracer()
+        tracer.configure(str(tmp_path / "trace.jsonl"))
+
+        with tracer.span("parent", bucket="aoc-backups"):
+            with tracer.span("child", retries=2):
+                pass
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        tracer.close()
+
+        with open(tmp_path / "trace.jsonl") as f:
+            spans = [
+                json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+                for line in f
+            ]
+        child, parent, failing = spans
+        assert [child["name"], parent["name"]] == ["child", "parent"]
+        assert child["parentSpanId"] == parent["spanId"]
+        assert child["traceId"] == parent["traceId"]
+        assert "parentSpanId" not in parent
+        assert parent["attributes"] == [
+            {"key": "bucket", "value": {"stringValue": "aoc-backups"}}
+        ]
+        assert child["attributes"] == [{"key": "retries", "value": {"intValue": "2"}}]
+        assert failing["status"] == {"code": 2, "message": "ValueError: boom"}
+
+    def test_traced_methods(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test verifies traced methods record attributes, nesting and failures."""
+        tracer = Tracer()
+        monkeypatch.setattr(lib.aoc.tracing, "TRACER", tracer)
+        spans: List[Span] = []
+        tracer.add_listener(spans.append)
+
+        # Nothing is recorded while tracing is disabled
+        assert not TracedOperation().pull_image("ops")
+        assert not spans
+
+        tracer.configure()
+        assert not TracedOperation().pull_image("ops")
+        login, pull_image = spans
+        assert login.parent is pull_image
+        assert pull_image.attributes == {
+            "aoc.deployment_name": "stack",
+            "aoc.image_tag": "latest",
+        }
+        assert login.error == "login failed"
+        assert pull_image.duration >= login.duration
@@ -0,0 +1,104 @@
+"""Tests validating the xdist distribution of the grouped stack tests."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Set
+
+import pytest
+
+REPO_DIR: str = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Each test records the worker running it, by test kind
+GROUPED_TESTS: str = """
+import os
+
+import pytest
+
+
+def record(kind: str) -> None:
+    with open(os.environ["AOC_GROUPS_FILE"], "a") as f:
+        f.write(f"{kind} {os.environ['PYTEST_XDIST_WORKER']}\\n")
+
+
+@pytest.mark.aoc_aws_backup_restore_stack
+@pytest.mark.parametrize("i", range(4))
+def test_backup_restore(i: int) -> None:
+    record("backup_restore")
+
+
+@pytest.mark.aoc_aws_delete_backups
+@pytest.mark.parametrize("i", range(4))
+def test_delete(i: int) -> None:
+    record("delete")
+
+
+@pytest.mark.aoc_aws_prune_backups
+@pytest.mark.parametrize("i", range(4))
+def test_prune(i: int) -> None:
+    record("prune")
+
+
+@pytest.mark.parametrize("i", range(12))
+def test_independent(i: int) -> None:
+    record("independent")
+"""
+
+
+def run_pytest(tmp_path: Path, *args: str) -> "subprocess.CompletedProcess[str]":
+    """Runs the grouped tests with the aoc conftest hooks in a pytest process."""
+    test_file = tmp_path / "test_grouped.py"
+    test_file.write_text(GROUPED_TESTS)
+    return subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "-q",
+            "-c",
+            os.path.join(REPO_DIR, "pytest.ini"),
+            "-p",
+            "tests.aoc.conftest",
+            "-p",
+            "no:cacheprovider",
+            "--ansible-host-pattern=localhost",
+            "--aoc-stack-deployment-name=stack-1",
+            *args,
+            str(test_file),
+        ],
+        cwd=REPO_DIR,
+        env={**os.environ, "AOC_GROUPS_FILE": str(tmp_path / "groups.txt")},
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+@pytest.mark.aoc_xdist
+class TestXdistGroups:
+    """Test suite covering the stack tests grouping on the xdist workers."""
+
+    def test_groups(self, tmp_path: Path) -> None:
+        """Test verifies each stack's dependent tests run on one worker."""
+        result = run_pytest(tmp_path, "-n", "3")
+        assert result.returncode == 0, result.stdout + result.stderr
+
+        workers: Dict[str, Set[str]] = {}
+        for line in (tmp_path / "groups.txt").read_text().splitlines():
+            kind, worker = line.split()
+            workers.setdefault(kind, set()).add(worker)
+
+        assert len(workers["backup_restore"]) == 1
+        assert len(workers["delete"]) == 1
+        assert workers["delete"] == workers["prune"]
+        assert len(workers["independent"]) > 1
+
+    def test_unsupported_dist(self, tmp_path: Path) -> None:
+        """Test verifies distribution modes ignoring the groups are rejected."""
+        args: List[str] = ["-n", "2", "--dist", "each"]
+        result = run_pytest(tmp_path, *args)
+
+        assert result.returncode == pytest.ExitCode.USAGE_ERROR
+        assert "--dist each does not keep the grouped stack tests" in result.stderr
@@ -4,12 +4,23 @@
 This will be removed once the issue is fixed!
 https://github.com/ansible-community/pytest-ansible/issues/135
 """
+import json
+
 import pytest
 from pytest_ansible.host_manager import get_host_manager
 
+# Host managers keyed by their effective configuration, building one parses
+# the inventory and loads the ansible plugins so they are shared by the session
+HOST_MANAGERS = {}
+
+
+def clear_host_manager_cache():
+    """Discard the cached host managers (e.g. after the inventory changed)."""
+    HOST_MANAGERS.clear()
+
 
 def initialize_workaround(self, config=None, request=None, **kwargs):
-    """Return an initialized Ansible Host Manager instance."""
+    """Return an initialized (cached) Ansible Host Manager instance."""
     ansible_cfg = {}
     # merge command-line configuration options
     if config is not None:
@@ -21,7 +32,11 @@ def initialize_workaround(self, config=None, request=None, **kwargs):
         ansible_cfg.update(self._load_request_config(request))
     # merge in provided kwargs
     ansible_cfg.update(kwargs)
-    return get_host_manager(**ansible_cfg)
+
+    key = json.dumps(ansible_cfg, sort_keys=True, default=repr)
+    if key not in HOST_MANAGERS:
+        HOST_MANAGERS[key] = get_host_manager(**ansible_cfg)
+    return HOST_MANAGERS[key]
 
 
 @pytest.fixture